@@ -0,0 +1,85 @@
+"""
+Application served by Hypercorn during the benchmarks of the cli commands.
+
+Routes:
+- /bytes/{size}: a body of size bytes sent at once
+- /stream/{size}?chunk_size=65536: a body of size bytes streamed in chunks
+- /slow/{delay}: a small body sent after delay seconds
+- /sse/{count}?rate=0: count json events, rate events per second or as fast as possible if rate is 0
+- /echo: the body of the request sent back
+- /ws: a websocket sending back each message received
+"""
+import json
+
+import anyio
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocket
+
+CHUNK = b'x' * 65536
+
+
+async def send_bytes(request: Request) -> Response:
+    return Response(b'x' * request.path_params['size'], media_type='application/octet-stream')
+
+
+async def generate_chunks(size: int, chunk_size: int):
+    while size > 0:
+        length = min(size, chunk_size)
+        yield CHUNK[:length] if length <= len(CHUNK) else b'x' * length
+        size -= length
+
+
+async def stream_bytes(request: Request) -> Response:
+    chunk_size = int(request.query_params.get('chunk_size', len(CHUNK)))
+    return StreamingResponse(
+        generate_chunks(request.path_params['size'], chunk_size), media_type='application/octet-stream'
+    )
+
+
+async def slow(request: Request) -> Response:
+    await anyio.sleep(request.path_params['delay'])
+    return Response('done', media_type='text/plain')
+
+
+async def generate_events(count: int, rate: float):
+    for i in range(count):
+        yield f'event: number\ndata: {json.dumps({"number": i, "message": "hello world"})}\n\n'
+        if rate:
+            await anyio.sleep(1 / rate)
+
+
+async def sse(request: Request) -> Response:
+    rate = float(request.query_params.get('rate', 0))
+    headers = {'cache-control': 'no-cache'}
+    return StreamingResponse(
+        generate_events(request.path_params['count'], rate), headers=headers, media_type='text/event-stream'
+    )
+
+
+async def echo(request: Request) -> Response:
+    return Response(await request.body(), media_type=request.headers.get('content-type'))
+
+
+async def websocket_echo(websocket: WebSocket) -> None:
+    await websocket.accept()
+    while True:
+        message = await websocket.receive()
+        if message['type'] == 'websocket.disconnect':
+            break
+        if message.get('text') is not None:
+            await websocket.send_text(message['text'])
+        else:
+            await websocket.send_bytes(message['bytes'])
+
+
+app = Starlette(routes=[
+    Route('/bytes/{size:int}', send_bytes),
+    Route('/stream/{size:int}', stream_bytes),
+    Route('/slow/{delay:float}', slow),
+    Route('/sse/{count:int}', sse),
+    Route('/echo', echo, methods=['POST']),
+    WebSocketRoute('/ws', websocket_echo),
+])
@@ -0,0 +1,243 @@
+"""
+Benchmarks the cli commands against a local Hypercorn server serving benchmarks/app.py.
+
+Each scenario runs the cli in a new process, like a user would, several times and records its wall time and its peak
+resident memory. The following metrics are derived from them:
+- startup: time needed to print the help, mostly imports
+- request latency: time of a get or post command minus the startup time
+- download throughput: size of the downloaded file divided by the time of the download command minus the startup time
+- sse events per second: number of events divided by the time of the sse command minus the startup time
+- websocket messages per second: same as sse events with the echo mode of the ws command
+Differences are computed on the fastest runs, which are the least disturbed by the rest of the system.
+
+Results are saved as json so that runs can be compared over time.
+
+The cli processes are measured with os.wait4, so the benchmarks only run on unix systems.
+
+Usage:
+    python benchmarks/commands.py [--repeat 5] [--output results.json] [--compare previous.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from httpcli.version import __version__
+
+ROOT_DIRECTORY = Path(__file__).resolve().parent.parent
+RESULTS_DIRECTORY = Path(__file__).resolve().parent / 'results'
+# the cli is run with the current interpreter, so that the benchmarks do not depend on the installed scripts
+CLI = [sys.executable, '-c', 'from httpcli.http import http; http()']
+
+
+class Measure(NamedTuple):
+    wall_time: float
+    peak_rss: int
+
+
+class Scenario(NamedTuple):
+    name: str
+    arguments: List[str]
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(port: int, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.1):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f'the benchmark server did not start on port {port}')
+
+
+def start_server(port: int) -> subprocess.Popen:
+    # trio is already installed with the test dependencies
+    command = [
+        sys.executable, '-m', 'hypercorn', '--worker-class', 'trio', '--bind', f'127.0.0.1:{port}',
+        'benchmarks.app:app'
+    ]
+    process = subprocess.Popen(command, cwd=ROOT_DIRECTORY, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_server(port)
+    except RuntimeError:
+        process.kill()
+        raise
+    return process
+
+
+def get_peak_rss(max_rss: int) -> int:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def run_cli(arguments: List[str]) -> Measure:
+    """Runs the cli in a new process and returns its wall time and peak memory, the output is discarded."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [*CLI, *arguments], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    # wait4 gives the resource usage of this process only, unlike getrusage(RUSAGE_CHILDREN)
+    _, status, usage = os.wait4(process.pid, 0)
+    wall_time = time.perf_counter() - start
+    # the process was reaped by wait4, Popen must not try to wait for it again
+    process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+    if process.returncode != 0:
+        raise RuntimeError(f'{" ".join(arguments)} failed with exit code {process.returncode}')
+    return Measure(wall_time, get_peak_rss(usage.ru_maxrss))
+
+
+def summarize(measures: List[Measure]) -> Dict[str, Any]:
+    times = [measure.wall_time for measure in measures]
+    return {
+        'runs': len(times),
+        'wall_time': {'min': min(times), 'median': statistics.median(times), 'max': max(times)},
+        'peak_rss': max(measure.peak_rss for measure in measures)
+    }
+
+
+def get_scenarios(base_url: str, args: argparse.Namespace, directory: str) -> List[Scenario]:
+    slow_urls = [f'{base_url}/slow/{args.slow_delay}?n={i}' for i in range(args.concurrency)]
+    return [
+        Scenario('startup', ['--help']),
+        Scenario('get', ['get', f'{base_url}/bytes/{args.payload_size}']),
+        Scenario('get-concurrent', ['get', *slow_urls, '--concurrency', str(args.concurrency)]),
+        Scenario('post', ['post', f'{base_url}/echo', '-j', 'message:hello world']),
+        Scenario('download', ['download', f'{base_url}/stream/{args.download_size}', '-d', directory]),
+        Scenario('sse', ['sse', f'{base_url}/sse/{args.sse_events}']),
+        Scenario('ws', ['ws', f'{base_url.replace("http", "ws", 1)}/ws', '--echo', str(args.ws_messages)]),
+    ]
+
+
+def add_derived_metrics(results: Dict[str, Dict[str, Any]], args: argparse.Namespace) -> None:
+    startup = results['startup']['wall_time']['min']
+
+    def command_time(name: str) -> Optional[float]:
+        # with too little work, the difference is lost in the noise of the startup and is not meaningful
+        duration = results[name]['wall_time']['min'] - startup
+        return duration if duration > 0 else None
+
+    def rate(quantity: int, duration: Optional[float]) -> Optional[float]:
+        return None if duration is None else quantity / duration
+
+    results['get']['latency'] = command_time('get')
+    results['get-concurrent']['latency'] = command_time('get-concurrent')
+    results['post']['latency'] = command_time('post')
+    results['download']['throughput'] = rate(args.download_size, command_time('download'))
+    results['sse']['events_per_second'] = rate(args.sse_events, command_time('sse'))
+    results['ws']['messages_per_second'] = rate(args.ws_messages, command_time('ws'))
+
+
+def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    port = get_free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    server = start_server(port)
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for scenario in get_scenarios(base_url, args, directory):
+                # the first run warms up the file system cache and the server, it is not recorded
+                run_cli(scenario.arguments)
+                measures = [run_cli(scenario.arguments) for _ in range(args.repeat)]
+                results[scenario.name] = summarize(measures)
+                print(f'{scenario.name:>15}: {results[scenario.name]["wall_time"]["median"] * 1000:8.1f} ms, '
+                      f'peak rss {results[scenario.name]["peak_rss"] / 1024 / 1024:6.1f} MiB')
+    finally:
+        server.terminate()
+        server.wait()
+
+    add_derived_metrics(results, args)
+    return {
+        'metadata': {
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'httpcli_version': __version__,
+            'python_version': platform.python_version(),
+            'platform': platform.platform(),
+            'parameters': {
+                'repeat': args.repeat,
+                'payload_size': args.payload_size,
+                'download_size': args.download_size,
+                'sse_events': args.sse_events,
+                'ws_messages': args.ws_messages,
+                'concurrency': args.concurrency,
+                'slow_delay': args.slow_delay,
+            }
+        },
+        'results': results
+    }
+
+
+def get_metrics(report: Dict[str, Any]) -> Dict[str, float]:
+    """Flattens the metrics of a report, for example {'get.latency': 0.012, 'get.wall_time': 0.3, ...}."""
+    metrics = {}
+    for name, result in report['results'].items():
+        metrics[f'{name}.wall_time'] = result['wall_time']['median']
+        metrics[f'{name}.peak_rss'] = result['peak_rss']
+        for key in ['latency', 'throughput', 'events_per_second', 'messages_per_second']:
+            if result.get(key) is not None:
+                metrics[f'{name}.{key}'] = result[key]
+    return metrics
+
+
+def print_comparison(previous: Dict[str, Any], current: Dict[str, Any]) -> None:
+    # for these metrics a higher value is better, for the others it is worse
+    higher_is_better = ('throughput', 'events_per_second', 'messages_per_second')
+    previous_metrics = get_metrics(previous)
+    print(f'\ncomparison with the run of {previous["metadata"]["date"]}')
+    if previous['metadata']['parameters'] != current['metadata']['parameters']:
+        print('warning: the runs do not have the same parameters, their metrics may not be comparable')
+    for name, value in get_metrics(current).items():
+        if not previous_metrics.get(name):
+            continue
+        change = (value - previous_metrics[name]) / previous_metrics[name] * 100
+        better = change > 0 if name.endswith(higher_is_better) else change < 0
+        print(f'{name:>35}: {previous_metrics[name]:12.6g} -> {value:12.6g} ({change:+6.1f}%'
+              f'{", better" if better else ", worse" if change else ""})')
+
+
+def parse_arguments(arguments: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Benchmarks the cli commands against a local Hypercorn server.')
+    parser.add_argument('--repeat', type=int, default=5, help='number of recorded runs per scenario')
+    parser.add_argument('--payload-size', type=int, default=1024, help='size of the get response in bytes')
+    parser.add_argument('--download-size', type=int, default=50 * 1024 * 1024, help='size of the download in bytes')
+    parser.add_argument('--sse-events', type=int, default=2000, help='number of sse events sent by the server')
+    parser.add_argument('--ws-messages', type=int, default=2000, help='number of websocket messages echoed')
+    parser.add_argument('--concurrency', type=int, default=10, help='number of slow urls fetched concurrently')
+    parser.add_argument('--slow-delay', type=float, default=0.2, help='response delay of the slow urls in seconds')
+    parser.add_argument('--output', type=Path, help='json file where results are saved, by default in '
+                                                    'benchmarks/results')
+    parser.add_argument('--compare', type=Path, help='json file of a previous run to compare with')
+    return parser.parse_args(arguments)
+
+
+def main() -> None:
+    args = parse_arguments()
+    report = run_benchmarks(args)
+    output = args.output
+    if output is None:
+        RESULTS_DIRECTORY.mkdir(exist_ok=True)
+        output = RESULTS_DIRECTORY / f'{datetime.datetime.now():%Y%m%d-%H%M%S}.json'
+    output.write_text(json.dumps(report, indent=4))
+    print(f'\nresults saved in {output}')
+
+    if args.compare is not None:
+        print_comparison(json.loads(args.compare.read_text()), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Compares the json codecs available in httpcli.json_codec on the operations done by the cli:
+pretty printing a large response body and decoding a high rate of small sse events.
+
+Usage: python benchmarks/json_codec.py
+"""
+import json
+import timeit
+
+from httpcli.json_codec import CODECS
+
+LARGE_PAYLOAD = json.dumps([
+    {'id': i, 'name': f'item {i}', 'price': i * 1.5, 'tags': ['foo', 'bar'], 'available': i % 2 == 0}
+    for i in range(50_000)
+]).encode()
+SSE_EVENTS = [json.dumps({'number': i, 'message': 'hello world'}) for i in range(10_000)]
+
+
+def pretty_print_large_payload(codec) -> None:
+    codec.dumps(codec.loads(LARGE_PAYLOAD), indent=True)
+
+
+def decode_sse_events(codec) -> None:
+    for event in SSE_EVENTS:
+        codec.loads(event)
+
+
+def main() -> None:
+    print(f'large payload: {len(LARGE_PAYLOAD) / 1024 / 1024:.2f} MiB, sse events: {len(SSE_EVENTS)}')
+    for name, codec_class in CODECS.items():
+        codec = codec_class()
+        large = min(timeit.repeat(lambda: pretty_print_large_payload(codec), number=1, repeat=5))
+        events = min(timeit.repeat(lambda: decode_sse_events(codec), number=1, repeat=5))
+        print(
+            f'{name:>8}: large payload {large * 1000:8.2f} ms, '
+            f'sse {len(SSE_EVENTS) / events:12.0f} events/s'
+        )
+
+
+if __name__ == '__main__':
+    main()
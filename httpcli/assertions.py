@@ -0,0 +1,203 @@
+"""
+Checks of responses given with the --expect-* and --max-latency options, for smoke tests in deploy pipelines.
+
+Each response is checked as soon as it is received, the failures are printed on stderr next to the response and a
+report can be written at the end in the JUnit xml format understood by most CI servers, or in json.
+"""
+import xml.etree.ElementTree as ElementTree
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import asyncclick as click
+import httpx
+
+from httpcli import json_codec
+from httpcli.console import error_console
+from httpcli.jsonpath import JsonCondition
+from httpcli.schema import validate
+
+REPORT_FORMATS = ['junit', 'json']
+
+
+def status_matches(pattern: str, status_code: int) -> bool:
+    # a pattern is a status code like 204 or a class of status codes like 2xx
+    if pattern.endswith('xx'):
+        return str(status_code)[0] == pattern[0]
+    return str(status_code) == pattern
+
+
+class Expectations(NamedTuple):
+    status_codes: Tuple[str, ...] = ()
+    # header names with their expected value, None when the header only needs to be present
+    headers: Tuple[Tuple[str, Optional[str]], ...] = ()
+    conditions: Tuple[JsonCondition, ...] = ()
+    schema: Optional[Dict[str, Any]] = None
+    # in seconds
+    max_latency: Optional[float] = None
+
+    @property
+    def needs_body(self) -> bool:
+        return bool(self.conditions) or self.schema is not None
+
+
+def get_body_failures(expectations: Expectations, content: bytes) -> List[str]:
+    try:
+        data = json_codec.loads(content)
+    except json_codec.JSONDecodeError:
+        return ['body is not a json document']
+    failures = [f'json condition {condition} is not met' for condition in expectations.conditions
+                if not condition.matches(data)]
+    if expectations.schema is not None:
+        failures.extend(f'body does not match the schema, {error}' for error in validate(data, expectations.schema))
+    return failures
+
+
+def get_failures(
+        expectations: Expectations, response: httpx.Response, latency: float, path: Optional[Path] = None
+) -> List[str]:
+    """Returns the checks failed by a response, a body saved in a file is read from it."""
+    failures = []
+    status_codes = expectations.status_codes
+    if status_codes and not any(status_matches(pattern, response.status_code) for pattern in status_codes):
+        failures.append(f'status code {response.status_code} is not {" or ".join(status_codes)}')
+
+    for name, value in expectations.headers:
+        if name not in response.headers:
+            failures.append(f'header {name} is missing')
+        elif value is not None and response.headers[name] != value:
+            failures.append(f'header {name} is {response.headers[name]!r} instead of {value!r}')
+
+    if expectations.needs_body:
+        failures.extend(get_body_failures(expectations, path.read_bytes() if path is not None else response.content))
+
+    if expectations.max_latency is not None and latency > expectations.max_latency:
+        failures.append(
+            f'latency of {latency * 1000:.2f} ms is above the maximum of {expectations.max_latency * 1000:.2f} ms'
+        )
+    return failures
+
+
+class CheckResult(NamedTuple):
+    index: int
+    method: str
+    url: str
+    latency: float
+    failures: List[str]
+    # set when no response was received
+    error: str = ''
+
+    @property
+    def passed(self) -> bool:
+        return not self.failures and not self.error
+
+
+def get_junit_report(results: List[CheckResult]) -> ElementTree.ElementTree:
+    failures = sum(bool(result.failures) for result in results)
+    errors = sum(bool(result.error) for result in results)
+    attributes = {
+        'name': 'httpcli', 'tests': str(len(results)), 'failures': str(failures), 'errors': str(errors),
+        'time': f'{sum(result.latency for result in results):.3f}'
+    }
+    root = ElementTree.Element('testsuites', attributes)
+    suite = ElementTree.SubElement(root, 'testsuite', attributes)
+    for result in results:
+        case = ElementTree.SubElement(
+            suite, 'testcase', {'classname': result.method, 'name': result.url, 'time': f'{result.latency:.3f}'}
+        )
+        if result.error:
+            element = ElementTree.SubElement(case, 'error', {'message': result.error})
+            element.text = result.error
+        elif result.failures:
+            element = ElementTree.SubElement(case, 'failure', {'message': result.failures[0]})
+            element.text = '\n'.join(result.failures)
+    return ElementTree.ElementTree(root)
+
+
+def get_json_report(results: List[CheckResult]) -> Dict[str, Any]:
+    return {
+        'tests': len(results),
+        'passed': sum(result.passed for result in results),
+        'failures': sum(bool(result.failures) for result in results),
+        'errors': sum(bool(result.error) for result in results),
+        'results': [
+            {
+                'method': result.method,
+                'url': result.url,
+                'passed': result.passed,
+                'latency': round(result.latency * 1000, 3),
+                'failures': result.failures,
+                'error': result.error or None
+            }
+            for result in results
+        ]
+    }
+
+
+def write_report(results: List[CheckResult], path: Path, report_format: str) -> None:
+    try:
+        if report_format == 'junit':
+            get_junit_report(results).write(path, encoding='utf-8', xml_declaration=True)
+        else:
+            path.write_text(json_codec.dumps(get_json_report(results)) + '\n')
+    except OSError as e:
+        error_console.print(f'[warning]unable to write report {path}: {e}')
+
+
+class ResponseChecker:
+    """Checks the responses of a command and keeps the results for the report."""
+
+    def __init__(self, expectations: Expectations, report: Optional[Path] = None, report_format: str = 'junit'):
+        self.expectations = expectations
+        self.report = report
+        self.report_format = report_format
+        self.results: List[CheckResult] = []
+
+    def check_response(
+            self,
+            index: int,
+            method: str,
+            url: str,
+            response: httpx.Response,
+            latency: float,
+            path: Optional[Path] = None
+    ) -> None:
+        failures = get_failures(self.expectations, response, latency, path)
+        for failure in failures:
+            error_console.print(f'[error]check failed for {method} {url}: {failure}')
+        self.results.append(CheckResult(index, method, url, latency, failures))
+
+    def add_error(self, index: int, method: str, url: str, latency: float, error: str) -> None:
+        self.results.append(CheckResult(index, method, url, latency, [], error))
+
+    def write_report(self) -> None:
+        if self.report is not None:
+            write_report(sorted(self.results, key=lambda item: item.index), self.report, self.report_format)
+
+    def finish(self) -> None:
+        """
+        Writes the report and exits with a status of 1 if a check failed or a request could not be made. The summary
+        is printed on stderr, like the failures, so the output can still be piped.
+        """
+        self.write_report()
+        failed = sum(not result.passed for result in self.results)
+        if not failed:
+            error_console.print(f'[info]{len(self.results)} response(s) checked, all the checks passed')
+            return
+        error_console.print(f'[error]{failed} of {len(self.results)} response(s) failed the checks')
+        raise click.exceptions.Exit(1)
+
+
+def get_response_checker(
+        status_codes: Tuple[str, ...],
+        headers: Tuple[Tuple[str, Optional[str]], ...],
+        conditions: Tuple[JsonCondition, ...],
+        schema: Optional[Dict[str, Any]],
+        max_latency: Optional[float],
+        report: Optional[str],
+        report_format: str
+) -> Optional[ResponseChecker]:
+    """Returns a checker if a check or a report is asked, None otherwise."""
+    expectations = Expectations(status_codes, headers, conditions, schema, max_latency)
+    if expectations == Expectations() and report is None:
+        return None
+    return ResponseChecker(expectations, Path(report) if report is not None else None, report_format)
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from httpcli.version import __version__
+
+DEFAULT_PORTS = {'http': 80, 'https': 443, 'ws': 80, 'wss': 443}
+# modules whose changes can make a cached configuration invalid
+CONFIGURATION_MODULES = [Path(__file__).with_name(name) for name in ('configuration.py', 'models.py')]
+
+
+def get_cache_directory() -> Path:
+    directory = os.environ.get('HTTP_CLI_CACHE_DIR')
+    if directory:
+        return Path(directory)
+    return Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'httpcli'
+
+
+def write_atomically(path: Path, data: bytes, mode: Optional[int] = None) -> None:
+    """Writes data in a temporary file before renaming it, so readers never see a partially written file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # the temporary file is only readable by the current user, unless another mode is given
+    fd, temporary_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        if mode is not None:
+            os.chmod(temporary_path, mode)
+        os.replace(temporary_path, path)
+    except OSError:
+        Path(temporary_path).unlink()
+        raise
+
+
+def write_json_atomically(path: Path, data: Any) -> None:
+    write_atomically(path, json.dumps(data).encode())
+
+
+def get_origin(url: str) -> str:
+    httpx_url = httpx.URL(url)
+    port = httpx_url.port or DEFAULT_PORTS.get(httpx_url.scheme)
+    return f'{httpx_url.scheme}://{httpx_url.host}:{port}'
+
+
+class ProtocolCache:
+    """
+    Remembers the http version negotiated with each origin between two invocations of the cli.
+    Entries expire after ttl seconds so that servers adding http2 support are detected.
+    """
+
+    def __init__(self, path: Optional[Path] = None, ttl: float = 24 * 3600):
+        self.path = path or get_cache_directory() / 'protocols.json'
+        self.ttl = ttl
+        self._protocols: Dict[str, Dict[str, Any]] = self._load()
+        self._changed = False
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def get(self, url: str) -> Optional[str]:
+        entry = self._protocols.get(get_origin(url))
+        if not isinstance(entry, dict) or time.time() - entry.get('checked_at', 0) > self.ttl:
+            return None
+        return entry.get('http_version')
+
+    def set(self, url: str, http_version: str) -> None:
+        self._protocols[get_origin(url)] = {'http_version': http_version, 'checked_at': time.time()}
+        self._changed = True
+
+    def save(self) -> None:
+        if not self._changed:
+            return
+        try:
+            write_json_atomically(self.path, self._protocols)
+        except OSError:
+            # the cache is just an optimization, we don't want to fail a command because of it
+            pass
+        self._changed = False
+
+
+class ConfigurationCache:
+    """
+    Keeps configurations validated from yaml files between two invocations of the cli, so that the yaml parsing is
+    skipped when the file has not changed. Entries are the json of the configuration, it is validated again when read.
+    An entry depends on the file path, modification time and size, the selected profile, the HTTP_CLI_ environment
+    variables since they are also read by the configuration, and the modules defining the configuration.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = directory or get_cache_directory() / 'configurations'
+
+    @staticmethod
+    def get_key(filename: str, profile: Optional[str] = None) -> Optional[str]:
+        try:
+            path = Path(filename).resolve()
+            file_stat = path.stat()
+        except OSError:
+            return None
+        # stdin or a named pipe cannot be identified by a modification time
+        if not stat.S_ISREG(file_stat.st_mode):
+            return None
+
+        environment = sorted(
+            (key.upper(), value) for key, value in os.environ.items() if key.upper().startswith('HTTP_CLI_')
+        )
+        # the version is not bumped for every change, an upgrade or an edit of the code rewrites these modules
+        modules = [str(module.stat().st_mtime_ns) for module in CONFIGURATION_MODULES]
+        parts = [
+            __version__, *modules, str(path), str(file_stat.st_mtime_ns), str(file_stat.st_size), profile or '',
+            repr(environment)
+        ]
+        return hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            return (self.directory / key).read_text()
+        except (OSError, ValueError):
+            # a missing or unreadable entry just means that the file must be parsed again
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        try:
+            write_atomically(self.directory / key, value.encode())
+        except OSError:
+            # the cache is just an optimization, we don't want to fail a command because of it
+            pass
+
+
+class DNSCache:
+    """
+    Keeps the addresses of resolved hostnames between two invocations of the cli.
+    The system resolver does not give the ttl of dns records, so entries expire after the configured ttl.
+    """
+
+    def __init__(self, ttl: float, path: Optional[Path] = None):
+        self.path = path or get_cache_directory() / 'dns.json'
+        self.ttl = ttl
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+        self._changed = False
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def get(self, host: str, port: int) -> Optional[List[str]]:
+        entry = self._entries.get(f'{host}:{port}')
+        if not isinstance(entry, dict) or time.time() - entry.get('resolved_at', 0) > self.ttl:
+            return None
+        addresses = entry.get('addresses')
+        return addresses if isinstance(addresses, list) and addresses else None
+
+    def set(self, host: str, port: int, addresses: List[str]) -> None:
+        now = time.time()
+        # expired entries are dropped so that the file does not grow forever
+        self._entries = {
+            key: entry for key, entry in self._entries.items()
+            if isinstance(entry, dict) and now - entry.get('resolved_at', 0) <= self.ttl
+        }
+        self._entries[f'{host}:{port}'] = {'addresses': addresses, 'resolved_at': now}
+        self._changed = True
+
+    def save(self) -> None:
+        if not self._changed:
+            return
+        try:
+            write_json_atomically(self.path, self._entries)
+        except OSError:
+            # the cache is just an optimization, we don't want to fail a command because of it
+            pass
+        self._changed = False
@@ -0,0 +1,115 @@
+"""
+Checksums of downloaded files, computed on the chunks as they are written so files are never read a second time.
+
+Expected hashes are given in the url file of the download command, after each url, as algorithm:digest or as a
+digest alone. The manifests of the computed hashes use the BSD tag format, "SHA256 (file.txt) = ...". By default
+there is one manifest per algorithm, like SHA256SUMS and MD5SUMS, so that each can be verified with sha256sum -c,
+md5sum -c... A manifest mixing algorithms can be verified with cksum -c of coreutils 9.
+"""
+import hashlib
+import re
+from pathlib import Path
+from typing import Any, Dict, IO, List, NamedTuple, Optional, Tuple
+
+HASH_ALGORITHMS = ['md5', 'sha1', 'sha256', 'sha512', 'blake2b']
+DEFAULT_HASH_ALGORITHM = 'sha256'
+# algorithms guessed from the length of a hexadecimal digest given without algorithm
+DIGEST_LENGTHS = {32: 'md5', 40: 'sha1', 64: 'sha256', 128: 'sha512'}
+# names used by the tagged output of coreutils
+MANIFEST_TAGS = {'md5': 'MD5', 'sha1': 'SHA1', 'sha256': 'SHA256', 'sha512': 'SHA512', 'blake2b': 'BLAKE2b'}
+
+
+class ExpectedHash(NamedTuple):
+    algorithm: str
+    digest: str
+
+    def __str__(self) -> str:
+        return f'{self.algorithm}:{self.digest}'
+
+
+def parse_expected_hash(value: str, algorithm: Optional[str] = None) -> ExpectedHash:
+    """
+    Returns the hash given as algorithm:digest or as a digest alone. Without algorithm, the given one is used,
+    otherwise it is guessed from the length of the digest. Raises ValueError if the hash is not valid.
+    """
+    name, separator, digest = value.rpartition(':')
+    name = name.lower()
+    digest = digest.lower()
+    if separator and name not in HASH_ALGORITHMS:
+        raise ValueError(f'{name} is not a supported hash algorithm, choose one of {", ".join(HASH_ALGORITHMS)}')
+    if re.fullmatch(r'[0-9a-f]+', digest) is None:
+        raise ValueError(f'{value} is not a valid hexadecimal digest')
+    name = name or algorithm or DIGEST_LENGTHS.get(len(digest), '')
+    if not name:
+        raise ValueError(f'unable to guess the hash algorithm of {value}, give it like sha256:{digest}')
+    if len(digest) != hashlib.new(name).digest_size * 2:
+        raise ValueError(f'{value} is not a valid {name} digest')
+    return ExpectedHash(name, digest)
+
+
+def read_download_file(file: IO[str], algorithm: Optional[str] = None) -> Dict[str, Optional[ExpectedHash]]:
+    """
+    Returns the urls of the file with their expected hash when one follows the url on its line, separated by spaces
+    or a comma. Empty lines are ignored. Raises ValueError with the line number if a hash is not valid.
+    """
+    items: Dict[str, Optional[ExpectedHash]] = {}
+    for number, line in enumerate(file, start=1):
+        columns = [column for column in re.split(r'[\s,]+', line.strip()) if column]
+        if not columns:
+            continue
+        if len(columns) > 2:
+            raise ValueError(f'line {number}: expected an url optionally followed by a hash, got {line.strip()}')
+        try:
+            items[columns[0]] = parse_expected_hash(columns[1], algorithm) if len(columns) == 2 else None
+        except ValueError as e:
+            raise ValueError(f'line {number}: {e}')
+    return items
+
+
+class ChecksumManifest:
+    """
+    Keeps the hashes computed for the downloaded files, the files which did not have the expected one and the urls
+    with an expected hash which could not be downloaded.
+    """
+
+    def __init__(self, algorithm: Optional[str] = None):
+        self.algorithm = algorithm or DEFAULT_HASH_ALGORITHM
+        # algorithm and digest of each file, by its path relative to the destination directory as it was saved
+        self.entries: Dict[str, Tuple[str, str]] = {}
+        self.mismatches: List[str] = []
+        self.failures: List[str] = []
+
+    @property
+    def algorithms(self) -> List[str]:
+        """Returns the algorithms of the entries, or the default one when there is no entry."""
+        return sorted({algorithm for algorithm, _ in self.entries.values()}) or [self.algorithm]
+
+    def new_hash(self, expected: Optional[ExpectedHash] = None) -> Any:
+        # an expected hash is checked with its own algorithm
+        return hashlib.new(expected.algorithm if expected is not None else self.algorithm)
+
+    def add(self, filename: str, algorithm: str, digest: str, expected: Optional[ExpectedHash] = None) -> bool:
+        """
+        Records the hash of a file given by the path it was saved to, relative to the destination directory, returns
+        False if it is not the expected one.
+        """
+        self.entries[filename] = (algorithm, digest)
+        if expected is not None and expected.digest != digest:
+            self.mismatches.append(filename)
+            return False
+        return True
+
+    def add_failure(self, url: str) -> None:
+        """Records an url with an expected hash whose file could not be downloaded, so it cannot be verified."""
+        self.failures.append(url)
+
+    def get_text(self, algorithm: Optional[str] = None) -> str:
+        """Returns the manifest of the entries of the given algorithm, or of all the entries."""
+        return ''.join(
+            f'{MANIFEST_TAGS[entry_algorithm]} ({filename}) = {digest}\n'
+            for filename, (entry_algorithm, digest) in sorted(self.entries.items())
+            if algorithm is None or entry_algorithm == algorithm
+        )
+
+    def write(self, path: Path, algorithm: Optional[str] = None) -> None:
+        path.write_text(self.get_text(algorithm))
@@ -1,70 +1,60 @@
-import mailbox
-import mimetypes
+import os
+import tempfile
 from pathlib import Path
-from typing import IO, Tuple, Set, List
+from typing import IO, Any, Dict, Set, Tuple, Optional
 
 import anyio
 import asyncclick as click
 import httpx
-from pydantic import BaseModel, AnyHttpUrl, ValidationError
+from pydantic import ValidationError
 from rich.progress import Progress, TaskID
 
-from httpcli.commands.helpers import function_runner, signal_handler
+from httpcli.checksums import HASH_ALGORITHMS, ChecksumManifest, ExpectedHash, MANIFEST_TAGS, read_download_file
+from httpcli.commands.helpers import (
+    FileModel, function_runner, signal_handler, get_decoding_information, get_filename, get_unique_path,
+    print_pool_statistics, save_negotiated_protocols
+)
 from httpcli.configuration import Configuration
 from httpcli.console import console
-from httpcli.helpers import build_base_httpx_arguments
+from httpcli.encodings import ContentDecoder, get_file_extension
 from httpcli.parameters import URL
+from httpcli.transport import PoolStatistics, build_pooled_client_arguments
 
 
-def get_filename_from_content_disposition(response: httpx.Response) -> str:
-    disposition = response.headers.get('content-disposition')
-
-    if disposition is None:
-        return ''
-
-    message = mailbox.Message(f'content-disposition: {disposition}')
-    return message.get_filename(failobj='')
-
-
-def get_filename_from_url(response: httpx.Response) -> str:
-    url = response.request.url
-    filename = url.path.split('/')[-1]
-
-    if Path(filename).suffix:
-        return filename
-
-    content_type = response.headers.get('content-type')
-    if content_type is None:
-        return filename
-
-    extension = mimetypes.guess_extension(content_type)
-    if extension is None:
-        return filename
-
-    return f'{filename.rstrip(".")}{extension}'
-
-
-def get_filename(response: httpx.Response) -> str:
-    filename = get_filename_from_content_disposition(response)
-    if filename:
-        return filename
+def get_file_mode() -> int:
+    """Returns the mode of the files created by open, temporary files are only readable by the current user."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
 
-    return get_filename_from_url(response)
-
-
-class FileModel(BaseModel):
-    urls: List[AnyHttpUrl]
-
-
-def get_urls_from_file(file: IO[str]) -> Set[str]:
-    urls = [line.strip() for line in file]
 
+async def save_body(response: httpx.Response, path: Path, decoder: ContentDecoder, file_hash: Any = None) -> None:
+    """
+    Writes the decoded body in a temporary file of the directory of path, it is renamed to path once the whole body is
+    received so that a failed or cancelled download never leaves a truncated file under the final name.
+    """
+    fd, temporary_name = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.part')
+    temporary_path = Path(temporary_name)
     try:
-        FileModel(urls=urls)  # type: ignore
-    except ValidationError as e:
-        raise click.UsageError(str(e))
-
-    return set(urls)
+        with os.fdopen(fd, 'wb') as f:
+            async for chunk in response.aiter_raw():
+                data = decoder.decode(chunk)
+                f.write(data)
+                if file_hash is not None:
+                    file_hash.update(data)
+            data = decoder.flush()
+            f.write(data)
+            if file_hash is not None:
+                file_hash.update(data)
+        os.chmod(temporary_path, get_file_mode())
+        os.replace(temporary_path, path)
+    except BaseException:
+        # cancellations too, the partial file is removed
+        try:
+            temporary_path.unlink()
+        except OSError:
+            pass
+        raise
 
 
 async def download_file(
@@ -73,42 +63,147 @@ async def download_file(
         allow_redirects: bool,
         destination: Path,
         progress: Progress,
-        task_id: TaskID
+        task_id: TaskID,
+        limiter: anyio.CapacityLimiter,
+        raw_encoding: bool = False,
+        verbose: bool = False,
+        checksums: Optional[ChecksumManifest] = None,
+        expected: Optional[ExpectedHash] = None,
+        used_paths: Optional[Set[Path]] = None
 ) -> None:
     try:
-        response = await client.get(url, allow_redirects=allow_redirects)
-        filename = get_filename(response)
-        if response.status_code >= 300:  # we take in account cases where users deny redirects
-            progress.console.print(f':cross_mark: {url} ({filename})')
-            progress.update(task_id, advance=1)
-        else:
-            path = destination / filename
-            path.write_bytes(response.content)
-            progress.console.print(f':white_heavy_check_mark: {url} ({filename})')
-            progress.update(task_id, advance=1)
+        async with limiter:
+            async with client.stream('GET', url, allow_redirects=allow_redirects) as response:
+                filename = get_filename(response)
+                if response.status_code >= 300:  # we take in account cases where users deny redirects
+                    progress.console.print(f':cross_mark: {url} ({filename})')
+                    if checksums is not None and expected is not None:
+                        checksums.add_failure(url)
+                    progress.update(task_id, advance=1)
+                    return
+
+                content_encoding = response.headers.get('content-encoding')
+                if raw_encoding:
+                    # the body is saved as it was sent by the server, no need to decode it
+                    filename = f'{filename}{get_file_extension(content_encoding)}'
+                    content_encoding = None
+                decoder = ContentDecoder(content_encoding)
+                # the hash is computed on the chunks as they are written, the file is not read again
+                file_hash = checksums.new_hash(expected) if checksums is not None else None
+                path = destination / filename
+                if used_paths is not None:
+                    # urls with the same filename do not overwrite each other, the next ones get a numbered name
+                    path = get_unique_path(path, used_paths)
+                    filename = path.name
+                await save_body(response, path, decoder, file_hash)
+
+        message = f':white_heavy_check_mark: {url} ({filename})'
+        if checksums is not None and file_hash is not None:
+            digest = file_hash.hexdigest()
+            if not checksums.add(filename, file_hash.name, digest, expected):
+                message = (
+                    f':cross_mark: [error]{url} ({filename}) checksum mismatch, expected {expected}, '
+                    f'got {file_hash.name}:{digest}'
+                )
+            elif expected is not None:
+                message = f'{message} {file_hash.name} verified'
+            elif verbose:
+                message = f'{message} {file_hash.name}:{digest}'
+        if verbose and decoder.encodings:
+            message = f'{message} {get_decoding_information(decoder)}'
+        progress.console.print(message)
+        progress.update(task_id, advance=1)
     except httpx.HTTPError as e:
         progress.console.print(f'[error]unable to fetch {url}, reason: {e}')
+        if checksums is not None and expected is not None:
+            checksums.add_failure(url)
         progress.update(task_id, advance=1)
+    except OSError as e:
+        progress.console.print(f'[error]unable to save {url}, reason: {e}')
+        if checksums is not None and expected is not None:
+            checksums.add_failure(url)
+        progress.update(task_id, advance=1)
+
 
+def read_file_items(file: IO[str], algorithm: Optional[str]) -> Dict[str, Optional[ExpectedHash]]:
+    """Returns the urls of the file with their expected hash, raises click.UsageError if the file is not valid."""
+    try:
+        items = read_download_file(file, algorithm)
+    except ValueError as e:
+        raise click.UsageError(f'{file.name}, {e}')
 
-async def handle_downloads(config: Configuration, destination: str, file: IO[str], url: Tuple[str, ...]) -> None:
-    urls = set(url)
+    try:
+        FileModel(urls=list(items))  # type: ignore
+    except ValidationError as e:
+        raise click.UsageError(str(e))
+
+    return items
+
+
+def write_manifest(checksums: ChecksumManifest, path: Path, algorithm: Optional[str] = None) -> None:
+    try:
+        checksums.write(path, algorithm)
+    except OSError as e:
+        console.print(f'[warning]unable to write checksum manifest {path}: {e}')
+        return
+    console.print(f'[info]checksums written to {path}')
+
+
+async def handle_downloads(
+        config: Configuration,
+        destination: str,
+        file: IO[str],
+        url: Tuple[str, ...],
+        concurrency: Optional[int],
+        raw_encoding: bool,
+        checksum: Optional[str] = None,
+        manifest: Optional[str] = None
+) -> None:
+    items: Dict[str, Optional[ExpectedHash]] = dict.fromkeys(url)
     if file:
-        other_urls = get_urls_from_file(file)
-        urls = urls.union(other_urls)
+        items.update(read_file_items(file, checksum))
 
     destination = Path(destination) if destination else Path.cwd()
-    arguments = build_base_httpx_arguments(config)
+    has_expected_hashes = any(expected is not None for expected in items.values())
+    checksums = ChecksumManifest(checksum) if checksum or has_expected_hashes or manifest else None
+    statistics = PoolStatistics()
+    arguments = build_pooled_client_arguments(config, statistics)
     allow_redirects = arguments.pop('allow_redirects')
+    limiter = anyio.CapacityLimiter(concurrency or config.pool.max_concurrent_streams)
+    used_paths: Set[Path] = set()
 
     with Progress(console=console) as progress:
-        task_id = progress.add_task('Downloading', total=len(urls))
+        task_id = progress.add_task('Downloading', total=len(items))
         async with httpx.AsyncClient(**arguments) as client:
             async with anyio.create_task_group() as tg:
-                for url in urls:
-                    tg.start_soon(download_file, client, url, allow_redirects, destination, progress, task_id)
+                for url, expected in items.items():
+                    tg.start_soon(
+                        download_file, client, url, allow_redirects, destination, progress, task_id, limiter,
+                        raw_encoding, config.verbose, checksums, expected, used_paths
+                    )
 
     console.print('[info]Downloads completed! :glowing_star:')
+    print_pool_statistics(statistics, config.verbose)
+    save_negotiated_protocols(config, statistics)
+    if checksums is not None:
+        if manifest:
+            write_manifest(checksums, Path(manifest))
+        else:
+            # one manifest per algorithm, sha256sum -c refuses the lines of the other algorithms
+            for algorithm in checksums.algorithms:
+                write_manifest(checksums, destination / f'{MANIFEST_TAGS[algorithm]}SUMS', algorithm)
+        if checksums.mismatches:
+            console.print(
+                f'[error]{len(checksums.mismatches)} file(s) do not have the expected checksum: '
+                f'{", ".join(sorted(checksums.mismatches))}'
+            )
+        if checksums.failures:
+            console.print(
+                f'[error]{len(checksums.failures)} file(s) with an expected checksum could not be downloaded: '
+                f'{", ".join(sorted(checksums.failures))}'
+            )
+        if checksums.mismatches or checksums.failures:
+            raise click.exceptions.Exit(1)
 
 
 @click.command()
@@ -119,21 +214,65 @@ async def handle_downloads(config: Configuration, destination: str, file: IO[str
 )
 @click.option(
     '-f', '--file',
-    help='File containing one url per line. Each url corresponds to a file to download.',
+    help='File containing one url per line. Each url corresponds to a file to download. An expected hash of the '
+         'file can follow the url on its line, as algorithm:digest or as a digest alone.',
     type=click.File()
 )
+@click.option(
+    '-c', '--concurrency',
+    help='Maximum number of downloads in progress at the same time. '
+         'If not provided, default to the max_concurrent_streams setting of the connection pool.',
+    type=click.IntRange(min=1)
+)
+@click.option(
+    '--raw-encoding',
+    is_flag=True,
+    help='Save files as sent by the server without decoding them. An extension corresponding to the content '
+         'encoding is appended to the filename, for example ".gz" for gzip.'
+)
+@click.option(
+    '--checksum',
+    type=click.Choice(HASH_ALGORITHMS),
+    help='Hash algorithm of the checksums computed while files are written, they are saved in a manifest. Digests '
+         'given without algorithm in the url file use it too.'
+)
+@click.option(
+    '--manifest',
+    type=click.Path(dir_okay=False, writable=True),
+    help='File where the checksums of the downloaded files are written, in the tagged format of sha256sum, it can '
+         'be checked with cksum -c if it mixes algorithms. If not provided, default to one file per algorithm like '
+         'SHA256SUMS in the destination directory.'
+)
 @click.argument('url', type=URL, nargs=-1)
 @click.pass_obj
 # well, technically url is not a str but a pydantic.AnyHttpUrl object inheriting from str
 # but it does not seem to bother httpx, so we can use the convenient str for signature
-async def download(config: Configuration, destination: str, file: IO[str], url: Tuple[str, ...]):
+async def download(
+        config: Configuration,
+        destination: str,
+        file: IO[str],
+        concurrency: Optional[int],
+        raw_encoding: bool,
+        checksum: Optional[str],
+        manifest: Optional[str],
+        url: Tuple[str, ...]
+):
     """
     Process download of urls given as arguments.
 
     URL is an url targeting a file to download. It can be passed multiple times.
 
     You can combine url arguments with --file option.
+
+    All files are downloaded with the same connection pool. With http2, requests to the same origin are
+    multiplexed over one connection.
+
+    With --checksum or expected hashes in the url file, files are hashed as they are written. The command exits with
+    a status of 1 if a file does not have its expected hash or cannot be downloaded.
     """
     async with anyio.create_task_group() as tg:
-        tg.start_soon(function_runner, tg.cancel_scope, handle_downloads, config, destination, file, url)
+        tg.start_soon(
+            function_runner, tg.cancel_scope, handle_downloads, config, destination, file, url, concurrency,
+            raw_encoding, checksum, manifest
+        )
         tg.start_soon(signal_handler, tg.cancel_scope)
@@ -1,20 +1,93 @@
-import json
+import mailbox
+import mimetypes
 import signal
-from typing import Dict, Any, Optional, Callable
+import time
+from pathlib import Path
+from typing import IO, Dict, Any, Iterable, List, NamedTuple, Optional, Callable, Set, Tuple
 
 import anyio
 import asyncclick as click
 import httpx
+from anyio.streams.memory import MemoryObjectSendStream
 from pygments.lexers import get_lexer_for_mimetype
+from pydantic import AnyHttpUrl, BaseModel, ValidationError
 from pygments.util import ClassNotFound
+from rich.console import Console
 from rich.syntax import Syntax
+from rich.table import Table
 from typing_extensions import Literal
 
+from httpcli import json_codec
+from httpcli.assertions import ResponseChecker
+from httpcli.cache import ProtocolCache
 from httpcli.configuration import Configuration
-from httpcli.console import console
+from httpcli.console import console, error_console
+from httpcli.encodings import ContentDecoder, DecodedResponse, compress_request
+from httpcli.formats import FormattedOutput, RequestTimings
 from httpcli.helpers import build_read_method_arguments, build_write_method_arguments
+from httpcli.models import OAuth2PasswordBearer
+from httpcli.sessions import Session, open_session
+from httpcli.tls import TLSStatistics
+from httpcli.transport import PoolStatistics, build_client_arguments, build_pooled_client_arguments
 from httpcli.types import HttpProperty
 
+# big writes limit the number of system calls when saving large bodies
+WRITE_BUFFER_SIZE = 1024 * 1024
+# given to -o/--output, the body is written as is on the standard output so it can be piped to another program
+STDOUT_PATH = Path('-')
+
+
+def get_filename_from_content_disposition(response: httpx.Response) -> str:
+    disposition = response.headers.get('content-disposition')
+
+    if disposition is None:
+        return ''
+
+    message = mailbox.Message(f'content-disposition: {disposition}')
+    return message.get_filename(failobj='')
+
+
+def get_filename_from_url(response: httpx.Response) -> str:
+    url = response.request.url
+    filename = url.path.split('/')[-1]
+
+    if Path(filename).suffix:
+        return filename
+
+    content_type = response.headers.get('content-type')
+    if content_type is None:
+        return filename
+
+    extension = mimetypes.guess_extension(content_type)
+    if extension is None:
+        return filename
+
+    return f'{filename.rstrip(".")}{extension}'
+
+
+def get_filename(response: httpx.Response) -> str:
+    filename = get_filename_from_content_disposition(response)
+    if filename:
+        return filename
+
+    return get_filename_from_url(response)
+
+
+class FileModel(BaseModel):
+    urls: List[AnyHttpUrl]
+
+
+def get_urls_from_file(file: IO[str]) -> List[str]:
+    """Returns urls of the file in the order they appear, without duplicates. Empty lines are ignored."""
+    urls = list(dict.fromkeys(line.strip() for line in file if line.strip()))
+
+    try:
+        FileModel(urls=urls)  # type: ignore
+    except ValidationError as e:
+        raise click.UsageError(str(e))
+
+    return urls
+
 
 def guess_lexer_name(response: httpx.Response) -> str:
     content_type = response.headers.get('Content-Type')
@@ -39,10 +112,10 @@ def print_delimiter() -> None:
     console.print(syntax)
 
 
-def print_response_headers(response: httpx.Response) -> None:
+def print_response_headers(response: httpx.Response, target: Console = console) -> None:
     http_headers = get_response_headers_text(response)
     syntax = Syntax(http_headers, 'http')
-    console.print(syntax)
+    target.print(syntax)
 
 
 def print_response(response: httpx.Response) -> None:
@@ -50,37 +123,271 @@ def print_response(response: httpx.Response) -> None:
     print_delimiter()
     lexer = guess_lexer_name(response)
     if lexer:
-        text = response.text
+        text = None
         if lexer.lower() == 'json':
             try:
-                data = response.json()
-                text = json.dumps(data, indent=4)
-            except json.JSONDecodeError:
+                # the codec decodes bytes directly, no need to decode the text first
+                text = json_codec.dumps(json_codec.loads(response.content), indent=True)
+            except json_codec.JSONDecodeError:
                 pass
+        if text is None:
+            text = response.text
         syntax = Syntax(text, lexer)
         console.print(syntax)
     else:
         console.print(response.text)
 
 
-async def _perform_request(
+async def read_response(response: httpx.Response) -> Tuple[httpx.Response, ContentDecoder]:
+    """
+    Reads a streamed response like httpx.Response.aread does, but with our decoders which support more encodings
+    and measure the time spent decoding the body. The streamed response is closed and a response holding the
+    decoded body is returned.
+    """
+    decoder = ContentDecoder(response.headers.get('content-encoding'))
+    parts = [decoder.decode(chunk) async for chunk in response.aiter_raw()]
+    parts.append(decoder.flush())
+    await response.aclose()
+    return DecodedResponse(response, b''.join(parts)), decoder
+
+
+def get_unique_path(path: Path, used_paths: Set[Path]) -> Path:
+    """Returns path, or path with a -1, -2... suffix if it is already used, and marks the returned path as used."""
+    unique_path = path
+    counter = 1
+    while unique_path in used_paths:
+        unique_path = path.with_name(f'{path.stem}-{counter}{path.suffix}')
+        counter += 1
+    used_paths.add(unique_path)
+    return unique_path
+
+
+def get_output_path(
+        response: httpx.Response, output: Optional[str], download: bool, used_paths: Optional[Set[Path]] = None
+) -> Optional[Path]:
+    """
+    Returns the file where the body is saved, None if it is printed. With download, used_paths holds the files
+    already taken by the other urls of a batch so that urls with the same filename do not overwrite each other.
+    """
+    if output:
+        return Path(output)
+    if download:
+        # only the name is kept, a malicious server could try to write elsewhere with a content-disposition header
+        path = Path.cwd() / (Path(get_filename(response)).name or 'index')
+        return path if used_paths is None else get_unique_path(path, used_paths)
+    return None
+
+
+async def write_body(response: httpx.Response, file: IO[bytes]) -> ContentDecoder:
+    decoder = ContentDecoder(response.headers.get('content-encoding'))
+    async for chunk in response.aiter_raw():
+        file.write(decoder.decode(chunk))
+    file.write(decoder.flush())
+    return decoder
+
+
+async def save_response(response: httpx.Response, path: Path) -> ContentDecoder:
+    """
+    Writes the decoded body in a file, or on the standard output, as it is received, so it is never held in memory
+    nor decoded to text. Raises OSError if the file cannot be written.
+    """
+    if path == STDOUT_PATH:
+        stream = click.get_binary_stream('stdout')
+        decoder = await write_body(response, stream)
+        stream.flush()
+        return decoder
+
+    with path.open('wb', buffering=WRITE_BUFFER_SIZE) as f:
+        return await write_body(response, f)
+
+
+def get_decoding_information(decoder: ContentDecoder) -> str:
+    return (
+        f'{", ".join(decoder.encodings)}, {decoder.raw_size} bytes -> {decoder.size} bytes '
+        f'(ratio {decoder.ratio:.2f}), decoded in {decoder.decode_time * 1000:.2f} ms'
+    )
+
+
+def print_tls_statistics(statistics: TLSStatistics, target: Console = console) -> None:
+    if not statistics.handshakes:
+        return
+    information = (
+        f'{statistics.handshakes} in {statistics.handshake_time * 1000:.2f} ms, {statistics.resumed} resumed'
+    )
+    if statistics.saved_time:
+        information += f' (about {statistics.saved_time * 1000:.2f} ms saved)'
+    target.print(f'[info]tls handshakes:[/] {information}')
+
+
+def print_request_information(
+        response: httpx.Response,
+        decoder: Optional[ContentDecoder] = None,
+        target: Console = console,
+        tls_statistics: Optional[TLSStatistics] = None
+) -> None:
+    target.print(f'[info]protocol:[/] {response.http_version}')
+    target.print(f'[info]elapsed:[/] {response.elapsed.total_seconds() * 1000:.2f} ms')
+    if tls_statistics is not None:
+        print_tls_statistics(tls_statistics, target)
+    if decoder is not None and decoder.encodings:
+        target.print(f'[info]content encoding:[/] {get_decoding_information(decoder)}')
+
+
+def print_result(
+        response: httpx.Response,
+        decoder: ContentDecoder,
+        path: Optional[Path],
+        verbose: bool,
+        tls_statistics: Optional[TLSStatistics] = None
+) -> None:
+    if path is None:
+        print_response(response)
+        if verbose:
+            print_request_information(response, decoder, tls_statistics=tls_statistics)
+    else:
+        # the standard output stays clean, so it can be piped even when saving the body
+        print_response_headers(response, error_console)
+        if path == STDOUT_PATH:
+            error_console.print(f'[info]body written to the standard output ({decoder.size} bytes)')
+        else:
+            error_console.print(f'[info]body saved to {path} ({decoder.size} bytes)')
+        if verbose:
+            print_request_information(response, decoder, error_console, tls_statistics)
+
+
+def print_pool_statistics(statistics: PoolStatistics, verbose: bool) -> None:
+    console.print(f'[info]{statistics.requests} request(s) made over {statistics.connections} connection(s)')
+    if verbose:
+        protocols = ', '.join(f'{protocol} ({count})' for protocol, count in statistics.protocols.most_common())
+        console.print(f'[info]protocols negotiated:[/] {protocols}')
+        print_tls_statistics(statistics.tls)
+
+
+def save_negotiated_protocols(config: Configuration, statistics: PoolStatistics) -> None:
+    if config.version == 'auto':
+        protocol_cache = ProtocolCache()
+        for origin, http_version in statistics.origin_protocols.items():
+            protocol_cache.set(origin, http_version)
+        protocol_cache.save()
+
+
+def update_session(
+        session: Optional[Session], config: Configuration, client: httpx.AsyncClient, unauthorized: bool
+) -> None:
+    """Saves the cookies of the client in the session, a token refused by the server is forgotten."""
+    if session is None:
+        return
+
+    session.update_cookies(client.cookies)
+    if unauthorized and isinstance(config.auth, OAuth2PasswordBearer):
+        session.remove_token(config.auth)
+    try:
+        session.save()
+    except OSError as e:
+        error_console.print(f'[warning]unable to save session {session.name}: {e}')
+
+
+def report_request_error(
+        method: str,
+        url: str,
+        message: str,
+        error: str,
+        timings: RequestTimings,
+        output_format: str = 'text',
+        checker: Optional[ResponseChecker] = None
+) -> None:
+    """
+    Prints the error of a single request. With the machine readable formats, the error is written in the document and
+    the message is printed on stderr so that stdout can still be parsed. The error is also recorded by the checker.
+    """
+    if output_format == 'text':
+        console.print(f'[error]{message}')
+    else:
+        error_console.print(f'[error]{message}')
+        formatted_output = FormattedOutput(output_format)
+        formatted_output.add_error(method, url, error, timings)
+        formatted_output.close()
+    if checker is not None:
+        checker.add_error(0, method, url, timings.total, error)
+        checker.write_report()
+
+
+async def perform_request(
         method: Literal['GET', 'HEAD', 'OPTIONS', 'DELETE', 'POST', 'PUT', 'PATCH'],
         url: str,
         config: Configuration,
         base_arguments: Dict[str, Any],
-        method_arguments: Dict[str, Any]
+        method_arguments: Dict[str, Any],
+        compress: Optional[str] = None,
+        output: Optional[str] = None,
+        download: bool = False,
+        session: Optional[Session] = None,
+        output_format: str = 'text',
+        checker: Optional[ResponseChecker] = None
 ) -> None:
+    if output is not None and Path(output) == STDOUT_PATH and output_format != 'text':
+        raise click.UsageError('--output - can only be used with the text format, stdout is taken by the document')
+    request_arguments = dict(method_arguments)
+    allow_redirects = request_arguments.pop('allow_redirects')
+    protocol_cache = ProtocolCache() if config.version == 'auto' else None
+    if protocol_cache is not None and protocol_cache.get(url) == 'HTTP/1.1':
+        # we already know that the server does not support http2, no need to offer it
+        base_arguments = {**base_arguments, 'http2': False}
+
+    started, start = time.time(), time.perf_counter()
     with anyio.move_on_after(config.timeout) as scope:
         try:
-            async with httpx.AsyncClient(**base_arguments, timeout=None) as client:
-                response = await client.request(method, url, **method_arguments)
-                print_response(response)
+            tls_statistics = TLSStatistics()
+            client_arguments = build_client_arguments(config, base_arguments, tls_statistics)
+            async with httpx.AsyncClient(**client_arguments, timeout=None) as client:
+                status_code = None
+                try:
+                    request = client.build_request(method, url, **request_arguments)
+                    if compress is not None:
+                        compress_request(request, compress)
+                    started, start = time.time(), time.perf_counter()
+                    response = await client.send(request, allow_redirects=allow_redirects, stream=True)
+                    headers_latency = time.perf_counter() - start
+                    status_code = response.status_code
+                    try:
+                        path = get_output_path(response, output, download)
+                        if path is None:
+                            response, decoder = await read_response(response)
+                        else:
+                            try:
+                                decoder = await save_response(response, path)
+                            except OSError as e:
+                                error = f'unable to save the response body: {e}'
+                                timings = RequestTimings(started, headers_latency, time.perf_counter() - start)
+                                report_request_error(method, url, error, error, timings, output_format, checker)
+                                raise click.Abort()
+                    finally:
+                        await response.aclose()
+                    timings = RequestTimings(started, headers_latency, time.perf_counter() - start)
+                finally:
+                    # cookies received before an error are kept too
+                    update_session(session, config, client, status_code == 401)
+
+                if output_format == 'text':
+                    print_result(response, decoder, path, config.verbose, tls_statistics)
+                else:
+                    formatted_output = FormattedOutput(output_format)
+                    formatted_output.add_response(response, timings, path)
+                    formatted_output.close()
+                if checker is not None:
+                    checker.check_response(0, method, url, response, timings.total, path)
+                if protocol_cache is not None:
+                    protocol_cache.set(url, response.http_version)
+                    protocol_cache.save()
         except httpx.HTTPError as e:
-            console.print(f'[error]unexpected error: {e}')
+            timings = RequestTimings(started, 0.0, time.perf_counter() - start)
+            report_request_error(method, url, f'unexpected error: {e}', str(e), timings, output_format, checker)
             raise click.Abort()
 
     if scope.cancel_called:
-        console.print('[error]the request timeout has expired')
+        error = 'the request timeout has expired'
+        timings = RequestTimings(started, 0.0, time.perf_counter() - start)
+        report_request_error(method, url, error, error, timings, output_format, checker)
         raise click.Abort()
 
 
@@ -91,12 +398,291 @@ async def perform_read_request(
         config: Configuration,
         headers: Optional[HttpProperty] = None,
         query_params: Optional[HttpProperty] = None,
-        cookies: Optional[HttpProperty] = None
+        cookies: Optional[HttpProperty] = None,
+        output: Optional[str] = None,
+        download: bool = False,
+        output_format: str = 'text',
+        checker: Optional[ResponseChecker] = None
 ):
-    arguments = await build_read_method_arguments(config, headers, cookies, query_params)
+    session = open_session(config.session)
+    arguments = await build_read_method_arguments(config, headers, cookies, query_params, session)
     method_arguments = {'allow_redirects': arguments.pop('allow_redirects')}
 
-    await _perform_request(method, url, config, arguments, method_arguments)
+    await perform_request(
+        method, url, config, arguments, method_arguments, output=output, download=download, session=session,
+        output_format=output_format, checker=checker
+    )
+
+
+# method, url and the other arguments given to httpx.AsyncClient.stream
+RequestItem = Tuple[str, str, Dict[str, Any]]
+
+
+class RequestResult(NamedTuple):
+    index: int
+    method: str
+    url: str
+    status_code: Optional[int] = None
+    size: int = 0
+    latency: float = 0.0
+    error: str = ''
+    # the response and the decoder are only kept until the result is printed
+    response: Optional[httpx.Response] = None
+    decoder: Optional[ContentDecoder] = None
+    path: Optional[Path] = None
+    # wall clock time when the request was sent and time to the response headers, for the machine readable formats
+    started: float = 0.0
+    headers_latency: float = 0.0
+
+    @property
+    def timings(self) -> RequestTimings:
+        return RequestTimings(self.started, self.headers_latency, self.latency)
+
+
+class ReorderWindow:
+    """
+    Results printed in order are kept until the previous ones are printed. The window lets workers fetch at most size
+    items ahead of the next one to print, so these results do not pile up in memory behind a slow request.
+    """
+
+    def __init__(self, size: int, next_index: int = 0):
+        self.size = size
+        self.next_index = next_index
+        self._condition = anyio.Condition()
+
+    async def wait(self, index: int) -> None:
+        """Waits until the item at index is in the window."""
+        async with self._condition:
+            while index - self.next_index >= self.size:
+                await self._condition.wait()
+
+    async def advance(self) -> None:
+        """Moves the window after the next item to print has been printed."""
+        async with self._condition:
+            self.next_index += 1
+            self._condition.notify_all()
+
+
+async def fetch(
+        client: httpx.AsyncClient,
+        index: int,
+        item: RequestItem,
+        config: Configuration,
+        allow_redirects: bool,
+        download: bool,
+        used_paths: Optional[Set[Path]] = None
+) -> RequestResult:
+    method, url, arguments = item
+    started, start = time.time(), time.perf_counter()
+    headers_latency = 0.0
+    try:
+        with anyio.fail_after(config.timeout):
+            async with client.stream(method, url, allow_redirects=allow_redirects, **arguments) as response:
+                headers_latency = time.perf_counter() - start
+                path = get_output_path(response, None, download, used_paths)
+                if path is None:
+                    response, decoder = await read_response(response)
+                else:
+                    try:
+                        decoder = await save_response(response, path)
+                    except OSError as e:
+                        error = f'unable to save the response body: {e}'
+                        latency = time.perf_counter() - start
+                        return RequestResult(index, method, url, latency=latency, error=error, started=started)
+    except TimeoutError:
+        error = 'the request timeout has expired'
+        return RequestResult(index, method, url, latency=time.perf_counter() - start, error=error, started=started)
+    except httpx.HTTPError as e:
+        return RequestResult(index, method, url, latency=time.perf_counter() - start, error=str(e), started=started)
+
+    return RequestResult(
+        index, method, url, response.status_code, decoder.size, time.perf_counter() - start,
+        response=response, decoder=decoder, path=path, started=started, headers_latency=headers_latency
+    )
+
+
+def print_batch_result(result: RequestResult, verbose: bool) -> None:
+    console.rule(f'{result.method} {result.url}')
+    if result.response is None:
+        console.print(f'[error]unable to fetch {result.url}, reason: {result.error}')
+    else:
+        print_result(result.response, result.decoder, result.path, verbose)  # type: ignore
+
+
+def add_formatted_result(formatted_output: FormattedOutput, result: RequestResult) -> None:
+    if result.response is None:
+        formatted_output.add_error(result.method, result.url, result.error, result.timings)
+    else:
+        formatted_output.add_response(result.response, result.timings, result.path)
+
+
+def check_result(checker: ResponseChecker, result: RequestResult) -> None:
+    if result.response is None:
+        checker.add_error(result.index, result.method, result.url, result.latency, result.error)
+    else:
+        checker.check_response(result.index, result.method, result.url, result.response, result.latency, result.path)
+
+
+def print_summary_table(results: List[RequestResult]) -> None:
+    table = Table(title='Summary')
+    table.add_column('URL')
+    table.add_column('Status', justify='right')
+    table.add_column('Latency', justify='right')
+    table.add_column('Size', justify='right')
+    for result in sorted(results, key=lambda item: item.index):
+        if result.status_code is None:
+            status = '[error]error'
+            size = '-'
+        else:
+            style = 'error' if result.status_code >= 400 else 'info'
+            status = f'[{style}]{result.status_code}'
+            size = f'{result.size} B'
+        table.add_row(result.url, status, f'{result.latency * 1000:.2f} ms', size)
+    console.print(table)
+
+
+async def perform_concurrent_requests(
+        config: Configuration,
+        arguments: Dict[str, Any],
+        items: Iterable[RequestItem],
+        download: bool = False,
+        concurrency: Optional[int] = None,
+        as_completed: bool = False,
+        session: Optional[Session] = None,
+        output_format: str = 'text',
+        checker: Optional[ResponseChecker] = None
+) -> List[RequestResult]:
+    """
+    Performs requests with one client created from the given pooled client arguments. At most concurrency requests
+    are in flight, items are consumed lazily so they can come from a big file.
+    Results are printed in the order of the items unless as_completed is true, in the given output format, and
+    checked by the checker when it is given.
+    """
+    arguments = dict(arguments)
+    allow_redirects = arguments.pop('allow_redirects')
+    concurrency = concurrency or config.pool.max_concurrent_streams
+    iterator = enumerate(items)
+    send_stream, receive_stream = anyio.create_memory_object_stream(concurrency)
+    results: List[RequestResult] = []
+    formatted_output = FormattedOutput(output_format, many=True) if output_format != 'text' else None
+    # downloaded files of the batch, urls with the same filename get a numbered one
+    used_paths: Set[Path] = set()
+    window = ReorderWindow(concurrency)
+
+    async def worker(stream: MemoryObjectSendStream) -> None:
+        async with stream:
+            for index, item in iterator:
+                if not as_completed:
+                    await window.wait(index)
+                await stream.send(await fetch(client, index, item, config, allow_redirects, download, used_paths))
+
+    def print_and_keep(result: RequestResult) -> None:
+        if formatted_output is None:
+            print_batch_result(result, config.verbose)
+        else:
+            add_formatted_result(formatted_output, result)
+        if checker is not None:
+            check_result(checker, result)
+        # the body is not needed for the summary, we don't want to keep thousands of them in memory
+        results.append(result._replace(response=None, decoder=None))
+
+    async with httpx.AsyncClient(**arguments, timeout=None) as client:
+        try:
+            async with anyio.create_task_group() as tg:
+                async with send_stream:
+                    for _ in range(concurrency):
+                        tg.start_soon(worker, send_stream.clone())
+
+                # results arriving early are kept until all the previous ones are printed, at most concurrency
+                pending: Dict[int, RequestResult] = {}
+                async with receive_stream:
+                    async for result in receive_stream:
+                        if as_completed:
+                            print_and_keep(result)
+                            continue
+
+                        pending[result.index] = result
+                        while len(results) in pending:
+                            print_and_keep(pending.pop(len(results)))
+                            await window.advance()
+        finally:
+            update_session(session, config, client, any(result.status_code == 401 for result in results))
+
+    if formatted_output is not None:
+        formatted_output.close()
+    return results
+
+
+async def perform_read_requests(
+        method: Literal['GET', 'HEAD'],
+        urls: List[str],
+        config: Configuration,
+        headers: Optional[HttpProperty] = None,
+        query_params: Optional[HttpProperty] = None,
+        cookies: Optional[HttpProperty] = None,
+        download: bool = False,
+        concurrency: Optional[int] = None,
+        as_completed: bool = False,
+        output_format: str = 'text',
+        checker: Optional[ResponseChecker] = None
+) -> None:
+    """
+    Performs the same request on many urls concurrently with one pooled client.
+    Results are printed in the order of the urls unless as_completed is true, followed by a summary table in the text
+    format.
+    """
+    statistics = PoolStatistics()
+    session = open_session(config.session)
+    arguments = await build_read_method_arguments(config, headers, cookies, query_params, session)
+    arguments = build_pooled_client_arguments(config, statistics, arguments)
+    items = [(method, url, {}) for url in urls]
+    results = await perform_concurrent_requests(
+        config, arguments, items, download, concurrency, as_completed, session, output_format, checker
+    )
+
+    if output_format == 'text':
+        print_summary_table(results)
+        print_pool_statistics(statistics, config.verbose)
+    save_negotiated_protocols(config, statistics)
+
+
+def get_urls(url: Tuple[str, ...], file: Optional[IO[str]], output: Optional[str] = None) -> List[str]:
+    """Returns urls given as arguments followed by the ones of the file, raises click.UsageError if none is given."""
+    urls = list(dict.fromkeys(str(item) for item in url))
+    if file is not None:
+        urls.extend(other_url for other_url in get_urls_from_file(file) if other_url not in urls)
+    if not urls:
+        raise click.UsageError('you must give at least one url as argument or with the --file option')
+    if output is not None and len(urls) > 1:
+        raise click.UsageError('--output cannot be used with several urls, use --download instead')
+    return urls
+
+
+async def dispatch_read_requests(
+        method: Literal['GET', 'HEAD'],
+        urls: List[str],
+        config: Configuration,
+        headers: Optional[HttpProperty] = None,
+        query_params: Optional[HttpProperty] = None,
+        cookies: Optional[HttpProperty] = None,
+        output: Optional[str] = None,
+        download: bool = False,
+        concurrency: Optional[int] = None,
+        as_completed: bool = False,
+        output_format: str = 'text',
+        checker: Optional[ResponseChecker] = None
+) -> None:
+    if len(urls) == 1:
+        await perform_read_request(
+            method, urls[0], config, headers, query_params, cookies, output, download, output_format, checker
+        )
+    else:
+        await perform_read_requests(
+            method, urls, config, headers, query_params, cookies, download, concurrency, as_completed, output_format,
+            checker
+        )
+    if checker is not None:
+        checker.finish()
 
 
 async def perform_write_request(
@@ -108,9 +694,16 @@ async def perform_write_request(
         cookies: Optional[HttpProperty] = None,
         form: Optional[HttpProperty] = None,
         json_data: Optional[HttpProperty] = None,
-        raw: Optional[bytes] = None
+        raw: Optional[bytes] = None,
+        compress: Optional[str] = None,
+        output: Optional[str] = None,
+        download: bool = False,
+        output_format: str = 'text'
 ):
-    arguments = await build_write_method_arguments(config, headers, cookies, query_params, form, json_data, raw)
+    session = open_session(config.session)
+    arguments = await build_write_method_arguments(
+        config, headers, cookies, query_params, form, json_data, raw, session
+    )
     method_arguments = {
         'allow_redirects': arguments.pop('allow_redirects'),
         'files': arguments.pop('files', {})
@@ -120,7 +713,9 @@ async def perform_write_request(
             method_arguments[item] = arguments.pop(item)
             break
 
-    await _perform_request(method, url, config, arguments, method_arguments)
+    await perform_request(
+        method, url, config, arguments, method_arguments, compress, output, download, session, output_format
+    )
 
 
 async def signal_handler(scope: anyio.CancelScope) -> None:
@@ -0,0 +1,284 @@
+import math
+from typing import IO, Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import anyio
+import asyncclick as click
+import httpx
+from anyio.streams.memory import MemoryObjectSendStream
+
+from httpcli import json_codec
+from httpcli.configuration import Configuration
+from httpcli.console import error_console
+from httpcli.helpers import build_read_method_arguments
+from httpcli.jsonpath import JsonPath
+from httpcli.sessions import open_session
+from httpcli.transport import PoolStatistics, build_pooled_client_arguments
+from httpcli.types import HttpProperty
+from .helpers import ReorderWindow, RequestResult, fetch, save_negotiated_protocols, update_session
+
+PAGINATION_STRATEGIES = ['link', 'cursor', 'page', 'offset']
+# a server always giving a next page or a non empty one must not make the command run forever
+DEFAULT_MAX_PAGES = 1000
+
+
+class Pagination(NamedTuple):
+    strategy: str
+    items_path: Optional[JsonPath] = None
+    cursor_path: Optional[JsonPath] = None
+    cursor_param: str = 'cursor'
+    page_param: Optional[str] = None
+    page_size: Optional[int] = None
+    total_path: Optional[JsonPath] = None
+    max_pages: Optional[int] = DEFAULT_MAX_PAGES
+
+    @property
+    def numbered(self) -> bool:
+        return self.strategy in ('page', 'offset')
+
+    def get_page_param(self) -> str:
+        return self.page_param or self.strategy
+
+
+def check_pagination(pagination: Pagination) -> None:
+    """Raises click.UsageError if the pagination options do not fit the strategy."""
+    if pagination.strategy == 'cursor' and pagination.cursor_path is None:
+        raise click.UsageError('--paginate cursor needs the json path of the next cursor given with --cursor-path')
+    if pagination.strategy == 'offset' and pagination.page_size is None:
+        raise click.UsageError('--paginate offset needs the number of items per page given with --page-size')
+    if pagination.total_path is not None:
+        if not pagination.numbered:
+            raise click.UsageError('--total-path can only be used with the page and offset strategies')
+        if pagination.page_size is None:
+            raise click.UsageError('--total-path needs the number of items per page given with --page-size')
+
+
+def get_page_values(pagination: Pagination, first_value: int, total: Optional[int] = None) -> Iterator[int]:
+    """Yields the page numbers or offsets following the first one, until the total number of items if it is known."""
+    step = pagination.page_size if pagination.strategy == 'offset' else 1
+    count = 1
+    while pagination.max_pages is None or count < pagination.max_pages:
+        if total is not None and count >= math.ceil(total / pagination.page_size):  # type: ignore
+            return
+        yield first_value + count * step  # type: ignore
+        count += 1
+
+
+def get_first_page_value(pagination: Pagination, url: str, params: Any) -> int:
+    # a page given in the url or with --query is the first one fetched
+    name = pagination.get_page_param()
+    value = httpx.URL(url).params.get(name) or httpx.QueryParams(params).get(name)
+    try:
+        return int(value) if value is not None else (1 if pagination.strategy == 'page' else 0)
+    except ValueError:
+        raise click.UsageError(f'{value} is not a valid value for the {name} query parameter')
+
+
+def get_items(pagination: Pagination, data: Any) -> List[Any]:
+    """Returns the items found with the items path, or those of a page which is an array, or the page itself."""
+    if pagination.items_path is not None:
+        return pagination.items_path.find(data)
+    return data if isinstance(data, list) else [data]
+
+
+def is_empty_page(items: List[Any]) -> bool:
+    return not items or items == [{}]
+
+
+def print_items(items: List[Any]) -> None:
+    if not is_empty_page(items):
+        # one write per page instead of one per item
+        click.echo('\n'.join(json_codec.dumps(item) for item in items))
+
+
+def get_next_url(pagination: Pagination, url: str, response: httpx.Response, data: Any) -> Optional[str]:
+    """Returns the url of the next page for the link and cursor strategies, None on the last page."""
+    if pagination.strategy == 'link':
+        next_url = response.links.get('next', {}).get('url')
+        return str(response.url.join(next_url)) if next_url else None
+
+    values = pagination.cursor_path.find(data)  # type: ignore
+    cursor = values[0] if values else None
+    if cursor is None or cursor == '' or cursor is False:
+        return None
+    if isinstance(cursor, str) and cursor.startswith(('http://', 'https://', '/')):
+        # some apis give the url of the next page instead of a cursor
+        return str(response.url.join(cursor))
+    return str(httpx.URL(url).copy_merge_params({pagination.cursor_param: str(cursor)}))
+
+
+class PageFetcher:
+    """Fetches the pages of a resource with a pooled client and prints their items as json lines."""
+
+    def __init__(
+            self,
+            client: httpx.AsyncClient,
+            url: str,
+            config: Configuration,
+            pagination: Pagination,
+            allow_redirects: bool
+    ):
+        self.client = client
+        self.url = url
+        self.config = config
+        self.pagination = pagination
+        self.allow_redirects = allow_redirects
+        # a token refused by the server is removed from the session
+        self.unauthorized = False
+
+    async def fetch(self, index: int, url: str, params: Optional[Dict[str, Any]] = None) -> RequestResult:
+        arguments = {'params': params} if params is not None else {}
+        return await fetch(self.client, index, ('GET', url, arguments), self.config, self.allow_redirects, False)
+
+    def get_data(self, result: RequestResult) -> Any:
+        """Returns the decoded json of a page, prints an error and aborts if the page cannot be used."""
+        if result.response is None:
+            error_console.print(f'[error]unable to fetch {result.url}, reason: {result.error}')
+            raise click.Abort()
+        status_code = result.response.status_code
+        if status_code >= 400:
+            self.unauthorized = status_code == 401
+            error_console.print(f'[error]unable to fetch {result.response.url}, status code: {status_code}')
+            raise click.Abort()
+        try:
+            return json_codec.loads(result.response.content)
+        except json_codec.JSONDecodeError:
+            error_console.print(f'[error]{result.response.url} did not return a json document, it cannot be paginated')
+            raise click.Abort()
+
+    def print_page(self, result: RequestResult) -> Tuple[Any, List[Any]]:
+        data = self.get_data(result)
+        items = get_items(self.pagination, data)
+        print_items(items)
+        return data, items
+
+    def warn_max_pages(self) -> None:
+        error_console.print(
+            f'[warning]pagination stopped after {self.pagination.max_pages} pages, use --max-pages to fetch more'
+        )
+
+    async def follow_next_pages(self) -> None:
+        """
+        Fetches pages one after the other, the url of each page is only known with the previous one. Pagination stops
+        when the next url was already fetched, a server giving it again would make it loop forever.
+        """
+        next_url: Optional[str] = self.url
+        visited_urls: Set[str] = set()
+        count = 0
+        while next_url is not None:
+            if self.pagination.max_pages is not None and count >= self.pagination.max_pages:
+                self.warn_max_pages()
+                return
+            if next_url in visited_urls:
+                error_console.print(f'[warning]{next_url} was already fetched, pagination stopped')
+                return
+            visited_urls.add(next_url)
+            result = await self.fetch(count, next_url)
+            data, _ = self.print_page(result)
+            next_url = get_next_url(self.pagination, self.url, result.response, data)  # type: ignore
+            count += 1
+
+    async def fetch_numbered_pages(self, concurrency: int) -> None:
+        """
+        Fetches pages by number or offset. When the first page gives the total number of items, the other pages are
+        fetched concurrently and printed in order, otherwise they are fetched one after the other until an empty one
+        or one identical to the previous page, like the ones of a server ignoring the page parameter.
+        """
+        name = self.pagination.get_page_param()
+        first_value = get_first_page_value(self.pagination, self.url, self.client.params)
+        data, items = self.print_page(await self.fetch(0, self.url, {name: first_value}))
+
+        if self.pagination.total_path is None:
+            for index, value in enumerate(get_page_values(self.pagination, first_value), start=1):
+                if is_empty_page(items):
+                    return
+                previous_data = data
+                result = await self.fetch(index, self.url, {name: value})
+                data = self.get_data(result)
+                if data == previous_data:
+                    url = result.response.url  # type: ignore
+                    error_console.print(f'[warning]{url} is the same as the previous page, pagination stopped')
+                    return
+                items = get_items(self.pagination, data)
+                print_items(items)
+            if not is_empty_page(items):
+                self.warn_max_pages()
+            return
+
+        totals = self.pagination.total_path.find(data)
+        if not totals or not isinstance(totals[0], int) or isinstance(totals[0], bool):
+            error_console.print(
+                f'[error]no total number of items found with {self.pagination.total_path.path} in {self.url}'
+            )
+            raise click.Abort()
+        iterator = enumerate(get_page_values(self.pagination, first_value, totals[0]), start=1)
+        send_stream, receive_stream = anyio.create_memory_object_stream(concurrency)
+        window = ReorderWindow(concurrency, next_index=1)
+
+        async def worker(stream: MemoryObjectSendStream) -> None:
+            async with stream:
+                for index, value in iterator:
+                    await window.wait(index)
+                    await stream.send(await self.fetch(index, self.url, {name: value}))
+
+        async with anyio.create_task_group() as tg:
+            async with send_stream:
+                for _ in range(concurrency):
+                    tg.start_soon(worker, send_stream.clone())
+
+            # pages arriving early are kept until all the previous ones are printed, at most concurrency
+            pending: Dict[int, RequestResult] = {}
+            async with receive_stream:
+                async for result in receive_stream:
+                    pending[result.index] = result
+                    while window.next_index in pending:
+                        self.print_page(pending.pop(window.next_index))
+                        await window.advance()
+
+        pages = math.ceil(totals[0] / self.pagination.page_size)  # type: ignore
+        if self.pagination.max_pages is not None and pages > self.pagination.max_pages:
+            self.warn_max_pages()
+
+
+async def perform_paginated_requests(
+        url: str,
+        config: Configuration,
+        pagination: Pagination,
+        headers: Optional[HttpProperty] = None,
+        query_params: Optional[HttpProperty] = None,
+        cookies: Optional[HttpProperty] = None,
+        concurrency: Optional[int] = None
+) -> None:
+    """
+    Fetches all the pages of a resource with one pooled client and prints their items as json lines, as soon as the
+    previous pages are printed, so pages are not kept in memory.
+    """
+    statistics = PoolStatistics()
+    session = open_session(config.session)
+    arguments = await build_read_method_arguments(config, headers, cookies, query_params, session)
+    arguments = build_pooled_client_arguments(config, statistics, arguments)
+    allow_redirects = arguments.pop('allow_redirects')
+
+    async with httpx.AsyncClient(**arguments, timeout=None) as client:
+        fetcher = PageFetcher(client, url, config, pagination, allow_redirects)
+        try:
+            if pagination.numbered:
+                await fetcher.fetch_numbered_pages(concurrency or config.pool.max_concurrent_streams)
+            else:
+                await fetcher.follow_next_pages()
+        finally:
+            update_session(session, config, client, fetcher.unauthorized)
+
+    save_negotiated_protocols(config, statistics)
+
+
+def get_pagination_arguments(
+        url: Tuple[str, ...], file: Optional[IO[str]], output: Optional[str], download: bool, output_format: str
+) -> str:
+    """Returns the url to paginate, raises click.UsageError if the other options cannot be used with --paginate."""
+    if len(url) != 1 or file is not None:
+        raise click.UsageError('--paginate needs exactly one url and cannot be used with --file')
+    if output is not None or download:
+        raise click.UsageError('--paginate cannot be used with --output or --download')
+    if output_format not in ('text', 'jsonl'):
+        raise click.UsageError('--paginate always prints json lines, it cannot be used with --format json or har')
+    return str(url[0])
@@ -1,50 +1,160 @@
+from typing import IO, Any, Dict, Optional, Tuple
+
 import anyio
 import asyncclick as click
 from pydantic import AnyHttpUrl
 
+from httpcli.assertions import get_response_checker
 from httpcli.configuration import Configuration
-from httpcli.options import http_query_options
+from httpcli.jsonpath import JsonCondition, JsonPath
+from httpcli.options import (
+    assertion_options, http_batch_options, http_query_options, http_output_options, pagination_options, watch_options
+)
 from httpcli.parameters import URL
 from httpcli.types import HttpProperty
-from .helpers import perform_read_request, function_runner, signal_handler
+from .helpers import dispatch_read_requests, get_urls, perform_read_request, function_runner, signal_handler
+from .pagination import Pagination, check_pagination, get_pagination_arguments, perform_paginated_requests
+from .watch import get_watch_arguments, watch_url
 
 
 @click.command()
-@click.argument('url', type=URL)
+@click.argument('url', type=URL, nargs=-1)
 @http_query_options
+@http_output_options
+@http_batch_options
+@pagination_options
+@watch_options
+@assertion_options
 @click.pass_obj
 async def get(
-        config: Configuration, url: AnyHttpUrl, headers: HttpProperty, query_params: HttpProperty, cookies: HttpProperty
+        config: Configuration,
+        url: Tuple[str, ...],
+        headers: HttpProperty,
+        query_params: HttpProperty,
+        cookies: HttpProperty,
+        output: Optional[str],
+        download: bool,
+        output_format: str,
+        file: Optional[IO[str]],
+        concurrency: Optional[int],
+        as_completed: bool,
+        paginate: Optional[str],
+        items_path: Optional[JsonPath],
+        cursor_path: Optional[JsonPath],
+        cursor_param: str,
+        page_param: Optional[str],
+        page_size: Optional[int],
+        total_path: Optional[JsonPath],
+        max_pages: Optional[int],
+        watch: Optional[float],
+        max_interval: Optional[float],
+        until: Tuple[JsonCondition, ...],
+        until_status: Tuple[int, ...],
+        expect_status: Tuple[str, ...],
+        expect_header: Tuple[Tuple[str, Optional[str]], ...],
+        expect_json: Tuple[JsonCondition, ...],
+        expect_schema: Optional[Dict[str, Any]],
+        max_latency: Optional[float],
+        report: Optional[str],
+        report_format: str
 ):
     """
     Performs http GET request.
 
-    URL is the target url.
+    URL is the target url. It can be passed multiple times and combined with --file option, requests are then
+    made concurrently with the same connection pool and a summary table is printed at the end.
+
+    With --paginate, all the pages of the url are fetched and their items are printed as json lines. With --watch,
+    the url is polled and the response is printed each time it changes.
+
+    With the --expect-* and --max-latency options, each response is checked and the command exits with a status of 1
+    if a check fails.
     """
+    if paginate is not None and watch is not None:
+        raise click.UsageError('--paginate and --watch cannot be used together')
+    checker = get_response_checker(
+        expect_status, expect_header, expect_json, expect_schema, max_latency, report, report_format
+    )
+    if checker is not None and (paginate is not None or watch is not None):
+        raise click.UsageError('checks and reports cannot be used with --paginate or --watch')
+
+    if watch is not None:
+        watched_url = get_watch_arguments(url, file, output, download, output_format)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(
+                function_runner, tg.cancel_scope, watch_url, watched_url, config, watch, max_interval, until,
+                until_status, headers, query_params, cookies, output_format
+            )
+            tg.start_soon(signal_handler, tg.cancel_scope)
+        return
+
+    if paginate is not None:
+        pagination = Pagination(
+            paginate, items_path, cursor_path, cursor_param, page_param, page_size, total_path, max_pages
+        )
+        check_pagination(pagination)
+        paginated_url = get_pagination_arguments(url, file, output, download, output_format)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(
+                function_runner, tg.cancel_scope, perform_paginated_requests, paginated_url, config, pagination,
+                headers, query_params, cookies, concurrency
+            )
+            tg.start_soon(signal_handler, tg.cancel_scope)
+        return
+
+    urls = get_urls(url, file, output)
     async with anyio.create_task_group() as tg:
         tg.start_soon(
-            function_runner, tg.cancel_scope, perform_read_request, 'GET', str(url), config, headers, query_params,
-            cookies
+            function_runner, tg.cancel_scope, dispatch_read_requests, 'GET', urls, config, headers, query_params,
+            cookies, output, download, concurrency, as_completed, output_format, checker
         )
         tg.start_soon(signal_handler, tg.cancel_scope)
 
 
 @click.command()
-@click.argument('url', type=URL)
+@click.argument('url', type=URL, nargs=-1)
 @http_query_options
+@http_output_options
+@http_batch_options
+@assertion_options
 @click.pass_obj
 async def head(
-        config: Configuration, url: AnyHttpUrl, headers: HttpProperty, query_params: HttpProperty, cookies: HttpProperty
+        config: Configuration,
+        url: Tuple[str, ...],
+        headers: HttpProperty,
+        query_params: HttpProperty,
+        cookies: HttpProperty,
+        output: Optional[str],
+        download: bool,
+        output_format: str,
+        file: Optional[IO[str]],
+        concurrency: Optional[int],
+        as_completed: bool,
+        expect_status: Tuple[str, ...],
+        expect_header: Tuple[Tuple[str, Optional[str]], ...],
+        expect_json: Tuple[JsonCondition, ...],
+        expect_schema: Optional[Dict[str, Any]],
+        max_latency: Optional[float],
+        report: Optional[str],
+        report_format: str
 ):
     """
     Performs http HEAD request.
 
-    URL is the target url.
+    URL is the target url. It can be passed multiple times and combined with --file option, requests are then
+    made concurrently with the same connection pool and a summary table is printed at the end.
+
+    With the --expect-* and --max-latency options, each response is checked and the command exits with a status of 1
+    if a check fails.
     """
+    checker = get_response_checker(
+        expect_status, expect_header, expect_json, expect_schema, max_latency, report, report_format
+    )
+    urls = get_urls(url, file, output)
     async with anyio.create_task_group() as tg:
         tg.start_soon(
-            function_runner, tg.cancel_scope, perform_read_request, 'HEAD', str(url), config, headers, query_params,
-            cookies
+            function_runner, tg.cancel_scope, dispatch_read_requests, 'HEAD', urls, config, headers, query_params,
+            cookies, output, download, concurrency, as_completed, output_format, checker
         )
         tg.start_soon(signal_handler, tg.cancel_scope)
 
@@ -52,9 +162,17 @@ async def head(
 @click.command()
 @click.argument('url', type=URL)
 @http_query_options
+@http_output_options
 @click.pass_obj
 async def options(
-        config: Configuration, url: AnyHttpUrl, headers: HttpProperty, query_params: HttpProperty, cookies: HttpProperty
+        config: Configuration,
+        url: AnyHttpUrl,
+        headers: HttpProperty,
+        query_params: HttpProperty,
+        cookies: HttpProperty,
+        output: Optional[str],
+        download: bool,
+        output_format: str
 ):
     """
     Performs http OPTIONS request.
@@ -64,6 +182,6 @@ async def options(
     async with anyio.create_task_group() as tg:
         tg.start_soon(
             function_runner, tg.cancel_scope, perform_read_request, 'OPTIONS', str(url), config, headers, query_params,
-            cookies
+            cookies, output, download, output_format
         )
         tg.start_soon(signal_handler, tg.cancel_scope)
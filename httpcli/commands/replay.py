@@ -0,0 +1,149 @@
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import anyio
+import asyncclick as click
+import httpx
+from pydantic import AnyHttpUrl
+from rich.table import Table
+
+from httpcli.commands.helpers import (
+    RequestResult, fetch, function_runner, print_pool_statistics, save_negotiated_protocols, signal_handler
+)
+from httpcli.configuration import Configuration
+from httpcli.console import console
+from httpcli.har import ReplayItem, read_har_file
+from httpcli.helpers import build_read_method_arguments
+from httpcli.options import concurrency_option
+from httpcli.parameters import URL
+from httpcli.transport import PoolStatistics, build_pooled_client_arguments
+
+
+def get_percentile(latencies: List[float], value: float) -> float:
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * value))]
+
+
+def get_status(status_code: Optional[int], other_status_code: Optional[int]) -> str:
+    if not status_code:
+        return '[error]error'
+    style = 'error' if status_code != other_status_code else 'info'
+    return f'[{style}]{status_code}'
+
+
+def print_replay_report(items: List[ReplayItem], results: List[RequestResult], duration: float) -> None:
+    table = Table(title='Replay')
+    table.add_column('Request')
+    table.add_column('Recorded', justify='right')
+    table.add_column('Replayed', justify='right')
+    table.add_column('Recorded latency', justify='right')
+    table.add_column('Replayed latency', justify='right')
+    table.add_column('Difference', justify='right')
+    for item, result in zip(items, results):
+        difference = (result.latency - item.latency) * 1000
+        table.add_row(
+            f'{item.method} {item.url}', get_status(item.status_code, result.status_code),
+            get_status(result.status_code, item.status_code), f'{item.latency * 1000:.2f} ms',
+            f'{result.latency * 1000:.2f} ms', f'{difference:+.2f} ms'
+        )
+    console.print(table)
+
+    differences = sum(item.status_code != result.status_code for item, result in zip(items, results))
+    errors = sum(result.status_code is None for result in results)
+    console.print(
+        f'[info]{len(results)} request(s) replayed in {duration:.2f} s, {differences} with a different status, '
+        f'{errors} error(s)'
+    )
+    for name, latencies in [
+        ('recorded', [item.latency for item in items]), ('replayed', [result.latency for result in results])
+    ]:
+        console.print(
+            f'[info]{name} latency (ms):[/] p50 {get_percentile(latencies, 0.5) * 1000:.2f}, '
+            f'p95 {get_percentile(latencies, 0.95) * 1000:.2f}, max {max(latencies) * 1000:.2f}'
+        )
+
+
+async def replay_items(
+        config: Configuration,
+        items: List[ReplayItem],
+        preserve_timing: bool = False,
+        speed: float = 1.0,
+        concurrency: Optional[int] = None
+) -> None:
+    """
+    Replays the requests concurrently with one pooled client. With preserve_timing, each request is sent at the
+    same offset from the start as in the recording, divided by speed, unless all the workers are busy.
+    """
+    if not items:
+        console.print('[warning]there is no request to replay')
+        return
+
+    statistics = PoolStatistics()
+    arguments = build_pooled_client_arguments(config, statistics, await build_read_method_arguments(config))
+    # redirections are recorded as separate requests, they are replayed as such
+    arguments.pop('allow_redirects')
+    concurrency = concurrency or config.pool.max_concurrent_streams
+    iterator = enumerate(items)
+    results: Dict[int, RequestResult] = {}
+
+    async def worker() -> None:
+        for index, item in iterator:
+            if preserve_timing:
+                await anyio.sleep_until(start + item.offset / speed)
+            result = await fetch(client, index, (item.method, item.url, item.arguments), config, False, False)
+            # only the status and the latency are compared, bodies are not kept
+            results[index] = result._replace(response=None, decoder=None)
+
+    async with httpx.AsyncClient(**arguments, timeout=None) as client:
+        start = anyio.current_time()
+        async with anyio.create_task_group() as tg:
+            for _ in range(concurrency):
+                tg.start_soon(worker)
+
+    print_replay_report(items, [results[index] for index in range(len(items))], anyio.current_time() - start)
+    print_pool_statistics(statistics, config.verbose)
+    save_negotiated_protocols(config, statistics)
+
+
+@click.command()
+@click.argument('file', type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    '--target',
+    type=URL,
+    help='Scheme, host and port replacing the ones of the recorded urls, for example https://staging.example.com.'
+)
+@click.option(
+    '--preserve-timing',
+    is_flag=True,
+    help='Send each request at the same time from the start as in the recording, instead of as fast as possible.'
+)
+@click.option(
+    '--speed',
+    type=click.FloatRange(min=0, min_open=True),
+    default=1.0,
+    show_default=True,
+    help='With --preserve-timing, speed factor of the replay, 2 sends the requests twice as fast as recorded.'
+)
+@concurrency_option
+@click.pass_obj
+async def replay(
+        config: Configuration,
+        file: str,
+        target: Optional[AnyHttpUrl],
+        preserve_timing: bool,
+        speed: float,
+        concurrency: Optional[int]
+):
+    """
+    Replays the requests of a HAR file.
+
+    FILE is a HAR file recorded with the --har option or exported from the network panel of a browser. Requests are
+    made concurrently with the same connection pool and a report compares the status and latency of each response
+    with the recorded ones.
+    """
+    items = read_har_file(Path(file), target)
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(
+            function_runner, tg.cancel_scope, replay_items, config, items, preserve_timing, speed, concurrency
+        )
+        tg.start_soon(signal_handler, tg.cancel_scope)
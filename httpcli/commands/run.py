@@ -0,0 +1,163 @@
+from typing import IO, Any, Dict, Iterator, Optional, Tuple
+
+import anyio
+import asyncclick as click
+
+from httpcli.assertions import ResponseChecker, get_response_checker
+from httpcli.commands.helpers import (
+    RequestItem, function_runner, signal_handler, perform_request, perform_concurrent_requests, print_summary_table,
+    print_pool_statistics, save_negotiated_protocols
+)
+from httpcli.configuration import Configuration
+from httpcli.console import console
+from httpcli.helpers import build_read_method_arguments
+from httpcli.jsonpath import JsonCondition
+from httpcli.options import as_completed_option, assertion_options, concurrency_option, http_output_options
+from httpcli.parameters import VARIABLE
+from httpcli.sessions import open_session
+from httpcli.templates import CompiledTemplate, read_data_rows
+from httpcli.transport import PoolStatistics, build_pooled_client_arguments
+
+
+def get_compiled_template(config: Configuration, name: str) -> CompiledTemplate:
+    if name not in config.templates:
+        available_templates = ', '.join(config.templates) or 'none'
+        raise click.UsageError(
+            f'template {name} not found in configuration, available templates: {available_templates}'
+        )
+    return CompiledTemplate(name, config.templates[name])
+
+
+def get_request_items(
+        template: CompiledTemplate, variables: Dict[str, str], data: IO[str]
+) -> Iterator[RequestItem]:
+    # variables given on the command line take precedence over the ones of the data file
+    number = 0
+    try:
+        for number, row in enumerate(read_data_rows(data), start=1):
+            url, arguments = template.render({**row, **variables})
+            yield template.method, url, arguments
+    except ValueError as e:
+        raise click.UsageError(f'{data.name}, row {number}: {e}')
+
+
+async def run_template(
+        config: Configuration,
+        template: CompiledTemplate,
+        variables: Dict[str, str],
+        output: Optional[str] = None,
+        download: bool = False,
+        output_format: str = 'text',
+        checker: Optional[ResponseChecker] = None
+) -> None:
+    try:
+        url, arguments = template.render(variables)
+    except ValueError as e:
+        console.print(f'[error]{e}')
+        raise click.Abort()
+
+    session = open_session(config.session)
+    base_arguments = await build_read_method_arguments(
+        config, arguments.pop('headers'), arguments.pop('cookies'), arguments.pop('params'), session
+    )
+    method_arguments = {'allow_redirects': base_arguments.pop('allow_redirects'), **arguments}
+    await perform_request(
+        template.method, url, config, base_arguments, method_arguments,  # type: ignore
+        output=output, download=download, session=session, output_format=output_format, checker=checker
+    )
+
+
+async def handle_run(
+        config: Configuration,
+        template: CompiledTemplate,
+        variables: Dict[str, str],
+        data: Optional[IO[str]],
+        output: Optional[str],
+        download: bool,
+        concurrency: Optional[int],
+        as_completed: bool,
+        output_format: str = 'text',
+        checker: Optional[ResponseChecker] = None
+) -> None:
+    if data is None:
+        await run_template(config, template, variables, output, download, output_format, checker)
+    else:
+        statistics = PoolStatistics()
+        session = open_session(config.session)
+        arguments = build_pooled_client_arguments(
+            config, statistics, await build_read_method_arguments(config, session=session)
+        )
+        items = get_request_items(template, variables, data)
+        results = await perform_concurrent_requests(
+            config, arguments, items, download, concurrency, as_completed, session, output_format, checker
+        )
+
+        if output_format == 'text':
+            print_summary_table(results)
+            print_pool_statistics(statistics, config.verbose)
+        save_negotiated_protocols(config, statistics)
+
+    if checker is not None:
+        checker.finish()
+
+
+@click.command()
+@click.argument('template')
+@click.option(
+    '-v', '--var', 'variables',
+    type=VARIABLE,
+    multiple=True,
+    help='Variable used to render the template in the form name=value, can be passed multiple times.'
+)
+@click.option(
+    '-d', '--data',
+    type=click.File(),
+    help='CSV file with a header line or json lines file. A request is made for each row, '
+         'using its values as variables.'
+)
+@concurrency_option
+@as_completed_option
+@http_output_options
+@assertion_options
+@click.pass_obj
+async def run(
+        config: Configuration,
+        template: str,
+        variables: Tuple[Tuple[str, str], ...],
+        data: Optional[IO[str]],
+        concurrency: Optional[int],
+        as_completed: bool,
+        output: Optional[str],
+        download: bool,
+        output_format: str,
+        expect_status: Tuple[str, ...],
+        expect_header: Tuple[Tuple[str, Optional[str]], ...],
+        expect_json: Tuple[JsonCondition, ...],
+        expect_schema: Optional[Dict[str, Any]],
+        max_latency: Optional[float],
+        report: Optional[str],
+        report_format: str
+):
+    """
+    Performs the request described by a template of the configuration file.
+
+    TEMPLATE is the name of the template in the templates section of the configuration. Placeholders like {{id}}
+    in its url, headers, query, cookies, form and json values are replaced by the given variables.
+
+    With --data, requests are made concurrently over the same connection pool and a summary table is printed at the
+    end. With the --expect-* and --max-latency options, each response is checked and the command exits with a status
+    of 1 if a check fails.
+    """
+    compiled_template = get_compiled_template(config, template)
+    checker = get_response_checker(
+        expect_status, expect_header, expect_json, expect_schema, max_latency, report, report_format
+    )
+    if data is not None and output is not None:
+        raise click.UsageError('--output cannot be used with --data, use --download instead')
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(
+            function_runner, tg.cancel_scope, handle_run, config, compiled_template, dict(variables), data, output,
+            download, concurrency, as_completed, output_format, checker
+        )
+        tg.start_soon(signal_handler, tg.cancel_scope)
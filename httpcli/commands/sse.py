@@ -1,4 +1,3 @@
-import json
 import re
 
 import anyio
@@ -7,17 +6,18 @@ import httpx
 from rich.markup import escape
 from rich.syntax import Syntax
 
+from httpcli import json_codec
 from httpcli.commands.helpers import print_response_headers, function_runner, signal_handler
 from httpcli.configuration import Configuration
 from httpcli.console import console
-from httpcli.helpers import build_base_httpx_arguments
 from httpcli.parameters import URL
+from httpcli.transport import build_client_arguments
 
 
 async def handle_sse(config: Configuration, url: str) -> None:
     event_regex = re.compile(r'event:\s*(.+)')
     data_regex = re.compile(r'data:\s*(.+)')
-    arguments = build_base_httpx_arguments(config)
+    arguments = build_client_arguments(config)
     allow_redirects = arguments.pop('allow_redirects')
     try:
         async with httpx.AsyncClient(**arguments) as client:
@@ -46,9 +46,9 @@ async def handle_sse(config: Configuration, url: str) -> None:
                             if match:
                                 try:
                                     line = match.group(1)
-                                    data = json.loads(line)
-                                    console.print(Syntax(json.dumps(data, indent=4), 'json'))
-                                except json.JSONDecodeError:
+                                    data = json_codec.loads(line)
+                                    console.print(Syntax(json_codec.dumps(data, indent=True), 'json'))
+                                except json_codec.JSONDecodeError:
                                     # we print the line as it if it is not a json string
                                     console.print(line)
                             else:
@@ -0,0 +1,160 @@
+import hashlib
+import time
+from typing import Any, Dict, IO, Optional, Sequence, Tuple
+
+import anyio
+import asyncclick as click
+import httpx
+
+from httpcli import json_codec
+from httpcli.configuration import Configuration
+from httpcli.console import console, error_console
+from httpcli.formats import FormattedOutput, RequestTimings
+from httpcli.helpers import build_read_method_arguments
+from httpcli.jsonpath import JsonCondition
+from httpcli.sessions import open_session
+from httpcli.transport import build_client_arguments
+from httpcli.types import HttpProperty
+from .helpers import print_result, read_response, update_session
+
+# the interval is multiplied by this factor each time the response does not change
+BACKOFF_FACTOR = 1.5
+DEFAULT_MAX_INTERVAL_FACTOR = 10
+# seconds added to the longest interval so that the connection is still alive when the next request is sent
+KEEPALIVE_MARGIN = 5
+
+
+class WatchState:
+    """What is known about the watched resource after the last response."""
+
+    def __init__(self):
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.body_hash: Optional[bytes] = None
+        self.data: Any = None
+
+    def get_conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag is not None:
+            headers['if-none-match'] = self.etag
+        if self.last_modified is not None:
+            headers['if-modified-since'] = self.last_modified
+        return headers
+
+    def update(self, response: httpx.Response, decode_json: bool) -> bool:
+        """Keeps the validators and the hash of the body of the response, returns True if the body changed."""
+        if response.status_code == 304:
+            return False
+        self.etag = response.headers.get('etag')
+        self.last_modified = response.headers.get('last-modified')
+        # only a digest of the last body is kept
+        body_hash = hashlib.blake2b(response.content, digest_size=16).digest()
+        if body_hash == self.body_hash:
+            return False
+        self.body_hash = body_hash
+        if decode_json:
+            try:
+                self.data = json_codec.loads(response.content)
+            except json_codec.JSONDecodeError:
+                self.data = None
+        return True
+
+
+def is_watch_done(
+        state: WatchState, status_code: int, conditions: Sequence[JsonCondition], status_codes: Sequence[int]
+) -> bool:
+    # a 304 response is not a stop status, the status of the last full response was checked when it was received
+    if status_code != 304 and status_code in status_codes:
+        return True
+    return state.data is not None and any(condition.matches(state.data) for condition in conditions)
+
+
+def get_next_interval(interval: float, current_interval: float, max_interval: float, changed: bool) -> float:
+    if changed:
+        return interval
+    return min(current_interval * BACKOFF_FACTOR, max_interval)
+
+
+async def watch_url(
+        url: str,
+        config: Configuration,
+        interval: float,
+        max_interval: Optional[float] = None,
+        conditions: Sequence[JsonCondition] = (),
+        status_codes: Sequence[int] = (),
+        headers: Optional[HttpProperty] = None,
+        query_params: Optional[HttpProperty] = None,
+        cookies: Optional[HttpProperty] = None,
+        output_format: str = 'text'
+) -> None:
+    """
+    Polls the url with the same client and prints the response each time its body changes. The interval grows while
+    the response does not change and comes back to its initial value when it does. Stops when a status code or a
+    condition on the json body is met.
+    """
+    session = open_session(config.session)
+    arguments = await build_read_method_arguments(config, headers, cookies, query_params, session)
+    allow_redirects = arguments.pop('allow_redirects')
+    max_interval = max(max_interval or interval * DEFAULT_MAX_INTERVAL_FACTOR, interval)
+    formatted_output = FormattedOutput(output_format) if output_format != 'text' else None
+    state = WatchState()
+    current_interval = interval
+    status_code = None
+    # the httpx default keeps idle connections for 5 s, longer intervals would open a new connection for each poll
+    limits = httpx.Limits(
+        max_connections=config.pool.max_connections,
+        max_keepalive_connections=config.pool.max_keepalive_connections,
+        keepalive_expiry=max_interval + KEEPALIVE_MARGIN
+    )
+    client_arguments = build_client_arguments(config, arguments, limits=limits)
+
+    async with httpx.AsyncClient(**client_arguments, timeout=None) as client:
+        try:
+            while True:
+                with anyio.move_on_after(config.timeout) as scope:
+                    try:
+                        started, start = time.time(), time.perf_counter()
+                        request = client.build_request('GET', url, headers=state.get_conditional_headers())
+                        response = await client.send(request, allow_redirects=allow_redirects, stream=True)
+                        headers_latency = time.perf_counter() - start
+                        status_code = response.status_code
+                        try:
+                            response, decoder = await read_response(response)
+                        finally:
+                            await response.aclose()
+                    except httpx.HTTPError as e:
+                        console.print(f'[error]unexpected error: {e}')
+                        raise click.Abort()
+                if scope.cancel_called:
+                    console.print('[error]the request timeout has expired')
+                    raise click.Abort()
+
+                changed = state.update(response, bool(conditions))
+                if changed:
+                    if formatted_output is None:
+                        print_result(response, decoder, None, config.verbose)
+                    else:
+                        timings = RequestTimings(started, headers_latency, time.perf_counter() - start)
+                        formatted_output.add_response(response, timings)
+                if is_watch_done(state, status_code, conditions, status_codes):
+                    return
+
+                current_interval = get_next_interval(interval, current_interval, max_interval, changed)
+                if config.verbose and not changed:
+                    error_console.print(f'[info]no change, next request in {current_interval:.2f} s')
+                await anyio.sleep(current_interval)
+        finally:
+            update_session(session, config, client, status_code == 401)
+
+
+def get_watch_arguments(
+        url: Tuple[str, ...], file: Optional[IO[str]], output: Optional[str], download: bool, output_format: str
+) -> str:
+    """Returns the url to watch, raises click.UsageError if the other options cannot be used with --watch."""
+    if len(url) != 1 or file is not None:
+        raise click.UsageError('--watch needs exactly one url and cannot be used with --file')
+    if output is not None or download:
+        raise click.UsageError('--watch cannot be used with --output or --download')
+    if output_format not in ('text', 'jsonl'):
+        raise click.UsageError('--watch prints each change as it happens, it cannot be used with --format json or har')
+    return str(url[0])
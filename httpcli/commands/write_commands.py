@@ -1,9 +1,11 @@
+from typing import Optional
+
 import anyio
 import asyncclick as click
 from pydantic import AnyHttpUrl
 
 from httpcli.configuration import Configuration
-from httpcli.options import http_query_options, http_write_options
+from httpcli.options import http_query_options, http_output_options, http_write_options
 from httpcli.parameters import URL
 from httpcli.types import HttpProperty
 from .helpers import perform_read_request, perform_write_request, function_runner, signal_handler
@@ -12,9 +14,17 @@ from .helpers import perform_read_request, perform_write_request, function_runne
 @click.command()
 @click.argument('url', type=URL)
 @http_query_options
+@http_output_options
 @click.pass_obj
 async def delete(
-        config: Configuration, url: AnyHttpUrl, headers: HttpProperty, query_params: HttpProperty, cookies: HttpProperty
+        config: Configuration,
+        url: AnyHttpUrl,
+        headers: HttpProperty,
+        query_params: HttpProperty,
+        cookies: HttpProperty,
+        output: Optional[str],
+        download: bool,
+        output_format: str
 ):
     """
     Performs http DELETE request.
@@ -24,7 +34,7 @@ async def delete(
     async with anyio.create_task_group() as tg:
         tg.start_soon(
             function_runner, tg.cancel_scope, perform_read_request, 'DELETE', str(url), config, headers, query_params,
-            cookies
+            cookies, output, download, output_format
         )
         tg.start_soon(signal_handler, tg.cancel_scope)
 
@@ -32,6 +42,7 @@ async def delete(
 @click.command()
 @click.argument('url', type=URL)
 @http_query_options
+@http_output_options
 @http_write_options
 @click.pass_obj
 async def post(
@@ -41,7 +52,11 @@ async def post(
         cookies: HttpProperty,
         form: HttpProperty,
         json_data: HttpProperty,
-        raw: bytes
+        raw: bytes,
+        compress: Optional[str],
+        output: Optional[str],
+        download: bool,
+        output_format: str
 ):
     """
     Performs http POST request.
@@ -51,7 +66,7 @@ async def post(
     async with anyio.create_task_group() as tg:
         tg.start_soon(
             function_runner, tg.cancel_scope, perform_write_request, 'POST', str(url), config, headers, query_params,
-            cookies, form, json_data, raw
+            cookies, form, json_data, raw, compress, output, download, output_format
         )
         tg.start_soon(signal_handler, tg.cancel_scope)
 
@@ -59,6 +74,7 @@ async def post(
 @click.command()
 @click.argument('url', type=URL)
 @http_query_options
+@http_output_options
 @http_write_options
 @click.pass_obj
 async def patch(
@@ -68,7 +84,11 @@ async def patch(
         cookies: HttpProperty,
         form: HttpProperty,
         json_data: HttpProperty,
-        raw: bytes
+        raw: bytes,
+        compress: Optional[str],
+        output: Optional[str],
+        download: bool,
+        output_format: str
 ):
     """
     Performs http PATCH request.
@@ -78,7 +98,7 @@ async def patch(
     async with anyio.create_task_group() as tg:
         tg.start_soon(
             function_runner, tg.cancel_scope, perform_write_request, 'PATCH', str(url), config, headers, query_params,
-            cookies, form, json_data, raw
+            cookies, form, json_data, raw, compress, output, download, output_format
         )
         tg.start_soon(signal_handler, tg.cancel_scope)
 
@@ -86,6 +106,7 @@ async def patch(
 @click.command()
 @click.argument('url', type=URL)
 @http_query_options
+@http_output_options
 @http_write_options
 @click.pass_obj
 async def put(
@@ -95,7 +116,11 @@ async def put(
         cookies: HttpProperty,
         form: HttpProperty,
         json_data: HttpProperty,
-        raw: bytes
+        raw: bytes,
+        compress: Optional[str],
+        output: Optional[str],
+        download: bool,
+        output_format: str
 ):
     """
     Performs http PUT request.
@@ -105,6 +130,6 @@ async def put(
     async with anyio.create_task_group() as tg:
         tg.start_soon(
             function_runner, tg.cancel_scope, perform_write_request, 'PUT', str(url), config, headers, query_params,
-            cookies, form, json_data, raw
+            cookies, form, json_data, raw, compress, output, download, output_format
         )
         tg.start_soon(signal_handler, tg.cancel_scope)
@@ -0,0 +1,389 @@
+import time
+from typing import IO, AsyncIterator, List, Optional, Union
+
+import anyio
+import asyncclick as click
+import httpx
+from anyio.abc import ByteStream
+from anyio.streams.tls import TLSStream
+from rich.markup import escape
+from rich.syntax import Syntax
+from wsproto import ConnectionType, WSConnection
+from wsproto.connection import ConnectionState
+from wsproto.events import (
+    AcceptConnection, BytesMessage, CloseConnection, Event, Ping, Pong, RejectConnection, RejectData, Request,
+    TextMessage
+)
+
+from httpcli import json_codec
+from httpcli.commands.helpers import print_response_headers, function_runner, signal_handler
+from httpcli.configuration import Configuration
+from httpcli.console import console
+from httpcli.helpers import build_read_method_arguments, get_client_certificate
+from httpcli.options import http_query_options
+from httpcli.parameters import WS_URL
+from httpcli.tls import ClientCertificate, get_ssl_context
+from httpcli.types import HttpProperty
+
+Message = Union[str, bytes]
+
+
+class WebSocketClient:
+    """
+    Minimal websocket client using an anyio byte stream for the network part and wsproto for the protocol part.
+    """
+
+    def __init__(self, stream: ByteStream):
+        self._stream = stream
+        self._connection = WSConnection(ConnectionType.CLIENT)
+        self._send_lock = anyio.Lock()
+        self.pong_received = True
+
+    @property
+    def is_open(self) -> bool:
+        return self._connection.state is ConnectionState.OPEN
+
+    async def send_event(self, event: Event) -> None:
+        async with self._send_lock:
+            await self._stream.send(self._connection.send(event))
+
+    async def send_message(self, message: Message) -> None:
+        if isinstance(message, bytes):
+            await self.send_event(BytesMessage(data=message))
+        else:
+            await self.send_event(TextMessage(data=message))
+
+    async def _receive_data(self) -> Optional[bytes]:
+        try:
+            return await self._stream.receive()
+        except (anyio.EndOfStream, anyio.BrokenResourceError):
+            return None
+
+    async def handshake(self, request: httpx.Request) -> httpx.Response:
+        extra_headers = [(name, value) for name, value in request.headers.raw if name.lower() != b'host']
+        await self.send_event(
+            Request(host=request.headers['host'], target=request.url.raw_path.decode(), extra_headers=extra_headers)
+        )
+        status_code = 0
+        headers: list = []
+        body = b''
+        while True:
+            data = await self._receive_data()
+            self._connection.receive_data(data)
+            for event in self._connection.events():
+                if isinstance(event, AcceptConnection):
+                    return httpx.Response(101, headers=event.extra_headers)
+                elif isinstance(event, RejectConnection):
+                    status_code, headers = event.status_code, event.headers
+                    if not event.has_body:
+                        return httpx.Response(status_code, headers=headers)
+                elif isinstance(event, RejectData):
+                    body += event.data
+                    if event.body_finished:
+                        return httpx.Response(status_code, headers=headers, content=body)
+            if data is None:
+                raise anyio.BrokenResourceError('connection closed during the websocket handshake')
+
+    async def messages(self) -> AsyncIterator[Message]:
+        """Yields complete messages until the connection is closed, answering control frames on the way."""
+        text_parts: List[str] = []
+        bytes_parts: List[bytes] = []
+        while True:
+            data = await self._receive_data()
+            self._connection.receive_data(data)
+            for event in self._connection.events():
+                if isinstance(event, TextMessage):
+                    text_parts.append(event.data)
+                    if event.message_finished:
+                        yield ''.join(text_parts)
+                        text_parts.clear()
+                elif isinstance(event, BytesMessage):
+                    bytes_parts.append(event.data)
+                    if event.message_finished:
+                        yield b''.join(bytes_parts)
+                        bytes_parts.clear()
+                elif isinstance(event, Ping):
+                    await self.send_event(event.response())
+                elif isinstance(event, Pong):
+                    self.pong_received = True
+                elif isinstance(event, CloseConnection):
+                    if self._connection.state is ConnectionState.REMOTE_CLOSING:
+                        await self.send_event(event.response())
+                    return
+            if data is None:
+                return
+
+    async def close(self, code: int = 1000) -> None:
+        if self.is_open:
+            await self.send_event(CloseConnection(code=code))
+
+
+async def build_handshake_request(
+        config: Configuration,
+        url: str,
+        headers: Optional[HttpProperty] = None,
+        cookies: Optional[HttpProperty] = None,
+        query_params: Optional[HttpProperty] = None
+) -> httpx.Request:
+    arguments = await build_read_method_arguments(config, headers, cookies, query_params)
+    request = httpx.Request(
+        'GET', url, headers=arguments.get('headers'), cookies=arguments.get('cookies'), params=arguments.get('params')
+    )
+    auth = arguments.get('auth')
+    if isinstance(auth, httpx.DigestAuth):
+        console.print('[error]digest authentication is not supported for websockets')
+        raise click.Abort()
+    if auth is not None:
+        request = next(auth.auth_flow(request))
+    return request
+
+
+async def open_proxy_tunnel(proxy_url: httpx.URL, host: str, port: int, verify: Union[bool, str]) -> ByteStream:
+    proxy_port = proxy_url.port or (443 if proxy_url.scheme == 'https' else 80)
+    stream: ByteStream = await anyio.connect_tcp(proxy_url.host, proxy_port)
+    try:
+        if proxy_url.scheme == 'https':
+            stream = await TLSStream.wrap(
+                stream, hostname=proxy_url.host, ssl_context=get_ssl_context(verify, False), standard_compatible=False
+            )
+        await stream.send(f'CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n\r\n'.encode())
+        response = b''
+        while b'\r\n\r\n' not in response:
+            response += await stream.receive()
+    except anyio.EndOfStream:
+        await anyio.aclose_forcefully(stream)
+        raise anyio.BrokenResourceError('proxy closed the connection before opening the tunnel')
+    except BaseException:
+        # also on cancellation, the connection to the proxy must not be left open
+        await anyio.aclose_forcefully(stream)
+        raise
+
+    status_line = response.split(b'\r\n', 1)[0].split()
+    if len(status_line) < 2 or not status_line[1].startswith(b'2'):
+        await stream.aclose()
+        raise anyio.BrokenResourceError(f'proxy refused to open a tunnel: {b" ".join(status_line[1:]).decode()}')
+    return stream
+
+
+async def open_websocket_stream(
+        url: httpx.URL,
+        verify: Union[bool, str],
+        proxy: Optional[str] = None,
+        cert: Optional[ClientCertificate] = None,
+        uds: Optional[str] = None
+) -> ByteStream:
+    port = url.port or (443 if url.scheme == 'wss' else 80)
+    stream: ByteStream
+    # like httpx, a proxy takes precedence over the unix socket
+    if proxy is not None:
+        stream = await open_proxy_tunnel(httpx.URL(proxy), url.host, port, verify)
+    elif uds is not None:
+        stream = await anyio.connect_unix(uds)
+    else:
+        stream = await anyio.connect_tcp(url.host, port)
+
+    if url.scheme == 'wss':
+        try:
+            stream = await TLSStream.wrap(
+                stream, hostname=url.host, ssl_context=get_ssl_context(verify, False, cert), standard_compatible=False
+            )
+        except BaseException:
+            await anyio.aclose_forcefully(stream)
+            raise
+    return stream
+
+
+def print_message(message: Message) -> None:
+    if isinstance(message, bytes):
+        console.print(f'[blue]binary:[/] {message.hex()}')
+        return
+
+    try:
+        data = json_codec.loads(message)
+        console.print(Syntax(json_codec.dumps(data, indent=True), 'json'))
+    except json_codec.JSONDecodeError:
+        console.print(escape(message))
+
+
+async def read_lines(file: IO[str]) -> AsyncIterator[str]:
+    while True:
+        # cancellable is needed to not block Ctrl+C while we are waiting for user input
+        line = await anyio.to_thread.run_sync(file.readline, cancellable=True)
+        if not line:
+            return
+        yield line.rstrip('\r\n')
+
+
+async def send_input(client: WebSocketClient, file: Optional[IO[str]], binary: bool) -> None:
+    if file is None:
+        return
+
+    async for line in read_lines(file):
+        if not client.is_open:
+            return
+        await client.send_message(line.encode() if binary else line)
+    await client.close()
+
+
+async def send_pings(client: WebSocketClient, interval: float) -> None:
+    while True:
+        await anyio.sleep(interval)
+        if not client.pong_received:
+            console.print('[error]the server did not answer the last ping')
+            raise click.Abort()
+        client.pong_received = False
+        await client.send_event(Ping(payload=str(time.time()).encode()))
+
+
+def print_echo_statistics(latencies: List[float], duration: float) -> None:
+    latencies = sorted(latencies)
+    count = len(latencies)
+
+    def percentile(value: float) -> float:
+        return latencies[min(count - 1, int(count * value))] * 1000
+
+    console.print(f'[info]messages:[/] {count}')
+    console.print(f'[info]duration:[/] {duration:.3f} s')
+    console.print(f'[info]throughput:[/] {count / duration:.1f} messages/s')
+    console.print(
+        f'[info]latency (ms):[/] min {latencies[0] * 1000:.3f}, mean {sum(latencies) / count * 1000:.3f}, '
+        f'p50 {percentile(0.5):.3f}, p95 {percentile(0.95):.3f}, max {latencies[-1] * 1000:.3f}'
+    )
+
+
+async def run_echo_test(client: WebSocketClient, count: int, payload_size: int, binary: bool) -> None:
+    payload: Message = b'x' * payload_size if binary else 'x' * payload_size
+    messages = client.messages()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(count):
+        sent_at = time.perf_counter()
+        await client.send_message(payload)
+        try:
+            await messages.__anext__()
+        except StopAsyncIteration:
+            console.print('[error]the connection was closed by the server before the end of the test')
+            raise click.Abort()
+        latencies.append(time.perf_counter() - sent_at)
+    duration = time.perf_counter() - start
+
+    await client.close()
+    # we wait for the server to acknowledge the closing handshake
+    async for _ in messages:
+        pass
+    print_echo_statistics(latencies, duration)
+
+
+async def handle_ws(
+        config: Configuration,
+        url: str,
+        headers: HttpProperty,
+        query_params: HttpProperty,
+        cookies: HttpProperty,
+        binary: bool,
+        file: Optional[IO[str]],
+        ping_interval: Optional[float],
+        echo_count: Optional[int],
+        payload_size: int
+) -> None:
+    request = await build_handshake_request(config, url, headers, cookies, query_params)
+    verify = str(config.verify) if not isinstance(config.verify, bool) else config.verify
+    proxy = str(config.proxy) if config.proxy is not None else None
+    uds = str(config.transport.uds) if config.transport.uds is not None else None
+    stream: Optional[ByteStream] = None
+    try:
+        with anyio.move_on_after(config.timeout) as scope:
+            stream = await open_websocket_stream(
+                request.url, verify, proxy, get_client_certificate(config), uds
+            )
+            client = WebSocketClient(stream)
+            response = await client.handshake(request)
+
+        if scope.cancel_called:
+            console.print('[error]the request timeout has expired')
+            raise click.Abort()
+
+        if response.status_code != 101:
+            console.print(f'[error]unexpected error: {response.text}')
+            raise click.Abort()
+
+        if echo_count is not None:
+            await run_echo_test(client, echo_count, payload_size, binary)
+            return
+
+        print_response_headers(response)
+        console.print()
+        async with anyio.create_task_group() as tg:
+            if ping_interval is not None:
+                tg.start_soon(send_pings, client, ping_interval)
+            tg.start_soon(send_input, client, file, binary)
+            async for message in client.messages():
+                print_message(message)
+            tg.cancel_scope.cancel()
+    except (OSError, anyio.BrokenResourceError) as e:
+        console.print(f'[error]unexpected error: {e}')
+        raise click.Abort()
+    finally:
+        # the stream may be opened when the timeout expires during the handshake
+        if stream is not None:
+            await anyio.aclose_forcefully(stream)
+
+
+@click.command()
+@click.argument('url', type=WS_URL)
+@http_query_options
+@click.option(
+    '-f', '--file',
+    type=click.File(),
+    help='File whose lines are sent as messages. If not provided, lines are read from the standard input, the '
+         'connection is closed at the end of the input (Ctrl+D in a terminal).'
+)
+@click.option('-b', '--binary', is_flag=True, help='Send messages as binary frames instead of text frames.')
+@click.option(
+    '--ping-interval',
+    type=click.FloatRange(min=0, min_open=True),
+    help='Interval in seconds between two keepalive pings. The connection is aborted if a ping is not answered.'
+)
+@click.option(
+    '--echo', 'echo_count',
+    type=click.IntRange(min=1),
+    help='Number of messages to send one after the other to an echo endpoint. Throughput and latency statistics '
+         'are printed at the end instead of the messages.'
+)
+@click.option(
+    '--payload-size',
+    type=click.IntRange(min=1),
+    default=32,
+    show_default=True,
+    help='Size of the messages sent in echo mode.'
+)
+@click.pass_obj
+# well, technically url is not a str but a pydantic.AnyUrl object inheriting from str
+# but it does not seem to bother httpx, so we can use the convenient str for signature
+async def ws(
+        config: Configuration,
+        url: str,
+        headers: HttpProperty,
+        query_params: HttpProperty,
+        cookies: HttpProperty,
+        file: Optional[IO[str]],
+        binary: bool,
+        ping_interval: Optional[float],
+        echo_count: Optional[int],
+        payload_size: int
+):
+    """
+    Opens a websocket connection, sends input lines as messages and prints received messages.
+
+    URL is the websocket url (ws:// or wss://).
+    """
+    # lines typed in a terminal are sent as well, reading them does not block Ctrl+C
+    if file is None:
+        file = click.get_text_stream('stdin')
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(
+            function_runner, tg.cancel_scope, handle_ws, config, str(url), headers, query_params, cookies, binary,
+            file, ping_interval, echo_count, payload_size
+        )
+        tg.start_soon(signal_handler, tg.cancel_scope)
@@ -1,21 +1,42 @@
 import json
-from typing import Optional, Union, Any
+from typing import Optional, Union, Any, Dict, List
 
-from pydantic import BaseSettings, AnyHttpUrl, validator, FilePath
+from pydantic import BaseSettings, AnyHttpUrl, validator, root_validator, DirectoryPath, FilePath, NonNegativeFloat
 from typing_extensions import Literal
 
-from .models import BasicAuth, DigestAuth, OAuth2PasswordBearer
+from .dns import parse_resolve_entry
+from .encodings import check_encodings
+from .models import BasicAuth, DigestAuth, OAuth2PasswordBearer, PoolSettings, RequestTemplate, TransportSettings
+from .sessions import check_session_name
+
+# fields given as plain values in environment variables, like the corresponding command line options: encodings
+# separated by commas, and curl-style resolve entries separated by spaces since a comma separates their addresses
+PLAIN_LIST_FIELDS = {'accept_encoding', 'resolve'}
 
 
 class Configuration(BaseSettings):
     proxy: Optional[AnyHttpUrl] = None
-    version: Literal['h1', 'h2'] = 'h1'
+    version: Literal['h1', 'h2', 'auto'] = 'h1'
     auth: Optional[Union[BasicAuth, DigestAuth, OAuth2PasswordBearer]] = None
     follow_redirects: bool = True
-    verify: Union[bool, FilePath] = True
+    # a CA bundle or a directory of certificates named after their subject hash like the one of openssl rehash
+    verify: Union[bool, FilePath, DirectoryPath] = True
+    # certificate presented to servers requiring mutual TLS, the key may be in the same file
+    client_cert: Optional[FilePath] = None
+    client_key: Optional[FilePath] = None
     timeout: Optional[float] = 5.0
+    pool: PoolSettings = PoolSettings()
+    transport: TransportSettings = TransportSettings()
+    verbose: bool = False
+    accept_encoding: Optional[List[str]] = None
+    templates: Dict[str, RequestTemplate] = {}
+    session: Optional[str] = None
+    # curl-style overrides in the form host:port:address
+    resolve: List[str] = []
+    # number of seconds resolved addresses are kept for the next invocations, 0 disables the persistent cache
+    dns_cache_ttl: NonNegativeFloat = 0.0
 
-    @validator('auth', pre=True)
+    @validator('auth', 'pool', 'transport', 'templates', pre=True)
     def convert_str_to_dict(cls, value: Any) -> Any:
         if isinstance(value, str):
             try:
@@ -24,5 +45,39 @@ class Configuration(BaseSettings):
                 raise ValueError(f'{value} is not a valid json string')
         return value
 
+    @validator('accept_encoding', pre=True)
+    def check_accept_encoding(cls, value: Any) -> Any:
+        if isinstance(value, str):
+            value = value.split(',')
+        if value is None:
+            return value
+        return check_encodings(value)
+
+    @validator('resolve', pre=True)
+    def split_resolve_entries(cls, value: Any) -> Any:
+        return value.split() if isinstance(value, str) else value
+
+    @validator('resolve', each_item=True)
+    def check_resolve_entry(cls, value: str) -> str:
+        parse_resolve_entry(value)
+        return value
+
+    @root_validator(skip_on_failure=True)
+    def check_client_key(cls, values: Dict[str, Any]) -> Dict[str, Any]:
+        if values.get('client_key') is not None and values.get('client_cert') is None:
+            raise ValueError('client_key cannot be used without client_cert')
+        return values
+
+    @validator('session')
+    def check_session(cls, value: Optional[str]) -> Optional[str]:
+        return value if value is None else check_session_name(value)
+
     class Config:
         env_prefix = 'http_cli_'
+
+        @classmethod
+        def parse_env_var(cls, field_name: str, raw_value: str) -> Any:
+            # a json array is still accepted for these fields
+            if field_name in PLAIN_LIST_FIELDS and not raw_value.lstrip().startswith('['):
+                return raw_value
+            return cls.json_loads(raw_value)  # type: ignore
@@ -9,3 +9,5 @@ custom_theme = Theme({
 })
 
 console = Console(theme=custom_theme)
+# used for messages which must not be mixed with a response body written on the standard output
+error_console = Console(theme=custom_theme, stderr=True)
@@ -0,0 +1,110 @@
+"""
+Hostnames are resolved once per run and the addresses are shared by all the connections of the run. Addresses can
+also be kept in the cache directory for the next invocations, or pinned with curl-style overrides.
+"""
+import ipaddress
+import socket
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import anyio
+
+from httpcli.cache import DNSCache
+
+
+def _is_ip_address(value: str) -> bool:
+    try:
+        ipaddress.ip_address(value)
+    except ValueError:
+        return False
+    return True
+
+
+def parse_resolve_entry(entry: str) -> Tuple[str, Optional[int], List[str]]:
+    """
+    Parses an override in the form host:port:address[,address...] like the --resolve option of curl.
+    IPv6 addresses may be enclosed in brackets and the port may be * to match all ports, in which case None is
+    returned as port. Raises ValueError if the entry is not valid.
+    """
+    host, _, rest = entry.partition(':')
+    port, _, addresses_part = rest.partition(':')
+    if not host or not port or not addresses_part:
+        raise ValueError(f'{entry} is not in the form host:port:address')
+
+    if port == '*':
+        parsed_port = None
+    elif port.isdigit() and 0 < int(port) < 65536:
+        parsed_port = int(port)
+    else:
+        raise ValueError(f'{port} is not a valid port in {entry}')
+
+    addresses = []
+    for address in addresses_part.split(','):
+        address = address.strip()
+        if address.startswith('[') and address.endswith(']'):
+            address = address[1:-1]
+        if not _is_ip_address(address):
+            raise ValueError(f'{address} is not a valid ip address in {entry}')
+        addresses.append(address)
+    return host.lower(), parsed_port, addresses
+
+
+class Resolver:
+    """
+    Resolves hostnames, looking in order at the overrides, the addresses already resolved during the run, the
+    persistent cache if one is given and finally the system resolver.
+    """
+
+    def __init__(self, overrides: Iterable[str] = (), cache: Optional[DNSCache] = None):
+        self._overrides: Dict[Tuple[str, Optional[int]], List[str]] = {}
+        for entry in overrides:
+            host, port, addresses = parse_resolve_entry(entry)
+            self._overrides[host, port] = addresses
+        self._cache = cache
+        self._addresses: Dict[Tuple[str, int], List[str]] = {}
+        # concurrent connections to the same host wait for the first lookup instead of doing their own
+        self._locks: Dict[Tuple[str, int], anyio.Lock] = {}
+        self.lookups = 0
+        self.lookup_time = 0.0
+
+    def _get_override(self, host: str, port: int) -> Optional[List[str]]:
+        return self._overrides.get((host, port)) or self._overrides.get((host, None))
+
+    async def _lookup(self, host: str, port: int) -> List[str]:
+        start = time.perf_counter()
+        try:
+            infos = await anyio.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        finally:
+            self.lookups += 1
+            self.lookup_time += time.perf_counter() - start
+        addresses: List[str] = []
+        for *_, socket_address in infos:
+            if socket_address[0] not in addresses:
+                addresses.append(socket_address[0])
+        return addresses
+
+    async def resolve(self, host: str, port: int) -> List[str]:
+        """Returns the addresses of the host, raises OSError if it cannot be resolved."""
+        host = host.lower()
+        if _is_ip_address(host):
+            return [host]
+
+        override = self._get_override(host, port)
+        if override is not None:
+            return override
+
+        key = (host, port)
+        lock = self._locks.setdefault(key, anyio.Lock())
+        async with lock:
+            if key in self._addresses:
+                return self._addresses[key]
+
+            addresses = self._cache.get(host, port) if self._cache is not None else None
+            if addresses is None:
+                addresses = await self._lookup(host, port)
+                if self._cache is not None:
+                    self._cache.set(host, port, addresses)
+                    self._cache.save()
+
+            self._addresses[key] = addresses
+            return addresses
@@ -0,0 +1,255 @@
+import datetime
+import time
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Type
+
+import httpx
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# size of the pieces given to compressors, this bounds the memory used to compress a big in-memory body
+COMPRESSION_CHUNK_SIZE = 64 * 1024
+FILE_EXTENSIONS = {'gzip': '.gz', 'deflate': '.zz', 'br': '.br', 'zstd': '.zst'}
+ENCODINGS = ['identity', 'gzip', 'deflate', 'br', 'zstd']
+ENCODING_PACKAGES = {'br': 'brotli', 'zstd': 'zstandard'}
+
+
+class IdentityDecoder:
+    def decode(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b''
+
+
+class GZipDecoder(IdentityDecoder):
+    def __init__(self):
+        self._decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+
+    def decode(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+
+    def flush(self) -> bytes:
+        return self._decompressor.flush()
+
+
+class DeflateDecoder(IdentityDecoder):
+    def __init__(self):
+        self._first_attempt = True
+        self._decompressor = zlib.decompressobj()
+
+    def decode(self, data: bytes) -> bytes:
+        # some servers send raw deflate data without zlib header, like httpx we handle both cases
+        was_first_attempt = self._first_attempt
+        self._first_attempt = False
+        try:
+            return self._decompressor.decompress(data)
+        except zlib.error:
+            if was_first_attempt:
+                self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                return self.decode(data)
+            raise
+
+    def flush(self) -> bytes:
+        return self._decompressor.flush()
+
+
+class BrotliDecoder(IdentityDecoder):
+    def __init__(self):
+        self._decompressor = brotli.Decompressor()
+
+    def decode(self, data: bytes) -> bytes:
+        return self._decompressor.process(data)
+
+
+class ZStandardDecoder(IdentityDecoder):
+    def __init__(self):
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    def decode(self, data: bytes) -> bytes:
+        # the decompressor cannot be called anymore once the frame is complete, even with empty data
+        if not data:
+            return b''
+        return self._decompressor.decompress(data)
+
+
+DECODERS: Dict[str, Type[IdentityDecoder]] = {
+    'identity': IdentityDecoder,
+    'gzip': GZipDecoder,
+    'deflate': DeflateDecoder
+}
+DECODING_ERRORS: List[Type[Exception]] = [zlib.error]
+
+if brotli is not None:
+    DECODERS['br'] = BrotliDecoder
+    DECODING_ERRORS.append(brotli.error)
+
+if zstandard is not None:
+    DECODERS['zstd'] = ZStandardDecoder
+    DECODING_ERRORS.append(zstandard.ZstdError)
+
+
+def get_supported_encodings() -> List[str]:
+    return list(DECODERS)
+
+
+def check_encodings(encodings: Iterable[Any]) -> List[str]:
+    """Returns the normalized encodings, raises ValueError if one of them is unknown or cannot be decoded."""
+    checked_encodings = []
+    for encoding in encodings:
+        encoding = str(encoding).strip().lower()
+        if encoding not in ENCODINGS:
+            raise ValueError(f'{encoding} is not a supported encoding, choose among {", ".join(ENCODINGS)}')
+        if encoding not in DECODERS:
+            raise ValueError(f'{encoding} encoding requires the {ENCODING_PACKAGES[encoding]} package to be installed')
+        checked_encodings.append(encoding)
+    return checked_encodings
+
+
+def get_encodings(content_encoding: Optional[str]) -> List[str]:
+    if not content_encoding:
+        return []
+    return [value.strip().lower() for value in content_encoding.split(',') if value.strip()]
+
+
+def get_file_extension(content_encoding: Optional[str]) -> str:
+    return ''.join(FILE_EXTENSIONS.get(encoding, '') for encoding in get_encodings(content_encoding))
+
+
+class ContentDecoder:
+    """
+    Incrementally decodes a body encoded following the given content-encoding header value.
+    It also keeps track of the sizes before and after decoding and of the time spent decoding.
+    """
+
+    def __init__(self, content_encoding: Optional[str] = None):
+        self.encodings = get_encodings(content_encoding)
+        # encodings are listed in the order they were applied, so we need to decode in the reverse order
+        # unknown encodings are ignored like httpx does
+        self._decoders = [DECODERS[encoding]() for encoding in reversed(self.encodings) if encoding in DECODERS]
+        self.raw_size = 0
+        self.size = 0
+        self.decode_time = 0.0
+
+    @property
+    def ratio(self) -> float:
+        return self.size / self.raw_size if self.raw_size else 1.0
+
+    def _run(self, data: bytes, flush: bool) -> bytes:
+        start = time.perf_counter()
+        try:
+            for decoder in self._decoders:
+                data = decoder.decode(data)
+                if flush:
+                    data += decoder.flush()
+        except tuple(DECODING_ERRORS) as e:
+            raise httpx.DecodingError(f'unable to decode content: {e}')
+        self.decode_time += time.perf_counter() - start
+        self.size += len(data)
+        return data
+
+    def decode(self, data: bytes) -> bytes:
+        self.raw_size += len(data)
+        return self._run(data, flush=False)
+
+    def flush(self) -> bytes:
+        return self._run(b'', flush=True)
+
+
+class DecodedResponse(httpx.Response):
+    """
+    Response whose body was decoded by a ContentDecoder. httpx would decode the body a second time following the
+    content-encoding header if it was given as content, so it is given as a stream and returned by content.
+    """
+
+    def __init__(self, response: httpx.Response, content: bytes):
+        super().__init__(
+            response.status_code, headers=response.headers, stream=httpx.ByteStream(content), request=response.request,
+            extensions=response.extensions, history=response.history
+        )
+        self._response = response
+        self._decoded_content = content
+
+    @property
+    def content(self) -> bytes:
+        return self._decoded_content
+
+    @property
+    def elapsed(self) -> datetime.timedelta:
+        # the elapsed time is set on the streamed response when it is closed
+        return self._response.elapsed
+
+
+class GZipCompressor:
+    def __init__(self):
+        self._compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliCompressor(GZipCompressor):
+    def __init__(self):
+        self._compressor = brotli.Compressor()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZStandardCompressor(GZipCompressor):
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor().compressobj()
+
+
+COMPRESSORS: Dict[str, Type[GZipCompressor]] = {'gzip': GZipCompressor}
+
+if brotli is not None:
+    COMPRESSORS['br'] = BrotliCompressor
+
+if zstandard is not None:
+    COMPRESSORS['zstd'] = ZStandardCompressor
+
+
+class CompressedStream(httpx.AsyncByteStream):
+    """Compresses a request body on the fly, chunk by chunk, so the compressed body is never held in memory."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, encoding: str):
+        self._stream = stream
+        self.encoding = encoding
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        # a new compressor is created for each iteration since httpx iterates again on the body when following
+        # 307 and 308 redirections
+        compressor = COMPRESSORS[self.encoding]()
+        async for chunk in self._stream:
+            view = memoryview(chunk)
+            for start in range(0, len(view), COMPRESSION_CHUNK_SIZE):
+                compressed = compressor.compress(view[start:start + COMPRESSION_CHUNK_SIZE])
+                if compressed:
+                    yield compressed
+        yield compressor.flush()
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+
+def compress_request(request: httpx.Request, encoding: str) -> None:
+    request.stream = CompressedStream(request.stream, encoding)  # type: ignore
+    request.headers['Content-Encoding'] = encoding
+    # the final size is not known before the body is sent, so we use chunked transfer encoding
+    request.headers.pop('Content-Length', None)
+    request.headers['Transfer-Encoding'] = 'chunked'
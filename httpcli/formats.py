@@ -0,0 +1,241 @@
+"""
+Machine readable outputs of the request commands, selected with the --format option.
+
+- json: one document, an object for a single request or an array when many requests are made
+- jsonl: one object per line, written as soon as each response is received
+- har: an HTTP Archive 1.2 document which can be opened in the network panel of browsers or in HAR viewers
+
+Documents are serialized with the json codec and written in one call, without the rich console, so that they can be
+piped to other tools. Bodies are kept as text when they can be decoded, otherwise they are base64 encoded.
+"""
+import base64
+import datetime
+from email.message import Message
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import asyncclick as click
+import httpx
+
+from httpcli import json_codec
+from httpcli.version import __version__
+
+OUTPUT_FORMATS = ['text', 'json', 'jsonl', 'har']
+HAR_VERSION = '1.2'
+
+
+class RequestTimings(NamedTuple):
+    # wall clock time when the request was sent, in seconds since the epoch
+    started: float
+    # time to the response headers and until the body is read, in seconds
+    headers: float
+    total: float
+
+
+def get_headers(headers: httpx.Headers) -> List[Tuple[str, str]]:
+    # a list keeps repeated headers like set-cookie
+    return [(name, value) for name, value in headers.multi_items()]
+
+
+def get_body(content: bytes, charset: Optional[str]) -> Tuple[str, Optional[str]]:
+    """Returns the body as text with no encoding or as base64 with the "base64" encoding if it is binary."""
+    try:
+        # guessing the charset of a body is slow, utf-8 is tried when the server does not give it
+        return content.decode(charset or 'utf-8'), None
+    except (UnicodeDecodeError, LookupError):
+        return base64.b64encode(content).decode(), 'base64'
+
+
+def get_milliseconds(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def get_response_data(
+        response: httpx.Response, timings: RequestTimings, path: Optional[Path] = None
+) -> Dict[str, Any]:
+    """Returns the status line, headers, timings and body of a response for the json and jsonl formats."""
+    data: Dict[str, Any] = {
+        'method': response.request.method,
+        'url': str(response.request.url),
+        'http_version': response.http_version,
+        'status_code': response.status_code,
+        'reason_phrase': response.reason_phrase,
+        'headers': get_headers(response.headers),
+        'timings': {
+            'headers': get_milliseconds(timings.headers),
+            'body': get_milliseconds(timings.total - timings.headers),
+            'total': get_milliseconds(timings.total)
+        }
+    }
+    if path is not None:
+        data.update(body=None, body_encoding=None, body_path=str(path))
+    else:
+        body, encoding = get_body(response.content, response.charset_encoding)
+        data.update(body=body, body_encoding=encoding)
+    return data
+
+
+def get_error_data(method: str, url: str, error: str) -> Dict[str, Any]:
+    return {'method': method, 'url': url, 'error': error}
+
+
+def get_har_headers(headers: httpx.Headers) -> List[Dict[str, str]]:
+    return [{'name': name, 'value': value} for name, value in get_headers(headers)]
+
+
+def get_har_datetime(timestamp: float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).isoformat()
+
+
+def get_har_request(request: httpx.Request) -> Dict[str, Any]:
+    return {
+        'method': request.method,
+        'url': str(request.url),
+        'httpVersion': 'HTTP/1.1',
+        'cookies': [],
+        'headers': get_har_headers(request.headers),
+        'queryString': [{'name': name, 'value': value} for name, value in request.url.params.multi_items()],
+        'headersSize': -1,
+        'bodySize': -1
+    }
+
+
+def get_charset(content_type: str) -> Optional[str]:
+    message = Message()
+    message['content-type'] = content_type
+    return message.get_content_charset()
+
+
+def get_har_post_data(request: httpx.Request, body: bytes) -> Dict[str, Any]:
+    mime_type = request.headers.get('content-type', '')
+    text, encoding = get_body(body, get_charset(mime_type))
+    post_data = {'mimeType': mime_type, 'text': text}
+    if encoding is not None:
+        # HAR has no encoding for request bodies, a custom field tells that the text is base64 encoded
+        post_data['_encoding'] = encoding
+    return post_data
+
+
+def get_har_entry(
+        response: httpx.Response,
+        timings: RequestTimings,
+        path: Optional[Path] = None,
+        request_body: Optional[bytes] = None,
+        body: Optional[bytes] = None
+) -> Dict[str, Any]:
+    """
+    Returns the HAR entry of a response, a body saved in a file is not included. The request body is only known when
+    it is given, httpx does not keep streamed request bodies. The decoded response body defaults to the content of the
+    response, it is given when the response was not read by httpx.
+    """
+    content: Dict[str, Any] = {'size': 0, 'mimeType': response.headers.get('content-type', '')}
+    if path is None:
+        if body is None:
+            body = response.content
+        text, encoding = get_body(body, response.charset_encoding)
+        content.update(size=len(body), text=text)
+        if encoding is not None:
+            content['encoding'] = encoding
+    request = get_har_request(response.request)
+    request['httpVersion'] = response.http_version
+    if request_body:
+        request['postData'] = get_har_post_data(response.request, request_body)
+        request['bodySize'] = len(request_body)
+    # HAR only knows the time to the first byte (wait) and the time to read the body (receive)
+    wait = get_milliseconds(timings.headers)
+    receive = get_milliseconds(timings.total - timings.headers)
+    return {
+        'startedDateTime': get_har_datetime(timings.started),
+        'time': wait + receive,
+        'request': request,
+        'response': {
+            'status': response.status_code,
+            'statusText': response.reason_phrase,
+            'httpVersion': response.http_version,
+            'cookies': [],
+            'headers': get_har_headers(response.headers),
+            'content': content,
+            'redirectURL': response.headers.get('location', ''),
+            'headersSize': -1,
+            'bodySize': -1
+        },
+        'cache': {},
+        'timings': {'send': 0, 'wait': wait, 'receive': receive}
+    }
+
+
+def get_har_error_entry(method: str, url: str, error: str, timings: RequestTimings) -> Dict[str, Any]:
+    """Returns the HAR entry of a failed request, with a status of 0 like browsers do."""
+    request = get_har_request(httpx.Request(method, url))
+    wait = get_milliseconds(timings.total)
+    return {
+        'startedDateTime': get_har_datetime(timings.started),
+        'time': wait,
+        'request': request,
+        'response': {
+            'status': 0,
+            'statusText': '',
+            'httpVersion': '',
+            'cookies': [],
+            'headers': [],
+            'content': {'size': 0, 'mimeType': ''},
+            'redirectURL': '',
+            'headersSize': -1,
+            'bodySize': -1,
+            '_error': error
+        },
+        'cache': {},
+        'timings': {'send': 0, 'wait': wait, 'receive': 0}
+    }
+
+
+def get_har_log(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        'log': {
+            'version': HAR_VERSION,
+            'creator': {'name': 'httpcli', 'version': __version__},
+            'pages': [],
+            'entries': entries
+        }
+    }
+
+
+def write_document(data: Any) -> None:
+    # the whole document is written at once, click.echo adds the newline to the same write
+    click.echo(json_codec.dumps(data))
+
+
+class FormattedOutput:
+    """
+    Collects the results of requests in a machine readable format. jsonl lines are written as soon as they are added,
+    json and har documents are written by the close method.
+    """
+
+    def __init__(self, output_format: str, many: bool = False):
+        self.output_format = output_format
+        self.many = many
+        self.items: List[Dict[str, Any]] = []
+
+    def add_response(self, response: httpx.Response, timings: RequestTimings, path: Optional[Path] = None) -> None:
+        if self.output_format == 'har':
+            self._add(get_har_entry(response, timings, path))
+        else:
+            self._add(get_response_data(response, timings, path))
+
+    def add_error(self, method: str, url: str, error: str, timings: RequestTimings) -> None:
+        if self.output_format == 'har':
+            self._add(get_har_error_entry(method, url, error, timings))
+        else:
+            self._add(get_error_data(method, url, error))
+
+    def _add(self, item: Dict[str, Any]) -> None:
+        if self.output_format == 'jsonl':
+            write_document(item)
+        else:
+            self.items.append(item)
+
+    def close(self) -> None:
+        if self.output_format == 'har':
+            write_document(get_har_log(self.items))
+        elif self.output_format == 'json':
+            write_document(self.items if self.many else self.items[0])
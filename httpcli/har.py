@@ -0,0 +1,351 @@
+"""
+Recording of the requests of a run in an HTTP Archive (HAR) file, and reading of HAR files for the replay command.
+
+Requests are recorded by a transport wrapping the one of each client, so everything httpx sends is captured as it is
+sent, including the headers added by the client and by the tracing of the run. Bodies are kept in memory until the
+file is written at exit, those bigger than MAX_RECORDED_BODY_SIZE are not recorded, and once the recorded bodies of the
+run reach MAX_RECORDED_TOTAL_SIZE, the next ones are left out too.
+"""
+import base64
+import datetime
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import asyncclick as click
+import httpx
+from pydantic import BaseModel, Field, ValidationError, validator
+
+from httpcli import json_codec
+from httpcli.console import error_console
+from httpcli.encodings import ContentDecoder
+from httpcli.formats import RequestTimings, get_har_entry, get_har_error_entry, get_har_log
+
+MAX_RECORDED_BODY_SIZE = 10 * 1024 * 1024
+MAX_RECORDED_TOTAL_SIZE = 100 * 1024 * 1024
+# headers depending on the connection or computed by httpx, they are not replayed
+SKIPPED_REPLAY_HEADERS = {
+    'host', 'content-length', 'connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade', 'te'
+}
+
+
+class HarRecorder:
+    """Keeps the HAR entries of the requests of a run, in the order they were sent."""
+
+    def __init__(self):
+        self.entries: List[Tuple[float, Dict[str, Any]]] = []
+        # responses not closed yet, they are recorded with what was received if the run ends before
+        self.pending: Set['RecordingResponseStream'] = set()
+        # bytes of the bodies kept in memory for the entries
+        self.recorded_size = 0
+
+    def reserve(self, size: int) -> bool:
+        """Returns True and counts size more bytes of bodies if they fit in MAX_RECORDED_TOTAL_SIZE."""
+        if self.recorded_size + size > MAX_RECORDED_TOTAL_SIZE:
+            return False
+        self.recorded_size += size
+        return True
+
+    def release(self, size: int) -> None:
+        self.recorded_size -= size
+
+    def add_entry(self, started: float, entry: Dict[str, Any]) -> None:
+        self.entries.append((started, entry))
+
+    def get_har(self) -> Dict[str, Any]:
+        for stream in list(self.pending):
+            stream.record()
+        return get_har_log([entry for _, entry in sorted(self.entries, key=lambda item: item[0])])
+
+
+class RecordedBody:
+    """Parts of a body kept while it is streamed, as long as it fits in the limits of the recorder."""
+
+    def __init__(self, recorder: HarRecorder):
+        self._recorder = recorder
+        self.parts: List[bytes] = []
+        self.size = 0
+        self.kept_size = 0
+        # why the body is not recorded, None while it is kept
+        self.comment: Optional[str] = None
+
+    def add(self, part: bytes) -> None:
+        self.size += len(part)
+        if self.comment is not None:
+            return
+        if self.size > MAX_RECORDED_BODY_SIZE:
+            self.drop(f'it is bigger than {MAX_RECORDED_BODY_SIZE} bytes')
+        elif not self._recorder.reserve(len(part)):
+            self.drop(f'the recorded bodies of the run already take {MAX_RECORDED_TOTAL_SIZE} bytes')
+        else:
+            self.parts.append(part)
+            self.kept_size += len(part)
+
+    def take(self) -> List[bytes]:
+        """Returns the kept parts, they are no longer counted by the recorder."""
+        parts = self.parts
+        self._recorder.release(self.kept_size)
+        self.parts = []
+        self.kept_size = 0
+        return parts
+
+    def drop(self, reason: str) -> None:
+        self.take()
+        self.comment = reason
+
+
+class RecordingRequestStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, recorder: HarRecorder):
+        self._stream = stream
+        self._body = RecordedBody(recorder)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for part in self._stream:
+            self._body.add(part)
+            yield part
+
+    @property
+    def size(self) -> int:
+        return self._body.size
+
+    @property
+    def body(self) -> Optional[bytes]:
+        return b''.join(self._body.parts) if self._body.comment is None else None
+
+
+class RecordingResponseStream(httpx.AsyncByteStream):
+    """Response stream adding the HAR entry of the request to the recorder when it is closed."""
+
+    def __init__(
+            self,
+            stream: httpx.AsyncByteStream,
+            recorder: HarRecorder,
+            response: httpx.Response,
+            request_stream: RecordingRequestStream,
+            started: float,
+            start: float,
+            headers_latency: float
+    ):
+        self._stream = stream
+        self._recorder = recorder
+        self._response = response
+        self._request_stream = request_stream
+        self._started = started
+        self._start = start
+        self._headers_latency = headers_latency
+        self._body = RecordedBody(recorder)
+        recorder.pending.add(self)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for part in self._stream:
+            self._body.add(part)
+            yield part
+
+    def _decode_body(self) -> Tuple[bytes, Optional[str]]:
+        recorded_body = self._body
+        if recorded_body.comment is not None:
+            return b'', f'body of {recorded_body.size} bytes not recorded, {recorded_body.comment}'
+        decoder = ContentDecoder(self._response.headers.get('content-encoding'))
+        # the decoded body is kept in the entry instead of the received parts, it can be bigger
+        parts = recorded_body.take()
+        try:
+            body = b''.join([*(decoder.decode(part) for part in parts), decoder.flush()])
+        except httpx.DecodingError as e:
+            return b'', f'body not recorded: {e}'
+        if not self._recorder.reserve(len(body)):
+            return b'', (
+                f'body of {recorded_body.size} bytes not recorded, the recorded bodies of the run already take '
+                f'{MAX_RECORDED_TOTAL_SIZE} bytes'
+            )
+        return body, None
+
+    def record(self) -> None:
+        if self not in self._recorder.pending:
+            return
+        self._recorder.pending.discard(self)
+        timings = RequestTimings(self._started, self._headers_latency, time.perf_counter() - self._start)
+        body, comment = self._decode_body()
+        # the body is decoded like the commands do, so the entry is built like the ones of --format har
+        entry = get_har_entry(self._response, timings, request_body=self._request_stream.body, body=body)
+        if comment is not None:
+            entry['response']['content'] = {
+                'size': self._body.size, 'mimeType': self._response.headers.get('content-type', ''),
+                'comment': comment
+            }
+        self._recorder.add_entry(self._started, entry)
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self.record()
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Transport recording the requests sent through another transport in a HAR recorder."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, recorder: HarRecorder):
+        self.transport = transport
+        self.recorder = recorder
+
+    async def handle_async_request(
+            self,
+            method: bytes,
+            url: Tuple[bytes, bytes, Optional[int], bytes],
+            headers: List[Tuple[bytes, bytes]],
+            stream: httpx.AsyncByteStream,
+            extensions: dict
+    ) -> Tuple[int, List[Tuple[bytes, bytes]], httpx.AsyncByteStream, dict]:
+        request_stream = RecordingRequestStream(stream, self.recorder)
+        started, start = time.time(), time.perf_counter()
+        try:
+            status_code, response_headers, response_stream, response_extensions = (
+                await self.transport.handle_async_request(method, url, headers, request_stream, extensions)
+            )
+        except Exception as e:
+            timings = RequestTimings(started, 0.0, time.perf_counter() - start)
+            entry = get_har_error_entry(method.decode(), str(httpx.URL(url)), str(e), timings)
+            self.recorder.add_entry(started, entry)
+            raise
+        headers_latency = time.perf_counter() - start
+
+        request = httpx.Request(method, httpx.URL(url), headers=headers)
+        response = httpx.Response(
+            status_code, headers=response_headers, request=request, extensions=response_extensions
+        )
+        recording_stream = RecordingResponseStream(
+            response_stream, self.recorder, response, request_stream, started, start, headers_latency
+        )
+        return status_code, response_headers, recording_stream, response_extensions
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+_current_recorder: Optional[HarRecorder] = None
+
+
+def get_current_recorder() -> Optional[HarRecorder]:
+    """Returns the HAR recorder of the run if requests are recorded, None otherwise."""
+    return _current_recorder
+
+
+def write_har(recorder: HarRecorder, path: Path) -> None:
+    global _current_recorder
+    _current_recorder = None
+    try:
+        path.write_text(json_codec.dumps(recorder.get_har()) + '\n')
+    except OSError as e:
+        error_console.print(f'[warning]unable to write HAR file {path}: {e}')
+
+
+def start_har_recording(context: click.Context, path: Optional[str]) -> None:
+    """Records the requests of the command invoked by the group of the given context and writes them at exit."""
+    global _current_recorder
+    if path is None:
+        return
+    recorder = HarRecorder()
+    _current_recorder = recorder
+    context.call_on_close(lambda: write_har(recorder, Path(path)))
+
+
+class HarHeader(BaseModel):
+    name: str
+    value: str
+
+
+class HarPostData(BaseModel):
+    mime_type: str = Field('', alias='mimeType')
+    text: str = ''
+    encoding: Optional[str] = Field(None, alias='_encoding')
+
+
+class HarRequest(BaseModel):
+    method: str
+    url: str
+    headers: List[HarHeader] = []
+    post_data: Optional[HarPostData] = Field(None, alias='postData')
+
+
+class HarResponse(BaseModel):
+    status: int
+
+
+class HarEntry(BaseModel):
+    started_date_time: datetime.datetime = Field(..., alias='startedDateTime')
+    time: float
+    request: HarRequest
+    response: HarResponse
+
+    @validator('started_date_time')
+    def convert_to_utc(cls, value: datetime.datetime) -> datetime.datetime:
+        # dates without offset are taken as utc, otherwise they cannot be compared with the others
+        if value.tzinfo is None:
+            return value.replace(tzinfo=datetime.timezone.utc)
+        return value.astimezone(datetime.timezone.utc)
+
+
+class HarLog(BaseModel):
+    entries: List[HarEntry]
+
+
+class HarFile(BaseModel):
+    log: HarLog
+
+
+class ReplayItem(NamedTuple):
+    method: str
+    url: str
+    arguments: Dict[str, Any]
+    # seconds between the first request of the recording and this one
+    offset: float
+    status_code: int
+    # total time of the recorded request, in seconds
+    latency: float
+
+
+def get_target_url(url: str, target: Optional[str]) -> str:
+    if target is None:
+        return url
+    target_url = httpx.URL(target)
+    return str(httpx.URL(url).copy_with(scheme=target_url.scheme, host=target_url.host, port=target_url.port))
+
+
+def get_replay_arguments(request: HarRequest) -> Dict[str, Any]:
+    # http2 pseudo headers like :authority are recorded by browsers
+    headers = [
+        (header.name, header.value) for header in request.headers
+        if not header.name.startswith(':') and header.name.lower() not in SKIPPED_REPLAY_HEADERS
+    ]
+    arguments: Dict[str, Any] = {'headers': headers}
+    post_data = request.post_data
+    if post_data is not None and post_data.text:
+        if post_data.encoding == 'base64':
+            arguments['content'] = base64.b64decode(post_data.text)
+        else:
+            arguments['content'] = post_data.text.encode()
+    return arguments
+
+
+def read_har_file(path: Path, target: Optional[str] = None) -> List[ReplayItem]:
+    """
+    Returns the requests of a HAR file in the order they were sent, with their urls pointing to the target when it is
+    given. Raises click.UsageError if the file is not a valid HAR file.
+    """
+    try:
+        har = HarFile.parse_obj(json_codec.loads(path.read_bytes()))
+    except (OSError, json_codec.JSONDecodeError, ValidationError) as e:
+        raise click.UsageError(f'{path} is not a valid HAR file: {e}')
+
+    entries = sorted(har.log.entries, key=lambda item: item.started_date_time)
+    if not entries:
+        return []
+    first_date = entries[0].started_date_time
+    return [
+        ReplayItem(
+            entry.request.method.upper(), get_target_url(entry.request.url, target),
+            get_replay_arguments(entry.request), (entry.started_date_time - first_date).total_seconds(),
+            entry.response.status, entry.time / 1000
+        )
+        for entry in entries
+    ]
@@ -1,24 +1,53 @@
+import ssl
 from pathlib import Path
-from typing import Dict, Any, TextIO, Optional, Union
+from typing import Dict, Any, TextIO, Optional, Union, List
 
 import anyio
 import asyncclick as click
 import httpx
 import pydantic
 import yaml
+from pydantic.env_settings import SettingsError
 
+from httpcli.cache import ConfigurationCache
 from httpcli.configuration import Configuration
 from httpcli.console import console
 from httpcli.models import BasicAuth, DigestAuth, Auth, OAuth2PasswordBearer
+from httpcli.sessions import Session
+from httpcli.tls import ClientCertificate
 from httpcli.types import HttpProperty
 
+# the C loader is much faster, but it is only available when PyYAML is compiled against libyaml
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def get_client_certificate(config: Configuration) -> Optional[ClientCertificate]:
+    if config.client_cert is None:
+        return None
+    if config.client_key is None:
+        return str(config.client_cert)
+    return str(config.client_cert), str(config.client_key)
+
+
+def check_client_certificate(config: Configuration) -> None:
+    """Raises UsageError if the client certificate or its key cannot be loaded."""
+    cert = get_client_certificate(config)
+    if cert is None:
+        return
+    certfile, keyfile = (cert, None) if isinstance(cert, str) else cert
+    try:
+        ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT).load_cert_chain(certfile, keyfile)
+    except (OSError, ssl.SSLError) as e:
+        raise click.UsageError(f'unable to load client certificate {certfile}: {e}')
+
 
 def build_base_httpx_arguments(config: Configuration) -> Dict[str, Any]:
     arguments: Dict[str, Any] = {
         'allow_redirects': config.follow_redirects,
         'verify': str(config.verify) if isinstance(config.verify, Path) else config.verify,
-        'http1': config.version == 'h1',
-        'http2': config.version == 'h2'
+        # with auto, both versions are offered to the server via ALPN and it chooses the one it prefers
+        'http1': config.version in ('h1', 'auto'),
+        'http2': config.version in ('h2', 'auto')
     }
     if config.auth is not None:
         auth = config.auth
@@ -30,6 +59,13 @@ def build_base_httpx_arguments(config: Configuration) -> Dict[str, Any]:
     if config.proxy is not None:
         arguments['proxies'] = str(config.proxy)
 
+    cert = get_client_certificate(config)
+    if cert is not None:
+        arguments['cert'] = cert
+
+    if config.accept_encoding:
+        arguments['headers'] = [('Accept-Encoding', ', '.join(config.accept_encoding))]
+
     return arguments
 
 
@@ -73,13 +109,27 @@ async def build_read_method_arguments(
         config: Configuration,
         headers: Optional[HttpProperty] = None,
         cookies: Optional[HttpProperty] = None,
-        query_params: Optional[HttpProperty] = None
+        query_params: Optional[HttpProperty] = None,
+        session: Optional[Session] = None
 ) -> Dict[str, Any]:
     base_arguments = build_base_httpx_arguments(config)
     http_arguments = build_http_property_arguments(headers, cookies, query_params)
+    if session is not None:
+        # headers given on the command line become default headers of the session
+        session.update_headers(headers)
+        http_arguments['headers'] = session.get_headers(headers)
+        http_arguments['cookies'] = session.get_cookies(cookies)  # type: ignore
+
+    if 'headers' in base_arguments:
+        http_arguments['headers'] = [*base_arguments.pop('headers'), *http_arguments.get('headers', [])]
 
     if isinstance(config.auth, OAuth2PasswordBearer):
-        token = await get_oauth2_bearer_token(config.auth)
+        # a token kept in the session spares a round trip to the token url
+        token = session.get_token(config.auth) if session is not None else None
+        if token is None:
+            token = await get_oauth2_bearer_token(config.auth)
+            if session is not None:
+                session.set_token(config.auth, token)
         headers = list(http_arguments.get('headers', []))
         headers.append(('Authorization', f'Bearer {token}'))
         http_arguments['headers'] = headers  # type: ignore
@@ -94,9 +144,10 @@ async def build_write_method_arguments(
         query_params: Optional[HttpProperty] = None,
         form: Optional[HttpProperty] = None,
         json_data: Optional[HttpProperty] = None,
-        raw: Optional[bytes] = None
+        raw: Optional[bytes] = None,
+        session: Optional[Session] = None
 ) -> Dict[str, Any]:
-    arguments = await build_read_method_arguments(config, headers, cookies, query_params)
+    arguments = await build_read_method_arguments(config, headers, cookies, query_params, session)
     presence_info = [(data is not None and data != ()) for data in [form, json_data, raw]]
     if presence_info.count(True) > 1:
         raise click.UsageError(
@@ -122,6 +173,10 @@ async def build_write_method_arguments(
     return arguments
 
 
+def set_unix_socket(config: Configuration, path: str) -> None:
+    config.transport = config.transport.copy(update={'uds': Path(path)})
+
+
 def set_configuration_options(
         config: Configuration,
         proxy: Optional[pydantic.AnyHttpUrl] = None,
@@ -129,7 +184,12 @@ def set_configuration_options(
         auth: Optional[Auth] = None,
         follow_redirects: Optional[bool] = None,
         timeout: Optional[float] = None,
-        verify: Optional[Union[bool, str]] = True
+        verify: Optional[Union[bool, str]] = True,
+        verbose: Optional[bool] = None,
+        accept_encoding: Optional[List[str]] = None,
+        session: Optional[str] = None,
+        resolve: Optional[List[str]] = None,
+        unix_socket: Optional[str] = None
 ) -> None:
     if http_version is not None:
         config.version = http_version
@@ -145,12 +205,74 @@ def set_configuration_options(
 
     if timeout is not None:
         config.timeout = None if timeout < 0 else timeout
+
+    if verbose is not None:
+        config.verbose = verbose
+
+    if accept_encoding is not None:
+        config.accept_encoding = accept_encoding
+
+    if session is not None:
+        config.session = session
+
+    if resolve:
+        config.resolve = resolve
+
+    if unix_socket is not None:
+        set_unix_socket(config, unix_socket)
     config.verify = verify
 
 
-def load_config_from_yaml(file: TextIO) -> Configuration:
-    data = yaml.load(file, Loader=yaml.SafeLoader)
+def load_config_from_environment() -> Configuration:
+    """Returns the configuration given by the HTTP_CLI_ environment variables, raises click.UsageError if not valid."""
     try:
-        return Configuration.parse_obj(data['httpcli'])
-    except pydantic.ValidationError as e:
+        return Configuration()
+    except (pydantic.ValidationError, SettingsError) as e:
         raise click.UsageError(str(e))
+
+
+def get_profile_data(data: Any, profile: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Returns the configuration data of the httpcli section, updated with the values of the given profile
+    found in the profiles section.
+    """
+    if not isinstance(data, dict):
+        raise click.UsageError('the configuration file must contain a httpcli or a profiles section')
+
+    config_data = dict(data.get('httpcli') or {})
+    if profile is not None:
+        profiles = data.get('profiles') or {}
+        if profile not in profiles:
+            available_profiles = ', '.join(profiles) or 'none'
+            raise click.UsageError(
+                f'profile {profile} not found in configuration file, available profiles: {available_profiles}'
+            )
+        config_data.update(profiles[profile] or {})
+    return config_data
+
+
+def load_config_from_yaml(file: TextIO, profile: Optional[str] = None) -> Configuration:
+    """
+    Loads the configuration from a yaml file, the validated configuration is cached so the next invocations
+    don't need to parse the file again if it is not modified.
+    """
+    cache = ConfigurationCache()
+    key = cache.get_key(file.name, profile)
+    if key is not None:
+        cached_config = cache.get(key)
+        if cached_config is not None:
+            try:
+                # validating the cached json again checks that the files given in the configuration still exist
+                return Configuration.parse_raw(cached_config)
+            except (pydantic.ValidationError, SettingsError):
+                pass
+
+    data = yaml.load(file, Loader=YamlLoader)  # nosec
+    try:
+        config = Configuration.parse_obj(get_profile_data(data, profile))
+    except (pydantic.ValidationError, SettingsError) as e:
+        raise click.UsageError(str(e))
+
+    if key is not None:
+        cache.set(key, config.json())
+    return config
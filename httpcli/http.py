@@ -1,4 +1,4 @@
-from typing import TextIO
+from typing import TextIO, List, Optional, Tuple
 
 import asyncclick as click
 from pydantic import AnyHttpUrl
@@ -6,19 +6,32 @@ from pydantic import AnyHttpUrl
 from .commands.completion import install_completion
 from .commands.download import download
 from .commands.read_commands import get, head, options
+from .commands.replay import replay
+from .commands.run import run
 from .commands.sse import sse
 from .commands.write_commands import delete, post, put, patch
-from .configuration import Configuration
+from .commands.ws import ws
 from .did_you_mean import DYMGroup
-from .helpers import load_config_from_yaml, set_configuration_options
+from .har import start_har_recording
+from .helpers import (
+    check_client_certificate, load_config_from_environment, load_config_from_yaml, set_configuration_options,
+    set_unix_socket
+)
+from .metrics import start_metrics
 from .models import Auth
-from .options import global_cli_options
+from .options import global_cli_options, har_option, metrics_options, profiling_options, tracing_options
+from .profiling import start_profiling
+from .tracing import start_tracing
 from .version import __version__
 
 
 @click.version_option(__version__, message='%(prog)s version %(version)s')
 @click.group(cls=DYMGroup)
 @global_cli_options
+@profiling_options
+@metrics_options
+@tracing_options
+@har_option
 @click.pass_context
 def http(
         context: click.Context,
@@ -27,18 +40,51 @@ def http(
         auth: Auth,
         follow_redirects: bool,
         timeout: float,
-        config_file: TextIO
+        config_file: TextIO,
+        profile: Optional[str],
+        verbose: bool,
+        accept_encoding: List[str],
+        session: Optional[str],
+        resolve: Tuple[str, ...],
+        unix_socket: Optional[str],
+        profile_cpu: Optional[str],
+        profile_cpu_format: str,
+        profile_mem: Optional[str],
+        metrics_file: Optional[str],
+        metrics_format: str,
+        trace_file: Optional[str],
+        trace_endpoint: Optional[AnyHttpUrl],
+        har: Optional[str]
 ):
     """HTTP CLI"""
+    if profile is not None and not config_file:
+        raise click.UsageError('--profile option needs a configuration file given with --config-file')
+    start_profiling(context, profile_cpu, profile_cpu_format, profile_mem)
+    start_metrics(context, metrics_file, metrics_format)
+    start_tracing(context, trace_file, trace_endpoint)
+    start_har_recording(context, har)
     if config_file:
-        config = load_config_from_yaml(config_file)
+        config = load_config_from_yaml(config_file, profile)
         config.verify = False
+        if session is not None:
+            config.session = session
+        # overrides given on the command line take precedence over the ones of the file
+        config.resolve = [*config.resolve, *resolve]
+        if unix_socket is not None:
+            set_unix_socket(config, unix_socket)
+        check_client_certificate(config)
         context.obj = config
         return
-    config = context.ensure_object(Configuration)
-    set_configuration_options(config, proxy, http_version, auth, follow_redirects, timeout, verify=False)
+    config = context.obj = load_config_from_environment()
+    set_configuration_options(
+        config, proxy, http_version, auth, follow_redirects, timeout, verify=False, verbose=verbose,
+        accept_encoding=accept_encoding, session=session, resolve=list(resolve),
+        unix_socket=unix_socket
+    )
 
 
 # add subcommands
-for command in [get, post, put, patch, delete, head, options, download, sse, install_completion]:
+for command in [
+    get, post, put, patch, delete, head, options, download, sse, ws, run, replay, install_completion
+]:
     http.add_command(command)  # type: ignore
@@ -1,4 +1,5 @@
-from typing import TextIO
+from pathlib import Path
+from typing import TextIO, List, Optional, Tuple
 
 import asyncclick as click
 from pydantic import AnyHttpUrl
@@ -6,22 +7,46 @@ from pydantic import AnyHttpUrl
 from .commands.completion import install_completion
 from .commands.download import download
 from .commands.read_commands import get, head, options
+from .commands.replay import replay
+from .commands.run import run
 from .commands.sse import sse
 from .commands.write_commands import delete, post, put, patch
-from .configuration import Configuration
+from .commands.ws import ws
 from .did_you_mean import DYMGroup
-from .helpers import load_config_from_yaml, set_configuration_options
+from .har import start_har_recording
+from .helpers import (
+    check_client_certificate, load_config_from_environment, load_config_from_yaml, set_configuration_options,
+    set_unix_socket
+)
+from .metrics import start_metrics
 from .models import Auth
-from .options import global_cli_options
+from .options import global_cli_options, har_option, metrics_options, profiling_options, tracing_options
+from .profiling import start_profiling
+from .tracing import start_tracing
 from .version import __version__
 
 
 @click.version_option(__version__, message='%(prog)s version %(version)s')
 @click.group(cls=DYMGroup)
 @global_cli_options
+@profiling_options
+@metrics_options
+@tracing_options
+@har_option
 @click.option(
     '--cert',
-    help='Path to certificate used to authenticate hosts.',
+    help='Path to certificate used to authenticate hosts. It can also be a directory of certificates named after '
+         'their subject hash (see openssl rehash), only the ones needed are loaded.',
+    type=click.Path(exists=True)
+)
+@click.option(
+    '--client-cert',
+    help='Path to the certificate sent to servers requiring mutual TLS authentication.',
+    type=click.Path(exists=True, dir_okay=False)
+)
+@click.option(
+    '--client-key',
+    help='Path to the private key of the client certificate, if it is not in the certificate file.',
     type=click.Path(exists=True, dir_okay=False)
 )
 @click.pass_context
@@ -33,20 +58,60 @@ def https(
         follow_redirects: bool,
         timeout: float,
         config_file: TextIO,
+        profile: Optional[str],
+        verbose: bool,
+        accept_encoding: List[str],
+        session: Optional[str],
+        resolve: Tuple[str, ...],
+        unix_socket: Optional[str],
+        profile_cpu: Optional[str],
+        profile_cpu_format: str,
+        profile_mem: Optional[str],
+        metrics_file: Optional[str],
+        metrics_format: str,
+        trace_file: Optional[str],
+        trace_endpoint: Optional[AnyHttpUrl],
+        har: Optional[str],
         cert: str,
+        client_cert: Optional[str],
+        client_key: Optional[str]
 ):
     """HTTP CLI with certificate validation."""
+    if profile is not None and not config_file:
+        raise click.UsageError('--profile option needs a configuration file given with --config-file')
+    start_profiling(context, profile_cpu, profile_cpu_format, profile_mem)
+    start_metrics(context, metrics_file, metrics_format)
+    start_tracing(context, trace_file, trace_endpoint)
+    start_har_recording(context, har)
     if config_file:
-        config = load_config_from_yaml(config_file)
+        config = load_config_from_yaml(config_file, profile)
         if cert:
             config.verify = cert
+        if session is not None:
+            config.session = session
+        # overrides given on the command line take precedence over the ones of the file
+        config.resolve = [*config.resolve, *resolve]
+        if unix_socket is not None:
+            set_unix_socket(config, unix_socket)
         context.obj = config
-        return
+    else:
+        config = context.obj = load_config_from_environment()
+        set_configuration_options(
+            config, proxy, http_version, auth, follow_redirects, timeout, verify=cert or True, verbose=verbose,
+            accept_encoding=accept_encoding, session=session, resolve=list(resolve), unix_socket=unix_socket
+        )
 
-    config = context.ensure_object(Configuration)
-    set_configuration_options(config, proxy, http_version, auth, follow_redirects, timeout, verify=cert or True)
+    if client_cert is not None:
+        config.client_cert = Path(client_cert)
+    if client_key is not None:
+        config.client_key = Path(client_key)
+    if config.client_key is not None and config.client_cert is None:
+        raise click.UsageError('--client-key option needs a client certificate given with --client-cert')
+    check_client_certificate(config)
 
 
 # add subcommands
-for command in [get, post, put, patch, delete, head, options, download, sse, install_completion]:
+for command in [
+    get, post, put, patch, delete, head, options, download, sse, ws, run, replay, install_completion
+]:
     https.add_command(command)  # type: ignore
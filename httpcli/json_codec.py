@@ -0,0 +1,93 @@
+"""
+JSON is decoded and encoded on all the hot paths of the cli (request parameters, responses, sse events, websocket
+messages), so everything goes through this module which uses orjson when it is installed.
+"""
+import json
+import re
+from typing import Any, Dict, Type, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# orjson.JSONDecodeError is a subclass of this exception, so callers only need to catch this one
+JSONDecodeError = json.JSONDecodeError
+# integers which do not fit in 64 bits have at least 19 digits, like -9223372036854775809
+BIG_INTEGER_REGEX = re.compile(r'\d{19}')
+BIG_INTEGER_BYTES_REGEX = re.compile(rb'\d{19}')
+# orjson writes floats like 1e16 or 0.00001 which the standard library writes 1e+16 and 1e-05, the search may also
+# match a string but it is only a false positive making the standard library encode the data
+FLOAT_FORMAT_BYTES_REGEX = re.compile(rb'\de|0\.0000')
+# orjson only indents with two spaces, strings never contain raw newlines so leading spaces are only indentation
+INDENT_BYTES_REGEX = re.compile(rb'^ +', re.MULTILINE)
+
+
+class StandardCodec:
+    name = 'json'
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def dumps(self, data: Any, indent: bool = False) -> str:
+        # pretty printed json is the one the cli always printed, four spaces of indentation and escaped non-ascii
+        # characters, compact json is the output of orjson, no space after separators and non-ascii characters as is
+        if indent:
+            return json.dumps(data, indent=4)
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+
+
+class OrjsonCodec(StandardCodec):
+    name = 'orjson'
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        # orjson silently converts integers bigger than 64 bits to floats, the standard library keeps them intact
+        regex = BIG_INTEGER_BYTES_REGEX if isinstance(data, bytes) else BIG_INTEGER_REGEX
+        if regex.search(data):
+            return super().loads(data)
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than the standard library, it refuses NaN values for example
+            return super().loads(data)
+
+    def dumps(self, data: Any, indent: bool = False) -> str:
+        # the output must not depend on the installed codec, so the standard library encodes what orjson writes
+        # differently: some floats, non-ascii characters when indenting, and data orjson refuses like integers bigger
+        # than 64 bits or non-string keys
+        try:
+            text = orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else None)
+        except TypeError:
+            return super().dumps(data, indent)
+        if FLOAT_FORMAT_BYTES_REGEX.search(text) or indent and not text.isascii():
+            return super().dumps(data, indent)
+        if indent:
+            text = INDENT_BYTES_REGEX.sub(lambda match: match.group() * 2, text)
+        return text.decode()
+
+
+CODECS: Dict[str, Type[StandardCodec]] = {'json': StandardCodec}
+
+if orjson is not None:
+    CODECS['orjson'] = OrjsonCodec
+
+_codec: StandardCodec = OrjsonCodec() if orjson is not None else StandardCodec()
+
+
+def get_codec() -> StandardCodec:
+    return _codec
+
+
+def set_codec(name: str) -> None:
+    global _codec
+    if name not in CODECS:
+        raise ValueError(f'{name} is not an available json codec, choose among {", ".join(CODECS)}')
+    _codec = CODECS[name]()
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    return _codec.loads(data)
+
+
+def dumps(data: Any, indent: bool = False) -> str:
+    return _codec.dumps(data, indent)
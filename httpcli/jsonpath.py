@@ -0,0 +1,109 @@
+"""
+A tiny subset of JSONPath, enough to find values like cursors, totals or items in json responses.
+
+Supported syntax: the root $ (optional), child names with .name or ['name'], array indexes with [0] or [-1], and
+wildcards with .* or [*]. For example $.data[*].id or meta.next_cursor.
+Conditions like $.status=done are built on top of paths.
+"""
+import re
+from typing import Any, List, NamedTuple, Tuple, Union
+
+from httpcli import json_codec
+
+TOKEN_REGEX = re.compile(
+    r"""
+    \.(?P<name>[^.\[\]]+)
+    | \[(?P<index>-?\d+)\]
+    | \[(?P<quote>['"])(?P<key>.*?)(?P=quote)\]
+    | (?P<wildcard>\.\*|\[\*\])
+    """,
+    re.VERBOSE
+)
+
+Step = Tuple[str, Union[str, int, None]]
+
+
+class JsonPath:
+    def __init__(self, path: str):
+        self.path = path
+        self.steps = parse_path(path)
+
+    def find(self, data: Any) -> List[Any]:
+        """Returns the values matching the path, in document order."""
+        values = [data]
+        for kind, argument in self.steps:
+            matches = []
+            for value in values:
+                if kind == 'wildcard':
+                    if isinstance(value, dict):
+                        matches.extend(value.values())
+                    elif isinstance(value, list):
+                        matches.extend(value)
+                elif kind == 'index':
+                    if isinstance(value, list) and -len(value) <= argument < len(value):  # type: ignore
+                        matches.append(value[argument])  # type: ignore
+                elif isinstance(value, dict) and argument in value:
+                    matches.append(value[argument])
+            values = matches
+        return values
+
+    def __repr__(self) -> str:
+        return f'JsonPath({self.path!r})'
+
+
+def parse_path(path: str) -> List[Step]:
+    """Returns the steps of a path, raises ValueError if its syntax is not supported."""
+    expression = path.strip()
+    if expression.startswith('$'):
+        expression = expression[1:]
+    elif expression and not expression.startswith(('.', '[')):
+        expression = f'.{expression}'
+
+    steps: List[Step] = []
+    position = 0
+    while position < len(expression):
+        match = TOKEN_REGEX.match(expression, position)
+        if match is None:
+            raise ValueError(f'{path} is not a valid json path, unable to parse {expression[position:]}')
+        if match.group('wildcard') or match.group('name') == '*':
+            steps.append(('wildcard', None))
+        elif match.group('index') is not None:
+            steps.append(('index', int(match.group('index'))))
+        else:
+            steps.append(('key', match.group('name') if match.group('name') is not None else match.group('key')))
+        position = match.end()
+    return steps
+
+
+class JsonCondition(NamedTuple):
+    """
+    A condition on a json document, like $.status=done. Without a value, it matches when the path finds a truthy value.
+    """
+    path: JsonPath
+    value: Any = None
+    has_value: bool = False
+
+    def matches(self, data: Any) -> bool:
+        values = self.path.find(data)
+        if not self.has_value:
+            return any(values)
+        # the type is compared too, otherwise 1 would match true
+        return any(type(value) is type(self.value) and value == self.value for value in values)
+
+    def __str__(self) -> str:
+        return f'{self.path.path}={json_codec.dumps(self.value)}' if self.has_value else self.path.path
+
+
+def parse_condition(condition: str) -> JsonCondition:
+    """
+    Returns the condition given in the form path=value or path, the value is a json value or a string otherwise.
+    Raises ValueError if the path is not valid.
+    """
+    path, separator, text = condition.partition('=')
+    if not separator:
+        return JsonCondition(JsonPath(path))
+    try:
+        value = json_codec.loads(text)
+    except json_codec.JSONDecodeError:
+        value = text
+    return JsonCondition(JsonPath(path), value, True)
@@ -0,0 +1,344 @@
+"""
+Metrics of a run, exported at exit as a Prometheus textfile, OpenMetrics or json with --metrics-file.
+
+Requests are measured by a transport wrapping the one of the client and connections by the httpcore backend, so
+recording a request only costs a few dictionary updates and counting the body bytes an addition per chunk.
+"""
+import bisect
+import math
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import asyncclick as click
+import httpx
+
+from httpcli import json_codec
+from httpcli.cache import write_atomically
+from httpcli.console import error_console
+
+LabelValues = Tuple[str, ...]
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = tuple(float(4 ** power) for power in range(5, 16))  # from 1 KiB to 1 GiB
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+class Metric:
+    type = ''
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def set(self, value: float, labels: LabelValues = ()) -> None:
+        self.values[labels] = value
+
+
+class HistogramValue:
+    def __init__(self, buckets: Sequence[float]):
+        # counts are not cumulative, they are summed at export time so that observing a value stays cheap
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(
+            self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = ()
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+        self.values: Dict[LabelValues, HistogramValue] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        histogram_value = self.values.get(labels)
+        if histogram_value is None:
+            histogram_value = self.values[labels] = HistogramValue(self.buckets)
+        histogram_value.counts[bisect.bisect_left(self.buckets, value)] += 1
+        histogram_value.sum += value
+        histogram_value.count += 1
+
+    def get_cumulative_counts(self, labels: LabelValues) -> List[Tuple[float, int]]:
+        """Returns the (upper bound, cumulative count) pairs of the buckets, the last upper bound is infinity."""
+        total = 0
+        result = []
+        for upper_bound, count in zip([*self.buckets, math.inf], self.values[labels].counts):
+            total += count
+            result.append((upper_bound, total))
+        return result
+
+
+class RunMetrics:
+    """Counters and histograms of the requests, connections and TLS handshakes of a run."""
+
+    def __init__(self, command: str = ''):
+        self.command = command
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.requests = Counter('httpcli_requests_total', 'Requests which got a response.', ['method', 'status'])
+        self.request_errors = Counter(
+            'httpcli_request_errors_total', 'Requests which failed without response.', ['method', 'error']
+        )
+        self.response_latency = Histogram(
+            'httpcli_response_latency_seconds', 'Time between the start of a request and its response headers.',
+            ['method'], DURATION_BUCKETS
+        )
+        self.request_duration = Histogram(
+            'httpcli_request_duration_seconds', 'Time between the start of a request and the end of its response body.',
+            ['method'], DURATION_BUCKETS
+        )
+        self.received_bytes = Histogram(
+            'httpcli_response_body_bytes', 'Size of the response bodies as received, before decompression.',
+            ['method'], SIZE_BUCKETS
+        )
+        self.sent_bytes = Histogram(
+            'httpcli_request_body_bytes', 'Size of the request bodies.', ['method'], SIZE_BUCKETS
+        )
+        self.connections = Counter('httpcli_connections_total', 'Network connections opened.', ['transport'])
+        self.connect_errors = Counter('httpcli_connect_errors_total', 'Connection attempts which failed.')
+        self.tls_handshakes = Counter('httpcli_tls_handshakes_total', 'TLS handshakes done.', ['resumed'])
+        self.run_start = Gauge('httpcli_run_start_time_seconds', 'Unix time of the start of the run.', ['command'])
+        self.run_duration = Gauge('httpcli_run_duration_seconds', 'Duration of the run.', ['command'])
+        self.connect_retries = Gauge(
+            'httpcli_connect_retries', 'Connection attempts retried after a failure, see the transport retries setting.'
+        )
+
+    def on_connection(self, transport: str) -> None:
+        self.connections.inc((transport,))
+
+    def on_connect_error(self) -> None:
+        self.connect_errors.inc()
+
+    def on_tls_handshake(self, resumed: bool) -> None:
+        self.tls_handshakes.inc(('true' if resumed else 'false',))
+
+    def on_response(self, method: str, status_code: int, latency: float) -> None:
+        self.requests.inc((method, str(status_code)))
+        self.response_latency.observe(latency, (method,))
+
+    def on_response_closed(self, method: str, duration: float, received: int, sent: int) -> None:
+        labels = (method,)
+        self.request_duration.observe(duration, labels)
+        self.received_bytes.observe(received, labels)
+        self.sent_bytes.observe(sent, labels)
+
+    def on_request_error(self, method: str, error: Exception) -> None:
+        self.request_errors.inc((method, type(error).__name__))
+
+    def finish(self) -> None:
+        labels = (self.command,)
+        self.run_start.set(self.start_time, labels)
+        self.run_duration.set(time.perf_counter() - self._start, labels)
+        # each request failing to connect made one more attempt than it retried
+        failed_requests = sum(
+            value for (_, error), value in self.request_errors.values.items()
+            if error in {error_class.__name__ for error_class in CONNECT_ERRORS}
+        )
+        self.connect_retries.set(max(sum(self.connect_errors.values.values()) - failed_requests, 0))
+
+    def get_metrics(self) -> List[Metric]:
+        return [
+            self.requests, self.request_errors, self.response_latency, self.request_duration, self.received_bytes,
+            self.sent_bytes, self.connections, self.connect_errors, self.connect_retries, self.tls_handshakes,
+            self.run_start, self.run_duration
+        ]
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label_value(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value: float, openmetrics: bool = False) -> str:
+    if math.isinf(value):
+        return '+Inf'
+    if value == int(value) and not openmetrics:
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_text(metrics: Sequence[Metric], openmetrics: bool = False) -> str:
+    """Returns the metrics in the Prometheus text format or, with openmetrics, in the OpenMetrics text format."""
+    lines = []
+    for metric in metrics:
+        # in OpenMetrics, the family of a counter does not have the _total suffix of its samples
+        family = metric.name[:-len('_total')] if openmetrics and metric.type == 'counter' else metric.name
+        lines.append(f'# HELP {family} {metric.documentation}')
+        lines.append(f'# TYPE {family} {metric.type}')
+        if isinstance(metric, Histogram):
+            for labels, histogram_value in metric.values.items():
+                for upper_bound, count in metric.get_cumulative_counts(labels):
+                    bucket_labels = _format_labels(
+                        [*metric.label_names, 'le'], [*labels, _format_value(upper_bound, openmetrics)]
+                    )
+                    lines.append(f'{metric.name}_bucket{bucket_labels} {count}')
+                formatted_labels = _format_labels(metric.label_names, labels)
+                lines.append(f'{metric.name}_sum{formatted_labels} {_format_value(histogram_value.sum, openmetrics)}')
+                lines.append(f'{metric.name}_count{formatted_labels} {histogram_value.count}')
+        else:
+            for labels, value in metric.values.items():  # type: ignore
+                formatted_labels = _format_labels(metric.label_names, labels)
+                lines.append(f'{metric.name}{formatted_labels} {_format_value(value, openmetrics)}')
+    if openmetrics:
+        lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+
+def render_json(metrics: Sequence[Metric]) -> str:
+    data: Dict[str, Any] = {}
+    for metric in metrics:
+        samples = []
+        if isinstance(metric, Histogram):
+            for labels, histogram_value in metric.values.items():
+                samples.append({
+                    'labels': dict(zip(metric.label_names, labels)),
+                    'buckets': [
+                        {'le': None if math.isinf(upper_bound) else upper_bound, 'count': count}
+                        for upper_bound, count in metric.get_cumulative_counts(labels)
+                    ],
+                    'sum': histogram_value.sum,
+                    'count': histogram_value.count
+                })
+        else:
+            for labels, value in metric.values.items():  # type: ignore
+                samples.append({'labels': dict(zip(metric.label_names, labels)), 'value': value})
+        data[metric.name] = {'type': metric.type, 'help': metric.documentation, 'samples': samples}
+    return json_codec.dumps(data, indent=True) + '\n'
+
+
+def render_metrics(metrics: Sequence[Metric], metrics_format: str) -> str:
+    if metrics_format == 'json':
+        return render_json(metrics)
+    return render_text(metrics, openmetrics=metrics_format == 'openmetrics')
+
+
+class CountingRequestStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream):
+        self._stream = stream
+        self.size = 0
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for part in self._stream:
+            self.size += len(part)
+            yield part
+
+
+class CountingResponseStream(httpx.AsyncByteStream):
+    """Response stream recording the duration of the request and the bytes exchanged when it is closed."""
+
+    def __init__(
+            self,
+            stream: httpx.AsyncByteStream,
+            metrics: RunMetrics,
+            method: str,
+            start: float,
+            request_stream: CountingRequestStream
+    ):
+        self._stream = stream
+        self._metrics = metrics
+        self._method = method
+        self._start = start
+        self._request_stream = request_stream
+        self._size = 0
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for part in self._stream:
+            self._size += len(part)
+            yield part
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._metrics.on_response_closed(
+                    self._method, time.perf_counter() - self._start, self._size, self._request_stream.size
+                )
+
+
+class MetricsTransport(httpx.AsyncBaseTransport):
+    """Transport measuring the requests sent through another transport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, metrics: RunMetrics):
+        self.transport = transport
+        self.metrics = metrics
+
+    async def handle_async_request(
+            self,
+            method: bytes,
+            url: Tuple[bytes, bytes, Optional[int], bytes],
+            headers: List[Tuple[bytes, bytes]],
+            stream: httpx.AsyncByteStream,
+            extensions: dict
+    ) -> Tuple[int, List[Tuple[bytes, bytes]], httpx.AsyncByteStream, dict]:
+        unicode_method = method.decode()
+        request_stream = CountingRequestStream(stream)
+        start = time.perf_counter()
+        try:
+            status_code, response_headers, response_stream, response_extensions = (
+                await self.transport.handle_async_request(method, url, headers, request_stream, extensions)
+            )
+        except Exception as e:
+            self.metrics.on_request_error(unicode_method, e)
+            raise
+        self.metrics.on_response(unicode_method, status_code, time.perf_counter() - start)
+        response_stream = CountingResponseStream(response_stream, self.metrics, unicode_method, start, request_stream)
+        return status_code, response_headers, response_stream, response_extensions
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+_current_metrics: Optional[RunMetrics] = None
+
+
+def get_current_metrics() -> Optional[RunMetrics]:
+    """Returns the metrics of the run if they are exported, None otherwise."""
+    return _current_metrics
+
+
+def write_metrics(metrics: RunMetrics, path: Path, metrics_format: str) -> None:
+    global _current_metrics
+    _current_metrics = None
+    metrics.finish()
+    try:
+        # the file is replaced atomically since collectors like the textfile one of node_exporter may read it anytime
+        write_atomically(path, render_metrics(metrics.get_metrics(), metrics_format).encode(), mode=0o644)
+    except OSError as e:
+        error_console.print(f'[warning]unable to write metrics in {path}: {e}')
+
+
+def start_metrics(context: click.Context, path: Optional[str], metrics_format: str) -> None:
+    """Records the metrics of the command invoked by the group of the given context and writes them at exit."""
+    global _current_metrics
+    if path is None:
+        return
+    metrics = RunMetrics(context.invoked_subcommand or '')
+    _current_metrics = metrics
+    context.call_on_close(lambda: write_metrics(metrics, Path(path), metrics_format))
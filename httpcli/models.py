@@ -1,7 +1,10 @@
 import re
-from typing import Any, List
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, validator, AnyHttpUrl
+from pydantic import (
+    BaseModel, Field, validator, root_validator, AnyHttpUrl, AnyUrl, IPvAnyAddress, NonNegativeInt, PositiveInt
+)
 from typing_extensions import Literal
 
 
@@ -15,6 +18,20 @@ class UrlModel(BaseModel):
         return value
 
 
+class WebSocketUrl(AnyUrl):
+    allowed_schemes = {'ws', 'wss'}
+
+
+class WebSocketUrlModel(BaseModel):
+    url: WebSocketUrl
+
+    @validator('url', pre=True)
+    def check_shortcut_url(cls, value: str) -> Any:
+        if re.match(r'^:\d+', value):
+            return f'ws://localhost{value}'
+        return value
+
+
 class Auth(BaseModel):
     type: str
 
@@ -41,3 +58,44 @@ class OAuth2PasswordBearer(UserMixin, OAuth2):
     token_url: AnyHttpUrl
     flow: Literal['password'] = 'password'
     scopes: List[str] = []
+
+
+class PoolSettings(BaseModel):
+    max_connections: Optional[PositiveInt] = 100
+    max_keepalive_connections: Optional[PositiveInt] = 20
+    # maximum number of requests in flight at the same time, with http2 they are multiplexed over few connections
+    max_concurrent_streams: PositiveInt = 100
+
+
+class TransportSettings(BaseModel):
+    # unix socket where all connections are made instead of tcp, useful for local services like the docker api
+    uds: Optional[Path] = None
+    # local ip address the connections are bound to
+    local_address: Optional[IPvAnyAddress] = None
+    # number of retries when a connection cannot be established
+    retries: NonNegativeInt = 0
+
+
+class RequestTemplate(BaseModel):
+    """A request where url, headers, query, cookies, form and json values may contain {{variable}} placeholders."""
+    method: Literal['GET', 'HEAD', 'OPTIONS', 'DELETE', 'POST', 'PUT', 'PATCH'] = 'GET'
+    url: str
+    headers: Dict[str, str] = {}
+    query: Dict[str, str] = {}
+    cookies: Dict[str, str] = {}
+    form: Optional[Dict[str, str]] = None
+    # json would shadow the BaseModel.json method
+    json_data: Any = Field(None, alias='json')
+
+    class Config:
+        allow_population_by_field_name = True
+
+    @validator('method', pre=True)
+    def normalize_method(cls, value: Any) -> Any:
+        return value.upper() if isinstance(value, str) else value
+
+    @root_validator(skip_on_failure=True)
+    def check_body(cls, values: Dict[str, Any]) -> Dict[str, Any]:
+        if values.get('form') is not None and values.get('json_data') is not None:
+            raise ValueError('you cannot mix form and json data, you must choose between one of them')
+        return values
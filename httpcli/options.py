@@ -2,7 +2,13 @@ from typing import Callable, TypeVar, Any
 
 import asyncclick as click
 
-from .parameters import AUTH_PARAM, URL, HEADER, COOKIE, QUERY, FORM, JSON, RAW_PAYLOAD
+from .assertions import REPORT_FORMATS
+from .commands.pagination import DEFAULT_MAX_PAGES, PAGINATION_STRATEGIES
+from .formats import OUTPUT_FORMATS
+from .parameters import (
+    AUTH_PARAM, ACCEPT_ENCODING, COMPRESSION, URL, HEADER, COOKIE, QUERY, FORM, JSON, RAW_PAYLOAD, SESSION, RESOLVE,
+    JSON_PATH, JSON_CONDITION, STATUS_PATTERN, EXPECTED_HEADER, JSON_SCHEMA, DURATION
+)
 
 # copying this from click code
 FC = TypeVar("FC", Callable[..., Any], click.Command)
@@ -15,8 +21,9 @@ def proxy_option(f: FC) -> FC:
 def http_version_option(f: FC) -> FC:
     return click.option(
         '--http-version',
-        type=click.Choice(['h1', 'h2']),
-        help='Version of http used to make the request.',
+        type=click.Choice(['h1', 'h2', 'auto']),
+        help='Version of http used to make the request. With "auto", both versions are offered to the server '
+             'and the one it prefers is used.',
     )(f)
 
 
@@ -49,15 +56,160 @@ def config_file_option(f: FC) -> FC:
     )(f)
 
 
+def profile_option(f: FC) -> FC:
+    return click.option(
+        '--profile',
+        help='Name of the profile to use in the configuration file, its values override the httpcli section.'
+    )(f)
+
+
+def verbose_option(f: FC) -> FC:
+    return click.option(
+        '-v', '--verbose',
+        is_flag=True,
+        default=None,
+        help='Print additional information about requests like the negotiated protocol and timings.'
+    )(f)
+
+
+def accept_encoding_option(f: FC) -> FC:
+    return click.option(
+        '--accept-encoding',
+        type=ACCEPT_ENCODING,
+        help='Comma separated list of content encodings accepted for responses, for example "zstd,br,gzip".'
+    )(f)
+
+
+def session_option(f: FC) -> FC:
+    return click.option(
+        '--session',
+        type=SESSION,
+        help='Name of a session where cookies, headers and authentication tokens are kept between invocations.'
+    )(f)
+
+
+def resolve_option(f: FC) -> FC:
+    return click.option(
+        '--resolve',
+        type=RESOLVE,
+        multiple=True,
+        help='Use the given address when connecting to host and port, like curl. The port may be * to match all '
+             'ports and several comma separated addresses may be given. Can be passed multiple times.'
+    )(f)
+
+
+def unix_socket_option(f: FC) -> FC:
+    return click.option(
+        '--unix-socket',
+        type=click.Path(exists=True, dir_okay=False),
+        help='Path of a unix socket where requests are sent instead of a tcp connection, for example '
+             '/var/run/docker.sock. The url is still used for the Host header and TLS verification.'
+    )(f)
+
+
 def global_cli_options(f: FC) -> FC:
     options = [
-        proxy_option, http_version_option, auth_option, follow_redirects_option, timeout_option, config_file_option
+        proxy_option, http_version_option, auth_option, follow_redirects_option, timeout_option, config_file_option,
+        profile_option, verbose_option, accept_encoding_option, session_option, resolve_option,
+        unix_socket_option
     ]
     for callable_option in options:
         f = callable_option(f)
     return f
 
 
+def profile_cpu_option(f: FC) -> FC:
+    return click.option(
+        '--profile-cpu',
+        type=click.Path(dir_okay=False, writable=True),
+        help='File where a cpu profile of the command is written.'
+    )(f)
+
+
+def profile_cpu_format_option(f: FC) -> FC:
+    return click.option(
+        '--profile-cpu-format',
+        type=click.Choice(['pstats', 'speedscope']),
+        default='pstats',
+        show_default=True,
+        help='Format of the cpu profile. pstats uses cProfile and can be read with the pstats module or snakeviz, '
+             'speedscope uses a sampling profiler which also shows the time spent waiting on the network and can be '
+             'opened on https://www.speedscope.app.'
+    )(f)
+
+
+def profile_mem_option(f: FC) -> FC:
+    return click.option(
+        '--profile-mem',
+        type=click.Path(dir_okay=False, writable=True),
+        help='File where the top memory allocators of the command, found with tracemalloc, are written.'
+    )(f)
+
+
+def profiling_options(f: FC) -> FC:
+    for option in [profile_cpu_option, profile_cpu_format_option, profile_mem_option]:
+        f = option(f)
+    return f
+
+
+def metrics_file_option(f: FC) -> FC:
+    return click.option(
+        '--metrics-file',
+        type=click.Path(dir_okay=False, writable=True),
+        help='File where metrics of the run (requests, latencies, bytes, connections, retries) are written at exit. '
+             'It is replaced atomically, so it can be read by the textfile collector of the Prometheus node exporter.'
+    )(f)
+
+
+def metrics_format_option(f: FC) -> FC:
+    return click.option(
+        '--metrics-format',
+        type=click.Choice(['prometheus', 'openmetrics', 'json']),
+        default='prometheus',
+        show_default=True,
+        help='Format of the metrics file.'
+    )(f)
+
+
+def metrics_options(f: FC) -> FC:
+    for option in [metrics_file_option, metrics_format_option]:
+        f = option(f)
+    return f
+
+
+def trace_file_option(f: FC) -> FC:
+    return click.option(
+        '--trace-file',
+        type=click.Path(dir_okay=False, writable=True),
+        help='File where the spans of the requests are written at exit, in the OTLP json format. '
+             'A traceparent header is sent with each request.'
+    )(f)
+
+
+def trace_endpoint_option(f: FC) -> FC:
+    return click.option(
+        '--trace-endpoint',
+        type=URL,
+        help='OTLP/HTTP url where the spans of the requests are sent at exit, for example '
+             'http://localhost:4318/v1/traces. A traceparent header is sent with each request.'
+    )(f)
+
+
+def tracing_options(f: FC) -> FC:
+    for option in [trace_file_option, trace_endpoint_option]:
+        f = option(f)
+    return f
+
+
+def har_option(f: FC) -> FC:
+    return click.option(
+        '--har',
+        type=click.Path(dir_okay=False, writable=True),
+        help='HAR file where the requests and responses of the run are recorded at exit, it can be replayed with the '
+             'replay command. Beware that it contains the headers sent, including credentials.'
+    )(f)
+
+
 def query_option(f: FC) -> FC:
     return click.option(
         '-q', '--query', 'query_params',
@@ -91,6 +243,271 @@ def http_query_options(f: FC) -> FC:
     return f
 
 
+def output_option(f: FC) -> FC:
+    return click.option(
+        '-o', '--output',
+        type=click.Path(dir_okay=False, writable=True, allow_dash=True),
+        help='File where the response body is saved instead of being printed, - writes the raw body on stdout. '
+             'Headers are printed on stderr.'
+    )(f)
+
+
+def download_option(f: FC) -> FC:
+    return click.option(
+        '--download',
+        is_flag=True,
+        help='Save the response body in the current directory, the filename is guessed from the response. '
+             'Headers are printed on stderr.'
+    )(f)
+
+
+def format_option(f: FC) -> FC:
+    return click.option(
+        '--format', 'output_format',
+        type=click.Choice(OUTPUT_FORMATS),
+        default='text',
+        show_default=True,
+        help='Format of the output. json, jsonl and har give the status line, headers, timings and body of the '
+             'responses, base64 encoded when it is binary, for scripts. With many urls, json and har documents are '
+             'written at the end while jsonl writes a line per response as soon as it arrives.'
+    )(f)
+
+
+def http_output_options(f: FC) -> FC:
+    for option in [output_option, download_option, format_option]:
+        f = option(f)
+    return f
+
+
+def url_file_option(f: FC) -> FC:
+    return click.option(
+        '-f', '--file',
+        type=click.File(),
+        help='File containing one url per line, requests are made on these urls in addition to the url arguments.'
+    )(f)
+
+
+def concurrency_option(f: FC) -> FC:
+    return click.option(
+        '--concurrency',
+        type=click.IntRange(min=1),
+        help='Maximum number of requests in progress at the same time when many urls are given. '
+             'If not provided, default to the max_concurrent_streams setting of the connection pool.'
+    )(f)
+
+
+def as_completed_option(f: FC) -> FC:
+    return click.option(
+        '--as-completed',
+        is_flag=True,
+        help='When many urls are given, print responses as they arrive instead of following the order of the urls.'
+    )(f)
+
+
+def http_batch_options(f: FC) -> FC:
+    for option in [url_file_option, concurrency_option, as_completed_option]:
+        f = option(f)
+    return f
+
+
+def paginate_option(f: FC) -> FC:
+    return click.option(
+        '--paginate',
+        type=click.Choice(PAGINATION_STRATEGIES),
+        help='Fetch all the pages of a json resource and print their items as json lines. link follows the next url '
+             'of the Link header, cursor the value found with --cursor-path, page and offset increment a query '
+             'parameter until an empty page or the total found with --total-path.'
+    )(f)
+
+
+def items_path_option(f: FC) -> FC:
+    return click.option(
+        '--items-path',
+        type=JSON_PATH,
+        help='Json path of the items in each page, for example $.data[*]. If not provided, the items of a page '
+             'which is an array, or the page itself, are printed.'
+    )(f)
+
+
+def cursor_path_option(f: FC) -> FC:
+    return click.option(
+        '--cursor-path',
+        type=JSON_PATH,
+        help='Json path of the next cursor in each page, for the cursor strategy. The cursor can also be the url of '
+             'the next page.'
+    )(f)
+
+
+def cursor_param_option(f: FC) -> FC:
+    return click.option(
+        '--cursor-param',
+        default='cursor',
+        show_default=True,
+        help='Query parameter receiving the cursor of the next page.'
+    )(f)
+
+
+def page_param_option(f: FC) -> FC:
+    return click.option(
+        '--page-param',
+        help='Query parameter receiving the page number or the offset. If not provided, default to the name of the '
+             'strategy, page or offset.'
+    )(f)
+
+
+def page_size_option(f: FC) -> FC:
+    return click.option(
+        '--page-size',
+        type=click.IntRange(min=1),
+        help='Number of items per page, needed by the offset strategy and by --total-path.'
+    )(f)
+
+
+def total_path_option(f: FC) -> FC:
+    return click.option(
+        '--total-path',
+        type=JSON_PATH,
+        help='Json path of the total number of items in the first page. When it is known, the other pages are '
+             'fetched concurrently and still printed in order.'
+    )(f)
+
+
+def max_pages_option(f: FC) -> FC:
+    return click.option(
+        '--max-pages',
+        type=click.IntRange(min=1),
+        default=DEFAULT_MAX_PAGES,
+        show_default=True,
+        help='Maximum number of pages fetched.'
+    )(f)
+
+
+def pagination_options(f: FC) -> FC:
+    for option in [
+        paginate_option, items_path_option, cursor_path_option, cursor_param_option, page_param_option,
+        page_size_option, total_path_option, max_pages_option
+    ]:
+        f = option(f)
+    return f
+
+
+def watch_option(f: FC) -> FC:
+    return click.option(
+        '--watch',
+        type=click.FloatRange(min=0, min_open=True),
+        metavar='INTERVAL',
+        help='Poll the url every INTERVAL seconds with the same connection and print the response only when its body '
+             'changes. Conditional requests are made when the server gives an ETag or a Last-Modified header.'
+    )(f)
+
+
+def max_interval_option(f: FC) -> FC:
+    return click.option(
+        '--max-interval',
+        type=click.FloatRange(min=0, min_open=True),
+        help='With --watch, the interval grows while the response does not change, up to this number of seconds. '
+             'If not provided, default to ten times the watch interval.'
+    )(f)
+
+
+def until_option(f: FC) -> FC:
+    return click.option(
+        '--until',
+        type=JSON_CONDITION,
+        multiple=True,
+        help='With --watch, stop when the json body matches a condition in the form PATH=VALUE, for example '
+             '$.status=done, or PATH to stop when a truthy value is found. Can be passed multiple times.'
+    )(f)
+
+
+def until_status_option(f: FC) -> FC:
+    return click.option(
+        '--until-status',
+        type=click.IntRange(min=100, max=599),
+        multiple=True,
+        help='With --watch, stop when the response has this status code. Can be passed multiple times.'
+    )(f)
+
+
+def watch_options(f: FC) -> FC:
+    for option in [watch_option, max_interval_option, until_option, until_status_option]:
+        f = option(f)
+    return f
+
+
+def expect_status_option(f: FC) -> FC:
+    return click.option(
+        '--expect-status',
+        type=STATUS_PATTERN,
+        multiple=True,
+        help='Expected status code of the responses, or class of status codes like 2xx. Can be passed multiple '
+             'times, one of them must match.'
+    )(f)
+
+
+def expect_header_option(f: FC) -> FC:
+    return click.option(
+        '--expect-header',
+        type=EXPECTED_HEADER,
+        multiple=True,
+        help='Header expected in the responses, in the form name to check that it is present or name:value to '
+             'check its value. Can be passed multiple times.'
+    )(f)
+
+
+def expect_json_option(f: FC) -> FC:
+    return click.option(
+        '--expect-json',
+        type=JSON_CONDITION,
+        multiple=True,
+        help='Condition on the json body of the responses in the form PATH=VALUE, for example $.status="ok", or '
+             'PATH to check that a truthy value is found. Can be passed multiple times.'
+    )(f)
+
+
+def expect_schema_option(f: FC) -> FC:
+    return click.option(
+        '--expect-schema',
+        type=JSON_SCHEMA,
+        help='File with a JSON Schema the json body of the responses must match.'
+    )(f)
+
+
+def max_latency_option(f: FC) -> FC:
+    return click.option(
+        '--max-latency',
+        type=DURATION,
+        help='Maximum time to receive each response, for example 200ms or 1.5s, a number alone is in milliseconds.'
+    )(f)
+
+
+def report_option(f: FC) -> FC:
+    return click.option(
+        '--report',
+        type=click.Path(dir_okay=False, writable=True),
+        help='File where the result of the checks of each response is written at the end.'
+    )(f)
+
+
+def report_format_option(f: FC) -> FC:
+    return click.option(
+        '--report-format',
+        type=click.Choice(REPORT_FORMATS),
+        default='junit',
+        show_default=True,
+        help='Format of the report, junit xml is understood by most CI servers.'
+    )(f)
+
+
+def assertion_options(f: FC) -> FC:
+    for option in [
+        expect_status_option, expect_header_option, expect_json_option, expect_schema_option, max_latency_option,
+        report_option, report_format_option
+    ]:
+        f = option(f)
+    return f
+
+
 def form_option(f: FC) -> FC:
     return click.option(
         '-f', '--form',
@@ -117,8 +534,16 @@ def raw_payload_option(f: FC) -> FC:
     )(f)
 
 
+def compress_option(f: FC) -> FC:
+    return click.option(
+        '--compress',
+        type=COMPRESSION,
+        help='Compress the request body with the given encoding, the Content-Encoding header is set accordingly.'
+    )(f)
+
+
 def http_write_options(f: FC) -> FC:
-    for option in [form_option, json_option, raw_payload_option]:
+    for option in [form_option, json_option, raw_payload_option, compress_option]:
         f = option(f)
 
     return f
@@ -1,13 +1,19 @@
-import json
+import re
 import typing as t
 from pathlib import Path
 
 import asyncclick as click
 from pydantic import ValidationError, AnyHttpUrl
 
+from . import json_codec
 from .configuration import Configuration
+from .dns import parse_resolve_entry
+from .encodings import check_encodings
+from .jsonpath import JsonCondition, JsonPath, parse_condition
 from .models import Auth
-from .models import UrlModel
+from .models import UrlModel, WebSocketUrlModel, WebSocketUrl
+from .schema import check_schema
+from .sessions import check_session_name
 
 
 class AuthParam(click.ParamType):
@@ -15,8 +21,8 @@ class AuthParam(click.ParamType):
 
     def convert(self, value: t.Any, param: t.Optional[click.Parameter], ctx: t.Optional[click.Context]) -> Auth:
         try:
-            auth_info = json.loads(value)
-        except json.JSONDecodeError:
+            auth_info = json_codec.loads(value)
+        except json_codec.JSONDecodeError:
             self.fail(f'{value} is not a valid json string')
 
         try:
@@ -37,6 +43,80 @@ class UrlParam(click.ParamType):
             self.fail(f'{value} is not a valid url')
 
 
+class WebSocketUrlParam(click.ParamType):
+    name = 'ws_url'
+
+    def convert(
+            self, value: t.Any, param: t.Optional[click.Parameter], ctx: t.Optional[click.Context]
+    ) -> WebSocketUrl:
+        try:
+            url_model = WebSocketUrlModel(url=value)
+            return url_model.url
+        except ValidationError:
+            self.fail(f'{value} is not a valid websocket url')
+
+
+class AcceptEncodingParam(click.ParamType):
+    name = 'encodings'
+
+    def convert(
+            self, value: t.Any, param: t.Optional[click.Parameter], ctx: t.Optional[click.Context]
+    ) -> t.List[str]:
+        if isinstance(value, list):
+            return value
+        try:
+            return check_encodings(value.split(','))
+        except ValueError as e:
+            self.fail(str(e))
+
+
+class CompressionParam(click.Choice):
+    name = 'compression'
+
+    def __init__(self):
+        super().__init__(['gzip', 'br', 'zstd'])
+
+    def convert(self, value: t.Any, param: t.Optional[click.Parameter], ctx: t.Optional[click.Context]) -> str:
+        encoding = super().convert(value, param, ctx)
+        try:
+            return check_encodings([encoding])[0]
+        except ValueError as e:
+            self.fail(str(e))
+
+
+class VariableParam(click.ParamType):
+    name = 'variable'
+
+    def convert(
+            self, value: str, param: t.Optional[click.Parameter], ctx: t.Optional[click.Context]
+    ) -> t.Tuple[str, str]:
+        name, separator, variable_value = value.partition('=')
+        if not separator or not name:
+            self.fail(f'{value} is not in the form name=value')
+        return name, variable_value
+
+
+class SessionParam(click.ParamType):
+    name = 'session'
+
+    def convert(self, value: str, param: t.Optional[click.Parameter], ctx: t.Optional[click.Context]) -> str:
+        try:
+            return check_session_name(value)
+        except ValueError as e:
+            self.fail(str(e))
+
+
+class ResolveParam(click.ParamType):
+    name = 'host:port:address'
+
+    def convert(self, value: str, param: t.Optional[click.Parameter], ctx: t.Optional[click.Context]) -> str:
+        try:
+            parse_resolve_entry(value)
+        except ValueError as e:
+            self.fail(str(e))
+        return value
+
+
 class HTTPParameter(click.ParamType):
 
     def convert(
@@ -88,15 +168,14 @@ class JsonParam(HTTPParameter):
             path = Path(field_value[1:])
             if not path.is_file():
                 self.fail(f'{field_value[1:]} file does not exist')
-            with path.open() as f:
-                try:
-                    field_value = json.load(f)
-                except json.JSONDecodeError:
-                    self.fail(f'{field_value[1:]} is not a valid json file')
+            try:
+                field_value = json_codec.loads(path.read_bytes())
+            except json_codec.JSONDecodeError:
+                self.fail(f'{field_value[1:]} is not a valid json file')
         elif field_value.startswith('='):
             try:
-                field_value = json.loads(field_value[1:])
-            except json.JSONDecodeError:
+                field_value = json_codec.loads(field_value[1:])
+            except json_codec.JSONDecodeError:
                 self.fail(f'{field_value} is not a valid json value')
 
         return field_name, field_value
@@ -117,11 +196,110 @@ class RawPayloadParam(click.ParamType):
         return value.encode()
 
 
+class JsonPathParam(click.ParamType):
+    name = 'json_path'
+
+    def convert(self, value: t.Any, param: t.Optional[click.Parameter], ctx: t.Optional[click.Context]) -> JsonPath:
+        if isinstance(value, JsonPath):
+            return value
+        try:
+            return JsonPath(value)
+        except ValueError as e:
+            self.fail(str(e))
+
+
+class JsonConditionParam(click.ParamType):
+    name = 'json_condition'
+
+    def convert(
+            self, value: t.Any, param: t.Optional[click.Parameter], ctx: t.Optional[click.Context]
+    ) -> JsonCondition:
+        if isinstance(value, JsonCondition):
+            return value
+        try:
+            return parse_condition(value)
+        except ValueError as e:
+            self.fail(str(e))
+
+
+class StatusPatternParam(click.ParamType):
+    name = 'status'
+
+    def convert(self, value: t.Any, param: t.Optional[click.Parameter], ctx: t.Optional[click.Context]) -> str:
+        pattern = str(value).lower()
+        if re.fullmatch(r'[1-5](xx|\d\d)', pattern) is None:
+            self.fail(f'{value} is not a valid status code or class of status codes like 2xx')
+        return pattern
+
+
+class ExpectedHeaderParam(click.ParamType):
+    name = 'name[:value]'
+
+    def convert(
+            self, value: t.Any, param: t.Optional[click.Parameter], ctx: t.Optional[click.Context]
+    ) -> t.Tuple[str, t.Optional[str]]:
+        if isinstance(value, tuple):
+            return value
+        # the value may contain colons, like urls
+        name, separator, header_value = value.partition(':')
+        if not name.strip():
+            self.fail(f'{value} is not in the form name or name:value')
+        return name.strip(), header_value.strip() if separator else None
+
+
+class JsonSchemaParam(click.ParamType):
+    name = 'file'
+
+    def convert(
+            self, value: t.Any, param: t.Optional[click.Parameter], ctx: t.Optional[click.Context]
+    ) -> t.Dict[str, t.Any]:
+        if isinstance(value, dict):
+            return value
+        path = Path(value)
+        if not path.is_file():
+            self.fail(f'{value} file does not exist')
+        try:
+            schema = json_codec.loads(path.read_bytes())
+        except json_codec.JSONDecodeError:
+            self.fail(f'{value} is not a valid json file')
+        try:
+            check_schema(schema)
+        except ValueError as e:
+            self.fail(f'{value} is not a valid json schema: {e}')
+        return schema
+
+
+class DurationParam(click.ParamType):
+    name = 'duration'
+
+    def convert(self, value: t.Any, param: t.Optional[click.Parameter], ctx: t.Optional[click.Context]) -> float:
+        if isinstance(value, float):
+            return value
+        # a number without unit is in milliseconds
+        match = re.fullmatch(r'(\d+(?:\.\d+)?)\s*(ms|s)?', str(value).strip())
+        if match is None:
+            self.fail(f'{value} is not a valid duration like 200ms or 1.5s')
+        number = float(match.group(1))
+        return number if match.group(2) == 's' else number / 1000
+
+
 AUTH_PARAM = AuthParam()
 URL = UrlParam()
+WS_URL = WebSocketUrlParam()
+ACCEPT_ENCODING = AcceptEncodingParam()
+COMPRESSION = CompressionParam()
+VARIABLE = VariableParam()
+SESSION = SessionParam()
+RESOLVE = ResolveParam()
 QUERY = QueryParam()
 COOKIE = CookieParam()
 HEADER = HeaderParam()
 FORM = FormParam()
 JSON = JsonParam()
 RAW_PAYLOAD = RawPayloadParam()
+JSON_PATH = JsonPathParam()
+JSON_CONDITION = JsonConditionParam()
+STATUS_PATTERN = StatusPatternParam()
+EXPECTED_HEADER = ExpectedHeaderParam()
+JSON_SCHEMA = JsonSchemaParam()
+DURATION = DurationParam()
@@ -0,0 +1,197 @@
+"""
+Profiling of a whole command, started by the http and https groups before the command runs and stopped when the
+click context is closed. Everything runs in the main thread, including the tasks of the anyio task groups, so the
+profilers see the rendering, the json decoding, the TLS handshakes and the time spent waiting on the network.
+"""
+import cProfile
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from types import FrameType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import asyncclick as click
+
+from httpcli import json_codec
+from httpcli.console import error_console
+
+SPEEDSCOPE_SCHEMA = 'https://www.speedscope.app/file-format-schema.json'
+# number of frames kept for each memory allocation, more frames make tracemalloc slower
+TRACEMALLOC_FRAMES = 10
+TOP_ALLOCATORS = 25
+
+FrameKey = Tuple[str, str, int]
+
+
+class SamplingProfiler:
+    """
+    Records the call stack of a thread at regular intervals, giving a wall clock profile: unlike cProfile, the time
+    spent waiting on the network shows up, in the event loop frames.
+    """
+
+    def __init__(self, interval: float = 0.001, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.frames: List[FrameKey] = []
+        self._frame_indexes: Dict[FrameKey, int] = {}
+        self.samples: List[List[int]] = []
+        self.weights: List[float] = []
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _get_frame_index(self, frame: FrameType) -> int:
+        code = frame.f_code
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frame_indexes.get(key)
+        if index is None:
+            index = self._frame_indexes[key] = len(self.frames)
+            self.frames.append(key)
+        return index
+
+    def _sample(self) -> None:
+        frame: Optional[FrameType] = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            stack.append(self._get_frame_index(frame))
+            frame = frame.f_back
+        # speedscope expects stacks from the root to the leaf
+        stack.reverse()
+        self.samples.append(stack)
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stopped.wait(self.interval):
+            self._sample()
+            now = time.perf_counter()
+            # the real interval may be longer than the expected one, for example when the GIL is not released
+            self.weights.append(now - last)
+            last = now
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='httpcli-sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def to_speedscope(self, name: str) -> dict:
+        return {
+            '$schema': SPEEDSCOPE_SCHEMA,
+            'name': name,
+            'exporter': 'httpcli',
+            'shared': {
+                'frames': [{'name': function, 'file': file, 'line': line} for function, file, line in self.frames]
+            },
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(self.weights),
+                'samples': self.samples,
+                'weights': self.weights
+            }]
+        }
+
+
+def format_size(size: float) -> str:
+    for unit in ['B', 'KiB', 'MiB']:
+        if abs(size) < 1024:
+            return f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GiB'
+
+
+def get_memory_report(snapshot: tracemalloc.Snapshot, current: int, peak: int, limit: int = TOP_ALLOCATORS) -> str:
+    """Returns the top allocators of a snapshot, by line and by file, as text."""
+    # allocations of tracemalloc itself and of the import machinery are noise for the user
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    ])
+    lines = [f'current memory: {format_size(current)}, peak memory: {format_size(peak)}', '']
+    for key_type in ['lineno', 'filename']:
+        statistics = snapshot.statistics(key_type)
+        lines.append(f'top {limit} allocators by {"line" if key_type == "lineno" else "file"}:')
+        for statistic in statistics[:limit]:
+            frame = statistic.traceback[0]
+            location = f'{frame.filename}:{frame.lineno}' if key_type == 'lineno' else frame.filename
+            lines.append(f'{format_size(statistic.size):>12} {statistic.count:>8} blocks  {location}')
+        lines.append('')
+    return '\n'.join(lines)
+
+
+class CommandProfiler:
+    """Starts the requested profilers and writes their results in the given files when stopped."""
+
+    def __init__(
+            self, cpu_file: Optional[Path] = None, cpu_format: str = 'pstats', memory_file: Optional[Path] = None
+    ):
+        self.cpu_file = cpu_file
+        self.cpu_format = cpu_format
+        self.memory_file = memory_file
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[SamplingProfiler] = None
+
+    def start(self) -> None:
+        if self.memory_file is not None:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        if self.cpu_file is not None:
+            if self.cpu_format == 'speedscope':
+                self._sampler = SamplingProfiler()
+                self._sampler.start()
+            else:
+                self._cprofile = cProfile.Profile()
+                self._cprofile.enable()
+
+    def stop(self) -> None:
+        # all the profilers are stopped before writing anything, so that the writing is not part of the profiles
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+        report = None
+        if self.memory_file is not None and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            report = get_memory_report(snapshot, current, peak)
+
+        if self._cprofile is not None:
+            self._write(self.cpu_file, self._cprofile.dump_stats)
+        if self._sampler is not None:
+            data = json_codec.dumps(self._sampler.to_speedscope(' '.join(sys.argv)))
+            self._write(self.cpu_file, lambda path: path.write_text(data))
+        if report is not None:
+            self._write(self.memory_file, lambda path: path.write_text(report))  # type: ignore
+
+    @staticmethod
+    def _write(path: Optional[Path], writer: Callable[[Path], Any]) -> None:
+        try:
+            writer(path)  # type: ignore
+        except OSError as e:
+            error_console.print(f'[warning]unable to write profile in {path}: {e}')
+        else:
+            error_console.print(f'[info]profile written in {path}')
+
+
+def start_profiling(
+        context: click.Context,
+        cpu_file: Optional[str],
+        cpu_format: str,
+        memory_file: Optional[str]
+) -> None:
+    """Profiles the command invoked by the group of the given context, until the context is closed."""
+    if cpu_file is None and memory_file is None:
+        return
+    profiler = CommandProfiler(
+        Path(cpu_file) if cpu_file is not None else None, cpu_format,
+        Path(memory_file) if memory_file is not None else None
+    )
+    profiler.start()
+    context.call_on_close(profiler.stop)
@@ -0,0 +1,174 @@
+"""
+Validation of json documents against the most used keywords of JSON Schema, enough for contract checks on responses.
+
+Supported keywords: type, enum, const, properties, required, additionalProperties, items, additionalItems, minItems,
+maxItems, minLength, maxLength, pattern, minimum, maximum, exclusiveMinimum, exclusiveMaximum, anyOf, allOf and oneOf.
+Other keywords, like $ref or format, are ignored as the specification asks for unknown keywords.
+
+items can be a schema for all the items, or a list of schemas for the items at the same positions, the items after
+them being checked against additionalItems.
+
+exclusiveMinimum and exclusiveMaximum can be numbers, or booleans making minimum and maximum exclusive like in draft 4
+and in the schemas of OpenAPI 3.0.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+TYPES = {
+    'object': lambda value: isinstance(value, dict),
+    'array': lambda value: isinstance(value, list),
+    'string': lambda value: isinstance(value, str),
+    # 1.0 is an integer in json schema, only the value matters
+    'integer': lambda value: (
+        isinstance(value, int) and not isinstance(value, bool) or isinstance(value, float) and value.is_integer()
+    ),
+    'number': lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    'boolean': lambda value: isinstance(value, bool),
+    'null': lambda value: value is None,
+}
+
+
+def is_equal(value: Any, other: Any) -> bool:
+    # in json, true is not 1
+    if isinstance(value, bool) or isinstance(other, bool):
+        return type(value) is type(other) and value == other
+    return value == other
+
+
+def check_schema(schema: Any) -> None:
+    """Raises ValueError if the schema is not an object, uses an unknown type or an invalid pattern."""
+    if isinstance(schema, bool):
+        return
+    if not isinstance(schema, dict):
+        raise ValueError('a json schema must be an object')
+    types = schema.get('type', [])
+    for name in types if isinstance(types, list) else [types]:
+        if name not in TYPES:
+            raise ValueError(f'{name} is not a valid json schema type')
+    for keyword, exclusive_keyword in [('minimum', 'exclusiveMinimum'), ('maximum', 'exclusiveMaximum')]:
+        if schema.get(exclusive_keyword) is True and keyword not in schema:
+            raise ValueError(f'{exclusive_keyword} given as a boolean needs {keyword}')
+    if 'pattern' in schema:
+        try:
+            re.compile(schema['pattern'])
+        except re.error as e:
+            raise ValueError(f'{schema["pattern"]} is not a valid pattern: {e}')
+    for sub_schema in schema.get('properties', {}).values():
+        check_schema(sub_schema)
+    for keyword in ['additionalItems', 'additionalProperties']:
+        if keyword in schema:
+            check_schema(schema[keyword])
+    items = schema.get('items', [])
+    for sub_schema in items if isinstance(items, list) else [items]:
+        check_schema(sub_schema)
+    for keyword in ['anyOf', 'allOf', 'oneOf']:
+        for sub_schema in schema.get(keyword, []):
+            check_schema(sub_schema)
+
+
+def validate(value: Any, schema: Any, path: str = '$') -> List[str]:
+    """Returns the errors of the value for the given schema, an empty list if the value is valid."""
+    if schema is True:
+        return []
+    if schema is False:
+        return [f'{path}: no value is allowed']
+
+    types = schema.get('type')
+    if types is not None:
+        types = types if isinstance(types, list) else [types]
+        if not any(TYPES[name](value) for name in types):
+            return [f'{path}: {value!r} is not of type {" or ".join(types)}']
+
+    errors = []
+    if 'enum' in schema and not any(is_equal(value, item) for item in schema['enum']):
+        errors.append(f'{path}: {value!r} is not one of {schema["enum"]!r}')
+    if 'const' in schema and not is_equal(value, schema['const']):
+        errors.append(f'{path}: {value!r} is not {schema["const"]!r}')
+
+    if isinstance(value, dict):
+        errors.extend(validate_object(value, schema, path))
+    elif isinstance(value, list):
+        errors.extend(validate_array(value, schema, path))
+    elif isinstance(value, str):
+        errors.extend(validate_string(value, schema, path))
+    elif TYPES['number'](value):
+        errors.extend(validate_number(value, schema, path))
+
+    for sub_schema in schema.get('allOf', []):
+        errors.extend(validate(value, sub_schema, path))
+    if 'anyOf' in schema and all(validate(value, sub_schema, path) for sub_schema in schema['anyOf']):
+        errors.append(f'{path}: {value!r} does not match any of the anyOf schemas')
+    if 'oneOf' in schema:
+        matches = sum(not validate(value, sub_schema, path) for sub_schema in schema['oneOf'])
+        if matches != 1:
+            errors.append(f'{path}: {value!r} matches {matches} of the oneOf schemas instead of one')
+    return errors
+
+
+def validate_object(value: Dict[str, Any], schema: Dict[str, Any], path: str) -> List[str]:
+    errors = [f'{path}: {name!r} is a required property' for name in schema.get('required', []) if name not in value]
+    properties = schema.get('properties', {})
+    additional = schema.get('additionalProperties', True)
+    for name, item in value.items():
+        if name in properties:
+            errors.extend(validate(item, properties[name], f'{path}.{name}'))
+        elif additional is False:
+            errors.append(f'{path}: additional property {name!r} is not allowed')
+        elif isinstance(additional, dict):
+            errors.extend(validate(item, additional, f'{path}.{name}'))
+    return errors
+
+
+def validate_array(value: List[Any], schema: Dict[str, Any], path: str) -> List[str]:
+    errors = []
+    if 'minItems' in schema and len(value) < schema['minItems']:
+        errors.append(f'{path}: expected at least {schema["minItems"]} items, got {len(value)}')
+    if 'maxItems' in schema and len(value) > schema['maxItems']:
+        errors.append(f'{path}: expected at most {schema["maxItems"]} items, got {len(value)}')
+    items = schema.get('items', True)
+    additional = schema.get('additionalItems', True)
+    for index, item in enumerate(value):
+        if not isinstance(items, list):
+            errors.extend(validate(item, items, f'{path}[{index}]'))
+        elif index < len(items):
+            errors.extend(validate(item, items[index], f'{path}[{index}]'))
+        elif additional is False:
+            errors.append(f'{path}: additional item at index {index} is not allowed')
+        else:
+            errors.extend(validate(item, additional, f'{path}[{index}]'))
+    return errors
+
+
+def validate_string(value: str, schema: Dict[str, Any], path: str) -> List[str]:
+    errors = []
+    if 'minLength' in schema and len(value) < schema['minLength']:
+        errors.append(f'{path}: {value!r} is shorter than {schema["minLength"]} characters')
+    if 'maxLength' in schema and len(value) > schema['maxLength']:
+        errors.append(f'{path}: {value!r} is longer than {schema["maxLength"]} characters')
+    if 'pattern' in schema and re.search(schema['pattern'], value) is None:
+        errors.append(f'{path}: {value!r} does not match {schema["pattern"]!r}')
+    return errors
+
+
+def get_bounds(schema: Dict[str, Any], keyword: str, exclusive_keyword: str) -> Tuple[Optional[float], Optional[float]]:
+    """Returns the inclusive and exclusive bounds given by a keyword and its exclusive keyword, None when not given."""
+    bound = schema.get(keyword)
+    exclusive_bound = schema.get(exclusive_keyword)
+    if isinstance(exclusive_bound, bool):
+        return (None, bound) if exclusive_bound else (bound, None)
+    return bound, exclusive_bound
+
+
+def validate_number(value: float, schema: Dict[str, Any], path: str) -> List[str]:
+    errors = []
+    minimum, exclusive_minimum = get_bounds(schema, 'minimum', 'exclusiveMinimum')
+    maximum, exclusive_maximum = get_bounds(schema, 'maximum', 'exclusiveMaximum')
+    if minimum is not None and value < minimum:
+        errors.append(f'{path}: {value!r} is less than {minimum!r}')
+    if maximum is not None and value > maximum:
+        errors.append(f'{path}: {value!r} is greater than {maximum!r}')
+    if exclusive_minimum is not None and value <= exclusive_minimum:
+        errors.append(f'{path}: {value!r} is not greater than {exclusive_minimum!r}')
+    if exclusive_maximum is not None and value >= exclusive_maximum:
+        errors.append(f'{path}: {value!r} is not less than {exclusive_maximum!r}')
+    return errors
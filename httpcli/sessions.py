@@ -0,0 +1,229 @@
+"""
+Sessions keep cookies, default headers and authentication tokens between two invocations of the cli.
+
+Parallel invocations may use the same session, so a session file is never overwritten with the state loaded at
+startup: only the changes made during the run are applied on the latest content of the file, under an exclusive
+lock, before it is atomically replaced.
+"""
+import os
+import re
+import time
+from contextlib import contextmanager
+from http.cookiejar import Cookie
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from httpcli import json_codec
+from httpcli.cache import write_atomically
+from httpcli.models import OAuth2PasswordBearer
+from httpcli.types import HttpProperty
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # on Windows, writes are still atomic but concurrent updates may be lost
+    fcntl = None
+
+SESSION_NAME_REGEX = re.compile(r'[A-Za-z0-9_][A-Za-z0-9_.-]*')
+# these headers describe a particular request, replaying them on the next requests would be wrong
+IGNORED_HEADERS = {
+    'authorization', 'content-encoding', 'content-length', 'content-type', 'cookie', 'host', 'if-match',
+    'if-modified-since', 'if-none-match', 'if-range', 'if-unmodified-since', 'transfer-encoding'
+}
+
+CookieKey = Tuple[str, str, str]
+
+
+def get_sessions_directory() -> Path:
+    directory = os.environ.get('HTTP_CLI_SESSIONS_DIR')
+    if directory:
+        return Path(directory)
+    return Path(os.environ.get('XDG_CONFIG_HOME', Path.home() / '.config')) / 'httpcli' / 'sessions'
+
+
+def check_session_name(name: str) -> str:
+    """Returns the name if it can be used as a file name, raises ValueError otherwise."""
+    if not SESSION_NAME_REGEX.fullmatch(name):
+        raise ValueError(
+            f'{name} is not a valid session name, only letters, digits, dots, dashes and underscores are allowed'
+        )
+    return name
+
+
+def get_token_key(auth: OAuth2PasswordBearer) -> str:
+    return f'{auth.token_url} {auth.username}'
+
+
+def _dump_cookie(cookie: Cookie) -> Dict[str, Any]:
+    return {
+        'name': cookie.name,
+        'value': cookie.value,
+        'domain': cookie.domain,
+        'path': cookie.path,
+        'secure': cookie.secure,
+        'expires': cookie.expires
+    }
+
+
+def _load_cookie(data: Dict[str, Any]) -> Cookie:
+    domain = data.get('domain') or ''
+    return Cookie(
+        version=0, name=data['name'], value=data['value'], port=None, port_specified=False, domain=domain,
+        domain_specified=bool(domain), domain_initial_dot=domain.startswith('.'), path=data.get('path') or '/',
+        path_specified=True, secure=bool(data.get('secure')), expires=data.get('expires'),
+        discard=data.get('expires') is None, comment=None, comment_url=None, rest={}
+    )
+
+
+def _get_cookie_key(data: Dict[str, Any]) -> CookieKey:
+    return data.get('domain') or '', data.get('path') or '/', data['name']
+
+
+class Session:
+    """
+    State shared by the invocations of the cli using the same session name.
+    Changes are tracked until save is called, which merges them in the session file.
+    """
+
+    def __init__(self, name: str, directory: Optional[Path] = None):
+        self.name = check_session_name(name)
+        self.path = (directory or get_sessions_directory()) / f'{name}.json'
+        data = self._load()
+        self.headers: Dict[str, str] = data['headers']
+        self.tokens: Dict[str, str] = data['tokens']
+        self._cookies: Dict[CookieKey, Dict[str, Any]] = data['cookies']
+        # a None value means that the header, the cookie or the token was removed
+        self._header_changes: Dict[str, Optional[str]] = {}
+        self._cookie_changes: Dict[CookieKey, Optional[Dict[str, Any]]] = {}
+        self._token_changes: Dict[str, Optional[str]] = {}
+
+    def _load(self) -> Dict[str, Any]:
+        data: Any = {}
+        try:
+            data = json_codec.loads(self.path.read_bytes())
+        except (OSError, ValueError):
+            # a missing or corrupted session is just an empty session
+            pass
+        if not isinstance(data, dict):
+            data = {}
+
+        cookies = {}
+        now = time.time()
+        for cookie in data.get('cookies') or []:
+            if not isinstance(cookie, dict) or 'name' not in cookie or 'value' not in cookie:
+                continue
+            if cookie.get('expires') is not None and cookie['expires'] <= now:
+                continue
+            cookies[_get_cookie_key(cookie)] = cookie
+        return {
+            'headers': dict(data.get('headers') or {}),
+            'tokens': dict(data.get('tokens') or {}),
+            'cookies': cookies
+        }
+
+    @property
+    def is_modified(self) -> bool:
+        return bool(self._header_changes or self._cookie_changes or self._token_changes)
+
+    def get_headers(self, headers: Optional[HttpProperty] = None) -> List[Tuple[str, str]]:
+        """
+        Returns the session headers followed by the given headers, session headers overridden by the given ones
+        are not sent.
+        """
+        headers = list(headers or [])
+        overridden = {key.lower() for key, _ in headers}
+        return [(key, value) for key, value in self.headers.items() if key.lower() not in overridden] + headers
+
+    def update_headers(self, headers: Optional[HttpProperty]) -> None:
+        for key, value in headers or []:
+            if key.lower() in IGNORED_HEADERS:
+                continue
+            # a header is stored with the case it was last given
+            for existing_key in [item for item in self.headers if item.lower() == key.lower() and item != key]:
+                del self.headers[existing_key]
+                self._header_changes[existing_key] = None
+            if self.headers.get(key) != value:
+                self.headers[key] = value
+                self._header_changes[key] = value
+
+    def get_cookies(self, cookies: Optional[HttpProperty] = None) -> httpx.Cookies:
+        """Returns a cookie jar with the session cookies and the given ones, which are sent to every domain."""
+        jar = httpx.Cookies()
+        for cookie in self._cookies.values():
+            jar.jar.set_cookie(_load_cookie(cookie))
+        for key, value in cookies or []:
+            jar.set(key, value)
+        return jar
+
+    def update_cookies(self, cookies: httpx.Cookies) -> None:
+        """Records the differences between the session cookies and the cookies of a client at the end of a run."""
+        current = {_get_cookie_key(data): data for data in (_dump_cookie(cookie) for cookie in cookies.jar)}
+        for key, data in current.items():
+            if self._cookies.get(key) != data:
+                self._cookies[key] = data
+                self._cookie_changes[key] = data
+        for key in [key for key in self._cookies if key not in current]:
+            del self._cookies[key]
+            self._cookie_changes[key] = None
+
+    def get_token(self, auth: OAuth2PasswordBearer) -> Optional[str]:
+        return self.tokens.get(get_token_key(auth))
+
+    def set_token(self, auth: OAuth2PasswordBearer, token: str) -> None:
+        key = get_token_key(auth)
+        self.tokens[key] = token
+        self._token_changes[key] = token
+
+    def remove_token(self, auth: OAuth2PasswordBearer) -> None:
+        key = get_token_key(auth)
+        if self.tokens.pop(key, None) is not None:
+            self._token_changes[key] = None
+
+    @contextmanager
+    def _lock(self) -> Iterator[None]:
+        if fcntl is None:  # pragma: no cover
+            yield
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(f'.{self.path.name}.lock'), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def save(self) -> None:
+        """Applies the changes of this run on the latest version of the session file."""
+        if not self.is_modified:
+            return
+
+        with self._lock():
+            data = self._load()
+            for key, value in self._header_changes.items():
+                if value is None:
+                    data['headers'].pop(key, None)
+                else:
+                    data['headers'][key] = value
+            for cookie_key, cookie in self._cookie_changes.items():
+                if cookie is None:
+                    data['cookies'].pop(cookie_key, None)
+                else:
+                    data['cookies'][cookie_key] = cookie
+            for token_key, token in self._token_changes.items():
+                if token is None:
+                    data['tokens'].pop(token_key, None)
+                else:
+                    data['tokens'][token_key] = token
+            data['cookies'] = list(data['cookies'].values())
+            write_atomically(self.path, json_codec.dumps(data, indent=True).encode())
+
+        self._header_changes.clear()
+        self._cookie_changes.clear()
+        self._token_changes.clear()
+
+
+def open_session(name: Optional[str]) -> Optional[Session]:
+    return None if name is None else Session(name)
@@ -0,0 +1,143 @@
+"""
+Request templates are compiled once into formatters, so rendering them for each row of a data file is just
+a few str.format_map calls.
+"""
+import csv
+import re
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterator, List, Mapping, Set, Tuple
+
+from httpcli import json_codec
+from httpcli.models import RequestTemplate
+
+PLACEHOLDER_REGEX = re.compile(r'{{\s*([A-Za-z_][A-Za-z0-9_]*)\s*}}')
+
+Variables = Mapping[str, Any]
+Formatter = Callable[[Variables], Any]
+
+
+def _get_variable(variables: Variables, name: str) -> Any:
+    try:
+        return variables[name]
+    except KeyError:
+        raise ValueError(f'variable {name} is not defined')
+
+
+def compile_string(text: str, keep_type: bool = False) -> Tuple[Formatter, Set[str]]:
+    """
+    Returns a function rendering the text with the variables it is given and the names of the variables used.
+    If keep_type is true and the text is only one placeholder, the variable is returned as is, this is useful
+    for json values which may be numbers.
+    """
+    names = set(PLACEHOLDER_REGEX.findall(text))
+    if not names:
+        return (lambda _: text), names
+
+    match = PLACEHOLDER_REGEX.fullmatch(text)
+    if keep_type and match:
+        name = match.group(1)
+        return (lambda variables: _get_variable(variables, name)), names
+
+    # literal braces are doubled so that the text becomes a valid format string
+    parts = []
+    position = 0
+    for match in PLACEHOLDER_REGEX.finditer(text):
+        parts.append(text[position:match.start()].replace('{', '{{').replace('}', '}}'))
+        parts.append(f'{{{match.group(1)}}}')
+        position = match.end()
+    parts.append(text[position:].replace('{', '{{').replace('}', '}}'))
+    format_string = ''.join(parts)
+
+    def render(variables: Variables) -> str:
+        try:
+            return format_string.format_map(variables)
+        except KeyError as e:
+            raise ValueError(f'variable {e.args[0]} is not defined')
+
+    return render, names
+
+
+def compile_value(value: Any) -> Tuple[Formatter, Set[str]]:
+    """Compiles a json value, placeholders are replaced in strings at any depth."""
+    if isinstance(value, str):
+        return compile_string(value, keep_type=True)
+
+    if isinstance(value, dict):
+        compiled = {key: compile_value(item) for key, item in value.items()}
+        names = set().union(*(item_names for _, item_names in compiled.values()))
+        return (lambda variables: {key: render(variables) for key, (render, _) in compiled.items()}), names
+
+    if isinstance(value, list):
+        compiled_items = [compile_value(item) for item in value]
+        names = set().union(*(item_names for _, item_names in compiled_items))
+        return (lambda variables: [render(variables) for render, _ in compiled_items]), names
+
+    return (lambda _: value), set()
+
+
+def _compile_mapping(mapping: Dict[str, str]) -> Tuple[List[Tuple[str, Formatter]], Set[str]]:
+    compiled = []
+    names: Set[str] = set()
+    for key, value in mapping.items():
+        render, value_names = compile_string(value)
+        compiled.append((key, render))
+        names |= value_names
+    return compiled, names
+
+
+class CompiledTemplate:
+    """Request template ready to be rendered many times."""
+
+    def __init__(self, name: str, template: RequestTemplate):
+        self.name = name
+        self.method = template.method
+        self._url, self.variables = compile_string(template.url)
+        self._headers, names = _compile_mapping(template.headers)
+        self.variables |= names
+        self._query, names = _compile_mapping(template.query)
+        self.variables |= names
+        self._cookies, names = _compile_mapping(template.cookies)
+        self.variables |= names
+        self._body_argument = None
+        if template.form is not None:
+            self._body_argument = 'data'
+            self._body, names = compile_value(template.form)
+            self.variables |= names
+        elif template.json_data is not None:
+            self._body_argument = 'json'
+            self._body, names = compile_value(template.json_data)
+            self.variables |= names
+
+    def render(self, variables: Variables) -> Tuple[str, Dict[str, Any]]:
+        """
+        Returns the url and the http properties (headers, query, cookies) and body arguments understood by httpx.
+        Raises ValueError if a variable is missing.
+        """
+        arguments: Dict[str, Any] = {
+            'headers': [(key, render(variables)) for key, render in self._headers],
+            'params': [(key, render(variables)) for key, render in self._query],
+            'cookies': [(key, render(variables)) for key, render in self._cookies]
+        }
+        if self._body_argument is not None:
+            arguments[self._body_argument] = self._body(variables)
+        return str(self._url(variables)), arguments
+
+
+def read_data_rows(file: IO[str]) -> Iterator[Dict[str, Any]]:
+    """Yields variables of each row of a csv file (with a header line) or a json lines file."""
+    suffix = Path(file.name).suffix.lower()
+    if suffix == '.csv':
+        yield from csv.DictReader(file)
+    elif suffix in ('.jsonl', '.ndjson'):
+        for number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json_codec.loads(line)
+            except json_codec.JSONDecodeError:
+                raise ValueError(f'line {number} is not a valid json document')
+            if not isinstance(row, dict):
+                raise ValueError(f'line {number} is not a json object')
+            yield row
+    else:
+        raise ValueError(f'{file.name} must be a csv (.csv) or a json lines (.jsonl, .ndjson) file')
@@ -0,0 +1,102 @@
+"""
+Creating an ssl context loads the whole CA bundle, so contexts are built once per process and shared by all the
+clients. They also remember the TLS session of the last connection to each host, so that the next connections to
+this host resume it instead of doing a full handshake.
+"""
+import functools
+import os
+import ssl
+from typing import Dict, Optional, Tuple, Union
+
+# httpx does not let us choose the class of the ssl context it creates, we reuse its configuration logic
+from httpx._config import DEFAULT_CIPHERS, SSLConfig, set_minimum_tls_version_1_2
+
+
+class SessionCachingSSLContext(ssl.SSLContext):
+    """SSL context resuming, for a new connection to a host, the TLS session of the last connection to this host."""
+
+    def __init__(self, protocol: int = ssl.PROTOCOL_TLS_CLIENT):
+        # with TLS 1.3, session tickets arrive after the handshake, so we keep the ssl objects and not their
+        # session, which is up to date when it is read
+        self._ssl_objects: Dict[str, ssl.SSLObject] = {}
+
+    def get_session(self, hostname: str) -> Optional[ssl.SSLSession]:
+        ssl_object = self._ssl_objects.get(hostname)
+        return None if ssl_object is None else ssl_object.session
+
+    def remember(self, hostname: str, ssl_object: ssl.SSLObject) -> None:
+        self._ssl_objects[hostname] = ssl_object
+
+    def wrap_bio(  # type: ignore[override]
+            self,
+            incoming: ssl.MemoryBIO,
+            outgoing: ssl.MemoryBIO,
+            server_side: bool = False,
+            server_hostname: Optional[str] = None,
+            session: Optional[ssl.SSLSession] = None
+    ) -> ssl.SSLObject:
+        if session is None and server_hostname is not None and not server_side:
+            session = self.get_session(server_hostname)
+        return super().wrap_bio(incoming, outgoing, server_side, server_hostname, session)
+
+
+class SessionCachingSSLConfig(SSLConfig):
+
+    def _create_default_ssl_context(self) -> ssl.SSLContext:
+        # same settings as httpx, only the class of the context changes
+        context = SessionCachingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        set_minimum_tls_version_1_2(context)
+        context.options |= ssl.OP_NO_COMPRESSION
+        context.set_ciphers(DEFAULT_CIPHERS)
+        if ssl.HAS_ALPN:
+            context.set_alpn_protocols(['http/1.1', 'h2'] if self.http2 else ['http/1.1'])
+        keylog_filename = os.environ.get('SSLKEYLOGFILE')
+        if keylog_filename and self.trust_env:
+            context.keylog_filename = keylog_filename
+        return context
+
+
+# a client certificate alone (with its key in the same file) or a certificate and its private key
+ClientCertificate = Union[str, Tuple[str, str]]
+
+
+@functools.lru_cache(maxsize=None)
+def get_ssl_context(
+        verify: Union[bool, str], http2: bool, cert: Optional[ClientCertificate] = None
+) -> SessionCachingSSLContext:
+    """
+    Returns the ssl context of the given verification settings and client certificate, it is created only once per
+    process. verify may be a CA bundle file or a directory of hashed certificates which are loaded when needed.
+    """
+    return SessionCachingSSLConfig(verify=verify, http2=http2, cert=cert).ssl_context  # type: ignore
+
+
+class TLSStatistics:
+    """Counts TLS handshakes, the ones resuming a previous session and the time spent doing them."""
+
+    def __init__(self):
+        self.handshakes = 0
+        self.resumed = 0
+        self.full_handshake_time = 0.0
+        self.resumed_handshake_time = 0.0
+
+    def add(self, duration: float, resumed: bool) -> None:
+        self.handshakes += 1
+        if resumed:
+            self.resumed += 1
+            self.resumed_handshake_time += duration
+        else:
+            self.full_handshake_time += duration
+
+    @property
+    def handshake_time(self) -> float:
+        return self.full_handshake_time + self.resumed_handshake_time
+
+    @property
+    def saved_time(self) -> float:
+        """Estimation of the time saved by resumed handshakes, compared to the average full handshake."""
+        full_handshakes = self.handshakes - self.resumed
+        if not self.resumed or not full_handshakes:
+            return 0.0
+        average_full_handshake_time = self.full_handshake_time / full_handshakes
+        return max(average_full_handshake_time * self.resumed - self.resumed_handshake_time, 0.0)
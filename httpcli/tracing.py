@@ -0,0 +1,284 @@
+"""
+Tracing of the requests of a run, compatible with OpenTelemetry.
+
+Each request gets a client span, with child spans for the dns resolution, the connection, the TLS handshake, the
+request (until the response headers) and the response body. Its traceparent header is sent to the server, so that the
+server spans are part of the same trace. If the TRACEPARENT environment variable holds a valid trace context, for
+example in a traced CI job, the run joins this trace.
+
+Spans are exported at exit in the OTLP json format, to a file and/or to the OTLP/HTTP endpoint of a collector.
+"""
+import contextvars
+import os
+import re
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import asyncclick as click
+import httpx
+
+from httpcli import json_codec
+from httpcli.console import error_console
+from httpcli.version import __version__
+
+TRACEPARENT_REGEX = re.compile(r'00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}')
+# span kinds and status codes of the OTLP protocol
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_CODE_ERROR = 2
+
+AttributeValue = Any
+
+
+class Span:
+    def __init__(
+            self,
+            name: str,
+            trace_id: str,
+            parent_span_id: Optional[str] = None,
+            kind: int = SPAN_KIND_INTERNAL,
+            attributes: Optional[Dict[str, AttributeValue]] = None
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_time = time.time_ns()
+        self.end_time: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f'00-{self.trace_id}-{self.span_id}-01'
+
+    def set_error(self, message: str) -> None:
+        self.error = message
+
+    def end(self) -> None:
+        if self.end_time is None:
+            self.end_time = time.time_ns()
+
+
+def _to_otlp_value(value: AttributeValue) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        # 64 bits integers are strings in the json encoding of OTLP
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _to_otlp_attributes(attributes: Dict[str, AttributeValue]) -> List[Dict[str, Any]]:
+    return [{'key': key, 'value': _to_otlp_value(value)} for key, value in attributes.items()]
+
+
+class Tracer:
+    """Creates the spans of a run, they are all children of a root span named after the command."""
+
+    def __init__(self, command: str = '', traceparent: Optional[str] = None):
+        match = TRACEPARENT_REGEX.fullmatch(traceparent or '')
+        trace_id, parent_span_id = match.groups() if match else (os.urandom(16).hex(), None)
+        name = f'httpcli {command}'.strip()
+        self.root = Span(name, trace_id, parent_span_id, attributes={'httpcli.command': command})
+        self.spans: List[Span] = [self.root]
+
+    def start_span(
+            self,
+            name: str,
+            parent: Span,
+            kind: int = SPAN_KIND_INTERNAL,
+            attributes: Optional[Dict[str, AttributeValue]] = None
+    ) -> Span:
+        span = Span(name, parent.trace_id, parent.span_id, kind, attributes)
+        self.spans.append(span)
+        return span
+
+    def finish(self) -> None:
+        self.root.end()
+        # spans of interrupted requests are ended with the run
+        for span in self.spans:
+            span.end()
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Returns the spans as an OTLP ExportTraceServiceRequest in its json encoding."""
+        spans = []
+        for span in self.spans:
+            data: Dict[str, Any] = {
+                'traceId': span.trace_id,
+                'spanId': span.span_id,
+                'name': span.name,
+                'kind': span.kind,
+                'startTimeUnixNano': str(span.start_time),
+                'endTimeUnixNano': str(span.end_time or span.start_time),
+                'attributes': _to_otlp_attributes(span.attributes),
+                'status': {}
+            }
+            if span.parent_span_id is not None:
+                data['parentSpanId'] = span.parent_span_id
+            if span.error is not None:
+                data['status'] = {'code': STATUS_CODE_ERROR, 'message': span.error}
+            spans.append(data)
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': _to_otlp_attributes({'service.name': 'httpcli'})},
+                'scopeSpans': [{'scope': {'name': 'httpcli', 'version': __version__}, 'spans': spans}]
+            }]
+        }
+
+
+# tracer and span of the request being sent in the current task, parent of the dns, connection and TLS spans
+_current_request: contextvars.ContextVar[Optional[Tuple[Tracer, Span]]] = contextvars.ContextVar(
+    'httpcli_current_request', default=None
+)
+
+
+@contextmanager
+def trace_phase(name: str, **attributes: AttributeValue) -> Iterator[Optional[Span]]:
+    """Creates a child span of the request phase in the current task, does nothing if the request is not traced."""
+    current = _current_request.get()
+    if current is None:
+        yield None
+        return
+
+    tracer, parent = current
+    span = tracer.start_span(name, parent, attributes=attributes)
+    try:
+        yield span
+    except Exception as e:
+        span.set_error(f'{type(e).__name__}: {e}')
+        raise
+    finally:
+        span.end()
+
+
+def _get_url(url: Tuple[bytes, bytes, Optional[int], bytes]) -> str:
+    scheme, host, port, target = url
+    port_part = f':{port}' if port is not None else ''
+    return f'{scheme.decode()}://{host.decode()}{port_part}{target.decode()}'
+
+
+class TracedResponseStream(httpx.AsyncByteStream):
+    """Response stream ending the response and client spans of a request when it is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, response_span: Span, client_span: Span):
+        self._stream = stream
+        self._response_span = response_span
+        self._client_span = client_span
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for part in self._stream:
+                yield part
+        except Exception as e:
+            self._response_span.set_error(f'{type(e).__name__}: {e}')
+            self._client_span.set_error(f'{type(e).__name__}: {e}')
+            raise
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._response_span.end()
+            self._client_span.end()
+
+
+class TracingTransport(httpx.AsyncBaseTransport):
+    """Transport creating a client span for each request and propagating its context with the traceparent header."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, tracer: Tracer):
+        self.transport = transport
+        self.tracer = tracer
+
+    async def handle_async_request(
+            self,
+            method: bytes,
+            url: Tuple[bytes, bytes, Optional[int], bytes],
+            headers: List[Tuple[bytes, bytes]],
+            stream: httpx.AsyncByteStream,
+            extensions: dict
+    ) -> Tuple[int, List[Tuple[bytes, bytes]], httpx.AsyncByteStream, dict]:
+        unicode_method = method.decode()
+        attributes: Dict[str, AttributeValue] = {
+            'http.method': unicode_method,
+            'http.url': _get_url(url),
+            'net.peer.name': url[1].decode(),
+        }
+        if url[2] is not None:
+            attributes['net.peer.port'] = url[2]
+        client_span = self.tracer.start_span(f'HTTP {unicode_method}', self.tracer.root, SPAN_KIND_CLIENT, attributes)
+        # a traceparent given by the user is kept, they know better
+        if not any(key.lower() == b'traceparent' for key, _ in headers):
+            headers = [*headers, (b'traceparent', client_span.traceparent.encode())]
+
+        # the request phase lasts until the response headers, including the connection if a new one is needed
+        request_span = self.tracer.start_span('request', client_span)
+        token = _current_request.set((self.tracer, request_span))
+        try:
+            status_code, response_headers, response_stream, response_extensions = (
+                await self.transport.handle_async_request(method, url, headers, stream, extensions)
+            )
+        except Exception as e:
+            request_span.set_error(f'{type(e).__name__}: {e}')
+            client_span.set_error(f'{type(e).__name__}: {e}')
+            client_span.end()
+            raise
+        finally:
+            request_span.end()
+            _current_request.reset(token)
+
+        client_span.attributes['http.status_code'] = status_code
+        http_version = response_extensions.get('http_version')
+        if http_version:
+            client_span.attributes['http.flavor'] = http_version.decode().replace('HTTP/', '')
+        if status_code >= 400:
+            client_span.set_error(f'HTTP status code {status_code}')
+        response_span = self.tracer.start_span('response', client_span)
+        traced_stream = TracedResponseStream(response_stream, response_span, client_span)
+        return status_code, response_headers, traced_stream, response_extensions
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+_current_tracer: Optional[Tracer] = None
+
+
+def get_current_tracer() -> Optional[Tracer]:
+    """Returns the tracer of the run if traces are exported, None otherwise."""
+    return _current_tracer
+
+
+def export_traces(tracer: Tracer, path: Optional[Path], endpoint: Optional[str]) -> None:
+    global _current_tracer
+    _current_tracer = None
+    tracer.finish()
+    data = json_codec.dumps(tracer.to_otlp())
+    if path is not None:
+        try:
+            path.write_text(data + '\n')
+        except OSError as e:
+            error_console.print(f'[warning]unable to write traces in {path}: {e}')
+
+    if endpoint is not None:
+        try:
+            # the run is over, a blocking request is simpler and it must not be traced itself
+            response = httpx.post(endpoint, content=data, headers={'content-type': 'application/json'}, timeout=5)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            error_console.print(f'[warning]unable to export traces to {endpoint}: {e}')
+
+
+def start_tracing(context: click.Context, path: Optional[str], endpoint: Optional[str]) -> None:
+    """Traces the requests of the command invoked by the group of the given context and exports them at exit."""
+    global _current_tracer
+    if path is None and endpoint is None:
+        return
+    tracer = Tracer(context.invoked_subcommand or '', os.environ.get('TRACEPARENT'))
+    _current_tracer = tracer
+    context.call_on_close(lambda: export_traces(tracer, Path(path) if path is not None else None, endpoint))
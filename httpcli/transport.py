@@ -0,0 +1,261 @@
+import time
+import typing
+from collections import Counter
+from contextlib import contextmanager
+from ssl import SSLContext
+from typing import Any, Dict, Iterator, Optional
+
+import anyio
+import anyio.abc
+import httpx
+from anyio import BrokenResourceError
+from anyio.streams.tls import TLSAttribute, TLSStream
+# httpx does not expose a way to hook into connection creation, so we rely on the anyio backend of httpcore
+# which works with all the concurrency libraries supported by anyio (asyncio and trio)
+from httpcore._backends.anyio import AnyIOBackend, SocketStream
+from httpcore._backends.base import AsyncSocketStream
+from httpcore._exceptions import ConnectError, ConnectTimeout, map_exceptions
+from httpcore._types import TimeoutDict
+
+from httpcli.cache import DNSCache, get_origin
+from httpcli.configuration import Configuration
+from httpcli.dns import Resolver
+from httpcli.har import RecordingTransport, get_current_recorder
+from httpcli.helpers import build_base_httpx_arguments
+from httpcli.metrics import MetricsTransport, RunMetrics, get_current_metrics
+from httpcli.tls import SessionCachingSSLContext, TLSStatistics, get_ssl_context
+from httpcli.tracing import TracingTransport, get_current_tracer, trace_phase
+
+
+class PoolStatistics:
+    """Counts requests sent by a client, the network connections they needed and the protocols negotiated."""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.protocols: typing.Counter[str] = Counter()
+        self.origin_protocols: Dict[str, str] = {}
+        self.tls = TLSStatistics()
+
+    async def on_request(self, _: httpx.Request) -> None:
+        self.requests += 1
+
+    async def on_response(self, response: httpx.Response) -> None:
+        self.protocols[response.http_version] += 1
+        self.origin_protocols[get_origin(str(response.request.url))] = response.http_version
+
+
+class ResolvingBackend(AnyIOBackend):
+    """
+    httpcore backend connecting to the addresses given by a Resolver, so that hostnames are resolved once per run.
+    TLS still uses the hostname for SNI and certificate verification.
+    """
+
+    def __init__(
+            self,
+            resolver: Optional[Resolver] = None,
+            tls_statistics: Optional[TLSStatistics] = None,
+            metrics: Optional[RunMetrics] = None
+    ):
+        self.resolver = resolver or Resolver()
+        self.tls_statistics = tls_statistics
+        self.metrics = metrics
+
+    async def _connect(self, host: str, port: int, local_address: Optional[str]) -> anyio.abc.SocketStream:
+        with trace_phase('dns', **{'net.peer.name': host}) as span:
+            addresses = await self.resolver.resolve(host, port)
+            if span is not None:
+                span.attributes['net.peer.addresses'] = ','.join(addresses)
+        error: Optional[OSError] = None
+        for address in addresses:
+            try:
+                with trace_phase('connect', **{'net.peer.ip': address, 'net.peer.port': port}):
+                    return await anyio.connect_tcp(address, port, local_host=local_address)
+            except OSError as e:
+                error = e
+        raise error or OSError(f'no address found for {host}')
+
+    async def _start_tls(self, stream: anyio.abc.ByteStream, hostname: str, ssl_context: SSLContext) -> TLSStream:
+        start = time.perf_counter()
+        with trace_phase('tls', **{'tls.server_name': hostname}) as span:
+            tls_stream = await TLSStream.wrap(
+                stream, hostname=hostname, ssl_context=ssl_context, standard_compatible=False
+            )
+            ssl_object = tls_stream.extra(TLSAttribute.ssl_object)
+            if span is not None:
+                span.attributes['tls.resumed'] = ssl_object.session_reused
+                span.attributes['tls.protocol.version'] = ssl_object.version() or ''
+        if isinstance(ssl_context, SessionCachingSSLContext):
+            ssl_context.remember(hostname, ssl_object)
+        if self.tls_statistics is not None:
+            self.tls_statistics.add(time.perf_counter() - start, ssl_object.session_reused)
+        if self.metrics is not None:
+            self.metrics.on_tls_handshake(ssl_object.session_reused)
+        return tls_stream
+
+    @contextmanager
+    def _record_connection(self, transport: str) -> Iterator[None]:
+        try:
+            yield
+        except Exception:
+            if self.metrics is not None:
+                self.metrics.on_connect_error()
+            raise
+        if self.metrics is not None:
+            self.metrics.on_connection(transport)
+
+    async def open_tcp_stream(
+            self,
+            hostname: bytes,
+            port: int,
+            ssl_context: Optional[SSLContext],
+            timeout: TimeoutDict,
+            *,
+            local_address: Optional[str],
+    ) -> AsyncSocketStream:
+        unicode_host = hostname.decode('utf-8')
+        exc_map = {TimeoutError: ConnectTimeout, OSError: ConnectError, BrokenResourceError: ConnectError}
+        with self._record_connection('tcp'), map_exceptions(exc_map):
+            with anyio.fail_after(timeout.get('connect')):
+                stream: anyio.abc.ByteStream = await self._connect(unicode_host, port, local_address)
+                if ssl_context:
+                    stream = await self._start_tls(stream, unicode_host, ssl_context)
+        return SocketStream(stream=stream)
+
+    async def open_uds_stream(
+            self,
+            path: str,
+            hostname: bytes,
+            ssl_context: Optional[SSLContext],
+            timeout: TimeoutDict,
+    ) -> AsyncSocketStream:
+        # the hostname is not resolved, it is only used for the Host header, SNI and certificate verification
+        unicode_host = hostname.decode('utf-8')
+        exc_map = {TimeoutError: ConnectTimeout, OSError: ConnectError, BrokenResourceError: ConnectError}
+        with self._record_connection('uds'), map_exceptions(exc_map):
+            with anyio.fail_after(timeout.get('connect')):
+                with trace_phase('connect', **{'net.sock.peer.addr': path}):
+                    stream: anyio.abc.ByteStream = await anyio.connect_unix(path)
+                if ssl_context:
+                    stream = await self._start_tls(stream, unicode_host, ssl_context)
+        return SocketStream(stream=stream)
+
+
+class InstrumentedBackend(ResolvingBackend):
+    """httpcore backend reporting each new connection to a PoolStatistics object."""
+
+    def __init__(
+            self, statistics: PoolStatistics, resolver: Optional[Resolver] = None, metrics: Optional[RunMetrics] = None
+    ):
+        super().__init__(resolver, statistics.tls, metrics)
+        self.statistics = statistics
+
+    async def open_tcp_stream(
+            self,
+            hostname: bytes,
+            port: int,
+            ssl_context: Optional[SSLContext],
+            timeout: TimeoutDict,
+            *,
+            local_address: Optional[str],
+    ) -> AsyncSocketStream:
+        stream = await super().open_tcp_stream(hostname, port, ssl_context, timeout, local_address=local_address)
+        self.statistics.connections += 1
+        return stream
+
+    async def open_uds_stream(
+            self,
+            path: str,
+            hostname: bytes,
+            ssl_context: Optional[SSLContext],
+            timeout: TimeoutDict,
+    ) -> AsyncSocketStream:
+        stream = await super().open_uds_stream(path, hostname, ssl_context, timeout)
+        self.statistics.connections += 1
+        return stream
+
+
+def build_resolver(config: Configuration) -> Resolver:
+    cache = DNSCache(config.dns_cache_ttl) if config.dns_cache_ttl else None
+    return Resolver(config.resolve, cache)
+
+
+def get_transport_arguments(config: Configuration) -> Dict[str, Any]:
+    """Returns the httpx.AsyncHTTPTransport arguments of the transport section of the configuration."""
+    settings = config.transport
+    return {
+        'uds': str(settings.uds) if settings.uds is not None else None,
+        'local_address': str(settings.local_address) if settings.local_address is not None else None,
+        'retries': settings.retries
+    }
+
+
+def build_transport(
+        arguments: Dict[str, Any], backend: ResolvingBackend, **transport_arguments: Any
+) -> httpx.AsyncBaseTransport:
+    """
+    Returns a transport using the given backend, the transport related arguments are removed from arguments.
+    The ssl context is shared with the other transports of the process having the same settings.
+    When the backend records metrics or when the run is traced or recorded in a HAR file, the requests are measured,
+    traced or recorded too.
+    """
+    http2 = arguments.pop('http2')
+    transport_arguments.update({
+        'verify': get_ssl_context(arguments.pop('verify'), http2, arguments.pop('cert', None)),
+        'http1': arguments.pop('http1'),
+        'http2': http2,
+        'backend': backend
+    })
+    proxy = arguments.pop('proxies', None)
+    if proxy is not None:
+        transport_arguments['proxy'] = httpx.Proxy(proxy)
+    transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(**transport_arguments)
+    if backend.metrics is not None:
+        transport = MetricsTransport(transport, backend.metrics)
+    recorder = get_current_recorder()
+    if recorder is not None:
+        # the recording is done under the tracing, so that the traceparent header is recorded too
+        transport = RecordingTransport(transport, recorder)
+    tracer = get_current_tracer()
+    if tracer is not None:
+        transport = TracingTransport(transport, tracer)
+    return transport
+
+
+def build_client_arguments(
+        config: Configuration,
+        arguments: Optional[Dict[str, Any]] = None,
+        tls_statistics: Optional[TLSStatistics] = None,
+        limits: Optional[httpx.Limits] = None
+) -> Dict[str, Any]:
+    """
+    Returns httpx.AsyncClient arguments for commands performing a single request, hostnames are resolved following
+    the resolve overrides and the dns cache of the configuration, unless a unix socket is configured.
+    Limits can be given to keep connections alive longer than the httpx default between requests.
+    """
+    arguments = dict(arguments) if arguments is not None else build_base_httpx_arguments(config)
+    backend = ResolvingBackend(build_resolver(config), tls_statistics, get_current_metrics())
+    transport_arguments = get_transport_arguments(config)
+    if limits is not None:
+        transport_arguments['limits'] = limits
+    arguments['transport'] = build_transport(arguments, backend, **transport_arguments)
+    return arguments
+
+
+def build_pooled_client_arguments(
+        config: Configuration, statistics: PoolStatistics, arguments: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Returns httpx.AsyncClient arguments for commands performing many requests with the same client.
+    With http2, there is one connection per origin and requests are multiplexed over it.
+    Arguments already built, for example with headers and cookies, can be given instead of the base ones.
+    """
+    arguments = dict(arguments) if arguments is not None else build_base_httpx_arguments(config)
+    limits = httpx.Limits(
+        max_connections=config.pool.max_connections,
+        max_keepalive_connections=config.pool.max_keepalive_connections
+    )
+    backend = InstrumentedBackend(statistics, build_resolver(config), get_current_metrics())
+    arguments['transport'] = build_transport(arguments, backend, limits=limits, **get_transport_arguments(config))
+    arguments['event_hooks'] = {'request': [statistics.on_request], 'response': [statistics.on_response]}
+    return arguments
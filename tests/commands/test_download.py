@@ -1,12 +1,25 @@
+import gzip
+import hashlib
+import os
+
 import httpx
 import pytest
+from hypercorn.config import Config
+from hypercorn.trio import serve
 from respx.patterns import M
 
-from httpcli.commands.download import (
+from httpcli.commands.helpers import (
     get_filename_from_content_disposition, get_filename_from_url, get_filename
 )
 from httpcli.http import http
 from httpcli.https import https
+from tests.helpers import app
+
+
+class BrokenStream(httpx.AsyncByteStream):
+    async def __aiter__(self):
+        yield b'partial'
+        raise httpx.ReadError('connection lost')
 
 
 class TestGetFilenameFromContentDisposition:
@@ -65,7 +78,7 @@ class TestGetFilename:
     """Tests get_filename"""
 
     def test_should_return_filename_from_content_disposition_header(self, mocker):
-        filename_from_url_mock = mocker.patch('httpcli.commands.download.get_filename_from_url')
+        filename_from_url_mock = mocker.patch('httpcli.commands.helpers.get_filename_from_url')
         response = httpx.Response(200, headers={'Content-Disposition': 'attachment; filename="filename.jpg"'})
 
         assert get_filename(response) == 'filename.jpg'
@@ -159,6 +172,7 @@ class TestDownloadCommand:
         assert '✅ https://images.com/image.png (image.png)\n' in output
         assert '✅ https://foo.com/image1.png (image1.png)\n' in output
         assert 'Downloading ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ 100% 0:00:00Downloads completed! 🌟\n' in output
+        assert '4 request(s) made over' in output
 
         # cleanup
         if current_dir:
@@ -167,3 +181,154 @@ class TestDownloadCommand:
                 file.unlink()
             for file in path.glob('*.txt'):
                 file.unlink()
+
+    @pytest.mark.parametrize('command', [http, https])
+    async def test_should_reuse_connections_when_downloading_files_from_the_same_origin(
+            self, runner, nursery, tmp_path, command
+    ):
+        await nursery.start(serve, app, Config())
+        urls = [f':8000/files/file{i}.txt' for i in range(5)]
+        result = await runner.invoke(command, ['download', *urls, '-d', f'{tmp_path}', '-c', '1'])
+
+        assert result.exit_code == 0
+        assert '5 request(s) made over 1 connection(s)' in result.output
+        assert (tmp_path / 'file3.txt').read_text() == 'content of file3.txt'
+
+    async def test_should_download_files_over_unix_socket(self, runner, nursery, tmp_path, uds_config, unix_socket):
+        await nursery.start(serve, app, uds_config)
+        urls = [f'http://docker.test/files/file{i}.txt' for i in range(3)]
+        arguments = ['--unix-socket', str(unix_socket), 'download', *urls, '-d', f'{tmp_path}', '-c', '1']
+        result = await runner.invoke(http, arguments)
+
+        assert result.exit_code == 0
+        assert '3 request(s) made over 1 connection(s)' in result.output
+        assert (tmp_path / 'file2.txt').read_text() == 'content of file2.txt'
+
+    @pytest.mark.parametrize('raw_encoding', [True, False])
+    async def test_should_save_decoded_or_raw_content(self, runner, respx_mock, tmp_path, raw_encoding):
+        content = b'hello world' * 10
+        headers = {'content-encoding': 'gzip', 'content-type': 'text/plain'}
+        respx_mock.get('https://foo.com/file.txt') % dict(content=gzip.compress(content), headers=headers)
+        arguments = ['download', 'https://foo.com/file.txt', '-d', f'{tmp_path}']
+        if raw_encoding:
+            arguments.append('--raw-encoding')
+        result = await runner.invoke(http, ['-v', *arguments])
+
+        assert result.exit_code == 0
+        if raw_encoding:
+            assert gzip.decompress((tmp_path / 'file.txt.gz').read_bytes()) == content
+            assert '✅ https://foo.com/file.txt (file.txt.gz)\n' in result.output
+        else:
+            assert (tmp_path / 'file.txt').read_bytes() == content
+            assert f'(file.txt) gzip, {len(gzip.compress(content))} bytes -> {len(content)} bytes' in result.output
+
+    async def test_should_write_manifest_when_checksum_is_given(self, runner, respx_mock, tmp_path):
+        respx_mock.get('https://foo.com/file.txt') % dict(content=b'hello', headers={'content-type': 'text/plain'})
+        arguments = ['download', 'https://foo.com/file.txt', '-d', f'{tmp_path}', '--checksum', 'md5']
+        result = await runner.invoke(http, arguments)
+
+        assert result.exit_code == 0
+        assert (tmp_path / 'MD5SUMS').read_text() == f'MD5 (file.txt) = {hashlib.md5(b"hello").hexdigest()}\n'
+        assert 'checksums written to' in result.output
+
+    async def test_should_hash_raw_content_given_raw_encoding(self, runner, respx_mock, tmp_path):
+        content = gzip.compress(b'hello world')
+        headers = {'content-encoding': 'gzip', 'content-type': 'text/plain'}
+        respx_mock.get('https://foo.com/file.txt') % dict(content=content, headers=headers)
+        manifest = tmp_path / 'sums.txt'
+        arguments = [
+            'download', 'https://foo.com/file.txt', '-d', f'{tmp_path}', '--raw-encoding', '--manifest', f'{manifest}'
+        ]
+        result = await runner.invoke(http, arguments)
+
+        assert result.exit_code == 0
+        assert manifest.read_text() == f'SHA256 (file.txt.gz) = {hashlib.sha256(content).hexdigest()}\n'
+
+    async def test_should_verify_expected_hashes_given_in_file(self, runner, respx_mock, tmp_path):
+        respx_mock.get('https://foo.com/a.txt') % dict(content=b'a', headers={'content-type': 'text/plain'})
+        respx_mock.get('https://foo.com/b.txt') % dict(content=b'b', headers={'content-type': 'text/plain'})
+        digest_a, digest_b = hashlib.sha256(b'a').hexdigest(), hashlib.sha256(b'b').hexdigest()
+        path = tmp_path / 'urls.txt'
+        path.write_text(f'https://foo.com/a.txt sha256:{digest_a}\nhttps://foo.com/b.txt {digest_a}\n')
+        result = await runner.invoke(http, ['download', '-f', f'{path}', '-d', f'{tmp_path}'])
+
+        assert result.exit_code == 1
+        output = ' '.join(result.output.split())
+        assert '✅ https://foo.com/a.txt (a.txt) sha256 verified' in output
+        assert f'❌ https://foo.com/b.txt (b.txt) checksum mismatch, expected sha256:{digest_a}' in output
+        assert '1 file(s) do not have the expected checksum: b.txt' in output
+        assert (tmp_path / 'SHA256SUMS').read_text() == f'SHA256 (a.txt) = {digest_a}\nSHA256 (b.txt) = {digest_b}\n'
+
+    async def test_should_write_one_manifest_per_algorithm(self, runner, respx_mock, tmp_path):
+        respx_mock.get('https://foo.com/a.txt') % dict(content=b'a', headers={'content-type': 'text/plain'})
+        respx_mock.get('https://foo.com/b.txt') % dict(content=b'b', headers={'content-type': 'text/plain'})
+        digest_a, digest_b = hashlib.md5(b'a').hexdigest(), hashlib.sha256(b'b').hexdigest()
+        path = tmp_path / 'urls.txt'
+        path.write_text(f'https://foo.com/a.txt md5:{digest_a}\nhttps://foo.com/b.txt\n')
+        result = await runner.invoke(http, ['download', '-f', f'{path}', '-d', f'{tmp_path}'])
+
+        assert result.exit_code == 0
+        assert (tmp_path / 'MD5SUMS').read_text() == f'MD5 (a.txt) = {digest_a}\n'
+        assert (tmp_path / 'SHA256SUMS').read_text() == f'SHA256 (b.txt) = {digest_b}\n'
+
+    async def test_should_not_overwrite_files_with_the_same_filename(self, runner, respx_mock, tmp_path):
+        respx_mock.get('https://one.example.com/file.bin') % dict(content=b'one')
+        respx_mock.get('https://two.example.com/file.bin') % dict(content=b'two')
+        digest_one, digest_two = hashlib.sha256(b'one').hexdigest(), hashlib.sha256(b'two').hexdigest()
+        path = tmp_path / 'urls.txt'
+        path.write_text(
+            f'https://one.example.com/file.bin sha256:{digest_one}\nhttps://two.example.com/file.bin {digest_two}\n'
+        )
+        destination = tmp_path / 'downloads'
+        destination.mkdir()
+        result = await runner.invoke(http, ['download', '-f', f'{path}', '-d', f'{destination}'])
+
+        assert result.exit_code == 0
+        assert sorted(path.read_bytes() for path in destination.glob('file*.bin')) == [b'one', b'two']
+        manifest = (destination / 'SHA256SUMS').read_text()
+        assert sorted(manifest.splitlines()) == sorted([
+            f'SHA256 ({path.name}) = {hashlib.sha256(path.read_bytes()).hexdigest()}'
+            for path in destination.glob('file*.bin')
+        ])
+        assert {path.name for path in destination.glob('file*.bin')} == {'file.bin', 'file-1.bin'}
+
+    async def test_should_keep_previous_file_when_download_fails(self, runner, respx_mock, tmp_path):
+        respx_mock.get('https://foo.com/file.txt') % httpx.Response(200, stream=BrokenStream())
+        (tmp_path / 'file.txt').write_bytes(b'complete')
+        result = await runner.invoke(http, ['download', 'https://foo.com/file.txt', '-d', f'{tmp_path}'])
+
+        assert result.exit_code == 0
+        assert 'unable to fetch https://foo.com/file.txt, reason: connection lost' in result.output
+        assert [path.name for path in tmp_path.iterdir()] == ['file.txt']
+        assert (tmp_path / 'file.txt').read_bytes() == b'complete'
+
+    async def test_should_create_files_with_default_permissions(self, runner, respx_mock, tmp_path):
+        respx_mock.get('https://foo.com/file.txt') % dict(content=b'hello')
+        result = await runner.invoke(http, ['download', 'https://foo.com/file.txt', '-d', f'{tmp_path}'])
+
+        assert result.exit_code == 0
+        umask = os.umask(0)
+        os.umask(umask)
+        assert (tmp_path / 'file.txt').stat().st_mode & 0o777 == 0o666 & ~umask
+
+    @pytest.mark.parametrize('side_effect', [httpx.Response(404), httpx.ConnectError('connection refused')])
+    async def test_should_exit_with_error_when_file_with_expected_hash_cannot_be_downloaded(
+            self, runner, respx_mock, tmp_path, side_effect
+    ):
+        respx_mock.get('https://foo.com/a.txt').side_effect = [side_effect]
+        respx_mock.get('https://foo.com/b.txt') % 404
+        path = tmp_path / 'urls.txt'
+        path.write_text(f'https://foo.com/a.txt sha256:{hashlib.sha256(b"a").hexdigest()}\nhttps://foo.com/b.txt\n')
+        result = await runner.invoke(http, ['download', '-f', f'{path}', '-d', f'{tmp_path}'])
+
+        assert result.exit_code == 1
+        output = ' '.join(result.output.split())
+        assert '1 file(s) with an expected checksum could not be downloaded: https://foo.com/a.txt' in output
+
+    async def test_should_print_error_when_hash_in_file_is_not_correct(self, runner, tmp_path):
+        path = tmp_path / 'urls.txt'
+        path.write_text('https://foo.com/a.txt sha256:xyz\n')
+        result = await runner.invoke(http, ['download', '-f', f'{path}', '-d', f'{tmp_path}'])
+
+        assert result.exit_code == 2
+        assert 'line 1: sha256:xyz is not a valid hexadecimal digest' in result.output
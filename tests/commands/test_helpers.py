@@ -1,3 +1,4 @@
+import gzip
 import json
 
 import anyio
@@ -5,10 +6,15 @@ import asyncclick as click
 import httpx
 import pytest
 
+from httpcli.commands import helpers
 from httpcli.commands.helpers import (
-    guess_lexer_name, get_response_headers_text, print_response, perform_read_request, perform_write_request
+    guess_lexer_name, get_response_headers_text, print_response, perform_read_request, perform_read_requests,
+    perform_write_request, get_urls, get_unique_path, ReorderWindow
 )
+from httpcli.cache import ProtocolCache
 from httpcli.configuration import Configuration
+from httpcli.models import OAuth2PasswordBearer
+from httpcli.sessions import Session
 
 
 class TestGuessLexerName:
@@ -75,7 +81,7 @@ class TestPrintResponse:
 
     def test_should_print_correct_output_when_json_is_badly_formed(self, capsys, mocker):
         data = {'hello': 'world'}
-        mocker.patch('json.dumps', side_effect=json.JSONDecodeError('hum', str(data), 2))
+        mocker.patch('httpcli.json_codec.dumps', side_effect=json.JSONDecodeError('hum', str(data), 2))
         response = httpx.Response(status_code=200, json=data)
         print_response(response)
 
@@ -117,6 +123,35 @@ class TestPerformReadRequest:
 
         assert capsys.readouterr().out == 'unexpected error: just a test error\n'
 
+    @pytest.mark.parametrize('output_format', ['json', 'jsonl'])
+    async def test_should_write_error_in_document_given_json_format(self, capsys, respx_mock, output_format):
+        respx_mock.get('https://example.com').side_effect = httpx.ConnectError('connection refused')
+
+        with pytest.raises(click.Abort):
+            await perform_read_request('GET', 'https://example.com', Configuration(), output_format=output_format)
+
+        captured = capsys.readouterr()
+        assert json.loads(captured.out) == {
+            'method': 'GET', 'url': 'https://example.com', 'error': 'connection refused'
+        }
+        assert 'unexpected error: connection refused' in captured.err
+
+    async def test_should_write_error_entry_given_har_format(self, capsys, respx_mock, autojump_clock):
+        async def side_effect(_):
+            await anyio.sleep(6)
+
+        respx_mock.get('https://example.com').side_effect = side_effect
+
+        with pytest.raises(click.Abort):
+            await perform_read_request('GET', 'https://example.com', Configuration(), output_format='har')
+
+        captured = capsys.readouterr()
+        entry = json.loads(captured.out)['log']['entries'][0]
+        assert entry['request']['url'] == 'https://example.com'
+        assert entry['response']['status'] == 0
+        assert entry['response']['_error'] == 'the request timeout has expired'
+        assert 'the request timeout has expired' in captured.err
+
     # this is not a realistic example, but just prove the function works as expected
     @pytest.mark.parametrize('method', ['GET', 'HEAD', 'OPTIONS', 'DELETE'])
     async def test_should_print_response_given_correct_input(self, capsys, respx_mock, method):
@@ -140,6 +175,318 @@ class TestPerformReadRequest:
         for line in lines:
             assert line in output
 
+    async def test_should_save_body_in_output_file_and_print_headers_on_stderr(self, capsys, respx_mock, tmp_path):
+        content = b'\x89PNG' + bytes(range(256)) * 100
+        respx_mock.get('https://example.com/image') % dict(content=content, headers={'content-type': 'image/png'})
+        path = tmp_path / 'image.png'
+        await perform_read_request('GET', 'https://example.com/image', Configuration(verbose=True), output=str(path))
+
+        assert path.read_bytes() == content
+        captured = capsys.readouterr()
+        assert captured.out == ''
+        assert 'HTTP/1.1 200 OK' in captured.err
+        assert f'body saved to {path} ({len(content)} bytes)' in captured.err.replace('\n', '')
+        assert 'protocol: HTTP/1.1' in captured.err
+
+    async def test_should_save_decoded_body_in_output_file(self, respx_mock, tmp_path):
+        content = b'hello world' * 1000
+        headers = {'content-encoding': 'gzip'}
+        respx_mock.get('https://example.com') % dict(content=gzip.compress(content), headers=headers)
+        path = tmp_path / 'hello.txt'
+        await perform_read_request('GET', 'https://example.com', Configuration(), output=str(path))
+
+        assert path.read_bytes() == content
+
+    async def test_should_write_body_on_stdout_when_output_is_a_dash(self, capsysbinary, respx_mock):
+        content = b'\x89PNG' + bytes(range(256))
+        respx_mock.get('https://example.com/image') % dict(content=content, headers={'content-type': 'image/png'})
+        await perform_read_request('GET', 'https://example.com/image', Configuration(), output='-')
+
+        captured = capsysbinary.readouterr()
+        assert captured.out == content
+        assert b'body written to the standard output (260 bytes)' in captured.err
+
+    @pytest.mark.parametrize('output_format', ['json', 'jsonl', 'har'])
+    async def test_should_raise_error_when_output_is_a_dash_with_a_document_format(self, respx_mock, output_format):
+        route = respx_mock.get('https://example.com') % dict(text='hello')
+        with pytest.raises(click.UsageError) as exc_info:
+            await perform_read_request('GET', 'https://example.com', Configuration(), output='-',
+                                       output_format=output_format)
+
+        assert '--output - can only be used with the text format' in str(exc_info.value)
+        assert not route.called
+
+    async def test_should_print_error_when_output_file_cannot_be_written(self, capsys, respx_mock, tmp_path):
+        respx_mock.get('https://example.com') % dict(text='hello')
+        path = tmp_path / 'unknown' / 'hello.txt'
+        with pytest.raises(click.Abort):
+            await perform_read_request('GET', 'https://example.com', Configuration(), output=str(path))
+
+        output = ' '.join(capsys.readouterr().out.split())
+        assert 'unable to save the response body: [Errno 2] No such file or directory' in output
+
+    @pytest.mark.parametrize(('url', 'headers', 'filename'), [
+        ('https://example.com/files/foo.txt', {}, 'foo.txt'),
+        ('https://example.com', {'content-disposition': 'attachment; filename="../../bar.txt"'}, 'bar.txt'),
+        ('https://example.com', {}, 'index')
+    ])
+    async def test_should_save_body_in_current_directory_when_download_is_true(
+            self, respx_mock, tmp_path, monkeypatch, url, headers, filename
+    ):
+        monkeypatch.chdir(tmp_path)
+        respx_mock.get(url) % dict(content=b'hello', headers=headers)
+        await perform_read_request('GET', url, Configuration(), download=True)
+
+        assert [path.name for path in tmp_path.iterdir()] == [filename]
+        assert (tmp_path / filename).read_bytes() == b'hello'
+
+    async def test_should_print_request_information_in_verbose_mode(self, capsys, respx_mock):
+        respx_mock.get('https://example.com') % dict(json={'hello': 'world'})
+        await perform_read_request('GET', 'https://example.com', Configuration(verbose=True))
+
+        output = capsys.readouterr().out
+        assert 'protocol: HTTP/1.1' in output
+        assert 'elapsed: ' in output
+
+    async def test_should_print_decoding_information_in_verbose_mode(self, capsys, respx_mock):
+        content = json.dumps({'hello': 'world'}).encode()
+        headers = {'content-encoding': 'gzip', 'content-type': 'application/json'}
+        respx_mock.get('https://example.com') % dict(content=gzip.compress(content), headers=headers)
+        await perform_read_request('GET', 'https://example.com', Configuration(verbose=True))
+
+        output = capsys.readouterr().out
+        assert 'hello' in output
+        assert f'content encoding: gzip, {len(gzip.compress(content))} bytes -> {len(content)} bytes' in output
+        assert 'decoded in' in output
+
+    async def test_should_remember_negotiated_protocol_in_auto_mode(self, capsys, respx_mock, cache_directory):
+        respx_mock.get('https://example.com') % dict(json={'hello': 'world'})
+        await perform_read_request('GET', 'https://example.com', Configuration(version='auto'))
+
+        assert ProtocolCache(cache_directory / 'protocols.json').get('https://example.com') == 'HTTP/1.1'
+
+    async def test_should_not_offer_http2_when_server_is_known_to_not_support_it(self, mocker, respx_mock):
+        cache = ProtocolCache()
+        cache.set('https://example.com', 'HTTP/1.1')
+        cache.save()
+        arguments_mock = mocker.patch(
+            'httpcli.commands.helpers.build_client_arguments', wraps=helpers.build_client_arguments
+        )
+        respx_mock.get('https://example.com') % dict(json={'hello': 'world'})
+        await perform_read_request('GET', 'https://example.com', Configuration(version='auto'))
+
+        arguments = arguments_mock.call_args.args[1]
+        assert arguments['http1'] is True
+        assert arguments['http2'] is False
+
+
+class TestGetUniquePath:
+    """Tests function get_unique_path"""
+
+    def test_should_return_path_when_it_is_not_used(self, tmp_path):
+        used_paths = set()
+        assert get_unique_path(tmp_path / 'foo.txt', used_paths) == tmp_path / 'foo.txt'
+        assert used_paths == {tmp_path / 'foo.txt'}
+
+    @pytest.mark.parametrize(('name', 'unique_name'), [('foo.txt', 'foo-2.txt'), ('index', 'index-2')])
+    def test_should_return_numbered_path_when_path_is_used(self, tmp_path, name, unique_name):
+        path = tmp_path / name
+        used_paths = {path, path.with_name(unique_name.replace('2', '1'))}
+
+        assert get_unique_path(path, used_paths) == tmp_path / unique_name
+        assert tmp_path / unique_name in used_paths
+
+
+class TestReorderWindow:
+    """Tests class ReorderWindow"""
+
+    async def test_should_wait_until_index_is_in_the_window(self):
+        window = ReorderWindow(2)
+        await window.wait(1)
+
+        with anyio.move_on_after(0.1) as scope:
+            await window.wait(2)
+        assert scope.cancel_called
+
+        await window.advance()
+        with anyio.fail_after(0.1):
+            await window.wait(2)
+        assert window.next_index == 1
+
+
+class TestSessions:
+    """Tests the session support of perform_read_request, perform_write_request and perform_read_requests"""
+
+    async def test_should_reuse_login_cookie_in_next_invocations(self, capsys, respx_mock):
+        login_route = respx_mock.post('https://example.com/login') % dict(
+            json={'logged': True}, headers={'set-cookie': 'sid=secret; Path=/'}
+        )
+        me_route = respx_mock.get('https://example.com/me') % dict(json={'name': 'foo'})
+        config = Configuration(session='api')
+        await perform_write_request(
+            'POST', 'https://example.com/login', config, headers=[('X-Api-Version', '2')], json_data=[('user', 'foo')]
+        )
+        await perform_read_request('GET', 'https://example.com/me', config)
+        await perform_read_requests('GET', ['https://example.com/me', 'https://example.com/me'], config)
+
+        assert login_route.call_count == 1
+        assert me_route.call_count == 3
+        for call in me_route.calls:
+            assert call.request.headers['cookie'] == 'sid=secret'
+            assert call.request.headers['x-api-version'] == '2'
+            assert 'content-type' not in call.request.headers
+
+    async def test_should_forget_token_refused_by_server(self, capsys, respx_mock):
+        auth = OAuth2PasswordBearer(username='foo', password='bar', token_url='https://token.com')  # type: ignore
+        token_route = respx_mock.post('https://token.com') % dict(json={'access_token': 'token'})
+        respx_mock.get('https://example.com/me') % 401
+        session = Session('api')
+        session.set_token(auth, 'expired')
+        session.save()
+        config = Configuration(session='api', auth=auth)
+
+        await perform_read_request('GET', 'https://example.com/me', config)
+        assert token_route.call_count == 0
+        assert Session('api').get_token(auth) is None
+
+        await perform_read_request('GET', 'https://example.com/me', config)
+        assert token_route.call_count == 1
+
+    async def test_should_not_create_session_file_without_session(self, respx_mock, sessions_directory):
+        respx_mock.get('https://example.com') % dict(headers={'set-cookie': 'sid=secret'})
+        await perform_read_request('GET', 'https://example.com', Configuration(), headers=[('foo', 'bar')])
+
+        assert not sessions_directory.exists()
+
+
+class TestGetUrls:
+    """Tests function get_urls"""
+
+    def test_should_return_urls_of_arguments_and_file_without_duplicates(self, tmp_path):
+        path = tmp_path / 'urls.txt'
+        path.write_text('https://b.com\n\nhttps://a.com\nhttps://c.com\n')
+        with path.open() as f:
+            urls = get_urls(('https://a.com', 'https://a.com'), f)
+
+        assert urls == ['https://a.com', 'https://b.com', 'https://c.com']
+
+    def test_should_raise_error_when_no_url_is_given(self):
+        with pytest.raises(click.UsageError) as exc_info:
+            get_urls((), None)
+
+        assert 'at least one url' in str(exc_info.value)
+
+    def test_should_raise_error_when_output_is_given_with_many_urls(self):
+        with pytest.raises(click.UsageError) as exc_info:
+            get_urls(('https://a.com', 'https://b.com'), None, 'file.txt')
+
+        assert '--output cannot be used with several urls' in str(exc_info.value)
+
+
+class TestPerformReadRequests:
+    """Tests function perform_read_requests"""
+
+    @pytest.mark.parametrize(('as_completed', 'expected_order'), [(False, ['slow', 'fast']), (True, ['fast', 'slow'])])
+    async def test_should_print_responses_in_expected_order(
+            self, capsys, respx_mock, autojump_clock, as_completed, expected_order
+    ):
+        async def slow(_):
+            await anyio.sleep(1)
+            return httpx.Response(200, text='slow')
+
+        respx_mock.get('https://example.com/slow').side_effect = slow
+        respx_mock.get('https://example.com/fast') % dict(text='fast')
+        urls = ['https://example.com/slow', 'https://example.com/fast']
+        await perform_read_requests('GET', urls, Configuration(), as_completed=as_completed)
+
+        output = capsys.readouterr().out
+        positions = [output.index(f'GET https://example.com/{name}') for name in expected_order]
+        assert positions == sorted(positions)
+        assert '2 request(s) made over' in output
+
+    async def test_should_not_fetch_more_than_concurrency_urls_ahead_of_a_slow_one(
+            self, capsys, respx_mock, autojump_clock
+    ):
+        started = []
+
+        async def side_effect(request):
+            started.append(request.url.path)
+            if request.url.path == '/0':
+                await anyio.sleep(10)
+            return httpx.Response(200, text='hello')
+
+        respx_mock.route(host='example.com').side_effect = side_effect
+        urls = [f'https://example.com/{index}' for index in range(10)]
+        with anyio.move_on_after(5):
+            await perform_read_requests('GET', urls, Configuration(timeout=20), concurrency=2)
+
+        # only the second url is fetched while the first one is in progress
+        assert started == ['/0', '/1']
+
+    async def test_should_print_summary_table_with_errors(self, capsys, respx_mock):
+        respx_mock.get('https://example.com/ok') % dict(text='hello')
+        respx_mock.get('https://example.com/missing') % 404
+        respx_mock.get('https://example.com/error').side_effect = httpx.ConnectError('connection refused')
+        urls = ['https://example.com/ok', 'https://example.com/missing', 'https://example.com/error']
+        await perform_read_requests('GET', urls, Configuration(), concurrency=1)
+
+        output = capsys.readouterr().out
+        assert 'unable to fetch https://example.com/error, reason: connection refused' in output
+        table = output[output.index('Summary'):]
+        lines = [line for line in table.splitlines() if 'https://example.com' in line]
+        assert 'https://example.com/ok' in lines[0] and '200' in lines[0] and '5 B' in lines[0]
+        assert 'https://example.com/missing' in lines[1] and '404' in lines[1]
+        assert 'https://example.com/error' in lines[2] and 'error' in lines[2]
+
+    async def test_should_record_timeout_error(self, capsys, respx_mock, autojump_clock):
+        async def side_effect(_):
+            await anyio.sleep(6)
+
+        respx_mock.get('https://example.com/slow').side_effect = side_effect
+        respx_mock.get('https://example.com/fast') % dict(text='fast')
+        urls = ['https://example.com/slow', 'https://example.com/fast']
+        await perform_read_requests('GET', urls, Configuration())
+
+        # rich wraps long lines
+        output = ' '.join(capsys.readouterr().out.split())
+        assert 'unable to fetch https://example.com/slow, reason: the request timeout has expired' in output
+
+    async def test_should_save_bodies_given_download(self, respx_mock, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        respx_mock.get('https://example.com/a.txt') % dict(text='a')
+        respx_mock.get('https://example.com/b.txt') % dict(text='b')
+        await perform_read_requests('GET', ['https://example.com/a.txt', 'https://example.com/b.txt'], Configuration(),
+                                    download=True)
+
+        assert (tmp_path / 'a.txt').read_text() == 'a'
+        assert (tmp_path / 'b.txt').read_text() == 'b'
+
+    async def test_should_not_overwrite_bodies_with_the_same_filename_given_download(
+            self, respx_mock, tmp_path, monkeypatch
+    ):
+        monkeypatch.chdir(tmp_path)
+        urls = ['https://example.com/a/data.txt', 'https://example.com/b/data.txt', 'https://example.com/c/data.txt']
+        for url in urls:
+            respx_mock.get(url) % dict(text=url)
+        await perform_read_requests('GET', urls, Configuration(), download=True)
+
+        assert sorted(path.name for path in tmp_path.iterdir()) == ['data-1.txt', 'data-2.txt', 'data.txt']
+        assert sorted(path.read_text() for path in tmp_path.iterdir()) == urls
+
+    async def test_should_print_error_when_downloaded_body_cannot_be_written(
+            self, capsys, respx_mock, tmp_path, monkeypatch
+    ):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'a.txt').mkdir()
+        respx_mock.get('https://example.com/a.txt') % dict(text='a')
+        respx_mock.get('https://example.com/b.txt') % dict(text='b')
+        await perform_read_requests('GET', ['https://example.com/a.txt', 'https://example.com/b.txt'], Configuration(),
+                                    download=True)
+
+        output = ' '.join(capsys.readouterr().out.split())
+        assert 'unable to fetch https://example.com/a.txt, reason: unable to save the response body' in output
+        assert (tmp_path / 'b.txt').read_text() == 'b'
+
 
 class TestPerformWriteRequest:
     """Tests function perform_write_request"""
@@ -192,3 +539,22 @@ class TestPerformWriteRequest:
         ]
         for line in lines:
             assert line in output
+
+    async def test_should_send_compressed_body_when_compress_is_given(self, capsys, respx_mock):
+        route = respx_mock.post('https://example.com') % dict(json={'hello': 'world'})
+        # noinspection PyTypeChecker
+        await perform_write_request('POST', 'https://example.com', Configuration(), raw=b'hello' * 100, compress='gzip')
+
+        request = route.calls.last.request
+        assert request.headers['content-encoding'] == 'gzip'
+        assert gzip.decompress(request.read()) == b'hello' * 100
+        assert 'HTTP/1.1 200 OK' in capsys.readouterr().out
+
+    async def test_should_save_body_in_output_file_when_output_is_given(self, capsys, respx_mock, tmp_path):
+        respx_mock.post('https://example.com') % dict(json={'hello': 'world'})
+        path = tmp_path / 'response.json'
+        # noinspection PyTypeChecker
+        await perform_write_request('POST', 'https://example.com', Configuration(), raw=b'hello', output=str(path))
+
+        assert json.loads(path.read_text()) == {'hello': 'world'}
+        assert capsys.readouterr().out == ''
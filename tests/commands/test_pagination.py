@@ -0,0 +1,291 @@
+import json
+
+import anyio
+import asyncclick as click
+import httpx
+import pytest
+
+from httpcli.commands.pagination import (
+    DEFAULT_MAX_PAGES, Pagination, check_pagination, get_first_page_value, get_next_url, get_page_values,
+    perform_paginated_requests
+)
+from httpcli.configuration import Configuration
+from httpcli.http import http
+from httpcli.https import https
+from httpcli.jsonpath import JsonPath
+
+
+def get_lines(output):
+    return [json.loads(line) for line in output.splitlines()]
+
+
+class TestCheckPagination:
+    """Tests function check_pagination"""
+
+    @pytest.mark.parametrize(('pagination', 'message'), [
+        (Pagination('cursor'), '--paginate cursor needs the json path of the next cursor'),
+        (Pagination('offset'), '--paginate offset needs the number of items per page'),
+        (Pagination('link', total_path=JsonPath('total')), '--total-path can only be used with the page and offset'),
+        (Pagination('page', total_path=JsonPath('total')), '--total-path needs the number of items per page'),
+    ])
+    def test_should_raise_error_given_incomplete_options(self, pagination, message):
+        with pytest.raises(click.UsageError) as exc_info:
+            check_pagination(pagination)
+
+        assert message in str(exc_info.value)
+
+    @pytest.mark.parametrize('pagination', [
+        Pagination('link'),
+        Pagination('cursor', cursor_path=JsonPath('next')),
+        Pagination('page'),
+        Pagination('offset', page_size=10, total_path=JsonPath('total')),
+    ])
+    def test_should_not_raise_error_given_valid_options(self, pagination):
+        check_pagination(pagination)
+
+
+class TestGetPageValues:
+    """Tests function get_page_values"""
+
+    @pytest.mark.parametrize(('pagination', 'first_value', 'total', 'expected'), [
+        (Pagination('page', page_size=10), 1, 35, [2, 3, 4]),
+        (Pagination('page', page_size=10), 1, 10, []),
+        (Pagination('offset', page_size=10), 0, 35, [10, 20, 30]),
+        (Pagination('offset', page_size=10), 20, 35, [30, 40, 50]),
+        (Pagination('page', max_pages=3), 1, None, [2, 3]),
+        (Pagination('offset', page_size=5, max_pages=10), 0, 12, [5, 10]),
+    ])
+    def test_should_return_following_values(self, pagination, first_value, total, expected):
+        assert list(get_page_values(pagination, first_value, total)) == expected
+
+
+class TestGetFirstPageValue:
+    """Tests function get_first_page_value"""
+
+    @pytest.mark.parametrize(('pagination', 'url', 'params', 'expected'), [
+        (Pagination('page'), 'https://example.com', None, 1),
+        (Pagination('offset', page_size=10), 'https://example.com', None, 0),
+        (Pagination('page'), 'https://example.com?page=3', None, 3),
+        (Pagination('page', page_param='p'), 'https://example.com', [('p', '4')], 4),
+    ])
+    def test_should_return_first_value(self, pagination, url, params, expected):
+        assert get_first_page_value(pagination, url, params) == expected
+
+    def test_should_raise_error_when_value_is_not_an_integer(self):
+        with pytest.raises(click.UsageError) as exc_info:
+            get_first_page_value(Pagination('page'), 'https://example.com?page=foo', None)
+
+        assert 'foo is not a valid value for the page query parameter' in str(exc_info.value)
+
+
+class TestGetNextUrl:
+    """Tests function get_next_url"""
+
+    @pytest.mark.parametrize(('headers', 'expected'), [
+        ({}, None),
+        ({'link': '</items?page=2>; rel="next", </items?page=9>; rel="last"'}, 'https://example.com/items?page=2'),
+    ])
+    def test_should_return_url_of_link_header(self, headers, expected):
+        response = httpx.Response(200, headers=headers, request=httpx.Request('GET', 'https://example.com/items'))
+
+        assert get_next_url(Pagination('link'), 'https://example.com/items', response, {}) == expected
+
+    @pytest.mark.parametrize(('data', 'expected'), [
+        ({'next': None}, None),
+        ({'next': ''}, None),
+        ({}, None),
+        ({'next': 'abc'}, 'https://example.com/items?limit=2&after=abc'),
+        ({'next': 42}, 'https://example.com/items?limit=2&after=42'),
+        ({'next': '/items?token=xyz'}, 'https://example.com/items?token=xyz'),
+    ])
+    def test_should_return_url_with_cursor(self, data, expected):
+        url = 'https://example.com/items?limit=2'
+        response = httpx.Response(200, request=httpx.Request('GET', url))
+        pagination = Pagination('cursor', cursor_path=JsonPath('$.next'), cursor_param='after')
+
+        assert get_next_url(pagination, url, response, data) == expected
+
+
+class TestPerformPaginatedRequests:
+    """Tests function perform_paginated_requests"""
+
+    async def test_should_prefetch_pages_concurrently_and_print_them_in_order(
+            self, respx_mock, capsys, autojump_clock
+    ):
+        async def side_effect(request):
+            offset = int(request.url.params['offset'])
+            # the last pages are the fastest, they must wait for the previous ones to be printed
+            await anyio.sleep(1 - offset / 100)
+            return httpx.Response(200, json={'total': 45, 'items': list(range(offset, min(offset + 10, 45)))})
+
+        respx_mock.get('https://example.com/items').side_effect = side_effect
+        pagination = Pagination('offset', JsonPath('$.items[*]'), page_size=10, total_path=JsonPath('$.total'))
+        start = anyio.current_time()
+        await perform_paginated_requests('https://example.com/items', Configuration(), pagination, concurrency=4)
+
+        assert get_lines(capsys.readouterr().out) == list(range(45))
+        # the first page then the four others at the same time
+        assert anyio.current_time() - start < 2
+        assert respx_mock.calls.call_count == 5
+
+    async def test_should_not_fetch_more_than_concurrency_pages_ahead_of_a_slow_one(
+            self, respx_mock, capsys, autojump_clock
+    ):
+        started = []
+
+        async def side_effect(request):
+            page = int(request.url.params['page'])
+            started.append(page)
+            if page == 2:
+                await anyio.sleep(10)
+            return httpx.Response(200, json={'total': 100, 'items': [page]})
+
+        respx_mock.get('https://example.com/items').side_effect = side_effect
+        pagination = Pagination('page', JsonPath('$.items[*]'), page_size=10, total_path=JsonPath('$.total'))
+        with anyio.move_on_after(5):
+            await perform_paginated_requests(
+                'https://example.com/items', Configuration(timeout=20), pagination, concurrency=2
+            )
+
+        # the first page, then the second one is slow and only the third one is fetched in the meantime
+        assert started == [1, 2, 3]
+
+    async def test_should_fetch_pages_until_empty_one_without_total(self, respx_mock, capsys):
+        def side_effect(request):
+            page = int(request.url.params['page'])
+            return httpx.Response(200, json=[page * 10, page * 10 + 1] if page <= 3 else [])
+
+        respx_mock.get('https://example.com/items').side_effect = side_effect
+        await perform_paginated_requests('https://example.com/items', Configuration(), Pagination('page'))
+
+        assert get_lines(capsys.readouterr().out) == [10, 11, 20, 21, 30, 31]
+        assert respx_mock.calls.call_count == 4
+
+    async def test_should_print_each_page_on_one_line_when_it_is_not_an_array(self, respx_mock, capsys):
+        def side_effect(request):
+            page = int(request.url.params['page'])
+            return httpx.Response(200, json={'page': page} if page <= 2 else {})
+
+        respx_mock.get('https://example.com/items').side_effect = side_effect
+        await perform_paginated_requests('https://example.com/items', Configuration(), Pagination('page'))
+
+        assert get_lines(capsys.readouterr().out) == [{'page': 1}, {'page': 2}]
+
+    async def test_should_stop_at_max_pages(self, respx_mock, capsys):
+        def side_effect(request):
+            return httpx.Response(200, json={'items': [int(request.url.params['page'])]})
+
+        respx_mock.get('https://example.com/items').side_effect = side_effect
+        pagination = Pagination('page', JsonPath('items[*]'), max_pages=2)
+        await perform_paginated_requests('https://example.com/items', Configuration(), pagination)
+
+        captured = capsys.readouterr()
+        assert get_lines(captured.out) == [1, 2]
+        assert respx_mock.calls.call_count == 2
+        assert 'pagination stopped after 2 pages, use --max-pages to fetch more' in captured.err
+
+    async def test_should_stop_when_page_is_the_same_as_the_previous_one(self, respx_mock, capsys):
+        # the server ignores the page parameter
+        respx_mock.get('https://example.com/items') % httpx.Response(200, json={'name': 'foo'})
+        await perform_paginated_requests('https://example.com/items', Configuration(), Pagination('page'))
+
+        captured = capsys.readouterr()
+        assert get_lines(captured.out) == [{'name': 'foo'}]
+        assert respx_mock.calls.call_count == 2
+        assert 'is the same as the previous page, pagination stopped' in ' '.join(captured.err.split())
+
+    async def test_should_stop_at_default_max_pages(self, respx_mock, capsys):
+        def side_effect(request):
+            return httpx.Response(200, json={'page': int(request.url.params['page'])})
+
+        respx_mock.get('https://example.com/items').side_effect = side_effect
+        await perform_paginated_requests('https://example.com/items', Configuration(), Pagination('page'))
+
+        assert len(get_lines(capsys.readouterr().out)) == DEFAULT_MAX_PAGES
+        assert respx_mock.calls.call_count == DEFAULT_MAX_PAGES
+
+    # the link of the second page goes back to the first one, the cursor goes back to the second page after a third one
+    @pytest.mark.parametrize(('pagination', 'calls'), [
+        (Pagination('link'), 2), (Pagination('cursor', JsonPath('items[*]'), cursor_path=JsonPath('next')), 3)
+    ])
+    async def test_should_stop_when_next_url_was_already_fetched(self, respx_mock, capsys, pagination, calls):
+        respx_mock.get('https://example.com/items', params={'cursor': '2'}) % httpx.Response(
+            200, json={'items': [2], 'next': '1'}, headers={'link': '<https://example.com/items>; rel="next"'}
+        )
+        respx_mock.get('https://example.com/items') % httpx.Response(
+            200, json={'items': [1], 'next': '2'},
+            headers={'link': '<https://example.com/items?cursor=2>; rel="next"'}
+        )
+        await perform_paginated_requests('https://example.com/items', Configuration(), pagination)
+
+        assert respx_mock.calls.call_count == calls
+        assert 'was already fetched, pagination stopped' in ' '.join(capsys.readouterr().err.split())
+
+    async def test_should_abort_when_total_is_not_found(self, respx_mock, capsys):
+        respx_mock.get('https://example.com/items') % httpx.Response(200, json={'items': [1]})
+        pagination = Pagination('page', JsonPath('items[*]'), page_size=1, total_path=JsonPath('count'))
+
+        with pytest.raises(click.Abort):
+            await perform_paginated_requests('https://example.com/items', Configuration(), pagination)
+
+        assert 'no total number of items found with count' in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('command', [http, https])
+async def test_should_follow_link_header(runner, respx_mock, command):
+    respx_mock.get('https://example.com/items', params={'page': '2'}) % httpx.Response(200, json=[{'id': 2}])
+    respx_mock.get('https://example.com/items') % httpx.Response(
+        200, json=[{'id': 1}], headers={'link': '<https://example.com/items?page=2>; rel="next"'}
+    )
+    result = await runner.invoke(command, ['get', 'https://example.com/items', '--paginate', 'link'])
+
+    assert result.exit_code == 0
+    assert result.output == '{"id":1}\n{"id":2}\n'
+
+
+async def test_should_follow_cursor_and_keep_query_parameters(runner, respx_mock):
+    def side_effect(request):
+        assert request.url.params['limit'] == '2'
+        if 'cursor' not in request.url.params:
+            return httpx.Response(200, json={'data': [1, 2], 'meta': {'next': 'abc'}})
+        return httpx.Response(200, json={'data': [3], 'meta': {'next': None}})
+
+    respx_mock.get('https://example.com/items').side_effect = side_effect
+    arguments = [
+        'get', 'https://example.com/items', '--query', 'limit:2', '--paginate', 'cursor', '--items-path',
+        '$.data[*]', '--cursor-path', '$.meta.next'
+    ]
+    result = await runner.invoke(http, arguments)
+
+    assert result.exit_code == 0
+    assert get_lines(result.output) == [1, 2, 3]
+    assert respx_mock.calls.call_count == 2
+
+
+async def test_should_abort_when_page_is_not_json(runner, respx_mock):
+    respx_mock.get('https://example.com/items') % httpx.Response(200, text='hello')
+    result = await runner.invoke(http, ['get', 'https://example.com/items', '--paginate', 'page'])
+
+    assert result.exit_code == 1
+    assert 'did not return a json document, it cannot be paginated' in ' '.join(result.output.split())
+
+
+async def test_should_abort_when_page_has_error_status(runner, respx_mock):
+    respx_mock.get('https://example.com/items') % 404
+    result = await runner.invoke(http, ['get', 'https://example.com/items', '--paginate', 'page'])
+
+    assert result.exit_code == 1
+    assert 'status code: 404' in result.output
+
+
+@pytest.mark.parametrize(('arguments', 'message'), [
+    (['https://example.com', 'https://example.org', '--paginate', 'link'], '--paginate needs exactly one url'),
+    (['https://example.com', '--paginate', 'link', '--download'], 'cannot be used with --output or --download'),
+    (['https://example.com', '--paginate', 'link', '--format', 'har'], 'it cannot be used with --format json or har'),
+    (['https://example.com', '--paginate', 'cursor'], '--paginate cursor needs the json path of the next cursor'),
+])
+async def test_should_print_error_given_wrong_pagination_options(runner, arguments, message):
+    result = await runner.invoke(http, ['get', *arguments])
+
+    assert result.exit_code == 2
+    assert message in ' '.join(result.output.split())
@@ -1,8 +1,16 @@
+import json
+import xml.etree.ElementTree as ElementTree
+
 import httpx
 import pytest
+from hypercorn.config import Config
+from hypercorn.trio import serve
 
 from httpcli.http import http
 from httpcli.https import https
+from tests.helpers import (
+    CA_CERTIFICATE, CA_DIRECTORY, CLIENT_CERTIFICATE, CLIENT_KEY, SERVER_CERTIFICATE, SERVER_KEY, app
+)
 
 
 @pytest.mark.parametrize('command', [http, https])
@@ -53,3 +61,223 @@ async def test_should_print_options_response_in_normal_cases(runner, respx_mock,
     assert 'allow: OPTIONS, GET, HEAD, POST' in output
     assert 'content-type: text/html; charset=utf-8' in output
     assert 'server: EOS (vny/0452)' in output
+
+
+@pytest.mark.parametrize('command', [http, https])
+async def test_should_save_get_response_in_file_given_output_option(runner, respx_mock, tmp_path, command):
+    respx_mock.get('https://example.com') % httpx.Response(status_code=200, content=b'\x00\x01binary')
+    path = tmp_path / 'data.bin'
+    result = await runner.invoke(command, ['get', 'https://example.com', '-o', str(path)])
+
+    assert result.exit_code == 0
+    assert path.read_bytes() == b'\x00\x01binary'
+    assert 'HTTP/1.1 200 OK' in result.output
+
+
+@pytest.mark.parametrize('command', [http, https])
+async def test_should_write_get_response_on_stdout_given_dash_output(runner, respx_mock, tmp_path, monkeypatch,
+                                                                     command):
+    monkeypatch.chdir(tmp_path)
+    respx_mock.get('https://example.com') % httpx.Response(status_code=200, content=b'\x00\x01binary')
+    result = await runner.invoke(command, ['get', 'https://example.com', '-o', '-'])
+
+    assert result.exit_code == 0
+    assert b'\x00\x01binary' in result.stdout_bytes
+    assert not (tmp_path / '-').exists()
+
+
+@pytest.mark.parametrize('command', [http, https])
+async def test_should_print_error_when_no_url_is_given(runner, command):
+    result = await runner.invoke(command, ['get'])
+
+    assert result.exit_code == 2
+    assert 'you must give at least one url' in result.output
+
+
+@pytest.mark.parametrize('command', [http, https])
+async def test_should_request_many_urls_over_one_connection(runner, nursery, tmp_path, command):
+    await nursery.start(serve, app, Config())
+    path = tmp_path / 'urls.txt'
+    path.write_text('\n'.join(f'http://localhost:8000/files/file{i}.txt' for i in range(1, 5)))
+    result = await runner.invoke(command, ['get', ':8000/files/file0.txt', '-f', str(path), '--concurrency', '1'])
+
+    assert result.exit_code == 0
+    output = result.output
+    assert [output.index(f'content of file{i}.txt') for i in range(5)] == sorted(
+        output.index(f'content of file{i}.txt') for i in range(5)
+    )
+    assert 'Summary' in output
+    assert '5 request(s) made over 1 connection(s)' in output
+
+
+async def test_should_print_tls_handshake_information_in_verbose_mode(runner, nursery, tls_config):
+    await nursery.start(serve, app, tls_config)
+    arguments = [
+        '--cert', str(CA_CERTIFICATE), '--resolve', 'localhost:8443:127.0.0.1', '-v', 'get',
+        'https://localhost:8443/files/a'
+    ]
+    result = await runner.invoke(https, arguments)
+
+    assert result.exit_code == 0
+    assert 'content of a' in result.output
+    assert 'tls handshakes: 1 in' in result.output
+    assert '0 resumed' in result.output
+
+
+@pytest.mark.parametrize('ca', [CA_CERTIFICATE, CA_DIRECTORY])
+async def test_should_authenticate_with_client_certificate(runner, nursery, mtls_config, ca):
+    await nursery.start(serve, app, mtls_config)
+    arguments = [
+        '--cert', str(ca), '--client-cert', str(CLIENT_CERTIFICATE), '--client-key', str(CLIENT_KEY),
+        '--resolve', 'localhost:8443:127.0.0.1', 'get', 'https://localhost:8443/files/a'
+    ]
+    result = await runner.invoke(https, arguments)
+
+    assert result.exit_code == 0
+    assert 'content of a' in result.output
+
+
+async def test_should_fail_when_server_requires_client_certificate(runner, nursery, mtls_config):
+    await nursery.start(serve, app, mtls_config)
+    arguments = [
+        '--cert', str(CA_CERTIFICATE), '--resolve', 'localhost:8443:127.0.0.1', 'get', 'https://localhost:8443'
+    ]
+    result = await runner.invoke(https, arguments)
+
+    assert result.exit_code == 1
+    assert 'unexpected error' in result.output
+
+
+async def test_should_send_requests_over_unix_socket(runner, nursery, uds_config, unix_socket):
+    await nursery.start(serve, app, uds_config)
+    # the host does not exist, nothing must be resolved
+    result = await runner.invoke(http, ['--unix-socket', str(unix_socket), 'get', 'http://docker.test/files/a'])
+
+    assert result.exit_code == 0
+    assert 'content of a' in result.output
+
+
+async def test_should_verify_server_certificate_over_unix_socket(runner, nursery, uds_config, unix_socket):
+    uds_config.certfile = str(SERVER_CERTIFICATE)
+    uds_config.keyfile = str(SERVER_KEY)
+    await nursery.start(serve, app, uds_config)
+    arguments = ['--cert', str(CA_CERTIFICATE), '--unix-socket', str(unix_socket), 'get', 'https://localhost/files/a']
+    result = await runner.invoke(https, arguments)
+
+    assert result.exit_code == 0
+    assert 'content of a' in result.output
+
+
+@pytest.mark.parametrize('command', [http, https])
+async def test_should_print_json_document_given_json_format(runner, respx_mock, command):
+    respx_mock.get('https://example.com') % httpx.Response(status_code=200, json={'hello': 'world'})
+    result = await runner.invoke(command, ['get', 'https://example.com', '--format', 'json'])
+
+    assert result.exit_code == 0
+    data = json.loads(result.output)
+    assert data['status_code'] == 200
+    assert ['content-type', 'application/json'] in data['headers']
+    assert json.loads(data['body']) == {'hello': 'world'}
+    assert set(data['timings']) == {'headers', 'body', 'total'}
+
+
+async def test_should_print_one_json_line_per_url_given_jsonl_format(runner, respx_mock):
+    respx_mock.get('https://example.com/image') % httpx.Response(status_code=200, content=b'\x89PNG')
+    respx_mock.get('https://example.com/error').side_effect = httpx.ConnectError('connection refused')
+    arguments = ['get', 'https://example.com/image', 'https://example.com/error', '--format', 'jsonl']
+    result = await runner.invoke(http, arguments)
+
+    assert result.exit_code == 0
+    # no summary table nor pool statistics
+    image, error = [json.loads(line) for line in result.output.splitlines()]
+    assert image['body_encoding'] == 'base64'
+    assert error == {'method': 'GET', 'url': 'https://example.com/error', 'error': 'connection refused'}
+
+
+async def test_should_print_har_document_given_har_format(runner, respx_mock):
+    respx_mock.head('https://example.com/a') % httpx.Response(status_code=200)
+    respx_mock.head('https://example.com/b') % httpx.Response(status_code=404)
+    result = await runner.invoke(http, ['head', 'https://example.com/a', 'https://example.com/b', '--format', 'har'])
+
+    assert result.exit_code == 0
+    entries = json.loads(result.output)['log']['entries']
+    assert [(entry['request']['url'], entry['response']['status']) for entry in entries] == [
+        ('https://example.com/a', 200), ('https://example.com/b', 404)
+    ]
+
+
+async def test_should_give_path_of_saved_body_given_json_format(runner, respx_mock, tmp_path):
+    respx_mock.options('https://example.com') % httpx.Response(status_code=200, text='hello')
+    path = tmp_path / 'body.txt'
+    result = await runner.invoke(http, ['options', 'https://example.com', '-o', str(path), '--format', 'json'])
+
+    assert result.exit_code == 0
+    assert json.loads(result.output)['body_path'] == str(path)
+    assert path.read_text() == 'hello'
+
+
+async def test_should_print_error_when_format_is_unknown(runner):
+    result = await runner.invoke(http, ['get', 'https://example.com', '--format', 'xml'])
+
+    assert result.exit_code == 2
+    assert "'xml' is not one of 'text', 'json', 'jsonl', 'har'" in result.output
+
+
+@pytest.mark.parametrize('command', [http, https])
+async def test_should_exit_with_error_when_response_fails_checks(runner, respx_mock, command):
+    respx_mock.get('https://example.com') % httpx.Response(status_code=200, json={'status': 'degraded'})
+    arguments = ['get', 'https://example.com', '--expect-status', '2xx', '--expect-json', '$.status=ok']
+    result = await runner.invoke(command, arguments)
+
+    assert result.exit_code == 1
+    output = ' '.join(result.output.split())
+    assert 'check failed for GET https://example.com: json condition $.status="ok" is not met' in output
+    assert '1 of 1 response(s) failed the checks' in output
+
+
+async def test_should_exit_normally_when_response_passes_checks(runner, respx_mock):
+    respx_mock.get('https://example.com') % httpx.Response(status_code=200, json={'status': 'ok'})
+    arguments = ['get', 'https://example.com', '--expect-status', '200', '--expect-header', 'content-type',
+                 '--max-latency', '5s']
+    result = await runner.invoke(http, arguments)
+
+    assert result.exit_code == 0
+    assert '1 response(s) checked, all the checks passed' in result.output
+
+
+async def test_should_write_junit_report_of_concurrent_checks(runner, respx_mock, tmp_path):
+    respx_mock.head('https://example.com/a') % httpx.Response(status_code=200)
+    respx_mock.head('https://example.com/b') % httpx.Response(status_code=503)
+    respx_mock.head('https://example.com/c').side_effect = httpx.ConnectError('connection refused')
+    path = tmp_path / 'report.xml'
+    arguments = [
+        'head', 'https://example.com/a', 'https://example.com/b', 'https://example.com/c', '--expect-status', '200',
+        '--report', str(path), '--as-completed'
+    ]
+    result = await runner.invoke(http, arguments)
+
+    assert result.exit_code == 1
+    assert 'Summary' in result.output
+    assert '2 of 3 response(s) failed the checks' in ' '.join(result.output.split())
+    suite = ElementTree.parse(path).getroot().find('testsuite')
+    assert (suite.get('tests'), suite.get('failures'), suite.get('errors')) == ('3', '1', '1')
+    assert [case.get('name') for case in suite.findall('testcase')] == [
+        'https://example.com/a', 'https://example.com/b', 'https://example.com/c'
+    ]
+
+
+async def test_should_write_report_when_single_request_fails(runner, respx_mock, tmp_path):
+    respx_mock.get('https://example.com').side_effect = httpx.ConnectError('connection refused')
+    path = tmp_path / 'report.json'
+    arguments = ['get', 'https://example.com', '--report', str(path), '--report-format', 'json']
+    result = await runner.invoke(http, arguments)
+
+    assert result.exit_code == 1
+    assert json.loads(path.read_text())['results'][0]['error'] == 'connection refused'
+
+
+async def test_should_print_error_when_checks_are_used_with_watch(runner):
+    result = await runner.invoke(http, ['get', 'https://example.com', '--watch', '1', '--expect-status', '200'])
+
+    assert result.exit_code == 2
+    assert 'checks and reports cannot be used with --paginate or --watch' in result.output
@@ -0,0 +1,108 @@
+import json
+
+import anyio
+import httpx
+import pytest
+
+from httpcli.configuration import Configuration
+from httpcli.commands.replay import get_percentile, replay_items
+from httpcli.har import read_har_file
+from httpcli.http import http
+from httpcli.https import https
+
+
+def write_har(tmp_path, entries):
+    path = tmp_path / 'recording.har'
+    path.write_text(json.dumps({'log': {'version': '1.2', 'entries': entries}}))
+    return path
+
+
+def get_entry(started, method, url, status, time=10.0):
+    return {
+        'startedDateTime': started,
+        'time': time,
+        'request': {'method': method, 'url': url, 'headers': [{'name': 'X-Foo', 'value': 'bar'}]},
+        'response': {'status': status}
+    }
+
+
+@pytest.mark.parametrize(('value', 'expected'), [(0.5, 3), (0.95, 5), (0.0, 1)])
+def test_get_percentile(value, expected):
+    assert get_percentile([5, 1, 4, 2, 3], value) == expected
+
+
+class TestReplayItems:
+    """Tests function replay_items"""
+
+    async def test_should_send_requests_at_recorded_offsets_given_preserve_timing(
+            self, tmp_path, respx_mock, autojump_clock
+    ):
+        times = {}
+
+        def side_effect(request):
+            times[request.url.path] = anyio.current_time()
+            return httpx.Response(200)
+
+        respx_mock.get(host='example.com').side_effect = side_effect
+        path = write_har(tmp_path, [
+            get_entry('2021-10-01T08:00:00Z', 'GET', 'https://example.com/a', 200),
+            get_entry('2021-10-01T08:00:04Z', 'GET', 'https://example.com/b', 200),
+            get_entry('2021-10-01T08:00:10Z', 'GET', 'https://example.com/c', 200)
+        ])
+        start = anyio.current_time()
+        await replay_items(Configuration(), read_har_file(path), preserve_timing=True, speed=2)
+
+        assert {name: round(value - start) for name, value in times.items()} == {'/a': 0, '/b': 2, '/c': 5}
+
+    async def test_should_send_requests_as_fast_as_possible_by_default(self, tmp_path, respx_mock, autojump_clock):
+        respx_mock.get(host='example.com') % 200
+        path = write_har(tmp_path, [
+            get_entry('2021-10-01T08:00:00Z', 'GET', 'https://example.com/a', 200),
+            get_entry('2021-10-01T09:00:00Z', 'GET', 'https://example.com/b', 200)
+        ])
+        start = anyio.current_time()
+        await replay_items(Configuration(), read_har_file(path))
+
+        assert anyio.current_time() - start < 1
+
+    async def test_should_print_warning_when_there_is_nothing_to_replay(self, capsys):
+        await replay_items(Configuration(), [])
+
+        assert 'there is no request to replay' in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('command', [http, https])
+async def test_should_replay_har_file_against_target(runner, respx_mock, tmp_path, command):
+    route_a = respx_mock.get('http://localhost:8000/a', headers={'X-Foo': 'bar'}) % 200
+    route_b = respx_mock.post('http://localhost:8000/b') % 503
+    respx_mock.get('http://localhost:8000/c').side_effect = httpx.ConnectError('connection refused')
+    path = write_har(tmp_path, [
+        get_entry('2021-10-01T08:00:00Z', 'GET', 'https://example.com/a', 200),
+        get_entry('2021-10-01T08:00:01Z', 'POST', 'https://example.com/b', 201),
+        get_entry('2021-10-01T08:00:02Z', 'GET', 'https://example.com/c', 200)
+    ])
+    result = await runner.invoke(command, ['replay', str(path), '--target', 'http://localhost:8000'])
+
+    assert result.exit_code == 0
+    assert route_a.called and route_b.called
+    output = ' '.join(result.output.split())
+    assert '3 request(s) replayed in' in output
+    assert '2 with a different status, 1 error(s)' in output
+    assert 'recorded latency (ms): p50 10.00, p95 10.00, max 10.00' in output
+
+
+async def test_should_print_error_when_har_file_is_invalid(runner, tmp_path):
+    path = tmp_path / 'invalid.har'
+    path.write_text('{"log": {}}')
+    result = await runner.invoke(http, ['replay', str(path)])
+
+    assert result.exit_code == 2
+    assert 'is not a valid HAR file' in result.output
+
+
+async def test_should_print_error_when_speed_is_not_positive(runner, tmp_path):
+    path = write_har(tmp_path, [])
+    result = await runner.invoke(http, ['replay', str(path), '--preserve-timing', '--speed', '0'])
+
+    assert result.exit_code == 2
+    assert '--speed' in result.output
@@ -0,0 +1,127 @@
+import json
+
+import httpx
+import pytest
+
+from httpcli.http import http
+from httpcli.https import https
+
+YAML_DATA = """
+httpcli:
+  templates:
+    get-user:
+      url: https://example.com/users/{{id}}
+      headers:
+        X-Env: '{{env}}'
+    create-user:
+      method: post
+      url: https://example.com/users
+      json:
+        id: '{{id}}'
+        name: '{{name}}'
+"""
+
+
+@pytest.fixture()
+def config_file(tmp_path):
+    path = tmp_path / 'config.yaml'
+    path.write_text(YAML_DATA)
+    return path
+
+
+@pytest.mark.parametrize('command', [http, https])
+async def test_should_print_error_when_template_does_not_exist(runner, config_file, command):
+    result = await runner.invoke(command, ['--config-file', str(config_file), 'run', 'foo'])
+
+    assert result.exit_code == 2
+    assert 'template foo not found in configuration, available templates: get-user, create-user' in result.output
+
+
+async def test_should_print_error_when_variable_is_missing(runner, config_file):
+    result = await runner.invoke(http, ['--config-file', str(config_file), 'run', 'get-user', '-v', 'id=42'])
+
+    assert result.exit_code == 1
+    assert 'variable env is not defined' in result.output
+
+
+@pytest.mark.parametrize('command', [http, https])
+async def test_should_perform_request_of_template_given_variables(runner, respx_mock, config_file, command):
+    route = respx_mock.get('https://example.com/users/42', headers={'X-Env': 'prod'}) % dict(json={'id': 42})
+    arguments = ['--config-file', str(config_file), 'run', 'get-user', '-v', 'id=42', '--var', 'env=prod']
+    result = await runner.invoke(command, arguments)
+
+    assert result.exit_code == 0
+    assert route.called
+    assert 'HTTP/1.1 200 OK' in result.output
+
+
+@pytest.mark.parametrize(('filename', 'content', 'expected_bodies'), [
+    ('users.csv', 'id,name\n1,foo\n2,bar\n', [{'id': '1', 'name': 'foo'}, {'id': '2', 'name': 'bar'}]),
+    ('users.jsonl', '{"id": 1, "name": "foo"}\n{"id": 2, "name": "bar"}\n', [
+        {'id': 1, 'name': 'foo'}, {'id': 2, 'name': 'bar'}
+    ])
+])
+async def test_should_perform_one_request_per_data_row(
+        runner, respx_mock, config_file, tmp_path, filename, content, expected_bodies
+):
+    route = respx_mock.post('https://example.com/users') % 201
+    data_file = tmp_path / filename
+    data_file.write_text(content)
+    result = await runner.invoke(http, ['--config-file', str(config_file), 'run', 'create-user', '-d', str(data_file)])
+
+    assert result.exit_code == 0
+    assert sorted((json.loads(call.request.content) for call in route.calls), key=lambda body: body['id']) == (
+        expected_bodies
+    )
+    assert 'Summary' in result.output
+    assert '2 request(s) made over' in result.output
+
+
+async def test_should_print_json_lines_given_jsonl_format(runner, respx_mock, config_file, tmp_path):
+    respx_mock.post('https://example.com/users') % 201
+    data_file = tmp_path / 'users.csv'
+    data_file.write_text('id,name\n1,foo\n2,bar\n')
+    arguments = ['--config-file', str(config_file), 'run', 'create-user', '-d', str(data_file), '--format', 'jsonl']
+    result = await runner.invoke(http, arguments)
+
+    assert result.exit_code == 0
+    assert [json.loads(line)['status_code'] for line in result.output.splitlines()] == [201, 201]
+
+
+async def test_should_print_error_when_data_row_misses_a_variable(runner, respx_mock, config_file, tmp_path):
+    respx_mock.post('https://example.com/users') % 201
+    data_file = tmp_path / 'users.csv'
+    data_file.write_text('id\n1\n')
+    result = await runner.invoke(http, ['--config-file', str(config_file), 'run', 'create-user', '-d', str(data_file)])
+
+    assert result.exit_code == 2
+    assert 'row 1: variable name is not defined' in result.output
+
+
+async def test_should_print_error_when_output_is_used_with_data(runner, config_file, tmp_path):
+    data_file = tmp_path / 'users.csv'
+    data_file.write_text('id\n1\n')
+    arguments = ['--config-file', str(config_file), 'run', 'create-user', '-d', str(data_file), '-o', 'out.json']
+    result = await runner.invoke(http, arguments)
+
+    assert result.exit_code == 2
+    assert '--output cannot be used with --data' in result.output
+
+
+async def test_should_check_response_of_each_data_row(runner, respx_mock, config_file, tmp_path):
+    respx_mock.post('https://example.com/users').side_effect = [
+        httpx.Response(201, json={'id': 1}), httpx.Response(400, json={'error': 'bad name'})
+    ]
+    data_file = tmp_path / 'users.csv'
+    data_file.write_text('id,name\n1,foo\n2,bar\n')
+    report = tmp_path / 'report.json'
+    arguments = [
+        '--config-file', str(config_file), 'run', 'create-user', '-d', str(data_file), '--concurrency', '1',
+        '--expect-status', '201', '--expect-json', '$.id', '--report', str(report), '--report-format', 'json'
+    ]
+    result = await runner.invoke(http, arguments)
+
+    assert result.exit_code == 1
+    results = json.loads(report.read_text())['results']
+    assert [item['passed'] for item in results] == [True, False]
+    assert results[1]['failures'] == ['status code 400 is not 201', 'json condition $.id is not met']
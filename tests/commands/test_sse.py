@@ -146,3 +146,17 @@ async def test_should_handle_user_interruption_by_sigterm(nursery):
             output += data.decode()
 
     assert 'Program was interrupted by the SIGTERM signal, good bye! 👋' in output
+
+
+async def test_should_read_events_over_unix_socket(nursery, uds_config, unix_socket):
+    output = ''
+    await nursery.start(serve, app, uds_config)
+
+    arguments = ['http', '--unix-socket', str(unix_socket), 'sse', 'http://docker.test/sse']
+    async with await trio.open_process(arguments, stdout=subprocess.PIPE) as process:
+        nursery.start_soon(terminate_process, process, signal.SIGINT)
+        async for data in process.stdout:
+            output += data.decode()
+
+    assert '"number"' in output
+    assert 'Program was interrupted by Ctrl+C, good bye! 👋' in output
@@ -0,0 +1,179 @@
+import json
+
+import anyio
+import httpx
+import pytest
+from httpcore._async.http11 import AsyncHTTP11Connection
+from hypercorn.config import Config
+from hypercorn.trio import serve
+
+from httpcli.commands.watch import WatchState, get_next_interval, is_watch_done, watch_url
+from httpcli.configuration import Configuration
+from httpcli.http import http
+from httpcli.https import https
+from httpcli.jsonpath import parse_condition
+
+
+class TestWatchState:
+    """Tests class WatchState"""
+
+    def test_should_return_conditional_headers_of_last_response(self):
+        state = WatchState()
+        assert state.get_conditional_headers() == {}
+
+        headers = {'etag': '"abc"', 'last-modified': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+        state.update(httpx.Response(200, headers=headers, content=b'foo'), False)
+
+        assert state.get_conditional_headers() == {
+            'if-none-match': '"abc"', 'if-modified-since': 'Wed, 21 Oct 2015 07:28:00 GMT'
+        }
+
+    def test_should_detect_body_changes(self):
+        state = WatchState()
+
+        assert state.update(httpx.Response(200, json={'state': 'running'}), True) is True
+        assert state.data == {'state': 'running'}
+        assert state.update(httpx.Response(200, json={'state': 'running'}), True) is False
+        assert state.update(httpx.Response(304), True) is False
+        assert state.data == {'state': 'running'}
+        assert state.update(httpx.Response(200, text='done'), True) is True
+        assert state.data is None
+
+
+class TestIsWatchDone:
+    """Tests function is_watch_done"""
+
+    @pytest.mark.parametrize(('data', 'status_code', 'expected'), [
+        ({'state': 'running'}, 200, False),
+        ({'state': 'done'}, 200, True),
+        ({'state': 'running'}, 404, True),
+        ({'state': 'running'}, 304, False),
+        (None, 200, False),
+    ])
+    def test_should_tell_if_watch_is_done(self, data, status_code, expected):
+        state = WatchState()
+        state.data = data
+
+        assert is_watch_done(state, status_code, [parse_condition('$.state="done"')], [404]) is expected
+
+
+@pytest.mark.parametrize(('current_interval', 'changed', 'expected'), [
+    (1, True, 1),
+    (4, True, 1),
+    (1, False, 1.5),
+    (8, False, 10),
+])
+def test_get_next_interval(current_interval, changed, expected):
+    assert get_next_interval(1, current_interval, 10, changed) == expected
+
+
+class TestWatchUrl:
+    """Tests function watch_url"""
+
+    async def test_should_back_off_while_content_does_not_change(self, respx_mock, capsys, autojump_clock):
+        times = []
+
+        def side_effect(request):
+            times.append(anyio.current_time())
+            if len(times) < 5:
+                return httpx.Response(200, json={'state': 'running'})
+            return httpx.Response(200, json={'state': 'done'})
+
+        respx_mock.get('https://example.com/job').side_effect = side_effect
+        start = anyio.current_time()
+        await watch_url('https://example.com/job', Configuration(), 1, 3, [parse_condition('$.state=done')])
+
+        assert [round(value - start, 2) for value in times] == [0, 1, 2.5, 4.75, 7.75]
+        output = capsys.readouterr().out
+        assert output.count('running') == 1
+        assert output.count('done') == 1
+
+    async def test_should_send_conditional_requests(self, respx_mock, capsys, autojump_clock):
+        def side_effect(request):
+            if request.headers.get('if-none-match') == '"v1"':
+                return httpx.Response(304, headers={'etag': '"v1"'})
+            return httpx.Response(200, json={'version': 1}, headers={'etag': '"v1"'})
+
+        route = respx_mock.get('https://example.com/job')
+        route.side_effect = side_effect
+        with anyio.move_on_after(10):
+            await watch_url('https://example.com/job', Configuration(), 1)
+
+        assert route.call_count > 2
+        assert all(call.request.headers['if-none-match'] == '"v1"' for call in route.calls[1:])
+        assert capsys.readouterr().out.count('version') == 1
+
+    async def test_should_stop_given_status_code(self, respx_mock, capsys, autojump_clock):
+        route = respx_mock.get('https://example.com/job')
+        route.side_effect = [httpx.Response(202, text='pending'), httpx.Response(200, text='ready')]
+        await watch_url('https://example.com/job', Configuration(), 1, status_codes=[200])
+
+        assert route.call_count == 2
+        output = capsys.readouterr().out
+        assert 'pending' in output
+        assert 'ready' in output
+
+    async def test_should_print_json_lines_given_jsonl_format(self, respx_mock, capsys, autojump_clock):
+        route = respx_mock.get('https://example.com/job')
+        route.side_effect = [httpx.Response(202, text='pending'), httpx.Response(200, text='ready')]
+        await watch_url('https://example.com/job', Configuration(), 1, status_codes=[200], output_format='jsonl')
+
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [(line['status_code'], line['body']) for line in lines] == [(202, 'pending'), (200, 'ready')]
+
+    async def test_should_reuse_connection_given_intervals_longer_than_5_seconds(
+            self, monkeypatch, nursery, capsys, autojump_clock
+    ):
+        # httpcore checks the keep-alive expiry with the real monotonic time, it follows the mock clock instead
+        monkeypatch.setattr(AsyncHTTP11Connection, '_now', lambda self: anyio.current_time())
+        client_addresses = []
+
+        async def app(scope, receive, send):
+            if scope['type'] == 'lifespan':
+                while True:
+                    message = await receive()
+                    await send({'type': f'{message["type"]}.complete'})
+                    if message['type'] == 'lifespan.shutdown':
+                        return
+            client_addresses.append(tuple(scope['client']))
+            status = 200 if len(client_addresses) == 3 else 202
+            await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-length', b'1')]})
+            await send({'type': 'http.response.body', 'body': str(len(client_addresses)).encode()})
+
+        # the clock only jumps once the network exchanges are done
+        autojump_clock.autojump_threshold = 0.1
+        config = Config()
+        config.keep_alive_timeout = 60
+        await nursery.start(serve, app, config)
+        await watch_url('http://localhost:8000/job', Configuration(), 6, status_codes=[200])
+
+        assert len(client_addresses) == 3
+        assert len(set(client_addresses)) == 1
+
+
+@pytest.mark.parametrize('command', [http, https])
+async def test_should_watch_url_until_condition(runner, respx_mock, command):
+    route = respx_mock.get('https://example.com/job')
+    route.side_effect = [httpx.Response(200, json={'progress': 50}), httpx.Response(200, json={'progress': 100})]
+    arguments = ['get', 'https://example.com/job', '--watch', '0.01', '--until', '$.progress=100']
+    result = await runner.invoke(command, arguments)
+
+    assert result.exit_code == 0
+    assert route.call_count == 2
+    assert '"progress": 50' in result.output
+    assert '"progress": 100' in result.output
+
+
+@pytest.mark.parametrize(('arguments', 'message'), [
+    (['https://example.com', 'https://example.org', '--watch', '1'], '--watch needs exactly one url'),
+    (['https://example.com', '--watch', '1', '-o', 'file.txt'], 'cannot be used with --output or --download'),
+    (['https://example.com', '--watch', '1', '--format', 'json'], 'it cannot be used with --format json or har'),
+    (['https://example.com', '--watch', '1', '--paginate', 'link'], '--paginate and --watch cannot be used together'),
+    (['https://example.com', '--watch', '0'], '--watch'),
+    (['https://example.com', '--watch', '1', '--until', '$.foo[bar]=1'], 'is not a valid json path'),
+])
+async def test_should_print_error_given_wrong_watch_options(runner, arguments, message):
+    result = await runner.invoke(http, ['get', *arguments])
+
+    assert result.exit_code == 2
+    assert message in ' '.join(result.output.split())
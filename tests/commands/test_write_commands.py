@@ -1,3 +1,5 @@
+import json
+
 import httpx
 import pytest
 
@@ -63,3 +65,25 @@ async def test_should_print_response_when_sending_file(runner, tmp_path, respx_m
     ]
     for line in lines:
         assert line in output
+
+
+@pytest.mark.parametrize('method', ['POST', 'PATCH', 'PUT'])
+async def test_should_save_response_in_current_directory_given_download_option(
+        runner, respx_mock, tmp_path, monkeypatch, method
+):
+    monkeypatch.chdir(tmp_path)
+    respx_mock.route(method=method, host='pie.dev', path='/report.csv') % dict(content=b'a,b\n1,2\n')
+    result = await runner.invoke(http, [method.lower(), 'https://pie.dev/report.csv', '-r', 'data', '--download'])
+
+    assert result.exit_code == 0
+    assert (tmp_path / 'report.csv').read_bytes() == b'a,b\n1,2\n'
+
+
+@pytest.mark.parametrize('method', ['DELETE', 'POST', 'PUT', 'PATCH'])
+async def test_should_print_json_document_given_json_format(runner, respx_mock, method):
+    respx_mock.route(method=method, host='pie.dev') % dict(status_code=201, text='created')
+    result = await runner.invoke(http, [method.lower(), 'https://pie.dev', '--format', 'json'])
+
+    assert result.exit_code == 0
+    data = json.loads(result.output)
+    assert (data['method'], data['status_code'], data['body']) == (method, 201, 'created')
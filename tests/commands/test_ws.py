@@ -0,0 +1,160 @@
+import io
+
+import anyio
+import asyncclick as click
+import httpx
+import pytest
+from hypercorn.config import Config
+from anyio.abc import SocketAttribute
+from hypercorn.trio import serve
+
+from httpcli.commands.ws import build_handshake_request
+from httpcli.configuration import Configuration
+from httpcli.http import http
+from httpcli.https import https
+from httpcli.models import BasicAuth, DigestAuth
+from tests.helpers import app
+
+command_parametrize = pytest.mark.parametrize('command', [http, https])
+
+
+class TestBuildHandshakeRequest:
+    """Tests function build_handshake_request"""
+
+    async def test_should_return_request_with_http_properties(self):
+        request = await build_handshake_request(
+            Configuration(), 'ws://example.com/ws', headers=[('foo', 'bar')], cookies=[('hello', 'world')],
+            query_params=[('search', 'bar')]
+        )
+
+        assert str(request.url) == 'ws://example.com/ws?search=bar'
+        assert request.headers['foo'] == 'bar'
+        assert request.headers['cookie'] == 'hello=world'
+
+    async def test_should_set_authorization_header_given_basic_auth(self):
+        config = Configuration(auth=BasicAuth(username='foo', password='bar'))
+        request = await build_handshake_request(config, 'ws://example.com/ws')
+
+        assert request.headers['authorization'] == httpx.BasicAuth('foo', 'bar')._auth_header
+
+    async def test_should_raise_error_given_digest_auth(self, capsys):
+        config = Configuration(auth=DigestAuth(username='foo', password='bar'))
+        with pytest.raises(click.Abort):
+            await build_handshake_request(config, 'ws://example.com/ws')
+
+        assert capsys.readouterr().out == 'digest authentication is not supported for websockets\n'
+
+
+@command_parametrize
+async def test_should_print_error_when_connection_is_refused(runner, command):
+    result = await runner.invoke(command, ['ws', 'ws://localhost:1/ws'])
+
+    assert result.exit_code == 1
+    assert 'unexpected error:' in result.output
+    assert 'Aborted!' in result.output
+
+
+async def start_tcp_server(nursery, handler) -> int:
+    listener = await anyio.create_tcp_listener(local_host='127.0.0.1')
+    nursery.start_soon(listener.serve, handler)
+    return listener.extra(SocketAttribute.local_port)
+
+
+async def test_should_print_error_when_proxy_closes_the_connection(runner, nursery):
+    async def handler(stream):
+        async with stream:
+            await stream.receive()
+
+    port = await start_tcp_server(nursery, handler)
+    result = await runner.invoke(http, ['--proxy', f'http://127.0.0.1:{port}', 'ws', 'ws://example.com/ws'])
+
+    assert result.exit_code == 1
+    assert 'unexpected error: proxy closed the connection before opening the tunnel' in result.output
+
+
+async def test_should_close_connection_when_timeout_expires(runner, nursery):
+    closed = anyio.Event()
+
+    async def handler(stream):
+        # the server accepts the connection but never answers the handshake
+        try:
+            while True:
+                await stream.receive()
+        except (anyio.EndOfStream, anyio.BrokenResourceError):
+            closed.set()
+
+    port = await start_tcp_server(nursery, handler)
+    result = await runner.invoke(http, ['--timeout', '0.5', 'ws', f'ws://127.0.0.1:{port}/ws'])
+
+    assert result.exit_code == 1
+    assert 'the request timeout has expired' in result.output
+    with anyio.fail_after(1):
+        await closed.wait()
+
+
+@command_parametrize
+async def test_should_print_error_when_handshake_is_rejected(runner, nursery, command):
+    await nursery.start(serve, app, Config())
+    result = await runner.invoke(command, ['ws', ':8000/unknown'])
+
+    assert result.exit_code == 1
+    assert 'unexpected error:' in result.output
+
+
+@command_parametrize
+async def test_should_print_echoed_text_messages(runner, nursery, command):
+    await nursery.start(serve, app, Config())
+    result = await runner.invoke(command, ['ws', ':8000/ws'], input='hello\n{"number": 2}\n')
+
+    assert result.exit_code == 0
+    output = result.output
+    assert 'HTTP/1.1 101 Switching Protocols' in output
+    assert 'hello' in output
+    assert '"number"' in output
+
+
+class TerminalInput(io.StringIO):
+    def isatty(self) -> bool:
+        return True
+
+
+async def test_should_send_lines_typed_in_a_terminal(runner, nursery, mocker):
+    await nursery.start(serve, app, Config())
+    mocker.patch('httpcli.commands.ws.click.get_text_stream', return_value=TerminalInput('typed line\n'))
+    result = await runner.invoke(http, ['ws', ':8000/ws'])
+
+    assert result.exit_code == 0
+    assert 'typed line' in result.output
+
+
+@command_parametrize
+async def test_should_print_echoed_binary_messages(runner, nursery, tmp_path, command):
+    path = tmp_path / 'messages.txt'
+    path.write_text('hello\n')
+    await nursery.start(serve, app, Config())
+    result = await runner.invoke(command, ['ws', ':8000/ws', '-b', '-f', f'{path}', '--ping-interval', '0.01'])
+
+    assert result.exit_code == 0
+    assert f'binary: {b"hello".hex()}' in result.output
+
+
+@command_parametrize
+async def test_should_print_statistics_in_echo_mode(runner, nursery, command):
+    await nursery.start(serve, app, Config())
+    result = await runner.invoke(command, ['ws', ':8000/ws', '--echo', '20', '--payload-size', '64'])
+
+    assert result.exit_code == 0
+    output = result.output
+    assert 'messages: 20' in output
+    assert 'messages/s' in output
+    assert 'latency (ms): min' in output
+
+
+async def test_should_open_websocket_over_unix_socket(runner, nursery, uds_config, unix_socket):
+    await nursery.start(serve, app, uds_config)
+    arguments = ['--unix-socket', str(unix_socket), 'ws', 'ws://docker.test/ws']
+    result = await runner.invoke(http, arguments, input='hello\n')
+
+    assert result.exit_code == 0
+    assert 'HTTP/1.1 101 Switching Protocols' in result.output
+    assert 'hello' in result.output
@@ -1,8 +1,73 @@
+import ssl
+import tempfile
+from pathlib import Path
+
 import pytest
 from asyncclick.testing import CliRunner
+from hypercorn.config import Config
+
+from httpcli.tls import get_ssl_context
+from tests.helpers import CA_CERTIFICATE, SERVER_CERTIFICATE, SERVER_KEY
 
 
 @pytest.fixture()
 def runner():
     """CLI test runner"""
     return CliRunner()
+
+
+@pytest.fixture(autouse=True)
+def cache_directory(tmp_path, monkeypatch):
+    """Prevents tests from writing in the user cache directory"""
+    path = tmp_path / 'cache'
+    monkeypatch.setenv('HTTP_CLI_CACHE_DIR', str(path))
+    return path
+
+
+@pytest.fixture(autouse=True)
+def sessions_directory(tmp_path, monkeypatch):
+    """Prevents tests from writing in the user sessions directory"""
+    path = tmp_path / 'sessions'
+    monkeypatch.setenv('HTTP_CLI_SESSIONS_DIR', str(path))
+    return path
+
+
+@pytest.fixture(autouse=True)
+def clear_ssl_contexts():
+    """Prevents TLS sessions remembered in a test to be resumed in another one"""
+    get_ssl_context.cache_clear()
+    yield
+    get_ssl_context.cache_clear()
+
+
+@pytest.fixture()
+def tls_config():
+    """Hypercorn configuration serving the test application over TLS"""
+    config = Config()
+    config.bind = ['127.0.0.1:8443']
+    config.certfile = str(SERVER_CERTIFICATE)
+    config.keyfile = str(SERVER_KEY)
+    return config
+
+
+@pytest.fixture()
+def mtls_config(tls_config):
+    """Hypercorn configuration requiring a client certificate signed by the test CA"""
+    tls_config.ca_certs = str(CA_CERTIFICATE)
+    tls_config.verify_mode = ssl.CERT_REQUIRED
+    return tls_config
+
+
+@pytest.fixture()
+def unix_socket():
+    """Path of a unix socket, in a short temporary directory since socket paths are limited to about 100 bytes"""
+    with tempfile.TemporaryDirectory() as directory:
+        yield Path(directory) / 'app.sock'
+
+
+@pytest.fixture()
+def uds_config(unix_socket):
+    """Hypercorn configuration serving the test application on a unix socket"""
+    config = Config()
+    config.bind = [f'unix:{unix_socket}']
+    return config
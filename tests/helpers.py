@@ -1,9 +1,11 @@
 import json
+from pathlib import Path
 
 import anyio
 from starlette.applications import Starlette
-from starlette.responses import StreamingResponse
-from starlette.routing import Route
+from starlette.responses import StreamingResponse, PlainTextResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocket
 
 
 async def number_generator():
@@ -21,4 +23,30 @@ async def sse(_):
     return StreamingResponse(number_generator(), headers=headers, media_type='text/event-stream')
 
 
-app = Starlette(routes=[Route('/sse', sse)])
+async def file(request):
+    return PlainTextResponse(f'content of {request.path_params["name"]}')
+
+
+async def echo(websocket: WebSocket):
+    await websocket.accept()
+    while True:
+        message = await websocket.receive()
+        if message['type'] == 'websocket.disconnect':
+            break
+        if message.get('text') is not None:
+            await websocket.send_text(message['text'])
+        else:
+            await websocket.send_bytes(message['bytes'])
+
+
+app = Starlette(routes=[Route('/sse', sse), Route('/files/{name}', file), WebSocketRoute('/ws', echo)])
+
+# certificates used to serve the application over TLS, the server one is valid for localhost and 127.0.0.1
+CERTIFICATES_DIRECTORY = Path(__file__).parent / 'certificates'
+CA_CERTIFICATE = CERTIFICATES_DIRECTORY / 'ca.pem'
+SERVER_CERTIFICATE = CERTIFICATES_DIRECTORY / 'server.pem'
+SERVER_KEY = CERTIFICATES_DIRECTORY / 'server.key'
+# directory with the CA certificate named after its subject hash, like openssl rehash does
+CA_DIRECTORY = CERTIFICATES_DIRECTORY / 'capath'
+CLIENT_CERTIFICATE = CERTIFICATES_DIRECTORY / 'client.pem'
+CLIENT_KEY = CERTIFICATES_DIRECTORY / 'client.key'
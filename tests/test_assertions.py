@@ -0,0 +1,157 @@
+import json
+import xml.etree.ElementTree as ElementTree
+
+import asyncclick as click
+import httpx
+import pytest
+
+from httpcli.assertions import (
+    CheckResult, Expectations, ResponseChecker, get_failures, get_response_checker, status_matches, write_report
+)
+from httpcli.jsonpath import parse_condition
+
+RESULTS = [
+    CheckResult(0, 'GET', 'https://example.com/a', 0.1, []),
+    CheckResult(1, 'GET', 'https://example.com/b', 0.2, ['status code 500 is not 2xx', 'header etag is missing']),
+    CheckResult(2, 'GET', 'https://example.com/c', 0.3, [], 'connection refused'),
+]
+
+
+@pytest.mark.parametrize(('pattern', 'status_code', 'expected'), [
+    ('200', 200, True),
+    ('200', 201, False),
+    ('2xx', 204, True),
+    ('2xx', 304, False),
+])
+def test_status_matches(pattern, status_code, expected):
+    assert status_matches(pattern, status_code) is expected
+
+
+class TestGetFailures:
+    """Tests function get_failures"""
+
+    def test_should_return_no_failure_when_response_meets_expectations(self):
+        response = httpx.Response(200, json={'status': 'ok'}, headers={'etag': '"abc"'})
+        expectations = Expectations(
+            ('2xx',), (('etag', '"abc"'), ('content-type', None)), (parse_condition('$.status=ok'),),
+            {'type': 'object', 'required': ['status']}, 0.2
+        )
+
+        assert get_failures(expectations, response, 0.1) == []
+
+    def test_should_return_all_failures(self):
+        response = httpx.Response(500, json={'status': 'error'}, headers={'etag': '"def"'})
+        expectations = Expectations(
+            ('200', '204'), (('etag', '"abc"'), ('x-request-id', None)), (parse_condition('$.status=ok'),),
+            {'type': 'object', 'required': ['id']}, 0.2
+        )
+
+        assert get_failures(expectations, response, 0.25) == [
+            'status code 500 is not 200 or 204',
+            'header etag is \'"def"\' instead of \'"abc"\'',
+            'header x-request-id is missing',
+            'json condition $.status="ok" is not met',
+            "body does not match the schema, $: 'id' is a required property",
+            'latency of 250.00 ms is above the maximum of 200.00 ms'
+        ]
+
+    def test_should_fail_when_body_is_not_json(self):
+        expectations = Expectations(conditions=(parse_condition('$.status'),))
+
+        assert get_failures(expectations, httpx.Response(200, text='hello'), 0.1) == ['body is not a json document']
+
+    def test_should_read_body_saved_in_file(self, tmp_path):
+        path = tmp_path / 'body.json'
+        path.write_text('{"status": "ok"}')
+        expectations = Expectations(conditions=(parse_condition('$.status=ok'),))
+
+        assert get_failures(expectations, httpx.Response(200), 0.1, path) == []
+
+
+class TestWriteReport:
+    """Tests function write_report"""
+
+    def test_should_write_junit_report(self, tmp_path):
+        path = tmp_path / 'report.xml'
+        write_report(RESULTS, path, 'junit')
+
+        root = ElementTree.parse(path).getroot()
+        suite = root.find('testsuite')
+        assert suite.attrib == {'name': 'httpcli', 'tests': '3', 'failures': '1', 'errors': '1', 'time': '0.600'}
+        cases = suite.findall('testcase')
+        assert [(case.get('classname'), case.get('name')) for case in cases] == [
+            ('GET', 'https://example.com/a'), ('GET', 'https://example.com/b'), ('GET', 'https://example.com/c')
+        ]
+        assert list(cases[0]) == []
+        assert cases[1].find('failure').get('message') == 'status code 500 is not 2xx'
+        assert cases[1].find('failure').text == 'status code 500 is not 2xx\nheader etag is missing'
+        assert cases[2].find('error').get('message') == 'connection refused'
+
+    def test_should_write_json_report(self, tmp_path):
+        path = tmp_path / 'report.json'
+        write_report(RESULTS, path, 'json')
+
+        report = json.loads(path.read_text())
+        assert {key: report[key] for key in ['tests', 'passed', 'failures', 'errors']} == {
+            'tests': 3, 'passed': 1, 'failures': 1, 'errors': 1
+        }
+        assert report['results'][0] == {
+            'method': 'GET', 'url': 'https://example.com/a', 'passed': True, 'latency': 100.0, 'failures': [],
+            'error': None
+        }
+        assert report['results'][2]['error'] == 'connection refused'
+
+    def test_should_print_warning_when_report_cannot_be_written(self, tmp_path, capsys):
+        write_report(RESULTS, tmp_path / 'unknown' / 'report.json', 'json')
+
+        assert 'unable to write report' in capsys.readouterr().err
+
+
+class TestResponseChecker:
+    """Tests class ResponseChecker"""
+
+    def test_should_print_failures_and_exit_with_error(self, tmp_path, capsys):
+        path = tmp_path / 'report.json'
+        checker = ResponseChecker(Expectations(status_codes=('200',)), path, 'json')
+        request = httpx.Request('GET', 'https://example.com/b')
+        checker.check_response(1, 'GET', 'https://example.com/b', httpx.Response(404, request=request), 0.1)
+        checker.add_error(2, 'GET', 'https://example.com/c', 0.1, 'connection refused')
+        checker.check_response(0, 'GET', 'https://example.com/a', httpx.Response(200, request=request), 0.1)
+
+        with pytest.raises(click.exceptions.Exit) as exc_info:
+            checker.finish()
+
+        assert exc_info.value.exit_code == 1
+        error = ' '.join(capsys.readouterr().err.split())
+        assert 'check failed for GET https://example.com/b: status code 404 is not 200' in error
+        assert '2 of 3 response(s) failed the checks' in error
+        report = json.loads(path.read_text())
+        assert [result['url'] for result in report['results']] == [
+            'https://example.com/a', 'https://example.com/b', 'https://example.com/c'
+        ]
+
+    def test_should_not_exit_when_all_checks_pass(self, capsys):
+        checker = ResponseChecker(Expectations(status_codes=('2xx',)))
+        checker.check_response(0, 'GET', 'https://example.com', httpx.Response(200), 0.1)
+        checker.finish()
+
+        assert '1 response(s) checked, all the checks passed' in capsys.readouterr().err
+
+
+class TestGetResponseChecker:
+    """Tests function get_response_checker"""
+
+    def test_should_return_none_when_nothing_is_checked(self):
+        assert get_response_checker((), (), (), None, None, None, 'junit') is None
+
+    def test_should_return_checker_given_only_a_report(self, tmp_path):
+        checker = get_response_checker((), (), (), None, None, str(tmp_path / 'report.xml'), 'junit')
+
+        assert checker.expectations == Expectations()
+        assert checker.report == tmp_path / 'report.xml'
+
+    def test_should_return_checker_given_expectations(self):
+        checker = get_response_checker(('200',), (), (), None, 0.2, None, 'json')
+
+        assert checker.expectations == Expectations(status_codes=('200',), max_latency=0.2)
+        assert checker.report is None
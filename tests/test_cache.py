@@ -0,0 +1,165 @@
+import json
+import time
+
+import pytest
+
+from httpcli.cache import (
+    get_cache_directory, get_origin, write_atomically, write_json_atomically, ConfigurationCache, DNSCache,
+    ProtocolCache
+)
+
+
+class TestGetCacheDirectory:
+    """Tests function get_cache_directory"""
+
+    def test_should_return_directory_given_by_environment_variable(self, tmp_path, monkeypatch):
+        monkeypatch.setenv('HTTP_CLI_CACHE_DIR', str(tmp_path))
+
+        assert get_cache_directory() == tmp_path
+
+    def test_should_return_httpcli_directory_in_xdg_cache_home(self, tmp_path, monkeypatch):
+        monkeypatch.delenv('HTTP_CLI_CACHE_DIR')
+        monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+
+        assert get_cache_directory() == tmp_path / 'httpcli'
+
+
+@pytest.mark.parametrize(('url', 'origin'), [
+    ('https://example.com/path?foo=bar', 'https://example.com:443'),
+    ('http://example.com:8000/path', 'http://example.com:8000'),
+    ('http://example.com', 'http://example.com:80'),
+])
+def test_get_origin_should_return_scheme_host_and_port(url, origin):
+    assert get_origin(url) == origin
+
+
+def test_write_json_atomically_should_create_parent_directories(tmp_path):
+    path = tmp_path / 'foo' / 'data.json'
+    write_json_atomically(path, {'hello': 'world'})
+
+    assert json.loads(path.read_text()) == {'hello': 'world'}
+    assert list(path.parent.iterdir()) == [path]
+
+
+@pytest.mark.parametrize(('mode', 'expected_mode'), [(None, 0o600), (0o644, 0o644)])
+def test_write_atomically_should_set_file_mode(tmp_path, mode, expected_mode):
+    path = tmp_path / 'metrics.prom'
+    write_atomically(path, b'hello', mode=mode)
+
+    assert path.read_bytes() == b'hello'
+    assert path.stat().st_mode & 0o777 == expected_mode
+
+
+class TestProtocolCache:
+    """Tests class ProtocolCache"""
+
+    def test_should_return_none_for_unknown_origin(self, tmp_path):
+        cache = ProtocolCache(tmp_path / 'protocols.json')
+
+        assert cache.get('https://example.com') is None
+
+    def test_should_persist_protocols_between_instances(self, tmp_path):
+        path = tmp_path / 'protocols.json'
+        cache = ProtocolCache(path)
+        cache.set('https://example.com/foo', 'HTTP/2')
+        cache.save()
+
+        assert ProtocolCache(path).get('https://example.com/bar') == 'HTTP/2'
+
+    def test_should_ignore_expired_entries(self, tmp_path):
+        path = tmp_path / 'protocols.json'
+        cache = ProtocolCache(path)
+        cache.set('https://example.com', 'HTTP/1.1')
+        cache.save()
+
+        assert ProtocolCache(path, ttl=-1).get('https://example.com') is None
+
+    def test_should_ignore_corrupted_file(self, tmp_path):
+        path = tmp_path / 'protocols.json'
+        path.write_text('not json')
+
+        assert ProtocolCache(path).get('https://example.com') is None
+
+    def test_should_not_write_file_when_nothing_changed(self, tmp_path):
+        path = tmp_path / 'protocols.json'
+        ProtocolCache(path).save()
+
+        assert not path.exists()
+
+
+class TestConfigurationCache:
+    """Tests class ConfigurationCache"""
+
+    def test_should_return_no_key_for_missing_or_special_files(self, tmp_path):
+        assert ConfigurationCache.get_key(str(tmp_path / 'missing.yaml')) is None
+        assert ConfigurationCache.get_key(str(tmp_path)) is None
+        assert ConfigurationCache.get_key('<stdin>') is None
+
+    def test_should_return_different_keys_for_different_profiles(self, tmp_path):
+        path = tmp_path / 'config.yaml'
+        path.write_text('httpcli: {}')
+
+        assert ConfigurationCache.get_key(str(path)) == ConfigurationCache.get_key(str(path))
+        assert ConfigurationCache.get_key(str(path)) != ConfigurationCache.get_key(str(path), 'dev')
+
+    def test_should_return_stored_value(self, tmp_path):
+        cache = ConfigurationCache(tmp_path)
+        cache.set('key', '{"hello": "world"}')
+
+        assert cache.get('key') == '{"hello": "world"}'
+        assert (tmp_path / 'key').read_text() == '{"hello": "world"}'
+
+    def test_should_return_none_when_entry_is_missing_or_not_readable(self, tmp_path):
+        cache = ConfigurationCache(tmp_path)
+        (tmp_path / 'binary').write_bytes(b'\xff\xfe')
+
+        assert cache.get('missing') is None
+        assert cache.get('binary') is None
+
+    def test_should_return_different_keys_when_configuration_modules_change(self, tmp_path, monkeypatch):
+        path = tmp_path / 'config.yaml'
+        path.write_text('httpcli: {}')
+        key = ConfigurationCache.get_key(str(path))
+        module = tmp_path / 'configuration.py'
+        module.write_text('')
+        monkeypatch.setattr('httpcli.cache.CONFIGURATION_MODULES', [module])
+
+        assert ConfigurationCache.get_key(str(path)) != key
+
+
+class TestDNSCache:
+    """Tests class DNSCache"""
+
+    def test_should_return_none_for_unknown_host(self, tmp_path):
+        assert DNSCache(60, tmp_path / 'dns.json').get('example.com', 443) is None
+
+    def test_should_persist_addresses_between_instances(self, tmp_path):
+        path = tmp_path / 'dns.json'
+        cache = DNSCache(60, path)
+        cache.set('example.com', 443, ['10.0.0.1'])
+        cache.save()
+
+        assert DNSCache(60, path).get('example.com', 443) == ['10.0.0.1']
+        assert DNSCache(60, path).get('example.com', 80) is None
+
+    def test_should_ignore_and_drop_expired_entries(self, tmp_path, mocker):
+        path = tmp_path / 'dns.json'
+        cache = DNSCache(60, path)
+        cache.set('example.com', 443, ['10.0.0.1'])
+        cache.save()
+        mocker.patch('time.time', return_value=time.time() + 61)
+        cache = DNSCache(60, path)
+
+        assert cache.get('example.com', 443) is None
+
+        cache.set('example.org', 443, ['10.0.0.2'])
+        cache.save()
+
+        assert list(json.loads(path.read_text())) == ['example.org:443']
+
+    @pytest.mark.parametrize('content', ['not json', '[]', '{"example.com:443": {"addresses": "foo"}}'])
+    def test_should_ignore_corrupted_file(self, tmp_path, content):
+        path = tmp_path / 'dns.json'
+        path.write_text(content)
+
+        assert DNSCache(60, path).get('example.com', 443) is None
@@ -0,0 +1,111 @@
+import hashlib
+import io
+
+import pytest
+
+from httpcli.checksums import ChecksumManifest, ExpectedHash, parse_expected_hash, read_download_file
+
+SHA256 = hashlib.sha256(b'hello').hexdigest()
+MD5 = hashlib.md5(b'hello').hexdigest()
+
+
+class TestParseExpectedHash:
+    """Tests function parse_expected_hash"""
+
+    @pytest.mark.parametrize(('value', 'message'), [
+        (f'sha3:{SHA256}', 'sha3 is not a supported hash algorithm'),
+        ('sha256:xyz', 'sha256:xyz is not a valid hexadecimal digest'),
+        ('abcdef', 'unable to guess the hash algorithm of abcdef'),
+        (f'md5:{SHA256}', f'md5:{SHA256} is not a valid md5 digest'),
+    ])
+    def test_should_raise_error_given_invalid_hash(self, value, message):
+        with pytest.raises(ValueError) as exc_info:
+            parse_expected_hash(value)
+
+        assert message in str(exc_info.value)
+
+    @pytest.mark.parametrize(('value', 'expected'), [
+        (f'SHA256:{SHA256.upper()}', ExpectedHash('sha256', SHA256)),
+        (SHA256, ExpectedHash('sha256', SHA256)),
+        (MD5, ExpectedHash('md5', MD5)),
+    ])
+    def test_should_return_expected_hash_given_valid_value(self, value, expected):
+        assert parse_expected_hash(value) == expected
+
+    def test_should_use_given_algorithm_when_digest_has_no_algorithm(self):
+        digest = hashlib.blake2b(b'hello').hexdigest()
+
+        assert parse_expected_hash(digest, 'blake2b') == ExpectedHash('blake2b', digest)
+        with pytest.raises(ValueError):
+            parse_expected_hash(SHA256, 'sha512')
+
+
+class TestReadDownloadFile:
+    """Tests function read_download_file"""
+
+    def test_should_return_urls_with_their_expected_hash(self):
+        file = io.StringIO(
+            f'https://foo.com/a.txt\n\nhttps://foo.com/b.txt  sha256:{SHA256}\nhttps://foo.com/c.txt,{MD5}\n'
+        )
+
+        assert read_download_file(file) == {
+            'https://foo.com/a.txt': None,
+            'https://foo.com/b.txt': ExpectedHash('sha256', SHA256),
+            'https://foo.com/c.txt': ExpectedHash('md5', MD5),
+        }
+
+    @pytest.mark.parametrize(('line', 'message'), [
+        ('https://foo.com/a.txt sha256:xyz', 'line 2: sha256:xyz is not a valid hexadecimal digest'),
+        (f'https://foo.com/a.txt {SHA256} foo', 'line 2: expected an url optionally followed by a hash'),
+    ])
+    def test_should_raise_error_with_line_number_given_invalid_line(self, line, message):
+        with pytest.raises(ValueError) as exc_info:
+            read_download_file(io.StringIO(f'https://foo.com/b.txt\n{line}\n'))
+
+        assert message in str(exc_info.value)
+
+
+class TestChecksumManifest:
+    """Tests class ChecksumManifest"""
+
+    def test_should_use_algorithm_of_expected_hash(self):
+        manifest = ChecksumManifest('sha256')
+
+        assert manifest.new_hash().name == 'sha256'
+        assert manifest.new_hash(ExpectedHash('md5', MD5)).name == 'md5'
+
+    def test_should_record_mismatches(self):
+        manifest = ChecksumManifest()
+
+        assert manifest.add('a.txt', 'sha256', SHA256, ExpectedHash('sha256', SHA256)) is True
+        assert manifest.add('b.txt', 'md5', MD5, ExpectedHash('md5', '0' * 32)) is False
+        assert manifest.add('c.txt', 'sha256', SHA256) is True
+        assert manifest.mismatches == ['b.txt']
+
+    def test_should_write_entries_in_tagged_format(self, tmp_path):
+        manifest = ChecksumManifest()
+        manifest.add('b.txt', 'md5', MD5)
+        manifest.add('a.txt', 'sha256', SHA256)
+        path = tmp_path / 'SHA256SUMS'
+        manifest.write(path)
+
+        assert path.read_text() == f'SHA256 (a.txt) = {SHA256}\nMD5 (b.txt) = {MD5}\n'
+
+    def test_should_write_entries_of_given_algorithm(self, tmp_path):
+        manifest = ChecksumManifest()
+        manifest.add('b.txt', 'md5', MD5)
+        manifest.add('a.txt', 'sha256', SHA256)
+        path = tmp_path / 'MD5SUMS'
+        manifest.write(path, 'md5')
+
+        assert path.read_text() == f'MD5 (b.txt) = {MD5}\n'
+        assert manifest.algorithms == ['md5', 'sha256']
+
+    def test_should_return_default_algorithm_when_there_is_no_entry(self):
+        assert ChecksumManifest('sha512').algorithms == ['sha512']
+
+    def test_should_record_failures(self):
+        manifest = ChecksumManifest()
+        manifest.add_failure('https://foo.com/a.txt')
+
+        assert manifest.failures == ['https://foo.com/a.txt']
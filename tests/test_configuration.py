@@ -55,3 +55,101 @@ def test_config_raises_error_when_auth_is_not_valid_json(monkeypatch):
         Configuration()
 
     assert 'is not a valid json string' in str(exc_info.value)
+
+
+@pytest.mark.parametrize('value', ['gzip,deflate', ['gzip', 'deflate']])
+def test_accept_encoding_configuration(value):
+    config = Configuration(accept_encoding=value)
+    assert config.accept_encoding == ['gzip', 'deflate']
+
+
+@pytest.mark.parametrize('value', ['gzip,deflate', '["gzip", "deflate"]'])
+def test_accept_encoding_environment_configuration(monkeypatch, value):
+    monkeypatch.setenv('HTTP_CLI_ACCEPT_ENCODING', value)
+    config = Configuration()
+
+    assert config.accept_encoding == ['gzip', 'deflate']
+
+
+def test_config_raises_error_when_accept_encoding_is_not_supported():
+    with pytest.raises(pydantic.ValidationError) as exc_info:
+        Configuration(accept_encoding='gzip,foo')
+
+    assert 'foo is not a supported encoding' in str(exc_info.value)
+
+
+def test_templates_configuration(monkeypatch):
+    template = {'method': 'post', 'url': 'https://example.com/users/{{id}}', 'json': {'name': '{{name}}'}}
+    monkeypatch.setenv('http_cli_templates', json.dumps({'create-user': template}))
+    config = Configuration()
+
+    assert config.templates['create-user'].method == 'POST'
+    assert config.templates['create-user'].json_data == {'name': '{{name}}'}
+
+
+def test_config_raises_error_when_template_mixes_form_and_json():
+    with pytest.raises(pydantic.ValidationError) as exc_info:
+        Configuration(templates={'foo': {'url': 'https://example.com', 'form': {'a': 'b'}, 'json': {'a': 'b'}}})
+
+    assert 'you cannot mix form and json data' in str(exc_info.value)
+
+
+def test_transport_configuration(monkeypatch):
+    monkeypatch.setenv('http_cli_transport', json.dumps({'uds': '/var/run/docker.sock', 'retries': 2}))
+    config = Configuration()
+
+    assert str(config.transport.uds) == '/var/run/docker.sock'
+    assert config.transport.local_address is None
+    assert config.transport.retries == 2
+
+
+def test_config_raises_error_when_transport_local_address_is_not_valid():
+    with pytest.raises(pydantic.ValidationError):
+        Configuration(transport={'local_address': 'localhost'})
+
+
+def test_config_raises_error_when_session_name_is_not_valid():
+    with pytest.raises(pydantic.ValidationError) as exc_info:
+        Configuration(session='../foo')
+
+    assert '../foo is not a valid session name' in str(exc_info.value)
+
+
+@pytest.mark.parametrize(('value', 'expected'), [
+    ('localhost:8766:127.0.0.1', ['localhost:8766:127.0.0.1']),
+    (
+        'example.com:443:10.0.0.1,10.0.0.2 example.org:*:10.0.0.3',
+        ['example.com:443:10.0.0.1,10.0.0.2', 'example.org:*:10.0.0.3']
+    ),
+    ('["localhost:8766:127.0.0.1"]', ['localhost:8766:127.0.0.1'])
+])
+def test_resolve_environment_configuration(monkeypatch, value, expected):
+    monkeypatch.setenv('HTTP_CLI_RESOLVE', value)
+    config = Configuration()
+
+    assert config.resolve == expected
+
+
+def test_config_raises_error_when_resolve_entry_is_not_valid():
+    with pytest.raises(pydantic.ValidationError) as exc_info:
+        Configuration(resolve=['example.com:443:127.0.0.1', 'example.com:443'])
+
+    assert 'example.com:443 is not in the form host:port:address' in str(exc_info.value)
+
+
+def test_config_raises_error_when_dns_cache_ttl_is_negative():
+    with pytest.raises(pydantic.ValidationError):
+        Configuration(dns_cache_ttl=-1)
+
+
+def test_config_raises_error_when_client_key_is_given_without_client_cert(tmp_path):
+    key = tmp_path / 'client.key'
+    key.write_text('fake key')
+    with pytest.raises(pydantic.ValidationError) as exc_info:
+        Configuration(client_key=key)
+
+    assert 'client_key cannot be used without client_cert' in str(exc_info.value)
+
+
+def test_config_accepts_directory_of_certificates_for_verify(tmp_path):
+    assert Configuration(verify=tmp_path).verify == tmp_path
@@ -0,0 +1,83 @@
+import socket
+
+import pytest
+
+from httpcli.cache import DNSCache
+from httpcli.dns import Resolver, parse_resolve_entry
+
+
+def getaddrinfo_result(*addresses):
+    return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, 443)) for address in addresses]
+
+
+class TestParseResolveEntry:
+    """Tests function parse_resolve_entry"""
+
+    @pytest.mark.parametrize(('entry', 'message'), [
+        ('example.com', 'example.com is not in the form host:port:address'),
+        ('example.com:443', 'example.com:443 is not in the form host:port:address'),
+        ('example.com:foo:127.0.0.1', 'foo is not a valid port'),
+        ('example.com:70000:127.0.0.1', '70000 is not a valid port'),
+        ('example.com:443:localhost', 'localhost is not a valid ip address'),
+    ])
+    def test_should_raise_error_given_invalid_entry(self, entry, message):
+        with pytest.raises(ValueError) as exc_info:
+            parse_resolve_entry(entry)
+
+        assert message in str(exc_info.value)
+
+    @pytest.mark.parametrize(('entry', 'expected'), [
+        ('Example.com:443:127.0.0.1', ('example.com', 443, ['127.0.0.1'])),
+        ('example.com:*:127.0.0.1,127.0.0.2', ('example.com', None, ['127.0.0.1', '127.0.0.2'])),
+        ('example.com:80:[::1]', ('example.com', 80, ['::1'])),
+        ('example.com:80:::1', ('example.com', 80, ['::1'])),
+    ])
+    def test_should_return_host_port_and_addresses_given_valid_entry(self, entry, expected):
+        assert parse_resolve_entry(entry) == expected
+
+
+class TestResolver:
+    """Tests class Resolver"""
+
+    async def test_should_return_ip_address_as_is(self, mocker):
+        getaddrinfo_mock = mocker.patch('anyio.getaddrinfo')
+
+        assert await Resolver().resolve('127.0.0.1', 80) == ['127.0.0.1']
+        getaddrinfo_mock.assert_not_called()
+
+    @pytest.mark.parametrize(('entry', 'port', 'expected'), [
+        ('example.com:443:10.0.0.1', 443, ['10.0.0.1']),
+        ('example.com:*:10.0.0.2', 8443, ['10.0.0.2']),
+    ])
+    async def test_should_use_overrides(self, mocker, entry, port, expected):
+        getaddrinfo_mock = mocker.patch('anyio.getaddrinfo')
+
+        assert await Resolver([entry]).resolve('EXAMPLE.com', port) == expected
+        getaddrinfo_mock.assert_not_called()
+
+    async def test_should_resolve_each_host_once_per_run(self, mocker):
+        getaddrinfo_mock = mocker.patch(
+            'anyio.getaddrinfo', return_value=getaddrinfo_result('10.0.0.1', '10.0.0.1', '10.0.0.2')
+        )
+        resolver = Resolver()
+
+        for _ in range(3):
+            assert await resolver.resolve('example.com', 443) == ['10.0.0.1', '10.0.0.2']
+
+        getaddrinfo_mock.assert_called_once_with('example.com', 443, type=socket.SOCK_STREAM)
+        assert resolver.lookups == 1
+
+    async def test_should_use_persistent_cache_between_runs(self, mocker, tmp_path):
+        getaddrinfo_mock = mocker.patch('anyio.getaddrinfo', return_value=getaddrinfo_result('10.0.0.1'))
+        path = tmp_path / 'dns.json'
+        await Resolver(cache=DNSCache(60, path)).resolve('example.com', 443)
+        addresses = await Resolver(cache=DNSCache(60, path)).resolve('example.com', 443)
+
+        assert addresses == ['10.0.0.1']
+        getaddrinfo_mock.assert_called_once()
+
+    async def test_should_propagate_resolution_errors(self, mocker):
+        mocker.patch('anyio.getaddrinfo', side_effect=socket.gaierror('name or service not known'))
+
+        with pytest.raises(OSError):
+            await Resolver().resolve('example.com', 443)
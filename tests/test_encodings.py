@@ -0,0 +1,149 @@
+import gzip
+import zlib
+
+import httpx
+import pytest
+
+from httpcli.encodings import (
+    CompressedStream, ContentDecoder, DecodedResponse, check_encodings, compress_request, get_file_extension,
+    get_supported_encodings
+)
+
+DATA = b'{"hello": "world"}' * 100
+
+
+def compress(encoding: str, data: bytes) -> bytes:
+    if encoding == 'gzip':
+        return gzip.compress(data)
+    if encoding == 'deflate':
+        return zlib.compress(data)
+    if encoding == 'br':
+        brotli = pytest.importorskip('brotli')
+        return brotli.compress(data)
+    zstandard = pytest.importorskip('zstandard')
+    return zstandard.ZstdCompressor().compress(data)
+
+
+class TestContentDecoder:
+    """Tests class ContentDecoder"""
+
+    @pytest.mark.parametrize('encoding', ['gzip', 'deflate', 'br', 'zstd'])
+    def test_should_decode_content_given_chunks(self, encoding):
+        raw = compress(encoding, DATA)
+        decoder = ContentDecoder(encoding)
+        content = b''.join(decoder.decode(raw[i:i + 10]) for i in range(0, len(raw), 10)) + decoder.flush()
+
+        assert content == DATA
+        assert decoder.encodings == [encoding]
+        assert decoder.raw_size == len(raw)
+        assert decoder.size == len(DATA)
+        assert decoder.ratio == len(DATA) / len(raw)
+        assert decoder.decode_time > 0
+
+    def test_should_decode_raw_deflate_content(self):
+        compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        raw = compressor.compress(DATA) + compressor.flush()
+        decoder = ContentDecoder('deflate')
+
+        assert decoder.decode(raw) + decoder.flush() == DATA
+
+    def test_should_decode_multiple_encodings_in_reverse_order(self):
+        raw = zlib.compress(gzip.compress(DATA))
+        decoder = ContentDecoder('gzip, deflate')
+
+        assert decoder.decode(raw) + decoder.flush() == DATA
+
+    @pytest.mark.parametrize('content_encoding', [None, '', 'unknown'])
+    def test_should_return_content_as_is_when_there_is_nothing_to_decode(self, content_encoding):
+        decoder = ContentDecoder(content_encoding)
+
+        assert decoder.decode(DATA) + decoder.flush() == DATA
+        assert decoder.ratio == 1.0
+
+    def test_should_raise_httpx_error_when_content_is_malformed(self):
+        decoder = ContentDecoder('gzip')
+        with pytest.raises(httpx.DecodingError):
+            decoder.decode(b'not gzip')
+
+
+class TestDecodedResponse:
+    """Tests class DecodedResponse"""
+
+    def test_should_return_decoded_content_and_keep_headers(self):
+        request = httpx.Request('GET', 'https://example.com')
+        headers = {'content-encoding': 'gzip', 'content-type': 'application/json'}
+        response = httpx.Response(200, headers=headers, request=request, extensions={'http_version': b'HTTP/2'})
+        decoded_response = DecodedResponse(response, DATA)
+
+        assert decoded_response.content == DATA
+        assert decoded_response.text == DATA.decode()
+        assert decoded_response.headers['content-encoding'] == 'gzip'
+        assert decoded_response.http_version == 'HTTP/2'
+        assert decoded_response.request is request
+
+
+class TestCheckEncodings:
+    """Tests function check_encodings"""
+
+    def test_should_return_normalized_encodings(self):
+        assert check_encodings([' GZIP', 'deflate']) == ['gzip', 'deflate']
+
+    def test_should_raise_error_given_unknown_encoding(self):
+        with pytest.raises(ValueError) as exc_info:
+            check_encodings(['gzip', 'foo'])
+
+        assert 'foo is not a supported encoding' in str(exc_info.value)
+
+    def test_should_raise_error_when_decoder_package_is_missing(self, mocker):
+        mocker.patch.dict('httpcli.encodings.DECODERS', clear=True)
+        with pytest.raises(ValueError) as exc_info:
+            check_encodings(['zstd'])
+
+        assert str(exc_info.value) == 'zstd encoding requires the zstandard package to be installed'
+
+
+@pytest.mark.parametrize(('content_encoding', 'extension'), [
+    (None, ''),
+    ('gzip', '.gz'),
+    ('gzip, br', '.gz.br'),
+    ('zstd', '.zst'),
+    ('identity', '')
+])
+def test_get_file_extension_should_return_extensions_of_all_encodings(content_encoding, extension):
+    assert get_file_extension(content_encoding) == extension
+
+
+def test_get_supported_encodings_should_contain_default_encodings():
+    assert {'identity', 'gzip', 'deflate'} <= set(get_supported_encodings())
+
+
+class TestCompressedStream:
+    """Tests class CompressedStream"""
+
+    @pytest.mark.parametrize('encoding', ['gzip', 'br', 'zstd'])
+    async def test_should_compress_body_chunk_by_chunk(self, encoding):
+        if encoding != 'gzip':
+            pytest.importorskip({'br': 'brotli', 'zstd': 'zstandard'}[encoding])
+        stream = CompressedStream(httpx.ByteStream(DATA * 1000), encoding)
+        raw = b''.join([chunk async for chunk in stream])
+        decoder = ContentDecoder(encoding)
+
+        assert decoder.decode(raw) + decoder.flush() == DATA * 1000
+        assert len(raw) < len(DATA) * 10
+
+    async def test_should_compress_body_again_when_iterated_twice(self):
+        stream = CompressedStream(httpx.ByteStream(DATA), 'gzip')
+        first = b''.join([chunk async for chunk in stream])
+        second = b''.join([chunk async for chunk in stream])
+
+        assert gzip.decompress(first) == gzip.decompress(second) == DATA
+
+
+def test_compress_request_should_replace_stream_and_set_headers():
+    request = httpx.Request('POST', 'https://example.com', content=DATA)
+    compress_request(request, 'gzip')
+
+    assert request.headers['content-encoding'] == 'gzip'
+    assert request.headers['transfer-encoding'] == 'chunked'
+    assert 'content-length' not in request.headers
+    assert isinstance(request.stream, CompressedStream)
@@ -0,0 +1,159 @@
+import base64
+import json
+
+import httpx
+import pytest
+
+from httpcli.formats import (
+    FormattedOutput, RequestTimings, get_body, get_har_entry, get_har_error_entry, get_har_log, get_response_data
+)
+from httpcli.version import __version__
+
+TIMINGS = RequestTimings(1633046400.0, 0.012, 0.015)
+
+
+def get_response(**arguments) -> httpx.Response:
+    request = httpx.Request('GET', 'https://example.com/users?page=1&page=2', headers={'X-Foo': 'bar'})
+    return httpx.Response(200, request=request, **arguments)
+
+
+@pytest.mark.parametrize(('content', 'charset', 'expected'), [
+    ('hello'.encode(), None, ('hello', None)),
+    ('héllo'.encode('latin-1'), 'latin-1', ('héllo', None)),
+    (b'\x89PNG\r\n\x1a\n', None, (base64.b64encode(b'\x89PNG\r\n\x1a\n').decode(), 'base64')),
+    (b'hello', 'unknown-charset', (base64.b64encode(b'hello').decode(), 'base64'))
+])
+def test_get_body(content, charset, expected):
+    assert get_body(content, charset) == expected
+
+
+class TestGetResponseData:
+    """Tests function get_response_data"""
+
+    def test_should_return_status_line_headers_timings_and_body(self):
+        response = get_response(json={'hello': 'world'}, headers=[('Set-Cookie', 'a=1'), ('Set-Cookie', 'b=2')])
+
+        assert get_response_data(response, TIMINGS) == {
+            'method': 'GET',
+            'url': 'https://example.com/users?page=1&page=2',
+            'http_version': 'HTTP/1.1',
+            'status_code': 200,
+            'reason_phrase': 'OK',
+            'headers': [
+                ('set-cookie', 'a=1'), ('set-cookie', 'b=2'), ('content-length', '18'),
+                ('content-type', 'application/json')
+            ],
+            'timings': {'headers': 12.0, 'body': 3.0, 'total': 15.0},
+            'body': '{"hello": "world"}',
+            'body_encoding': None
+        }
+
+    def test_should_base64_encode_binary_body(self):
+        data = get_response_data(get_response(content=b'\xff\xfe\x00'), TIMINGS)
+
+        assert data['body'] == '//4A'
+        assert data['body_encoding'] == 'base64'
+
+    def test_should_give_path_of_saved_body(self, tmp_path):
+        data = get_response_data(get_response(content=b'hello'), TIMINGS, tmp_path / 'file.txt')
+
+        assert data['body'] is None
+        assert data['body_path'] == str(tmp_path / 'file.txt')
+
+
+class TestGetHarEntry:
+    """Tests function get_har_entry"""
+
+    def test_should_return_request_response_and_timings(self):
+        entry = get_har_entry(get_response(text='hello', headers={'Location': '/next'}), TIMINGS)
+
+        assert entry['startedDateTime'] == '2021-10-01T00:00:00+00:00'
+        assert entry['time'] == 15.0
+        assert entry['timings'] == {'send': 0, 'wait': 12.0, 'receive': 3.0}
+        request = entry['request']
+        assert request['method'] == 'GET'
+        assert request['url'] == 'https://example.com/users?page=1&page=2'
+        assert {'name': 'x-foo', 'value': 'bar'} in request['headers']
+        assert request['queryString'] == [{'name': 'page', 'value': '1'}, {'name': 'page', 'value': '2'}]
+        response = entry['response']
+        assert response['status'] == 200
+        assert response['statusText'] == 'OK'
+        assert response['redirectURL'] == '/next'
+        assert response['content'] == {'size': 5, 'mimeType': 'text/plain; charset=utf-8', 'text': 'hello'}
+
+    def test_should_base64_encode_binary_body(self):
+        content = get_har_entry(get_response(content=b'\xff\xfe\x00'), TIMINGS)['response']['content']
+
+        assert content['text'] == '//4A'
+        assert content['encoding'] == 'base64'
+
+    def test_should_use_given_body_of_a_response_not_read(self):
+        request = httpx.Request('GET', 'https://example.com')
+        response = httpx.Response(200, request=request, stream=httpx.ByteStream(b''))
+        content = get_har_entry(response, TIMINGS, body=b'hello')['response']['content']
+
+        assert content['size'] == 5
+        assert content['text'] == 'hello'
+
+    def test_should_not_include_saved_body(self, tmp_path):
+        content = get_har_entry(get_response(content=b'hello'), TIMINGS, tmp_path / 'file.txt')['response']['content']
+
+        assert 'text' not in content
+
+
+def test_get_har_error_entry_returns_zero_status():
+    entry = get_har_error_entry('GET', 'https://example.com', 'connection refused', TIMINGS)
+
+    assert entry['request']['url'] == 'https://example.com'
+    assert entry['response']['status'] == 0
+    assert entry['response']['_error'] == 'connection refused'
+    assert entry['time'] == 15.0
+
+
+def test_get_har_log_returns_har_document():
+    log = get_har_log([{'foo': 'bar'}])['log']
+
+    assert log['version'] == '1.2'
+    assert log['creator'] == {'name': 'httpcli', 'version': __version__}
+    assert log['entries'] == [{'foo': 'bar'}]
+
+
+class TestFormattedOutput:
+    """Tests class FormattedOutput"""
+
+    def test_should_write_one_json_object_for_one_response(self, capsys):
+        output = FormattedOutput('json')
+        output.add_response(get_response(text='hello'), TIMINGS)
+        output.close()
+
+        assert json.loads(capsys.readouterr().out)['body'] == 'hello'
+
+    def test_should_write_json_array_for_many_responses(self, capsys):
+        output = FormattedOutput('json', many=True)
+        output.add_response(get_response(text='hello'), TIMINGS)
+        output.add_error('GET', 'https://example.com/error', 'connection refused', TIMINGS)
+        assert capsys.readouterr().out == ''
+        output.close()
+
+        data = json.loads(capsys.readouterr().out)
+        assert [item.get('status_code') for item in data] == [200, None]
+        assert data[1] == {'method': 'GET', 'url': 'https://example.com/error', 'error': 'connection refused'}
+
+    def test_should_write_jsonl_lines_as_results_are_added(self, capsys):
+        output = FormattedOutput('jsonl', many=True)
+        output.add_response(get_response(text='hello'), TIMINGS)
+        assert json.loads(capsys.readouterr().out)['body'] == 'hello'
+
+        output.add_response(get_response(text='world'), TIMINGS)
+        output.close()
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])['body'] == 'world'
+
+    def test_should_write_har_document(self, capsys):
+        output = FormattedOutput('har')
+        output.add_response(get_response(text='hello'), TIMINGS)
+        output.close()
+
+        entries = json.loads(capsys.readouterr().out)['log']['entries']
+        assert [entry['response']['content']['text'] for entry in entries] == ['hello']
@@ -0,0 +1,208 @@
+import base64
+import gzip
+import json
+
+import asyncclick as click
+import httpx
+import pytest
+
+import httpcli.har
+from httpcli.configuration import Configuration
+from httpcli.har import HarRecorder, RecordingTransport, get_current_recorder, get_target_url, read_har_file
+from httpcli.http import http
+from httpcli.https import https
+from httpcli.transport import build_client_arguments
+
+
+@pytest.fixture()
+def recorder(monkeypatch):
+    """HAR recorder of the requests sent by the clients built during the test"""
+    run_recorder = HarRecorder()
+    monkeypatch.setattr(httpcli.har, '_current_recorder', run_recorder)
+    return run_recorder
+
+
+def get_client_arguments():
+    arguments = build_client_arguments(Configuration())
+    arguments.pop('allow_redirects')
+    return arguments
+
+
+def write_har(tmp_path, entries, name='recording.har'):
+    path = tmp_path / name
+    path.write_text(json.dumps({'log': {'version': '1.2', 'entries': entries}}))
+    return path
+
+
+def get_entry(started, method, url, status, time=10.0, headers=None, post_data=None):
+    request = {'method': method, 'url': url, 'headers': headers or []}
+    if post_data is not None:
+        request['postData'] = post_data
+    return {'startedDateTime': started, 'time': time, 'request': request, 'response': {'status': status}}
+
+
+class TestRecordingTransport:
+    """Tests class RecordingTransport"""
+
+    def test_should_not_wrap_transport_when_run_is_not_recorded(self):
+        assert get_current_recorder() is None
+        assert not isinstance(build_client_arguments(Configuration())['transport'], RecordingTransport)
+
+    async def test_should_record_request_and_decoded_response(self, recorder, respx_mock):
+        headers = {'content-encoding': 'gzip', 'content-type': 'application/json'}
+        respx_mock.post('https://example.com/users') % httpx.Response(
+            status_code=201, content=gzip.compress(b'{"id": 1}'), headers=headers
+        )
+        async with httpx.AsyncClient(**get_client_arguments()) as client:
+            await client.post('https://example.com/users', json={'name': 'foo'}, headers={'X-Foo': 'bar'})
+
+        entries = recorder.get_har()['log']['entries']
+        assert len(entries) == 1
+        request, response = entries[0]['request'], entries[0]['response']
+        assert request['method'] == 'POST'
+        assert request['url'] == 'https://example.com/users'
+        assert {'name': 'x-foo', 'value': 'bar'} in request['headers']
+        assert request['postData'] == {'mimeType': 'application/json', 'text': '{"name": "foo"}'}
+        assert response['status'] == 201
+        assert response['content']['text'] == '{"id": 1}'
+        assert {'name': 'content-encoding', 'value': 'gzip'} in response['headers']
+
+    async def test_should_base64_encode_binary_request_body(self, recorder, respx_mock):
+        respx_mock.put('https://example.com/image') % 204
+        async with httpx.AsyncClient(**get_client_arguments()) as client:
+            await client.put('https://example.com/image', content=b'\xff\xd8')
+
+        post_data = recorder.get_har()['log']['entries'][0]['request']['postData']
+        assert base64.b64decode(post_data['text']) == b'\xff\xd8'
+        assert post_data['_encoding'] == 'base64'
+
+    async def test_should_not_record_body_bigger_than_limit(self, recorder, respx_mock, monkeypatch):
+        monkeypatch.setattr(httpcli.har, 'MAX_RECORDED_BODY_SIZE', 4)
+        respx_mock.get('https://example.com') % dict(text='hello world')
+        async with httpx.AsyncClient(**get_client_arguments()) as client:
+            await client.get('https://example.com')
+
+        content = recorder.get_har()['log']['entries'][0]['response']['content']
+        assert 'text' not in content
+        assert content['size'] == 11
+        assert 'not recorded' in content['comment']
+
+    async def test_should_not_record_bodies_once_total_limit_is_reached(self, recorder, respx_mock, monkeypatch):
+        monkeypatch.setattr(httpcli.har, 'MAX_RECORDED_TOTAL_SIZE', 8)
+        respx_mock.get('https://example.com/a') % dict(text='hello')
+        respx_mock.get('https://example.com/b') % dict(text='world')
+        async with httpx.AsyncClient(**get_client_arguments()) as client:
+            await client.get('https://example.com/a')
+            await client.get('https://example.com/b')
+
+        first, second = [entry['response']['content'] for entry in recorder.get_har()['log']['entries']]
+        assert first['text'] == 'hello'
+        assert 'text' not in second
+        assert second['comment'] == 'body of 5 bytes not recorded, the recorded bodies of the run already take 8 bytes'
+        assert recorder.recorded_size == 5
+
+    async def test_should_record_response_not_closed_yet(self, recorder, respx_mock):
+        respx_mock.get('https://example.com/events') % dict(text='data: 1\n\n')
+        async with httpx.AsyncClient(**get_client_arguments()) as client:
+            response = await client.send(client.build_request('GET', 'https://example.com/events'), stream=True)
+            async for _ in response.aiter_raw():
+                pass
+
+            entries = recorder.get_har()['log']['entries']
+            assert entries[0]['response']['content']['text'] == 'data: 1\n\n'
+            await response.aclose()
+
+        assert len(recorder.get_har()['log']['entries']) == 1
+
+    async def test_should_record_failed_request(self, recorder, respx_mock):
+        respx_mock.get('https://example.com').side_effect = httpx.ConnectError('connection refused')
+        async with httpx.AsyncClient(**get_client_arguments()) as client:
+            with pytest.raises(httpx.ConnectError):
+                await client.get('https://example.com')
+
+        response = recorder.get_har()['log']['entries'][0]['response']
+        assert response['status'] == 0
+        assert response['_error'] == 'connection refused'
+
+
+@pytest.mark.parametrize(('url', 'target', 'expected'), [
+    ('https://example.com/users?page=2', None, 'https://example.com/users?page=2'),
+    ('https://example.com/users?page=2', 'http://localhost:8000', 'http://localhost:8000/users?page=2'),
+    ('http://example.com:8080/', 'https://staging.example.com', 'https://staging.example.com/')
+])
+def test_get_target_url(url, target, expected):
+    assert get_target_url(url, target) == expected
+
+
+class TestReadHarFile:
+    """Tests function read_har_file"""
+
+    def test_should_return_requests_sorted_by_date_with_offsets(self, tmp_path):
+        path = write_har(tmp_path, [
+            get_entry('2021-10-01T10:00:01.500+02:00', 'post', 'https://example.com/users', 201, 30.0, post_data={
+                'mimeType': 'application/json', 'text': '{"name": "foo"}'
+            }),
+            get_entry('2021-10-01T08:00:00Z', 'GET', 'https://example.com/', 200, headers=[
+                {'name': ':authority', 'value': 'example.com'}, {'name': 'Host', 'value': 'example.com'},
+                {'name': 'Content-Length', 'value': '0'}, {'name': 'Cookie', 'value': 'a=1'}
+            ])
+        ])
+        first, second = read_har_file(path, 'http://localhost:8000')
+
+        assert (first.method, first.url, first.offset, first.status_code) == ('GET', 'http://localhost:8000/', 0, 200)
+        assert first.arguments == {'headers': [('Cookie', 'a=1')]}
+        assert first.latency == 0.01
+        assert (second.method, second.offset, second.latency) == ('POST', 1.5, 0.03)
+        assert second.arguments['content'] == b'{"name": "foo"}'
+
+    def test_should_sort_dates_with_and_without_offset(self, tmp_path):
+        path = write_har(tmp_path, [
+            get_entry('2021-10-01T10:00:01+02:00', 'GET', 'https://example.com/b', 200),
+            get_entry('2021-10-01T08:00:00', 'GET', 'https://example.com/a', 200)
+        ])
+        first, second = read_har_file(path)
+
+        assert (first.url, first.offset) == ('https://example.com/a', 0)
+        assert (second.url, second.offset) == ('https://example.com/b', 1)
+
+    def test_should_decode_base64_request_body(self, tmp_path):
+        post_data = {'mimeType': 'image/png', 'text': base64.b64encode(b'\x89PNG').decode(), '_encoding': 'base64'}
+        entry = get_entry('2021-10-01T08:00:00Z', 'PUT', 'https://a.com', 204, post_data=post_data)
+        path = write_har(tmp_path, [entry])
+
+        assert read_har_file(path)[0].arguments['content'] == b'\x89PNG'
+
+    @pytest.mark.parametrize('content', ['not json', '{"log": {}}', '{"log": {"entries": [{"time": 1}]}}'])
+    def test_should_raise_error_when_file_is_not_a_valid_har_file(self, tmp_path, content):
+        path = tmp_path / 'invalid.har'
+        path.write_text(content)
+
+        with pytest.raises(click.UsageError) as exc_info:
+            read_har_file(path)
+
+        assert f'{path} is not a valid HAR file' in str(exc_info.value)
+
+
+@pytest.mark.parametrize('command', [http, https])
+async def test_should_write_har_file_at_exit(runner, respx_mock, tmp_path, command):
+    respx_mock.get('https://example.com/a') % dict(text='a')
+    respx_mock.get('https://example.com/b') % dict(status_code=404, text='b')
+    path = tmp_path / 'run.har'
+    result = await runner.invoke(command, ['--har', str(path), 'get', 'https://example.com/a', 'https://example.com/b'])
+
+    assert result.exit_code == 0
+    log = json.loads(path.read_text())['log']
+    assert log['creator']['name'] == 'httpcli'
+    assert sorted((entry['request']['url'], entry['response']['status']) for entry in log['entries']) == [
+        ('https://example.com/a', 200), ('https://example.com/b', 404)
+    ]
+    assert get_current_recorder() is None
+
+
+async def test_should_print_warning_when_har_file_cannot_be_written(runner, respx_mock, tmp_path):
+    respx_mock.get('https://example.com') % dict(text='hello')
+    path = tmp_path / 'missing' / 'run.har'
+    result = await runner.invoke(http, ['--har', str(path), 'get', 'https://example.com'])
+
+    assert result.exit_code == 0
+    assert 'unable to write HAR file' in result.output
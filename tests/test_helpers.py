@@ -5,18 +5,22 @@ import asyncclick as click
 import httpx
 import mock
 import pytest
+import yaml
 
 from httpcli.configuration import Configuration, BasicAuth, DigestAuth, OAuth2PasswordBearer
 from httpcli.helpers import (
     build_base_httpx_arguments, load_config_from_yaml, build_http_property_arguments, get_oauth2_bearer_token,
-    build_read_method_arguments, build_write_method_arguments
+    build_read_method_arguments, build_write_method_arguments, get_profile_data
 )
+from httpcli.sessions import Session
+from tests.helpers import CLIENT_CERTIFICATE, CLIENT_KEY
 
 CONFIGURATIONS = [
     Configuration(),
     Configuration(verify=False, version='h2'),
     Configuration(proxy='https://proxy.com', follow_redirects=False),  # type: ignore
-    Configuration(auth=DigestAuth(username='foo', password='bar'), follow_redirects=False)
+    Configuration(auth=DigestAuth(username='foo', password='bar'), follow_redirects=False),
+    Configuration(version='auto')
 ]
 
 DEFAULT_ARGUMENT = {
@@ -30,6 +34,7 @@ ARGUMENTS = [
     DEFAULT_ARGUMENT,
     {**DEFAULT_ARGUMENT, 'verify': False, 'http1': False, 'http2': True},
     {**DEFAULT_ARGUMENT, 'proxies': 'https://proxy.com', 'allow_redirects': False},
+    {**DEFAULT_ARGUMENT, 'http1': True, 'http2': True},
 ]
 
 
@@ -39,7 +44,8 @@ class TestBuildBaseHttpxArguments:
     @pytest.mark.parametrize(('config', 'arguments'), [
         (CONFIGURATIONS[0], ARGUMENTS[0]),
         (CONFIGURATIONS[1], ARGUMENTS[1]),
-        (CONFIGURATIONS[2], ARGUMENTS[2])
+        (CONFIGURATIONS[2], ARGUMENTS[2]),
+        (CONFIGURATIONS[4], ARGUMENTS[3])
     ])
     def test_should_return_correct_arguments(self, config, arguments):
         assert build_base_httpx_arguments(config) == arguments
@@ -60,6 +66,16 @@ class TestBuildBaseHttpxArguments:
         auth = arguments['auth']
         assert isinstance(auth, httpx_auth_class)
 
+    @pytest.mark.parametrize(('key', 'expected_cert'), [
+        (False, str(CLIENT_CERTIFICATE)),
+        (True, (str(CLIENT_CERTIFICATE), str(CLIENT_KEY)))
+    ])
+    def test_should_return_client_certificate(self, key, expected_cert):
+        config = Configuration(client_cert=CLIENT_CERTIFICATE, client_key=CLIENT_KEY if key else None)
+        arguments = build_base_httpx_arguments(config)
+
+        assert arguments['cert'] == expected_cert
+
     def test_should_return_correct_arguments_with_a_custom_certificate(self, tmp_path):
         fake_cert = tmp_path / 'cert.pem'
         fake_cert.write_bytes(b'fake cert')
@@ -102,6 +118,12 @@ httpcli:
   version: h2
 """
 
+PROFILES_YAML_DATA = CORRECT_YAML_DATA + """
+profiles:
+  production:
+    timeout: 30
+"""
+
 
 class TestLoadConfigFromYaml:
     """Tests function load_config_from_yaml"""
@@ -123,6 +145,94 @@ class TestLoadConfigFromYaml:
             assert config.timeout == 2
             assert config.version == 'h2'
 
+    def test_should_return_configuration_of_given_profile(self, tmp_path):
+        config_file = tmp_path / 'config.yaml'
+        config_file.write_text(PROFILES_YAML_DATA)
+        with config_file.open() as f:
+            config = load_config_from_yaml(f, 'production')
+
+        assert config.timeout == 30
+        assert config.version == 'h2'
+
+    def test_should_not_parse_file_again_when_it_is_not_modified(self, tmp_path, mocker):
+        config_file = tmp_path / 'config.yaml'
+        config_file.write_text(CORRECT_YAML_DATA)
+        yaml_load_spy = mocker.spy(yaml, 'load')
+        for _ in range(2):
+            with config_file.open() as f:
+                config = load_config_from_yaml(f)
+            assert config.timeout == 2
+
+        assert yaml_load_spy.call_count == 1
+
+    def test_should_parse_file_again_when_it_is_modified(self, tmp_path):
+        config_file = tmp_path / 'config.yaml'
+        config_file.write_text(CORRECT_YAML_DATA)
+        with config_file.open() as f:
+            load_config_from_yaml(f)
+
+        config_file.write_text(CORRECT_YAML_DATA.replace('timeout: 2', 'timeout: 10'))
+        with config_file.open() as f:
+            config = load_config_from_yaml(f)
+
+        assert config.timeout == 10
+
+    def test_should_parse_file_again_when_environment_variables_change(self, tmp_path, monkeypatch):
+        config_file = tmp_path / 'config.yaml'
+        config_file.write_text(CORRECT_YAML_DATA)
+        with config_file.open() as f:
+            load_config_from_yaml(f)
+
+        monkeypatch.setenv('HTTP_CLI_FOLLOW_REDIRECTS', 'false')
+        with config_file.open() as f:
+            config = load_config_from_yaml(f)
+
+        assert config.follow_redirects is False
+
+    def test_should_validate_cached_configuration_again(self, tmp_path):
+        certificate = tmp_path / 'client.pem'
+        certificate.write_text('certificate')
+        config_file = tmp_path / 'config.yaml'
+        config_file.write_text(f'httpcli:\n  client_cert: {certificate}\n')
+        with config_file.open() as f:
+            assert load_config_from_yaml(f).client_cert == certificate
+
+        certificate.unlink()
+        with pytest.raises(click.UsageError) as exc_info:
+            with config_file.open() as f:
+                load_config_from_yaml(f)
+
+        assert 'client_cert' in str(exc_info.value)
+
+
+class TestGetProfileData:
+    """Tests function get_profile_data"""
+
+    DATA = {'httpcli': {'timeout': 2, 'version': 'h2'}, 'profiles': {'dev': {'timeout': 10}, 'empty': None}}
+
+    @pytest.mark.parametrize(('profile', 'expected_data'), [
+        (None, {'timeout': 2, 'version': 'h2'}),
+        ('dev', {'timeout': 10, 'version': 'h2'}),
+        ('empty', {'timeout': 2, 'version': 'h2'})
+    ])
+    def test_should_return_data_of_given_profile(self, profile, expected_data):
+        assert get_profile_data(self.DATA, profile) == expected_data
+        assert self.DATA['httpcli'] == {'timeout': 2, 'version': 'h2'}
+
+    def test_should_return_profile_data_when_there_is_no_httpcli_section(self):
+        assert get_profile_data({'profiles': {'dev': {'timeout': 10}}}, 'dev') == {'timeout': 10}
+
+    def test_should_raise_error_when_profile_does_not_exist(self):
+        with pytest.raises(click.UsageError) as exc_info:
+            get_profile_data(self.DATA, 'foo')
+
+        assert str(exc_info.value) == 'profile foo not found in configuration file, available profiles: dev, empty'
+
+    @pytest.mark.parametrize('data', [None, 'foo', ['foo']])
+    def test_should_raise_error_when_data_is_not_a_mapping(self, data):
+        with pytest.raises(click.UsageError):
+            get_profile_data(data)
+
 
 class TestGetOauth2BearerToken:
     """Tests function get_oauth2_bearer_token"""
@@ -203,6 +313,36 @@ class TestBuildReadMethodArguments:
         assert arguments['http2'] is False
         assert arguments['headers'] == [('Authorization', f'Bearer {access_token}')]
 
+    async def test_should_reuse_oauth2_token_kept_in_session(self, respx_mock, tmp_path):
+        token_url = 'https://token.com'
+        auth = OAuth2PasswordBearer(username='foo', password='bar', token_url=token_url)  # type: ignore
+        config = Configuration(auth=auth)
+        route = respx_mock.post(token_url) % dict(json={'token_type': 'bearer', 'access_token': 'token'})
+        session = Session('api', tmp_path)
+
+        for _ in range(2):
+            arguments = await build_read_method_arguments(config, session=session)
+            assert arguments['headers'] == [('Authorization', 'Bearer token')]
+
+        assert route.call_count == 1
+
+    async def test_should_add_session_headers_and_cookies(self, tmp_path):
+        session = Session('api', tmp_path)
+        session.update_headers([('X-Api-Version', '2')])
+        arguments = await build_read_method_arguments(
+            Configuration(), headers=(('foo', 'bar'),), cookies=(('lang', 'fr'),), session=session
+        )
+
+        assert arguments['headers'] == [('X-Api-Version', '2'), ('foo', 'bar')]
+        assert arguments['cookies']['lang'] == 'fr'
+        assert session.headers == {'X-Api-Version': '2', 'foo': 'bar'}
+
+    async def test_should_put_accept_encoding_header_before_user_headers(self):
+        config = Configuration(accept_encoding=['gzip', 'deflate'])
+        arguments = await build_read_method_arguments(config, headers=(('foo', 'bar'),))
+
+        assert arguments['headers'] == [('Accept-Encoding', 'gzip, deflate'), ('foo', 'bar')]
+
 
 class TestBuildWriteMethodArguments:
     """Tests function build_write_method_arguments"""
@@ -213,7 +353,7 @@ class TestBuildWriteMethodArguments:
         config = Configuration()
         await build_write_method_arguments(config, headers, cookies, query_params)
 
-        build_read_mock.assert_awaited_once_with(config, headers, cookies, query_params)
+        build_read_mock.assert_awaited_once_with(config, headers, cookies, query_params, None)
 
     @pytest.mark.parametrize('arguments', [
         {'json_data': [('foo', 'bar')], 'form': [('foo', 'bar')]},
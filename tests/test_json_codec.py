@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from httpcli import json_codec
+from httpcli.json_codec import CODECS, OrjsonCodec, StandardCodec, get_codec, set_codec
+
+DATA = {'hello': 'world', 'numbers': [1, 2.5, None, True]}
+
+
+@pytest.fixture()
+def codec_name():
+    name = get_codec().name
+    yield
+    set_codec(name)
+
+
+@pytest.fixture(params=['json', 'orjson'])
+def codec(request):
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    return CODECS[request.param]()
+
+
+class TestCodecs:
+    """Tests classes StandardCodec and OrjsonCodec"""
+
+    @pytest.mark.parametrize('data', [json.dumps(DATA), json.dumps(DATA).encode()])
+    def test_should_decode_str_and_bytes(self, codec, data):
+        assert codec.loads(data) == DATA
+
+    def test_should_raise_standard_error_given_invalid_json(self, codec):
+        with pytest.raises(json.JSONDecodeError):
+            codec.loads('{"hello":')
+
+    def test_should_encode_data(self, codec):
+        assert json.loads(codec.dumps(DATA)) == DATA
+        assert '\n' not in codec.dumps(DATA)
+
+    def test_should_indent_data_when_asked(self, codec):
+        text = codec.dumps(DATA, indent=True)
+
+        assert json.loads(text) == DATA
+        assert text == json.dumps(DATA, indent=4)
+
+    def test_should_escape_non_ascii_characters_when_indenting(self, codec):
+        assert codec.dumps({'name': 'Élodie'}, indent=True) == '{\n    "name": "\\u00c9lodie"\n}'
+        assert codec.dumps({'name': 'Élodie'}) == '{"name":"Élodie"}'
+
+    def test_should_keep_big_integers_intact(self, codec):
+        value = codec.loads('{"big": 100000000000000000000000}')
+
+        assert value == {'big': 10 ** 23}
+        assert json.loads(codec.dumps(value)) == value
+
+    @pytest.mark.parametrize('text', ['-9223372036854775809', '18446744073709551616'])
+    def test_should_keep_integers_outside_64_bits_intact(self, codec, text):
+        assert codec.loads(f'[{text}]') == [int(text)]
+
+    def test_should_decode_nan_values_refused_by_orjson(self, codec):
+        value = codec.loads('{"value": NaN}')
+
+        assert value['value'] != value['value']
+
+
+@pytest.mark.parametrize('data', [
+    DATA,
+    {'name': 'Élodie', 'emoji': '🚀', 'escaped': 'a"b\\c\n'},
+    {'floats': [1e16, 1.5e-7, 0.00001, 0.0001, 123.456, -0.0], 'text': '1e5'},
+    {'big': [10 ** 23, -(2 ** 63) - 1], 1: 'integer key'},
+    [[], {}, [{}]],
+    {'nested': {'list': [{'a': [1, {'b': []}]}], 'text': '  leading spaces\n  "quoted"'}},
+])
+@pytest.mark.parametrize('indent', [False, True])
+def test_codecs_should_encode_data_the_same_way(data, indent):
+    pytest.importorskip('orjson')
+
+    assert OrjsonCodec().dumps(data, indent) == StandardCodec().dumps(data, indent)
+
+
+class TestSetCodec:
+    """Tests function set_codec"""
+
+    def test_should_raise_error_given_unknown_codec(self):
+        with pytest.raises(ValueError) as exc_info:
+            set_codec('foo')
+
+        assert str(exc_info.value).startswith('foo is not an available json codec, choose among json')
+
+    def test_should_change_codec_used_by_module_functions(self, codec_name):
+        set_codec('json')
+
+        assert isinstance(get_codec(), StandardCodec)
+        assert json_codec.loads('[1, 2]') == [1, 2]
+        assert json_codec.dumps([1, 2]) == '[1,2]'
+
+
+def test_orjson_codec_should_be_the_default_when_installed():
+    pytest.importorskip('orjson')
+
+    assert isinstance(get_codec(), OrjsonCodec)
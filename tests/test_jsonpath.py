@@ -0,0 +1,70 @@
+import pytest
+
+from httpcli.jsonpath import JsonPath, parse_condition, parse_path
+
+DATA = {
+    'data': [{'id': 1, 'name': 'foo'}, {'id': 2, 'name': 'bar'}],
+    'meta': {'next-cursor': 'abc', 'total': 2}
+}
+
+
+class TestParsePath:
+    """Tests function parse_path"""
+
+    @pytest.mark.parametrize('path', ['$.data[foo]', '$.data[', '$..data', 'data[1'])
+    def test_should_raise_error_given_invalid_path(self, path):
+        with pytest.raises(ValueError) as exc_info:
+            parse_path(path)
+
+        assert f'{path} is not a valid json path' in str(exc_info.value)
+
+    @pytest.mark.parametrize(('path', 'expected'), [
+        ('$', []),
+        ('$.data[0].id', [('key', 'data'), ('index', 0), ('key', 'id')]),
+        ('data[-1]', [('key', 'data'), ('index', -1)]),
+        ("$['meta'].total", [('key', 'meta'), ('key', 'total')]),
+        ('$.data[*]', [('key', 'data'), ('wildcard', None)]),
+        ('$.meta.*', [('key', 'meta'), ('wildcard', None)]),
+    ])
+    def test_should_return_steps_given_valid_path(self, path, expected):
+        assert parse_path(path) == expected
+
+
+class TestJsonPath:
+    """Tests class JsonPath"""
+
+    @pytest.mark.parametrize(('path', 'expected'), [
+        ('$', [DATA]),
+        ('$.data[*].id', [1, 2]),
+        ('data[-1].name', ['bar']),
+        ("$.meta['next-cursor']", ['abc']),
+        ('$.meta.*', ['abc', 2]),
+        ('$.data[5]', []),
+        ('$.unknown.total', []),
+        ('$.meta.total.foo', []),
+    ])
+    def test_should_find_values_given_path(self, path, expected):
+        assert JsonPath(path).find(DATA) == expected
+
+    def test_should_not_index_dict_with_integer(self):
+        assert JsonPath('$[0]').find({0: 'foo'}) == []
+
+
+class TestParseCondition:
+    """Tests function parse_condition"""
+
+    def test_should_raise_error_given_invalid_path(self):
+        with pytest.raises(ValueError):
+            parse_condition('$.data[foo]=1')
+
+    @pytest.mark.parametrize(('condition', 'expected'), [
+        ('$.meta.total=2', True),
+        ('$.meta.total=3', False),
+        ('$.meta.next-cursor=abc', True),
+        ('$.data[*].name="bar"', True),
+        ('$.data[0].id=true', False),
+        ('$.meta.total', True),
+        ('$.meta.unknown', False),
+    ])
+    def test_should_match_data_given_condition(self, condition, expected):
+        assert parse_condition(condition).matches(DATA) is expected
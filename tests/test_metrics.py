@@ -0,0 +1,187 @@
+import json
+
+import httpx
+import pytest
+from hypercorn.config import Config
+from hypercorn.trio import serve
+
+import httpcli.metrics
+from httpcli.configuration import Configuration
+from httpcli.http import http
+from httpcli.https import https
+from httpcli.metrics import (
+    Counter, Histogram, MetricsTransport, RunMetrics, get_current_metrics, render_json, render_metrics, render_text
+)
+from httpcli.models import TransportSettings
+from httpcli.transport import PoolStatistics, build_client_arguments, build_pooled_client_arguments
+from tests.helpers import app
+
+
+@pytest.fixture()
+def metrics(monkeypatch):
+    """Metrics recorded by the clients built during the test"""
+    run_metrics = RunMetrics('get')
+    monkeypatch.setattr(httpcli.metrics, '_current_metrics', run_metrics)
+    return run_metrics
+
+
+class TestHistogram:
+    """Tests class Histogram"""
+
+    def test_should_count_values_in_buckets(self):
+        histogram = Histogram('sizes', 'Sizes.', ['method'], [10, 100])
+        for value in [1, 10, 50, 1000]:
+            histogram.observe(value, ('GET',))
+
+        assert histogram.get_cumulative_counts(('GET',)) == [(10, 2), (100, 3), (float('inf'), 4)]
+        assert histogram.values[('GET',)].sum == 1061
+        assert histogram.values[('GET',)].count == 4
+
+
+class TestRender:
+    """Tests functions render_text and render_json"""
+
+    @staticmethod
+    def get_metrics():
+        counter = Counter('requests_total', 'Requests made.', ['status'])
+        counter.inc(('200',), 3)
+        histogram = Histogram('latency_seconds', 'Latency.', [], [0.5])
+        histogram.observe(0.25)
+        return [counter, histogram]
+
+    def test_should_render_prometheus_text_format(self):
+        assert render_text(self.get_metrics()) == (
+            '# HELP requests_total Requests made.\n'
+            '# TYPE requests_total counter\n'
+            'requests_total{status="200"} 3\n'
+            '# HELP latency_seconds Latency.\n'
+            '# TYPE latency_seconds histogram\n'
+            'latency_seconds_bucket{le="0.5"} 1\n'
+            'latency_seconds_bucket{le="+Inf"} 1\n'
+            'latency_seconds_sum 0.25\n'
+            'latency_seconds_count 1\n'
+        )
+
+    def test_should_render_openmetrics_text_format(self):
+        assert render_metrics(self.get_metrics(), 'openmetrics') == (
+            '# HELP requests Requests made.\n'
+            '# TYPE requests counter\n'
+            'requests_total{status="200"} 3.0\n'
+            '# HELP latency_seconds Latency.\n'
+            '# TYPE latency_seconds histogram\n'
+            'latency_seconds_bucket{le="0.5"} 1\n'
+            'latency_seconds_bucket{le="+Inf"} 1\n'
+            'latency_seconds_sum 0.25\n'
+            'latency_seconds_count 1\n'
+            '# EOF\n'
+        )
+
+    def test_should_escape_label_values(self):
+        counter = Counter('errors_total', 'Errors.', ['error'])
+        counter.inc(('a "quoted"\\error\n',))
+
+        assert 'errors_total{error="a \\"quoted\\"\\\\error\\n"} 1' in render_text([counter])
+
+    def test_should_render_json(self):
+        data = json.loads(render_json(self.get_metrics()))
+
+        assert data == {
+            'requests_total': {
+                'type': 'counter', 'help': 'Requests made.', 'samples': [{'labels': {'status': '200'}, 'value': 3}]
+            },
+            'latency_seconds': {
+                'type': 'histogram',
+                'help': 'Latency.',
+                'samples': [{
+                    'labels': {},
+                    'buckets': [{'le': 0.5, 'count': 1}, {'le': None, 'count': 1}],
+                    'sum': 0.25,
+                    'count': 1
+                }]
+            }
+        }
+
+
+class TestRunMetrics:
+    """Tests class RunMetrics"""
+
+    def test_should_compute_connect_retries_when_finished(self):
+        metrics = RunMetrics('download')
+        # a request succeeded after one failure and another failed after three attempts
+        for _ in range(4):
+            metrics.on_connect_error()
+        metrics.on_request_error('GET', httpx.ConnectError('refused'))
+        metrics.on_request_error('GET', httpx.ReadTimeout('timeout'))
+        metrics.finish()
+
+        assert metrics.connect_retries.values[()] == 3
+        assert metrics.run_duration.values[('download',)] >= 0
+
+
+class TestMetricsTransport:
+    """Tests class MetricsTransport"""
+
+    def test_should_not_wrap_transport_when_metrics_are_not_recorded(self):
+        assert get_current_metrics() is None
+        arguments = build_client_arguments(Configuration())
+
+        assert isinstance(arguments['transport'], httpx.AsyncHTTPTransport)
+
+    async def test_should_record_requests_bytes_and_connections(self, nursery, metrics):
+        await nursery.start(serve, app, Config())
+        arguments = build_pooled_client_arguments(Configuration(), PoolStatistics())
+        arguments.pop('allow_redirects')
+
+        assert isinstance(arguments['transport'], MetricsTransport)
+        async with httpx.AsyncClient(**arguments) as client:
+            for name in ['a', 'b']:
+                await client.get(f'http://localhost:8000/files/{name}')
+            await client.post('http://localhost:8000/files/c', content=b'hello')
+
+        assert metrics.requests.values == {('GET', '200'): 2, ('POST', '405'): 1}
+        assert metrics.connections.values == {('tcp',): 1}
+        assert metrics.response_latency.values[('GET',)].count == 2
+        assert metrics.request_duration.values[('GET',)].count == 2
+        assert metrics.received_bytes.values[('GET',)].sum == len('content of a') * 2
+        assert metrics.sent_bytes.values[('POST',)].sum == 5
+
+    async def test_should_record_connect_errors_and_retries(self, metrics):
+        config = Configuration(transport=TransportSettings(retries=2))
+        arguments = build_client_arguments(config)
+        arguments.pop('allow_redirects')
+
+        async with httpx.AsyncClient(**arguments) as client:
+            with pytest.raises(httpx.ConnectError):
+                await client.get('http://127.0.0.1:1')
+
+        metrics.finish()
+        assert metrics.request_errors.values == {('GET', 'ConnectError'): 1}
+        assert metrics.connect_errors.values == {(): 3}
+        assert metrics.connect_retries.values == {(): 2}
+
+
+@pytest.mark.parametrize('command', [http, https])
+@pytest.mark.parametrize(('metrics_format', 'expected'), [
+    ('prometheus', 'httpcli_requests_total{method="GET",status="200"} 1\n'),
+    ('openmetrics', 'httpcli_requests_total{method="GET",status="200"} 1.0\n'),
+    ('json', '"status": "200"'),
+])
+async def test_should_write_metrics_file_at_exit(runner, respx_mock, tmp_path, command, metrics_format, expected):
+    respx_mock.get('https://example.com') % httpx.Response(status_code=200, text='hello')
+    path = tmp_path / 'httpcli.prom'
+    arguments = ['--metrics-file', str(path), '--metrics-format', metrics_format, 'get', 'https://example.com']
+    result = await runner.invoke(command, arguments)
+
+    assert result.exit_code == 0
+    content = path.read_text()
+    assert expected in content
+    assert 'httpcli_run_duration_seconds' in content
+    assert get_current_metrics() is None
+
+
+async def test_should_write_metrics_file_when_command_fails(runner, tmp_path):
+    path = tmp_path / 'httpcli.prom'
+    result = await runner.invoke(http, ['--metrics-file', str(path), 'get', 'http://127.0.0.1:1'])
+
+    assert result.exit_code == 1
+    assert 'httpcli_request_errors_total{method="GET",error="ConnectError"} 1' in path.read_text()
@@ -1,18 +1,27 @@
 import asyncclick as click
 
 from httpcli.models import DigestAuth
-from httpcli.options import global_cli_options, http_query_options, http_write_options
+from httpcli.options import global_cli_options, http_query_options, http_output_options, http_write_options
 
 
 @click.command()
 @global_cli_options
-def debug_global_options(proxy, http_version, auth, follow_redirects, timeout, config_file):
+def debug_global_options(
+        proxy, http_version, auth, follow_redirects, timeout, config_file, profile, verbose, accept_encoding, session,
+        resolve, unix_socket
+):
     click.echo(proxy)
     click.echo(http_version)
     click.echo(auth)
     click.echo(follow_redirects)
     click.echo(timeout)
     click.echo(config_file)
+    click.echo(profile)
+    click.echo(verbose)
+    click.echo(accept_encoding)
+    click.echo(session)
+    click.echo(resolve)
+    click.echo(unix_socket)
 
 
 @click.command()
@@ -23,22 +32,40 @@ def debug_http_query_options(query_params, headers, cookies):
     click.echo(cookies)
 
 
+@click.command()
+@http_output_options
+def debug_http_output_options(output, download, output_format):
+    click.echo(output)
+    click.echo(download)
+    click.echo(output_format)
+
+
 @click.command()
 @http_write_options
-def debug_http_write_options(form, json_data, raw):
+def debug_http_write_options(form, json_data, raw, compress):
     click.echo(form)
     click.echo(json_data)
     click.echo(raw)
+    click.echo(compress)
 
 
-async def test_global_cli_options_is_correctly_formed(runner):
+async def test_global_cli_options_is_correctly_formed(runner, tmp_path):
+    socket_path = tmp_path / 'docker.sock'
+    socket_path.touch()
     auth = DigestAuth(username='user', password='pass')
     proxy = 'http://proxy.com'
-    arguments = ['--http-version', 'h2', '--auth', auth.json(), '--proxy', proxy, '-N', '-t', 3]
+    arguments = [
+        '--http-version', 'h2', '--auth', auth.json(), '--proxy', proxy, '-N', '-t', 3, '-v',
+        '--accept-encoding', 'gzip,deflate', '--profile', 'staging', '--session', 'api',
+        '--resolve', 'example.com:443:127.0.0.1', '--unix-socket', str(socket_path)
+    ]
     result = await runner.invoke(debug_global_options, arguments)
 
     assert result.exit_code == 0
-    assert result.output == f'{proxy}\nh2\n{auth}\nFalse\n3.0\n\n'
+    assert result.output == (
+        f'{proxy}\nh2\n{auth}\nFalse\n3.0\n\nstaging\nTrue\n{["gzip", "deflate"]}\napi\n'
+        f'{("example.com:443:127.0.0.1",)}\n{socket_path}\n'
+    )
 
 
 async def test_http_query_options_is_correctly_formed(runner):
@@ -50,9 +77,16 @@ async def test_http_query_options_is_correctly_formed(runner):
 
 
 async def test_http_write_options_is_correctly_formed(runner):
-    arguments = ['-f', 'foo:bar', '-j', 'foo:bar', '-r', 'pineapple']
+    arguments = ['-f', 'foo:bar', '-j', 'foo:bar', '-r', 'pineapple', '--compress', 'gzip']
     result = await runner.invoke(debug_http_write_options, arguments)
     foo_tuple = (('foo', 'bar'),)
 
     assert result.exit_code == 0
-    assert result.output == f'{foo_tuple}\n{foo_tuple}\npineapple\n'
+    assert result.output == f'{foo_tuple}\n{foo_tuple}\npineapple\ngzip\n'
+
+
+async def test_http_output_options_is_correctly_formed(runner):
+    result = await runner.invoke(debug_http_output_options, ['-o', 'file.txt', '--download', '--format', 'jsonl'])
+
+    assert result.exit_code == 0
+    assert result.output == 'file.txt\nTrue\njsonl\n'
@@ -4,7 +4,10 @@ import asyncclick as click
 import pytest
 
 from httpcli.models import BasicAuth
-from httpcli.parameters import AUTH_PARAM, URL, QUERY, HEADER, COOKIE, JSON, FORM, RAW_PAYLOAD
+from httpcli.parameters import (
+    AUTH_PARAM, ACCEPT_ENCODING, COMPRESSION, URL, WS_URL, QUERY, HEADER, COOKIE, JSON, FORM, RAW_PAYLOAD, VARIABLE,
+    SESSION, RESOLVE, JSON_PATH, JSON_CONDITION, STATUS_PATTERN, EXPECTED_HEADER, JSON_SCHEMA, DURATION
+)
 
 
 @click.command()
@@ -19,6 +22,63 @@ def debug_url(url):
     click.echo(url)
 
 
+@click.command()
+@click.option('--accept-encoding', type=ACCEPT_ENCODING)
+def debug_accept_encoding(accept_encoding):
+    click.echo(accept_encoding)
+
+
+@click.command()
+@click.option('--compress', type=COMPRESSION)
+def debug_compression(compress):
+    click.echo(compress)
+
+
+@click.command()
+@click.option('-v', '--var', type=VARIABLE)
+def debug_variable(var):
+    click.echo(var)
+
+
+@click.command()
+@click.option('--session', type=SESSION)
+def debug_session(session):
+    click.echo(session)
+
+
+@click.command()
+@click.option('--resolve', type=RESOLVE)
+def debug_resolve(resolve):
+    click.echo(resolve)
+
+
+@click.command()
+@click.option('--path', type=JSON_PATH)
+def debug_json_path(path):
+    click.echo(path)
+
+
+@click.command()
+@click.option('--condition', type=JSON_CONDITION)
+def debug_json_condition(condition):
+    click.echo(f'{condition.path.path} {condition.value!r} {condition.has_value}')
+
+
+@click.command()
+@click.option('--status', type=STATUS_PATTERN)
+@click.option('--header', type=EXPECTED_HEADER)
+@click.option('--schema', type=JSON_SCHEMA)
+@click.option('--duration', type=DURATION)
+def debug_assertion(status, header, schema, duration):
+    click.echo(f'{status} {header} {schema} {duration}')
+
+
+@click.command()
+@click.option('--url', type=WS_URL)
+def debug_ws_url(url):
+    click.echo(url)
+
+
 @click.command()
 @click.option('--header', type=HEADER)
 @click.option('--cookie', type=COOKIE)
@@ -85,6 +145,211 @@ class TestUrlParam:
         assert result.output == f'{url}\n'
 
 
+class TestWebSocketUrlParam:
+    """Tests WebSocketUrlParam class"""
+
+    @pytest.mark.parametrize('url', ['4', 'http://foo.com'])
+    async def test_should_print_error_given_wrong_input(self, runner, url):
+        result = await runner.invoke(debug_ws_url, ['--url', url])
+
+        assert result.exit_code == 2
+        assert f'{url} is not a valid websocket url' in result.output
+
+    @pytest.mark.parametrize(('url', 'expected_url'), [
+        ('ws://url.com', 'ws://url.com'),
+        ('wss://url.com/ws', 'wss://url.com/ws'),
+        (':8000/ws', 'ws://localhost:8000/ws')
+    ])
+    async def test_should_print_url_given_correct_input(self, runner, url, expected_url):
+        result = await runner.invoke(debug_ws_url, ['--url', url])
+
+        assert result.exit_code == 0
+        assert result.output == f'{expected_url}\n'
+
+
+class TestAcceptEncodingParam:
+    """Tests AcceptEncodingParam class"""
+
+    async def test_should_print_error_given_unknown_encoding(self, runner):
+        result = await runner.invoke(debug_accept_encoding, ['--accept-encoding', 'gzip,foo'])
+
+        assert result.exit_code == 2
+        assert 'foo is not a supported encoding' in result.output
+
+    async def test_should_print_encodings_given_correct_input(self, runner):
+        result = await runner.invoke(debug_accept_encoding, ['--accept-encoding', 'gzip, deflate'])
+
+        assert result.exit_code == 0
+        assert result.output == f'{["gzip", "deflate"]}\n'
+
+
+class TestCompressionParam:
+    """Tests CompressionParam class"""
+
+    @pytest.mark.parametrize('encoding', ['deflate', 'foo'])
+    async def test_should_print_error_given_unsupported_encoding(self, runner, encoding):
+        result = await runner.invoke(debug_compression, ['--compress', encoding])
+
+        assert result.exit_code == 2
+        assert f'{encoding!r} is not one of' in result.output
+
+    async def test_should_print_encoding_given_correct_input(self, runner):
+        result = await runner.invoke(debug_compression, ['--compress', 'gzip'])
+
+        assert result.exit_code == 0
+        assert result.output == 'gzip\n'
+
+
+class TestVariableParam:
+    """Tests VariableParam class"""
+
+    @pytest.mark.parametrize('value', ['foo', '=bar'])
+    async def test_should_print_error_given_wrong_input(self, runner, value):
+        result = await runner.invoke(debug_variable, ['-v', value])
+
+        assert result.exit_code == 2
+        assert f'{value} is not in the form name=value' in result.output
+
+    @pytest.mark.parametrize(('value', 'expected'), [
+        ('id=42', ('id', '42')),
+        ('q=a=b', ('q', 'a=b')),
+        ('e=', ('e', ''))
+    ])
+    async def test_should_print_variable_given_correct_input(self, runner, value, expected):
+        result = await runner.invoke(debug_variable, ['-v', value])
+
+        assert result.exit_code == 0
+        assert result.output == f'{expected}\n'
+
+
+class TestSessionParam:
+    """Tests SessionParam class"""
+
+    @pytest.mark.parametrize('value', ['../api', '.hidden', 'a/b', ''])
+    async def test_should_print_error_given_wrong_input(self, runner, value):
+        result = await runner.invoke(debug_session, ['--session', value])
+
+        assert result.exit_code == 2
+        assert f'{value} is not a valid session name' in result.output
+
+    @pytest.mark.parametrize('value', ['api', 'my-api.v2', '_test'])
+    async def test_should_print_session_given_correct_input(self, runner, value):
+        result = await runner.invoke(debug_session, ['--session', value])
+
+        assert result.exit_code == 0
+        assert result.output == f'{value}\n'
+
+
+class TestResolveParam:
+    """Tests ResolveParam class"""
+
+    @pytest.mark.parametrize(('value', 'message'), [
+        ('example.com:443', 'example.com:443 is not in the form host:port:address'),
+        ('example.com:443:foo', 'foo is not a valid ip address')
+    ])
+    async def test_should_print_error_given_wrong_input(self, runner, value, message):
+        result = await runner.invoke(debug_resolve, ['--resolve', value])
+
+        assert result.exit_code == 2
+        assert message in result.output
+
+    async def test_should_print_entry_given_correct_input(self, runner):
+        result = await runner.invoke(debug_resolve, ['--resolve', 'example.com:443:127.0.0.1'])
+
+        assert result.exit_code == 0
+        assert result.output == 'example.com:443:127.0.0.1\n'
+
+
+class TestJsonPathParam:
+    """Tests JsonPathParam class"""
+
+    async def test_should_print_error_given_wrong_input(self, runner):
+        result = await runner.invoke(debug_json_path, ['--path', '$.data[foo]'])
+
+        assert result.exit_code == 2
+        assert '$.data[foo] is not a valid json path' in result.output
+
+    async def test_should_print_json_path_given_correct_input(self, runner):
+        result = await runner.invoke(debug_json_path, ['--path', '$.data[*].id'])
+
+        assert result.exit_code == 0
+        assert result.output == "JsonPath('$.data[*].id')\n"
+
+
+class TestJsonConditionParam:
+    """Tests JsonConditionParam class"""
+
+    async def test_should_print_error_given_wrong_input(self, runner):
+        result = await runner.invoke(debug_json_condition, ['--condition', '$.data[foo]=1'])
+
+        assert result.exit_code == 2
+        assert '$.data[foo] is not a valid json path' in result.output
+
+    @pytest.mark.parametrize(('value', 'expected'), [
+        ('$.state=done', "$.state 'done' True"),
+        ('$.count=3', '$.count 3 True'),
+        ('$.ready', '$.ready None False'),
+    ])
+    async def test_should_print_condition_given_correct_input(self, runner, value, expected):
+        result = await runner.invoke(debug_json_condition, ['--condition', value])
+
+        assert result.exit_code == 0
+        assert result.output == f'{expected}\n'
+
+
+class TestAssertionParams:
+    """Tests StatusPatternParam, ExpectedHeaderParam, JsonSchemaParam and DurationParam classes"""
+
+    @pytest.mark.parametrize(('arguments', 'message'), [
+        (['--status', '600'], '600 is not a valid status code or class of status codes like 2xx'),
+        (['--status', '2x'], '2x is not a valid status code or class of status codes like 2xx'),
+        (['--header', ':foo'], ':foo is not in the form name or name:value'),
+        (['--schema', 'unknown.json'], 'unknown.json file does not exist'),
+        (['--duration', '2m'], '2m is not a valid duration like 200ms or 1.5s'),
+        (['--duration', '-1'], '-1 is not a valid duration like 200ms or 1.5s'),
+    ])
+    async def test_should_print_error_given_wrong_input(self, runner, arguments, message):
+        result = await runner.invoke(debug_assertion, arguments)
+
+        assert result.exit_code == 2
+        assert message in result.output
+
+    @pytest.mark.parametrize(('content', 'message'), [
+        ('{"type":', 'is not a valid json file'),
+        ('{"type": "int"}', 'is not a valid json schema: int is not a valid json schema type'),
+    ])
+    async def test_should_print_error_given_wrong_schema(self, runner, tmp_path, content, message):
+        path = tmp_path / 'schema.json'
+        path.write_text(content)
+        result = await runner.invoke(debug_assertion, ['--schema', str(path)])
+
+        assert result.exit_code == 2
+        assert message in ' '.join(result.output.split())
+
+    @pytest.mark.parametrize(('arguments', 'expected'), [
+        (['--status', '2XX'], "2xx None None None"),
+        (['--status', '204'], "204 None None None"),
+        (['--header', 'etag'], "None ('etag', None) None None"),
+        (['--header', 'location: https://example.com'], "None ('location', 'https://example.com') None None"),
+        (['--duration', '200ms'], "None None None 0.2"),
+        (['--duration', '1.5s'], "None None None 1.5"),
+        (['--duration', '50'], "None None None 0.05"),
+    ])
+    async def test_should_print_value_given_correct_input(self, runner, arguments, expected):
+        result = await runner.invoke(debug_assertion, arguments)
+
+        assert result.exit_code == 0
+        assert result.output == f'{expected}\n'
+
+    async def test_should_print_schema_given_correct_file(self, runner, tmp_path):
+        path = tmp_path / 'schema.json'
+        path.write_text('{"type": "object"}')
+        result = await runner.invoke(debug_assertion, ['--schema', str(path)])
+
+        assert result.exit_code == 0
+        assert result.output == "None None {'type': 'object'} None\n"
+
+
 class TestHttpParam:
     """Tests HTTPParameter subclasses (query, cookie and header)"""
 
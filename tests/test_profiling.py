@@ -0,0 +1,149 @@
+import json
+import pstats
+import time
+import tracemalloc
+
+import httpx
+import pytest
+
+from httpcli.http import http
+from httpcli.https import https
+from httpcli.profiling import CommandProfiler, SamplingProfiler, format_size, get_memory_report
+
+
+def busy_function(duration: float) -> None:
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        pass
+
+
+class TestSamplingProfiler:
+    """Tests class SamplingProfiler"""
+
+    def test_should_record_stacks_of_the_profiled_thread(self):
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        busy_function(0.1)
+        profiler.stop()
+
+        assert profiler.samples
+        assert len(profiler.samples) == len(profiler.weights)
+        names = {profiler.frames[index][0] for sample in profiler.samples for index in sample}
+        assert 'busy_function' in names
+        # stacks go from the root to the leaf
+        leaf_names = [profiler.frames[sample[-1]][0] for sample in profiler.samples]
+        assert 'busy_function' in leaf_names
+
+    def test_should_return_speedscope_sampled_profile(self):
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        busy_function(0.05)
+        profiler.stop()
+        data = profiler.to_speedscope('http get')
+
+        assert data['$schema'] == 'https://www.speedscope.app/file-format-schema.json'
+        assert len(data['shared']['frames']) == len(profiler.frames)
+        profile = data['profiles'][0]
+        assert profile['type'] == 'sampled'
+        assert profile['unit'] == 'seconds'
+        assert profile['endValue'] == pytest.approx(sum(profile['weights']))
+        assert profile['samples'] == profiler.samples
+
+
+@pytest.mark.parametrize(('size', 'expected'), [
+    (512, '512.0 B'),
+    (2048, '2.0 KiB'),
+    (3 * 1024 * 1024, '3.0 MiB'),
+    (5 * 1024 ** 3, '5.0 GiB')
+])
+def test_format_size(size, expected):
+    assert format_size(size) == expected
+
+
+def test_get_memory_report_returns_top_allocators():
+    tracemalloc.start()
+    data = [bytearray(1024) for _ in range(100)]
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    report = get_memory_report(snapshot, current, peak, limit=5)
+
+    assert report.startswith('current memory:')
+    assert 'top 5 allocators by line:' in report
+    assert 'top 5 allocators by file:' in report
+    assert f'{__file__}:' in report
+    assert len(data) == 100
+
+
+class TestCommandProfiler:
+    """Tests class CommandProfiler"""
+
+    def test_should_write_pstats_and_memory_files(self, tmp_path):
+        cpu_file = tmp_path / 'profile.pstats'
+        memory_file = tmp_path / 'memory.txt'
+        profiler = CommandProfiler(cpu_file, 'pstats', memory_file)
+        profiler.start()
+        busy_function(0.01)
+        profiler.stop()
+
+        stats = pstats.Stats(str(cpu_file))
+        assert any(function == 'busy_function' for _, _, function in stats.stats)  # type: ignore
+        assert 'peak memory' in memory_file.read_text()
+        assert not tracemalloc.is_tracing()
+
+    def test_should_write_speedscope_file(self, tmp_path):
+        cpu_file = tmp_path / 'profile.json'
+        profiler = CommandProfiler(cpu_file, 'speedscope')
+        profiler.start()
+        busy_function(0.02)
+        profiler.stop()
+
+        data = json.loads(cpu_file.read_text())
+        assert data['profiles'][0]['type'] == 'sampled'
+        assert not tracemalloc.is_tracing()
+
+    def test_should_print_warning_when_profile_cannot_be_written(self, tmp_path, capsys):
+        cpu_file = tmp_path / 'missing' / 'profile.pstats'
+        profiler = CommandProfiler(cpu_file)
+        profiler.start()
+        profiler.stop()
+
+        error = capsys.readouterr().err
+        assert 'unable to write profile in' in error
+        assert 'No such file or directory' in error
+
+
+@pytest.mark.parametrize('command', [http, https])
+@pytest.mark.parametrize('cpu_format', ['pstats', 'speedscope'])
+async def test_should_profile_command(runner, respx_mock, tmp_path, command, cpu_format):
+    respx_mock.get('https://example.com') % httpx.Response(status_code=200, json={'hello': 'world'})
+    cpu_file = tmp_path / 'cpu.profile'
+    memory_file = tmp_path / 'memory.txt'
+    arguments = [
+        '--profile-cpu', str(cpu_file), '--profile-cpu-format', cpu_format, '--profile-mem', str(memory_file),
+        'get', 'https://example.com'
+    ]
+    result = await runner.invoke(command, arguments)
+
+    assert result.exit_code == 0
+    assert '"hello"' in result.output
+    assert 'profile written in' in result.output
+    assert cpu_file.stat().st_size > 0
+    assert 'top 25 allocators by line:' in memory_file.read_text()
+
+
+@pytest.mark.parametrize('command', [http, https])
+async def test_should_write_profiles_when_command_fails(runner, respx_mock, tmp_path, command):
+    respx_mock.get('https://example.com') % httpx.Response(status_code=500, text='oops')
+    cpu_file = tmp_path / 'cpu.pstats'
+    result = await runner.invoke(command, ['--profile-cpu', str(cpu_file), 'get', 'https://example.com'])
+
+    assert cpu_file.exists()
+    assert 'profile written in' in result.output
+
+
+async def test_should_print_error_when_cpu_format_is_unknown(runner):
+    result = await runner.invoke(http, ['--profile-cpu', 'cpu.out', '--profile-cpu-format', 'foo', 'get', ':8000'])
+
+    assert result.exit_code == 2
+    assert "'foo' is not one of 'pstats', 'speedscope'" in result.output
@@ -5,6 +5,7 @@ from httpcli.configuration import Configuration
 from httpcli.http import http
 from httpcli.https import https
 from httpcli.models import OAuth2PasswordBearer, BasicAuth
+from tests.helpers import CA_DIRECTORY, CLIENT_CERTIFICATE, CLIENT_KEY
 
 
 @click.command()
@@ -27,6 +28,13 @@ httpcli:
     password: bar
 """
 
+PROFILES_YAML_DATA = YAML_DATA + """
+profiles:
+  staging:
+    proxy: https://staging-proxy.com
+    timeout: 10
+"""
+
 command_parametrize = pytest.mark.parametrize(('command', 'verify'), [
     (http, False),
     (https, True)
@@ -56,6 +64,25 @@ async def test_should_print_correct_configuration_with_env_variables_set(monkeyp
     assert result.output == f'{config}\n'
 
 
+@command_parametrize
+async def test_should_read_accept_encoding_from_env_variable(monkeypatch, runner, command, verify):
+    monkeypatch.setenv('HTTP_CLI_ACCEPT_ENCODING', 'gzip')
+    result = await runner.invoke(command, ['debug'])
+
+    assert result.exit_code == 0
+    assert result.output == f'{Configuration(verify=verify, accept_encoding=["gzip"])}\n'
+
+
+@command_parametrize
+async def test_should_print_error_when_env_variable_is_not_valid(monkeypatch, runner, command, verify):
+    monkeypatch.setenv('HTTP_CLI_POOL', '{"max_connections": ')
+    result = await runner.invoke(command, ['debug'])
+
+    assert result.exit_code == 2
+    assert 'Traceback' not in result.output
+    assert 'error parsing env var "http_cli_pool"' in result.output
+
+
 @command_parametrize
 async def test_should_print_correct_configuration_with_given_configuration_file(runner, tmp_path, command, verify):
     config_file = tmp_path / 'config.yaml'
@@ -68,6 +95,83 @@ async def test_should_print_correct_configuration_with_given_configuration_file(
     assert result.output == f'{config}\n'
 
 
+@command_parametrize
+async def test_should_print_configuration_of_given_profile(runner, tmp_path, command, verify):
+    config_file = tmp_path / 'config.yaml'
+    config_file.write_text(PROFILES_YAML_DATA)
+    auth = BasicAuth(username='foo', password='bar')
+    config = Configuration(proxy='https://staging-proxy.com', version='h2', timeout=10, auth=auth, verify=verify)
+    arguments = ['--config-file', f'{config_file}', '--profile', 'staging', 'debug']
+    # the second invocation uses the cached configuration
+    for _ in range(2):
+        result = await runner.invoke(command, arguments)
+
+        assert result.exit_code == 0
+        assert result.output == f'{config}\n'
+
+
+@command_parametrize
+async def test_should_print_error_when_profile_is_given_without_configuration_file(runner, command, verify):
+    result = await runner.invoke(command, ['--profile', 'staging', 'debug'])
+
+    assert result.exit_code == 2
+    assert '--profile option needs a configuration file' in result.output
+
+
+@command_parametrize
+async def test_should_print_configuration_with_given_session(runner, tmp_path, command, verify):
+    config_file = tmp_path / 'config.yaml'
+    config_file.write_text(YAML_DATA)
+    auth = BasicAuth(username='foo', password='bar')
+    config = Configuration(
+        proxy='https://proxy.com', version='h2', timeout=None, auth=auth, verify=verify, session='api'
+    )
+    result = await runner.invoke(command, ['--config-file', f'{config_file}', '--session', 'api', 'debug'])
+
+    assert result.exit_code == 0
+    assert result.output == f'{config}\n'
+
+
+@command_parametrize
+async def test_should_add_resolve_overrides_to_the_ones_of_configuration_file(runner, tmp_path, command, verify):
+    config_file = tmp_path / 'config.yaml'
+    config_file.write_text(YAML_DATA + '  resolve:\n    - example.com:443:10.0.0.1\n')
+    arguments = ['--config-file', f'{config_file}', '--resolve', 'example.com:443:10.0.0.2', 'debug']
+    result = await runner.invoke(command, arguments)
+
+    assert result.exit_code == 0
+    assert "resolve=['example.com:443:10.0.0.1', 'example.com:443:10.0.0.2']" in result.output
+
+
+@command_parametrize
+async def test_should_override_unix_socket_of_configuration_file(runner, tmp_path, command, verify):
+    socket_path = tmp_path / 'docker.sock'
+    socket_path.touch()
+    config_file = tmp_path / 'config.yaml'
+    config_file.write_text(YAML_DATA + '  transport:\n    uds: /var/run/other.sock\n    retries: 1\n')
+    arguments = ['--config-file', f'{config_file}', '--unix-socket', str(socket_path), 'debug']
+    result = await runner.invoke(command, arguments)
+
+    assert result.exit_code == 0
+    assert f"transport=TransportSettings(uds={socket_path!r}, local_address=None, retries=1)" in result.output
+
+
+@command_parametrize
+async def test_should_print_error_when_unix_socket_does_not_exist(runner, tmp_path, command, verify):
+    result = await runner.invoke(command, ['--unix-socket', str(tmp_path / 'missing.sock'), 'debug'])
+
+    assert result.exit_code == 2
+    assert 'does not exist' in result.output
+
+
+@command_parametrize
+async def test_should_print_error_when_session_name_is_not_valid(runner, command, verify):
+    result = await runner.invoke(command, ['--session', '../api', 'debug'])
+
+    assert result.exit_code == 2
+    assert '../api is not a valid session name' in result.output
+
+
 @command_parametrize
 async def test_should_print_correct_information_given_user_input(runner, command, verify):
     auth = OAuth2PasswordBearer(username='foo', password='bar', token_url='http://token.com')  # type: ignore
@@ -98,3 +202,47 @@ async def test_should_print_correct_info_when_given_certificate_exist(runner, tm
 
     assert result.exit_code == 0
     assert result.output == f'{config}\n'
+
+
+async def test_should_accept_directory_of_certificates(runner):
+    result = await runner.invoke(https, ['--cert', str(CA_DIRECTORY), 'debug'])
+
+    assert result.exit_code == 0
+    assert f"verify='{CA_DIRECTORY}'" in result.output
+
+
+# https client certificate options tests
+
+async def test_should_print_configuration_with_client_certificate(runner):
+    config = Configuration(client_cert=CLIENT_CERTIFICATE, client_key=CLIENT_KEY)
+    arguments = ['--client-cert', str(CLIENT_CERTIFICATE), '--client-key', str(CLIENT_KEY), 'debug']
+    result = await runner.invoke(https, arguments)
+
+    assert result.exit_code == 0
+    assert result.output == f'{config}\n'
+
+
+async def test_should_print_error_when_client_key_is_given_without_client_certificate(runner):
+    result = await runner.invoke(https, ['--client-key', str(CLIENT_KEY), 'debug'])
+
+    assert result.exit_code == 2
+    assert '--client-key option needs a client certificate' in result.output
+
+
+async def test_should_print_error_when_client_certificate_cannot_be_loaded(runner, tmp_path):
+    path = tmp_path / 'client.pem'
+    path.write_text('fake certificate')
+    result = await runner.invoke(https, ['--client-cert', str(path), 'debug'])
+
+    assert result.exit_code == 2
+    assert f'unable to load client certificate {path}' in ' '.join(result.output.split())
+
+
+@command_parametrize
+async def test_should_check_client_certificate_of_configuration_file(runner, tmp_path, command, verify):
+    config_file = tmp_path / 'config.yaml'
+    config_file.write_text(f'httpcli:\n  client_cert: {CLIENT_CERTIFICATE}\n')
+    result = await runner.invoke(command, ['--config-file', str(config_file), 'debug'])
+
+    assert result.exit_code == 2
+    assert 'unable to load client certificate' in ' '.join(result.output.split())
@@ -0,0 +1,110 @@
+import pytest
+
+from httpcli.schema import check_schema, validate
+
+SCHEMA = {
+    'type': 'object',
+    'required': ['id', 'name'],
+    'properties': {
+        'id': {'type': 'integer', 'minimum': 1},
+        'name': {'type': 'string', 'minLength': 1, 'maxLength': 10, 'pattern': '^[a-z]+$'},
+        'status': {'enum': ['active', 'disabled']},
+        'tags': {'type': 'array', 'items': {'type': 'string'}, 'maxItems': 2},
+        'score': {'type': ['number', 'null'], 'exclusiveMaximum': 100}
+    },
+    'additionalProperties': False
+}
+
+
+class TestCheckSchema:
+    """Tests function check_schema"""
+
+    @pytest.mark.parametrize(('schema', 'message'), [
+        ([], 'a json schema must be an object'),
+        ({'type': 'foo'}, 'foo is not a valid json schema type'),
+        ({'properties': {'id': {'type': ['integer', 'int']}}}, 'int is not a valid json schema type'),
+        ({'items': {'pattern': '('}}, '( is not a valid pattern'),
+        ({'exclusiveMinimum': True}, 'exclusiveMinimum given as a boolean needs minimum'),
+        ({'items': [{'type': 'string'}, {'type': 'foo'}]}, 'foo is not a valid json schema type'),
+        ({'items': [{'type': 'string'}], 'additionalItems': []}, 'a json schema must be an object'),
+    ])
+    def test_should_raise_error_given_invalid_schema(self, schema, message):
+        with pytest.raises(ValueError) as exc_info:
+            check_schema(schema)
+
+        assert message in str(exc_info.value)
+
+    def test_should_not_raise_error_given_valid_schema(self):
+        check_schema(SCHEMA)
+
+    def test_should_not_raise_error_given_items_as_a_list(self):
+        check_schema({'type': 'array', 'items': [{'type': 'string'}, {'type': 'integer'}], 'additionalItems': False})
+
+
+class TestValidate:
+    """Tests function validate"""
+
+    def test_should_return_no_error_given_valid_document(self):
+        value = {'id': 1, 'name': 'foo', 'status': 'active', 'tags': ['a'], 'score': None}
+
+        assert validate(value, SCHEMA) == []
+
+    @pytest.mark.parametrize(('value', 'error'), [
+        ([], "$: [] is not of type object"),
+        ({'id': 1}, "$: 'name' is a required property"),
+        ({'id': 0, 'name': 'foo'}, '$.id: 0 is less than 1'),
+        ({'id': True, 'name': 'foo'}, '$.id: True is not of type integer'),
+        ({'id': 1, 'name': ''}, "$.name: '' is shorter than 1 characters"),
+        ({'id': 1, 'name': 'foobarfoobar'}, "$.name: 'foobarfoobar' is longer than 10 characters"),
+        ({'id': 1, 'name': 'Foo'}, "$.name: 'Foo' does not match '^[a-z]+$'"),
+        ({'id': 1, 'name': 'foo', 'status': 'unknown'}, "$.status: 'unknown' is not one of ['active', 'disabled']"),
+        ({'id': 1, 'name': 'foo', 'tags': ['a', 'b', 'c']}, '$.tags: expected at most 2 items, got 3'),
+        ({'id': 1, 'name': 'foo', 'tags': [1]}, '$.tags[0]: 1 is not of type string'),
+        ({'id': 1, 'name': 'foo', 'score': 100}, '$.score: 100 is not less than 100'),
+        ({'id': 1, 'name': 'foo', 'other': 1}, "$: additional property 'other' is not allowed"),
+    ])
+    def test_should_return_errors_given_invalid_document(self, value, error):
+        assert error in validate(value, SCHEMA)
+
+    @pytest.mark.parametrize(('schema', 'value', 'valid'), [
+        ({'const': 1}, True, False),
+        ({'const': 1}, 1, True),
+        ({'anyOf': [{'type': 'string'}, {'type': 'integer'}]}, 1, True),
+        ({'anyOf': [{'type': 'string'}, {'type': 'integer'}]}, 1.5, False),
+        ({'oneOf': [{'type': 'number'}, {'type': 'integer'}]}, 1, False),
+        ({'oneOf': [{'type': 'number'}, {'type': 'integer'}]}, 1.5, True),
+        ({'allOf': [{'minimum': 1}, {'maximum': 3}]}, 4, False),
+        ({'additionalProperties': {'type': 'integer'}}, {'a': 1}, True),
+        ({'additionalProperties': {'type': 'integer'}}, {'a': 'b'}, False),
+        ({'minItems': 1}, [], False),
+        (False, 1, False),
+        ({'format': 'email', '$ref': '#/definitions/foo'}, 'foo', True),
+        ({'type': 'integer'}, 1.0, True),
+        ({'type': 'integer'}, 1.5, False),
+        ({'minimum': 1, 'exclusiveMinimum': True}, 1, False),
+        ({'minimum': 1, 'exclusiveMinimum': True}, 1.5, True),
+        ({'minimum': 1, 'exclusiveMinimum': False}, 1, True),
+        ({'minimum': 1, 'exclusiveMinimum': False}, 0, False),
+        ({'maximum': 3, 'exclusiveMaximum': True}, 3, False),
+        ({'maximum': 3, 'exclusiveMaximum': True}, 2, True),
+        ({'maximum': 3, 'exclusiveMaximum': False}, 3, True),
+    ])
+    def test_should_handle_other_keywords(self, schema, value, valid):
+        assert (validate(value, schema) == []) is valid
+
+    @pytest.mark.parametrize(('schema', 'value', 'errors'), [
+        ({'items': [{'type': 'string'}, {'type': 'integer'}]}, ['a', 1], []),
+        ({'items': [{'type': 'string'}, {'type': 'integer'}]}, ['a'], []),
+        ({'items': [{'type': 'string'}, {'type': 'integer'}]}, [1, 'a'], [
+            '$[0]: 1 is not of type string', "$[1]: 'a' is not of type integer"
+        ]),
+        ({'items': [{'type': 'string'}]}, ['a', 1], []),
+        ({'items': [{'type': 'string'}], 'additionalItems': {'type': 'integer'}}, ['a', 1, 'b'], [
+            "$[2]: 'b' is not of type integer"
+        ]),
+        ({'items': [{'type': 'string'}], 'additionalItems': False}, ['a', 1], [
+            '$: additional item at index 1 is not allowed'
+        ]),
+    ])
+    def test_should_validate_items_by_position_given_items_as_a_list(self, schema, value, errors):
+        assert validate(value, schema) == errors
@@ -0,0 +1,158 @@
+import json
+import time
+
+import httpx
+import pytest
+
+from httpcli.models import OAuth2PasswordBearer
+from httpcli.sessions import Session, check_session_name, get_sessions_directory, open_session
+
+AUTH = OAuth2PasswordBearer(token_url='https://token.com', username='foo', password='bar')  # type: ignore
+
+
+class TestGetSessionsDirectory:
+    """Tests function get_sessions_directory"""
+
+    def test_should_return_directory_given_by_environment_variable(self, tmp_path, monkeypatch):
+        monkeypatch.setenv('HTTP_CLI_SESSIONS_DIR', str(tmp_path))
+
+        assert get_sessions_directory() == tmp_path
+
+    def test_should_return_httpcli_directory_in_xdg_config_home(self, tmp_path, monkeypatch):
+        monkeypatch.delenv('HTTP_CLI_SESSIONS_DIR')
+        monkeypatch.setenv('XDG_CONFIG_HOME', str(tmp_path))
+
+        assert get_sessions_directory() == tmp_path / 'httpcli' / 'sessions'
+
+
+class TestCheckSessionName:
+    """Tests function check_session_name"""
+
+    @pytest.mark.parametrize('name', ['', '.', '..', '../foo', 'foo/bar', 'foo bar'])
+    def test_should_raise_error_given_invalid_name(self, name):
+        with pytest.raises(ValueError) as exc_info:
+            check_session_name(name)
+
+        assert f'{name} is not a valid session name' in str(exc_info.value)
+
+    @pytest.mark.parametrize('name', ['api', 'API_2', 'my-api.prod'])
+    def test_should_return_name_given_valid_name(self, name):
+        assert check_session_name(name) == name
+
+
+def test_open_session_should_return_none_without_name():
+    assert open_session(None) is None
+
+
+class TestSession:
+    """Tests class Session"""
+
+    def test_should_use_sessions_directory(self, sessions_directory):
+        assert Session('api').path == sessions_directory / 'api.json'
+
+    @pytest.mark.parametrize('content', ['', 'not json', '[1, 2]', '{"cookies": [{"foo": "bar"}, 4]}'])
+    def test_should_be_empty_given_missing_or_corrupted_file(self, tmp_path, content):
+        (tmp_path / 'api.json').write_text(content)
+        session = Session('api', tmp_path)
+
+        assert session.headers == {}
+        assert session.tokens == {}
+        assert list(session.get_cookies().jar) == []
+
+    def test_should_not_write_file_when_nothing_changed(self, tmp_path):
+        session = Session('api', tmp_path)
+        session.update_cookies(httpx.Cookies())
+        session.save()
+
+        assert not session.path.exists()
+
+    def test_should_persist_headers_cookies_and_tokens(self, tmp_path):
+        session = Session('api', tmp_path)
+        session.update_headers([('X-Api-Version', '2'), ('Content-Type', 'application/json')])
+        cookies = httpx.Cookies()
+        cookies.set('sid', 'abc', domain='example.com')
+        session.update_cookies(cookies)
+        session.set_token(AUTH, 'token')
+        session.save()
+
+        session = Session('api', tmp_path)
+        assert session.headers == {'X-Api-Version': '2'}
+        assert session.get_token(AUTH) == 'token'
+        assert session.get_cookies().get('sid', domain='example.com') == 'abc'
+        assert oct(session.path.stat().st_mode & 0o777) == oct(0o600)
+
+    def test_should_let_given_headers_override_session_headers(self, tmp_path):
+        session = Session('api', tmp_path)
+        session.update_headers([('X-Api-Version', '2'), ('Accept', 'text/plain')])
+
+        assert session.get_headers([('x-api-version', '3')]) == [('Accept', 'text/plain'), ('x-api-version', '3')]
+
+    def test_should_keep_last_case_of_header(self, tmp_path):
+        session = Session('api', tmp_path)
+        session.update_headers([('X-API-Version', '2')])
+        session.save()
+        session = Session('api', tmp_path)
+        session.update_headers([('x-api-version', '3')])
+        session.save()
+
+        assert Session('api', tmp_path).headers == {'x-api-version': '3'}
+
+    def test_should_send_given_cookies_with_session_cookies(self, tmp_path):
+        session = Session('api', tmp_path)
+        cookies = httpx.Cookies()
+        cookies.set('sid', 'abc', domain='example.com')
+        session.update_cookies(cookies)
+
+        jar = session.get_cookies([('lang', 'fr')])
+
+        assert {cookie.name: cookie.value for cookie in jar.jar} == {'sid': 'abc', 'lang': 'fr'}
+
+    def test_should_forget_expired_and_removed_cookies(self, tmp_path):
+        data = {
+            'cookies': [
+                {'name': 'old', 'value': '1', 'domain': 'example.com', 'path': '/', 'expires': int(time.time()) - 10},
+                {'name': 'sid', 'value': '2', 'domain': 'example.com', 'path': '/', 'expires': None}
+            ]
+        }
+        (tmp_path / 'api.json').write_text(json.dumps(data))
+        session = Session('api', tmp_path)
+        jar = session.get_cookies()
+
+        assert [cookie.name for cookie in jar.jar] == ['sid']
+
+        # the server expired the cookie during the run
+        jar.delete('sid')
+        session.update_cookies(jar)
+        session.save()
+
+        assert json.loads(session.path.read_text())['cookies'] == []
+
+    def test_should_remove_token(self, tmp_path):
+        session = Session('api', tmp_path)
+        session.set_token(AUTH, 'token')
+        session.save()
+        session = Session('api', tmp_path)
+        session.remove_token(AUTH)
+        session.save()
+
+        assert Session('api', tmp_path).get_token(AUTH) is None
+
+    def test_should_merge_changes_of_concurrent_invocations(self, tmp_path):
+        first = Session('api', tmp_path)
+        second = Session('api', tmp_path)
+        first_cookies = httpx.Cookies()
+        first_cookies.set('a', '1', domain='example.com')
+        first.update_cookies(first_cookies)
+        first.update_headers([('X-First', '1')])
+        second_cookies = httpx.Cookies()
+        second_cookies.set('b', '2', domain='example.com')
+        second.update_cookies(second_cookies)
+        second.set_token(AUTH, 'token')
+
+        first.save()
+        second.save()
+
+        session = Session('api', tmp_path)
+        assert {cookie.name for cookie in session.get_cookies().jar} == {'a', 'b'}
+        assert session.headers == {'X-First': '1'}
+        assert session.get_token(AUTH) == 'token'
@@ -0,0 +1,113 @@
+import io
+
+import pytest
+
+from httpcli.models import RequestTemplate
+from httpcli.templates import CompiledTemplate, compile_string, compile_value, read_data_rows
+
+
+class TestCompileString:
+    """Tests function compile_string"""
+
+    @pytest.mark.parametrize(('text', 'expected_text', 'names'), [
+        ('https://example.com/users', 'https://example.com/users', set()),
+        ('https://example.com/users/{{id}}', 'https://example.com/users/42', {'id'}),
+        ('{{ name }}-{{id}}-{{id}}', 'foo-42-42', {'name', 'id'}),
+        ('{"id": {{id}}, "braces": "{}"}', '{"id": 42, "braces": "{}"}', {'id'})
+    ])
+    def test_should_render_text_with_given_variables(self, text, expected_text, names):
+        render, variable_names = compile_string(text)
+
+        assert render({'id': 42, 'name': 'foo'}) == expected_text
+        assert variable_names == names
+
+    def test_should_keep_variable_type_when_text_is_only_a_placeholder(self):
+        render, _ = compile_string('{{id}}', keep_type=True)
+
+        assert render({'id': 42}) == 42
+
+    @pytest.mark.parametrize('keep_type', [True, False])
+    def test_should_raise_error_when_variable_is_missing(self, keep_type):
+        render, _ = compile_string('{{id}}', keep_type)
+
+        with pytest.raises(ValueError) as exc_info:
+            render({'name': 'foo'})
+
+        assert str(exc_info.value) == 'variable id is not defined'
+
+
+def test_compile_value_should_render_placeholders_at_any_depth():
+    render, names = compile_value({'user': {'id': '{{id}}', 'tags': ['{{tag}}', 'tag-{{id}}', 2]}, 'active': True})
+
+    assert render({'id': 42, 'tag': 'foo'}) == {'user': {'id': 42, 'tags': ['foo', 'tag-42', 2]}, 'active': True}
+    assert names == {'id', 'tag'}
+
+
+class TestCompiledTemplate:
+    """Tests class CompiledTemplate"""
+
+    def test_should_render_http_arguments(self):
+        template = RequestTemplate(
+            method='post',
+            url='https://example.com/users/{{id}}',
+            headers={'X-Request-Id': '{{request_id}}'},
+            query={'page': '{{page}}'},
+            cookies={'session': 'abc'},
+            json={'name': '{{name}}'}
+        )
+        compiled = CompiledTemplate('update-user', template)
+        variables = {'id': '42', 'request_id': 'r1', 'page': 2, 'name': 'foo'}
+
+        assert compiled.method == 'POST'
+        assert compiled.variables == {'id', 'request_id', 'page', 'name'}
+        assert compiled.render(variables) == ('https://example.com/users/42', {
+            'headers': [('X-Request-Id', 'r1')],
+            'params': [('page', '2')],
+            'cookies': [('session', 'abc')],
+            'json': {'name': 'foo'}
+        })
+
+    def test_should_render_form_data(self):
+        compiled = CompiledTemplate('login', RequestTemplate(url='https://example.com', form={'user': '{{user}}'}))
+
+        _, arguments = compiled.render({'user': 'foo'})
+        assert arguments['data'] == {'user': 'foo'}
+
+
+class TestReadDataRows:
+    """Tests function read_data_rows"""
+
+    def test_should_read_csv_rows(self):
+        file = io.StringIO('id,name\n1,foo\n2,bar\n')
+        file.name = 'data.csv'
+
+        assert list(read_data_rows(file)) == [{'id': '1', 'name': 'foo'}, {'id': '2', 'name': 'bar'}]
+
+    @pytest.mark.parametrize('filename', ['data.jsonl', 'data.ndjson'])
+    def test_should_read_json_lines_rows(self, filename):
+        file = io.StringIO('{"id": 1}\n\n{"id": 2, "name": "bar"}\n')
+        file.name = filename
+
+        assert list(read_data_rows(file)) == [{'id': 1}, {'id': 2, 'name': 'bar'}]
+
+    @pytest.mark.parametrize(('content', 'message'), [
+        ('{"id": 1}\nfoo\n', 'line 2 is not a valid json document'),
+        ('[1, 2]\n', 'line 1 is not a json object')
+    ])
+    def test_should_raise_error_given_incorrect_json_lines(self, content, message):
+        file = io.StringIO(content)
+        file.name = 'data.jsonl'
+
+        with pytest.raises(ValueError) as exc_info:
+            list(read_data_rows(file))
+
+        assert str(exc_info.value) == message
+
+    def test_should_raise_error_given_unknown_file_format(self):
+        file = io.StringIO('')
+        file.name = 'data.txt'
+
+        with pytest.raises(ValueError) as exc_info:
+            list(read_data_rows(file))
+
+        assert 'must be a csv (.csv) or a json lines (.jsonl, .ndjson) file' in str(exc_info.value)
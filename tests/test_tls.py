@@ -0,0 +1,75 @@
+import ssl
+
+import httpx
+import pytest
+from hypercorn.trio import serve
+
+from httpcli.configuration import Configuration
+from httpcli.tls import SessionCachingSSLContext, TLSStatistics, get_ssl_context
+from httpcli.transport import build_client_arguments
+from tests.helpers import CA_CERTIFICATE, CLIENT_CERTIFICATE, CLIENT_KEY, app
+
+
+class TestGetSslContext:
+    """Tests function get_ssl_context"""
+
+    def test_should_return_the_same_context_for_the_same_settings(self):
+        context = get_ssl_context(True, False)
+
+        assert isinstance(context, SessionCachingSSLContext)
+        assert get_ssl_context(True, False) is context
+        assert get_ssl_context(True, True) is not context
+        assert get_ssl_context(str(CA_CERTIFICATE), False) is not context
+        assert get_ssl_context(True, False, (str(CLIENT_CERTIFICATE), str(CLIENT_KEY))) is not context
+
+    def test_should_configure_context_like_httpx(self):
+        context = get_ssl_context(True, True)
+
+        assert context.verify_mode == ssl.CERT_REQUIRED
+        assert context.check_hostname is True
+        assert context.minimum_version == ssl.TLSVersion.TLSv1_2
+
+    def test_should_not_verify_certificates_when_verify_is_false(self):
+        context = get_ssl_context(False, False)
+
+        assert context.verify_mode == ssl.CERT_NONE
+        assert context.check_hostname is False
+
+
+class TestTLSStatistics:
+    """Tests class TLSStatistics"""
+
+    def test_should_not_estimate_saved_time_without_resumed_handshake(self):
+        statistics = TLSStatistics()
+        statistics.add(0.05, False)
+
+        assert statistics.handshakes == 1
+        assert statistics.saved_time == 0.0
+
+    def test_should_estimate_saved_time_from_average_full_handshake(self):
+        statistics = TLSStatistics()
+        statistics.add(0.04, False)
+        statistics.add(0.06, False)
+        statistics.add(0.01, True)
+        statistics.add(0.01, True)
+
+        assert statistics.handshakes == 4
+        assert statistics.resumed == 2
+        assert statistics.handshake_time == pytest.approx(0.12)
+        assert statistics.saved_time == pytest.approx(0.08)
+
+
+async def test_should_resume_tls_session_in_next_connections(nursery, tls_config):
+    await nursery.start(serve, app, tls_config)
+    statistics = TLSStatistics()
+    config = Configuration(verify=CA_CERTIFICATE, resolve=['localhost:8443:127.0.0.1'])
+
+    for name in ['a', 'b']:
+        arguments = build_client_arguments(config, tls_statistics=statistics)
+        arguments.pop('allow_redirects')
+        async with httpx.AsyncClient(**arguments) as client:
+            response = await client.get(f'https://localhost:8443/files/{name}')
+            assert response.text == f'content of {name}'
+
+    assert statistics.handshakes == 2
+    assert statistics.resumed == 1
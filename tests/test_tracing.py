@@ -0,0 +1,199 @@
+import json
+
+import httpx
+import pytest
+from hypercorn.config import Config
+from hypercorn.trio import serve
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+import httpcli.tracing
+from httpcli.configuration import Configuration
+from httpcli.http import http
+from httpcli.https import https
+from httpcli.tracing import Tracer, TracingTransport, get_current_tracer, trace_phase
+from httpcli.transport import PoolStatistics, build_client_arguments, build_pooled_client_arguments
+from tests.helpers import CA_CERTIFICATE, app
+
+TRACEPARENT = '00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01'
+
+
+async def traceparent(request):
+    return PlainTextResponse(request.headers.get('traceparent', ''))
+
+
+traceparent_app = Starlette(routes=[Route('/traceparent', traceparent)])
+
+
+@pytest.fixture()
+def tracer(monkeypatch):
+    """Tracer of the requests sent by the clients built during the test"""
+    run_tracer = Tracer('get')
+    monkeypatch.setattr(httpcli.tracing, '_current_tracer', run_tracer)
+    return run_tracer
+
+
+def get_spans(tracer: Tracer):
+    return {span.name: span for span in tracer.spans}
+
+
+class TestTracer:
+    """Tests class Tracer"""
+
+    def test_should_create_a_new_trace_without_traceparent(self):
+        tracer = Tracer('get')
+
+        assert len(tracer.root.trace_id) == 32
+        assert tracer.root.parent_span_id is None
+        assert tracer.root.name == 'httpcli get'
+
+    @pytest.mark.parametrize('traceparent', [TRACEPARENT, TRACEPARENT.upper(), 'foo'])
+    def test_should_join_trace_of_valid_traceparent(self, traceparent):
+        tracer = Tracer('get', traceparent)
+
+        if traceparent == TRACEPARENT:
+            assert tracer.root.trace_id == '0af7651916cd43dd8448eb211c80319c'
+            assert tracer.root.parent_span_id == 'b7ad6b7169203331'
+        else:
+            assert tracer.root.trace_id != '0af7651916cd43dd8448eb211c80319c'
+            assert tracer.root.parent_span_id is None
+
+    def test_should_return_otlp_json(self):
+        tracer = Tracer('get', TRACEPARENT)
+        span = tracer.start_span('HTTP GET', tracer.root, 3, {'http.status_code': 500, 'http.url': 'http://a.test'})
+        span.set_error('HTTP status code 500')
+        tracer.finish()
+        data = tracer.to_otlp()
+
+        resource_spans = data['resourceSpans'][0]
+        service_name = {'key': 'service.name', 'value': {'stringValue': 'httpcli'}}
+        assert resource_spans['resource']['attributes'] == [service_name]
+        root, client = resource_spans['scopeSpans'][0]['spans']
+        assert root['parentSpanId'] == 'b7ad6b7169203331'
+        assert client['parentSpanId'] == root['spanId']
+        assert client['traceId'] == root['traceId'] == '0af7651916cd43dd8448eb211c80319c'
+        assert client['kind'] == 3
+        assert int(client['endTimeUnixNano']) >= int(client['startTimeUnixNano'])
+        assert client['attributes'] == [
+            {'key': 'http.status_code', 'value': {'intValue': '500'}},
+            {'key': 'http.url', 'value': {'stringValue': 'http://a.test'}}
+        ]
+        assert client['status'] == {'code': 2, 'message': 'HTTP status code 500'}
+        assert root['status'] == {}
+
+
+class TestTracePhase:
+    """Tests function trace_phase"""
+
+    def test_should_do_nothing_when_no_request_is_traced(self):
+        with trace_phase('dns') as span:
+            assert span is None
+
+
+class TestTracingTransport:
+    """Tests class TracingTransport"""
+
+    def test_should_not_wrap_transport_when_run_is_not_traced(self):
+        assert get_current_tracer() is None
+        arguments = build_client_arguments(Configuration())
+
+        assert not isinstance(arguments['transport'], TracingTransport)
+
+    async def test_should_propagate_context_and_trace_request_phases(self, nursery, tracer, respx_mock):
+        respx_mock.route(host='localhost').pass_through()
+        await nursery.start(serve, traceparent_app, Config())
+        arguments = build_pooled_client_arguments(Configuration(), PoolStatistics())
+        arguments.pop('allow_redirects')
+
+        assert isinstance(arguments['transport'], TracingTransport)
+        async with httpx.AsyncClient(**arguments) as client:
+            response = await client.get('http://localhost:8000/traceparent')
+
+        spans = get_spans(tracer)
+        client_span = spans['HTTP GET']
+        assert response.text == client_span.traceparent
+        assert client_span.parent_span_id == tracer.root.span_id
+        assert client_span.attributes['http.status_code'] == 200
+        assert client_span.attributes['http.flavor'] == '1.1'
+        assert client_span.end_time is not None
+        assert spans['request'].parent_span_id == client_span.span_id
+        assert spans['response'].parent_span_id == client_span.span_id
+        for name in ['dns', 'connect']:
+            assert spans[name].parent_span_id == spans['request'].span_id
+        assert spans['connect'].attributes['net.peer.port'] == 8000
+
+    async def test_should_trace_tls_handshake(self, nursery, tracer, tls_config):
+        await nursery.start(serve, app, tls_config)
+        config = Configuration(verify=CA_CERTIFICATE, resolve=['localhost:8443:127.0.0.1'])
+        arguments = build_client_arguments(config)
+        arguments.pop('allow_redirects')
+
+        async with httpx.AsyncClient(**arguments) as client:
+            await client.get('https://localhost:8443/files/a')
+
+        spans = get_spans(tracer)
+        assert spans['tls'].attributes['tls.server_name'] == 'localhost'
+        assert spans['tls'].attributes['tls.resumed'] is False
+        assert spans['dns'].attributes['net.peer.addresses'] == '127.0.0.1'
+
+    async def test_should_keep_traceparent_given_by_user(self, tracer, respx_mock):
+        route = respx_mock.get('https://example.com') % httpx.Response(status_code=200)
+        arguments = build_client_arguments(Configuration())
+        arguments.pop('allow_redirects')
+
+        async with httpx.AsyncClient(**arguments) as client:
+            await client.get('https://example.com', headers={'traceparent': TRACEPARENT})
+
+        assert route.calls[0].request.headers.get_list('traceparent') == [TRACEPARENT]
+
+    async def test_should_set_error_status_when_request_fails(self, tracer):
+        arguments = build_client_arguments(Configuration())
+        arguments.pop('allow_redirects')
+
+        async with httpx.AsyncClient(**arguments) as client:
+            with pytest.raises(httpx.ConnectError):
+                await client.get('http://127.0.0.1:1')
+
+        spans = get_spans(tracer)
+        assert spans['HTTP GET'].error.startswith('ConnectError')
+        assert spans['request'].error.startswith('ConnectError')
+        assert spans['connect'].error is not None
+        assert 'response' not in spans
+
+
+@pytest.mark.parametrize('command', [http, https])
+async def test_should_write_trace_file_at_exit(runner, respx_mock, tmp_path, monkeypatch, command):
+    monkeypatch.setenv('TRACEPARENT', TRACEPARENT)
+    route = respx_mock.get('https://example.com') % httpx.Response(status_code=200, text='hello')
+    path = tmp_path / 'traces.json'
+    result = await runner.invoke(command, ['--trace-file', str(path), 'get', 'https://example.com'])
+
+    assert result.exit_code == 0
+    spans = json.loads(path.read_text())['resourceSpans'][0]['scopeSpans'][0]['spans']
+    assert [span['name'] for span in spans] == ['httpcli get', 'HTTP GET', 'request', 'response']
+    assert {span['traceId'] for span in spans} == {'0af7651916cd43dd8448eb211c80319c'}
+    assert route.calls[0].request.headers['traceparent'] == f'00-{spans[1]["traceId"]}-{spans[1]["spanId"]}-01'
+    assert get_current_tracer() is None
+
+
+async def test_should_send_traces_to_otlp_endpoint(runner, respx_mock):
+    respx_mock.get('https://example.com') % httpx.Response(status_code=200, text='hello')
+    collector = respx_mock.post('http://localhost:4318/v1/traces') % httpx.Response(status_code=200)
+    arguments = ['--trace-endpoint', 'http://localhost:4318/v1/traces', 'get', 'https://example.com']
+    result = await runner.invoke(http, arguments)
+
+    assert result.exit_code == 0
+    request = collector.calls[0].request
+    assert request.headers['content-type'] == 'application/json'
+    assert 'resourceSpans' in json.loads(request.content)
+
+
+async def test_should_print_warning_when_traces_cannot_be_exported(runner, respx_mock):
+    respx_mock.get('https://example.com') % httpx.Response(status_code=200, text='hello')
+    respx_mock.post('http://localhost:4318/v1/traces') % httpx.Response(status_code=503)
+    arguments = ['--trace-endpoint', 'http://localhost:4318/v1/traces', 'get', 'https://example.com']
+    result = await runner.invoke(http, arguments)
+
+    assert result.exit_code == 0
+    assert 'unable to export traces to http://localhost:4318/v1/traces' in ' '.join(result.output.split())
@@ -0,0 +1,100 @@
+import httpx
+import pytest
+from hypercorn.config import Config
+from hypercorn.trio import serve
+
+from httpcli.configuration import Configuration
+from httpcli.models import PoolSettings, TransportSettings
+from httpcli.transport import (
+    PoolStatistics, build_client_arguments, build_pooled_client_arguments, get_transport_arguments
+)
+from tests.helpers import app
+
+
+class TestBuildPooledClientArguments:
+    """Tests function build_pooled_client_arguments"""
+
+    def test_should_return_transport_using_instrumented_backend(self):
+        statistics = PoolStatistics()
+        config = Configuration(pool=PoolSettings(max_connections=4), proxy='http://proxy.com')  # type: ignore
+        arguments = build_pooled_client_arguments(config, statistics)
+
+        assert set(arguments.keys()) == {'allow_redirects', 'transport', 'event_hooks'}
+        assert isinstance(arguments['transport'], httpx.AsyncHTTPTransport)
+        assert arguments['event_hooks'] == {'request': [statistics.on_request], 'response': [statistics.on_response]}
+
+    async def test_should_count_requests_and_connections(self, nursery):
+        await nursery.start(serve, app, Config())
+        statistics = PoolStatistics()
+        arguments = build_pooled_client_arguments(Configuration(), statistics)
+        arguments.pop('allow_redirects')
+
+        async with httpx.AsyncClient(**arguments) as client:
+            for name in ['a', 'b', 'c']:
+                response = await client.get(f'http://localhost:8000/files/{name}')
+                assert response.text == f'content of {name}'
+
+        assert statistics.requests == 3
+        assert statistics.connections == 1
+        assert statistics.protocols == {'HTTP/1.1': 3}
+        assert statistics.origin_protocols == {'http://localhost:8000': 'HTTP/1.1'}
+
+    async def test_should_connect_to_addresses_given_by_resolve_overrides(self, nursery):
+        await nursery.start(serve, app, Config())
+        statistics = PoolStatistics()
+        config = Configuration(resolve=['backend.test:8000:127.0.0.2,127.0.0.1'])
+        arguments = build_pooled_client_arguments(config, statistics)
+        arguments.pop('allow_redirects')
+
+        async with httpx.AsyncClient(**arguments) as client:
+            response = await client.get('http://backend.test:8000/files/a')
+
+        assert response.text == 'content of a'
+        assert statistics.connections == 1
+
+    async def test_should_connect_to_unix_socket_given_in_transport_settings(self, nursery, uds_config, unix_socket):
+        await nursery.start(serve, app, uds_config)
+        statistics = PoolStatistics()
+        config = Configuration(transport=TransportSettings(uds=unix_socket))
+        arguments = build_pooled_client_arguments(config, statistics)
+        arguments.pop('allow_redirects')
+
+        async with httpx.AsyncClient(**arguments) as client:
+            for name in ['a', 'b']:
+                response = await client.get(f'http://docker.test/files/{name}')
+                assert response.text == f'content of {name}'
+
+        assert statistics.connections == 1
+
+
+class TestBuildClientArguments:
+    """Tests function build_client_arguments"""
+
+    def test_should_return_transport_instead_of_transport_arguments(self):
+        config = Configuration(proxy='http://proxy.com', version='h2')  # type: ignore
+        arguments = build_client_arguments(config, {'verify': True, 'http1': False, 'http2': True, 'headers': []})
+
+        assert set(arguments.keys()) == {'transport', 'headers'}
+        assert isinstance(arguments['transport'], httpx.AsyncHTTPTransport)
+
+    async def test_should_raise_connect_error_when_host_cannot_be_resolved(self, mocker):
+        mocker.patch('anyio.getaddrinfo', side_effect=OSError('name or service not known'))
+        arguments = build_client_arguments(Configuration())
+        arguments.pop('allow_redirects')
+
+        async with httpx.AsyncClient(**arguments) as client:
+            with pytest.raises(httpx.ConnectError):
+                await client.get('http://unknown.test')
+
+
+class TestGetTransportArguments:
+    """Tests function get_transport_arguments"""
+
+    def test_should_return_default_transport_arguments(self):
+        assert get_transport_arguments(Configuration()) == {'uds': None, 'local_address': None, 'retries': 0}
+
+    def test_should_return_transport_arguments_of_configuration(self, tmp_path):
+        settings = TransportSettings(uds=tmp_path / 'app.sock', local_address='127.0.0.1', retries=2)
+        arguments = get_transport_arguments(Configuration(transport=settings))
+
+        assert arguments == {'uds': str(tmp_path / 'app.sock'), 'local_address': '127.0.0.1', 'retries': 2}